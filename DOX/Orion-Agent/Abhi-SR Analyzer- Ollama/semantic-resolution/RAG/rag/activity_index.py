@@ -0,0 +1,383 @@
+"""
+Compiled Activity Index
+Prebuilt lookup tables for ImprovedActivityFinder, persisted next to javaMapping.db
+
+Built once from the java_classes table and rebuilt only when javaMapping.db
+changes (size/mtime, confirmed by SHA-1). The artifact is a folder of .npy
+arrays opened with mmap, so a pipeline start no longer reads every class row:
+
+    manifest.json                   source signature + counts
+    strings.npy / strings_idx.npy   UTF-8 string table (names, packages, paths)
+    records.npy                     string ids per class: RECORD_FIELDS
+    activities.npy                  activity names in first-seen order
+    names_hash.npy / names_key.npy / names_record.npy
+                                    sorted 64-bit hashes of lowercase activity and
+                                    class names -> record (the old by_name dict)
+    keywords_hash.npy / keywords_key.npy / keywords_ptr.npy / keywords_postings.npy
+                                    CamelCase keyword -> activity ids (CSR postings)
+    activity_keywords.npy           distinct keyword count per activity
+
+Class names are identifiers, so SR text is matched in one tokenization pass:
+every CamelCase token is hashed and all of them are resolved with a single
+searchsorted over the name table.
+
+Usage:
+    index = ActivityIndex.load_or_build(Path("vector store/javaMapping.db"))
+    index.lookup("ValidateAddress")           # {'class_name': 'ValidateAddressImpl', ...}
+    index.match_names(sr_text)                # known names mentioned verbatim
+    index.keyword_matches({'validate', 'address'})
+
+    python activity_index.py ["vector store/javaMapping.db"] [--rebuild]
+"""
+
+import os
+import re
+import json
+import shutil
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+RECORD_FIELDS = ('class_name', 'activity_name', 'package', 'file_path', 'class_type', 'fqn')
+
+CAMEL_WORD = re.compile(r'[A-Z][a-z]+')
+CAMEL_IDENTIFIER = re.compile(r'\b([A-Z][a-z]+(?:[A-Z][a-z]+)+)\b')
+
+
+def activity_name_for(class_name: str) -> str:
+    """Activity name of a class (Impl / Service suffix removed)"""
+    if class_name.endswith('Impl'):
+        return class_name[:-4]
+    if class_name.endswith('Service'):
+        return class_name[:-7] if len(class_name) > 7 else class_name
+    return class_name
+
+
+def extract_keywords(name: str) -> List[str]:
+    """
+    Extract keywords from CamelCase name.
+
+    Examples:
+        "ValidateAddress" -> ["validate", "address"]
+        "CreateOrderService" -> ["create", "order", "service"]
+    """
+    return [w.lower() for w in CAMEL_WORD.findall(name) if len(w) > 2]
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _hash_many(keys: List[str]) -> np.ndarray:
+    return np.fromiter((_hash(k) for k in keys), dtype=np.uint64, count=len(keys))
+
+
+def _file_sha1(path: Path) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class ActivityIndex:
+    """
+    Read-only activity lookup tables (memory-mapped when loaded from disk).
+
+    Use load_or_build(); build() alone gives an in-memory index.
+    """
+
+    ARRAYS = ('strings', 'strings_idx', 'records', 'activities',
+              'names_hash', 'names_key', 'names_record',
+              'keywords_hash', 'keywords_key', 'keywords_ptr', 'keywords_postings',
+              'activity_keywords')
+
+    def __init__(self, arrays: Dict[str, np.ndarray], origin: str = 'memory'):
+        self.arrays = arrays
+        self.origin = origin  # 'loaded', 'built' or 'memory'
+        self._activities = None
+
+    def __len__(self) -> int:
+        return len(self.arrays['activities'])
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def string(self, sid: int) -> str:
+        offsets = self.arrays['strings_idx']
+        return bytes(self.arrays['strings'][offsets[sid]:offsets[sid + 1]]).decode('utf-8')
+
+    def record(self, rid: int) -> Dict[str, str]:
+        return {field: self.string(sid) for field, sid in zip(RECORD_FIELDS, self.arrays['records'][rid])}
+
+    @property
+    def activities(self) -> List[str]:
+        """All activity names, first-seen order"""
+        if self._activities is None:
+            self._activities = [self.string(sid) for sid in self.arrays['activities']]
+        return self._activities
+
+    def _resolve(self, table: str, keys: List[str]) -> np.ndarray:
+        """Position of each key in a hash table ('names' / 'keywords'), -1 if absent"""
+        hashes, key_ids = self.arrays[f'{table}_hash'], self.arrays[f'{table}_key']
+        if not keys or not len(hashes):
+            return np.full(len(keys), -1, dtype=np.int64)
+        query = _hash_many(keys)
+        positions = np.searchsorted(hashes, query)
+        positions[positions >= len(hashes)] = 0
+        hits = hashes[positions] == query
+        # Confirm against the stored key (64-bit hash collisions)
+        return np.array([p if hit and self.string(key_ids[p]) == k else -1
+                         for p, hit, k in zip(positions, hits, keys)], dtype=np.int64)
+
+    def find_records(self, names: List[str]) -> List[int]:
+        """Record id per name (case-insensitive activity or class name), -1 if unknown"""
+        positions = self._resolve('names', [n.lower() for n in names])
+        records = self.arrays['names_record']
+        return [int(records[p]) if p >= 0 else -1 for p in positions]
+
+    def __contains__(self, name: str) -> bool:
+        return self.find_records([name])[0] >= 0
+
+    def lookup(self, name: str) -> Dict[str, str]:
+        """Class details for an activity or class name ({} if unknown)"""
+        rid = self.find_records([name])[0]
+        return self.record(rid) if rid >= 0 else {}
+
+    def match_names(self, text: str) -> List[str]:
+        """Activity names whose class or activity name appears verbatim (CamelCase token) in text"""
+        tokens = list(dict.fromkeys(CAMEL_IDENTIFIER.findall(text)))
+        found = []
+        for token, rid in zip(tokens, self.find_records(tokens)):
+            if rid < 0:
+                continue
+            record = self.record(rid)
+            if token in (record['class_name'], record['activity_name']):
+                found.append(record['activity_name'])
+        return list(dict.fromkeys(found))
+
+    def keyword_matches(self, words: Iterable[str], min_ratio: float = 0.5) -> List[Tuple[str, float]]:
+        """
+        Activities sharing keywords with `words`, via the keyword postings.
+
+        Returns:
+            (activity_name, matched keywords / activity keywords) for every
+            activity at or above min_ratio, in first-seen activity order
+        """
+        positions = [p for p in self._resolve('keywords', list(words)) if p >= 0]
+        if not positions:
+            return []
+        ptr, postings = self.arrays['keywords_ptr'], self.arrays['keywords_postings']
+        ids = np.concatenate([postings[ptr[p]:ptr[p + 1]] for p in positions])
+        activity_ids, overlap = np.unique(ids, return_counts=True)
+        ratios = overlap / self.arrays['activity_keywords'][activity_ids]
+        keep = ratios >= min_ratio
+        names = self.activities
+        return [(names[a], float(r)) for a, r in zip(activity_ids[keep].tolist(), ratios[keep].tolist())]
+
+    # ------------------------------------------------------------------
+    # Build / persist
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, java_db_path: Path) -> 'ActivityIndex':
+        """Compile the tables from javaMapping.db (java_classes), streaming the rows"""
+        strings, string_ids = [], {}
+
+        def sid(value: str) -> int:
+            if value not in string_ids:
+                string_ids[value] = len(strings)
+                strings.append(value)
+            return string_ids[value]
+
+        records, by_name, activities, postings = [], {}, {}, {}
+        conn = sqlite3.connect(str(java_db_path))
+        try:
+            cursor = conn.execute("""
+                SELECT class_name, package, full_qualified_name, file_path, class_type
+                FROM java_classes
+            """)
+            for class_name, package, fqn, file_path, class_type in cursor:
+                if not class_name:
+                    continue
+                activity_name = activity_name_for(class_name)
+                rid = len(records)
+                records.append([sid(class_name), sid(activity_name), sid(package or ''),
+                                sid(file_path or ''), sid(class_type or ''), sid(fqn or '')])
+                # Later rows win, as with the old by_name dict
+                by_name[activity_name.lower()] = rid
+                by_name[class_name.lower()] = rid
+                if activity_name not in activities:
+                    aid = activities[activity_name] = len(activities)
+                    for keyword in set(extract_keywords(activity_name)):
+                        postings.setdefault(keyword, []).append(aid)
+        finally:
+            conn.close()
+
+        def hash_table(keys: List[str]):
+            hashes = _hash_many(keys)
+            order = np.argsort(hashes, kind='stable')
+            key_ids = np.array([sid(k) for k in keys], dtype=np.int32)
+            return hashes[order], key_ids[order], order
+
+        names = list(by_name)
+        names_hash, names_key, order = hash_table(names)
+        names_record = np.array([by_name[names[i]] for i in order], dtype=np.int32)
+
+        keywords = list(postings)
+        keywords_hash, keywords_key, order = hash_table(keywords)
+        lists = [postings[keywords[i]] for i in order]
+        keywords_ptr = np.zeros(len(lists) + 1, dtype=np.int64)
+        keywords_ptr[1:] = np.cumsum([len(l) for l in lists])
+        keywords_postings = np.array([a for l in lists for a in l], dtype=np.int32)
+        activity_keywords = np.array([len(set(extract_keywords(a))) for a in activities], dtype=np.int32)
+
+        encoded = [s.encode('utf-8') for s in strings]
+        strings_idx = np.zeros(len(encoded) + 1, dtype=np.int64)
+        strings_idx[1:] = np.cumsum([len(b) for b in encoded])
+
+        return cls({
+            'strings': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            'strings_idx': strings_idx,
+            'records': np.array(records, dtype=np.int32).reshape(-1, len(RECORD_FIELDS)),
+            'activities': np.array([string_ids[a] for a in activities], dtype=np.int32),
+            'names_hash': names_hash, 'names_key': names_key, 'names_record': names_record,
+            'keywords_hash': keywords_hash, 'keywords_key': keywords_key,
+            'keywords_ptr': keywords_ptr, 'keywords_postings': keywords_postings,
+            'activity_keywords': activity_keywords
+        }, origin='built')
+
+    @classmethod
+    def empty(cls) -> 'ActivityIndex':
+        arrays = {name: np.zeros(0, dtype=np.int32) for name in cls.ARRAYS}
+        arrays.update(strings=np.zeros(0, dtype=np.uint8), strings_idx=np.zeros(1, dtype=np.int64),
+                      records=np.zeros((0, len(RECORD_FIELDS)), dtype=np.int32),
+                      names_hash=np.zeros(0, dtype=np.uint64), keywords_hash=np.zeros(0, dtype=np.uint64),
+                      keywords_ptr=np.zeros(1, dtype=np.int64))
+        return cls(arrays)
+
+    def save(self, directory: Path, source: Dict):
+        """Write the arrays + manifest next to the target, then swap it in"""
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in self.ARRAYS:
+            np.save(tmp / f'{name}.npy', self.arrays[name])
+        with open(tmp / 'manifest.json', 'w') as f:
+            json.dump({
+                'format_version': INDEX_FORMAT_VERSION,
+                'source': source,
+                'activities': len(self),
+                'records': len(self.arrays['records']),
+                'names': len(self.arrays['names_hash']),
+                'keywords': len(self.arrays['keywords_hash']),
+                'built_at': datetime.now().isoformat()
+            }, f, indent=2)
+
+        if directory.exists():
+            old = directory.with_name(directory.name + '.old')
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+            os.replace(tmp, directory)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, directory)
+
+    @classmethod
+    def load(cls, directory: Path) -> 'ActivityIndex':
+        arrays = {}
+        for name in cls.ARRAYS:
+            path = Path(directory) / f'{name}.npy'
+            try:
+                arrays[name] = np.load(path, mmap_mode='r')
+            except ValueError:
+                arrays[name] = np.load(path)  # Zero-length arrays cannot be mapped
+        return cls(arrays, origin='loaded')
+
+    @staticmethod
+    def default_path(java_db_path: Path) -> Path:
+        """javaMapping.db -> javaMapping.activity_index/"""
+        return Path(java_db_path).with_suffix('.activity_index')
+
+    @classmethod
+    def load_or_build(cls, java_db_path: Path, index_path: Path = None,
+                      rebuild: bool = False) -> 'ActivityIndex':
+        """
+        Load the compiled index, rebuilding it only if javaMapping.db changed.
+
+        Args:
+            java_db_path: Path to javaMapping.db
+            index_path: Artifact folder (default: next to the database)
+            rebuild: Ignore an up-to-date artifact
+
+        Returns:
+            ActivityIndex (empty if the database is missing; in-memory if the
+            artifact cannot be written)
+        """
+        java_db_path = Path(java_db_path)
+        if not java_db_path.exists():
+            logger.warning(f"javaMapping.db not found at {java_db_path}")
+            return cls.empty()
+
+        index_path = Path(index_path) if index_path else cls.default_path(java_db_path)
+        manifest_path = index_path / 'manifest.json'
+        stat = java_db_path.stat()
+        source = {'path': str(java_db_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        manifest = None
+        if manifest_path.exists() and not rebuild:
+            try:
+                with open(manifest_path, 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+        if manifest and manifest.get('format_version') == INDEX_FORMAT_VERSION:
+            known = manifest.get('source', {})
+            if known.get('size') == source['size'] and known.get('mtime') == source['mtime']:
+                return cls.load(index_path)
+            source['sha1'] = _file_sha1(java_db_path)
+            if known.get('sha1') == source['sha1']:
+                # Touched, same content: refresh the signature only
+                manifest['source'] = source
+                with open(manifest_path, 'w') as f:
+                    json.dump(manifest, f, indent=2)
+                return cls.load(index_path)
+
+        source.setdefault('sha1', _file_sha1(java_db_path))
+        try:
+            index = cls.build(java_db_path)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to build activity index: {e}")
+            return cls.empty()
+        try:
+            index.save(index_path, source)
+        except OSError as e:
+            logger.warning(f"Activity index not persisted ({e}), using in-memory index")
+            return index
+        loaded = cls.load(index_path)
+        loaded.origin = 'built'
+        return loaded
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    db_path = Path(args[0]) if args else Path(__file__).parent.parent.parent / "vector store" / "javaMapping.db"
+
+    start = time.perf_counter()
+    index = ActivityIndex.load_or_build(db_path, rebuild='--rebuild' in sys.argv)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"[ACTIVITY INDEX] {len(index)} activities, {len(index.arrays['keywords_hash'])} keywords "
+          f"({index.origin} in {elapsed:.1f} ms) -> {ActivityIndex.default_path(db_path)}")
@@ -0,0 +1,446 @@
+"""
+ANN Index
+Pluggable nearest-neighbour index for the memory-mapped vector stores (mmap_vector_store.py)
+
+Backends (all inner product over L2-normalized vectors, i.e. cosine similarity):
+
+    exact   numpy block-wise dot product + argpartition (always available)
+    hnsw    hnswlib HNSW graph          - best recall/latency, keeps a float32 copy in RAM
+    ivfpq   FAISS IVF-PQ (faiss-cpu)    - ~m bytes per vector, candidates re-scored exactly
+
+Recall vs. latency is tuned at query time: ef_search for hnsw, nprobe for ivfpq
+(set_search_params or the ANN_* settings below).
+
+An index is saved as a folder:
+
+    <dir>/
+        ann.json          backend, dim, count, build + search params
+        hnsw.bin | ivfpq.faiss
+
+Usage:
+    from ann_index import build_index, load_index
+
+    index = build_index(vectors, backend='hnsw')       # vectors: (count, dim) array or memmap
+    index.save("vector store/clean_history_data.db.mmap/ann")
+
+    index = load_index("vector store/clean_history_data.db.mmap/ann")
+    index.set_search_params(ef_search=128)
+    ids, scores = index.search(query_vectors, k=10)    # (n, k) arrays, best first, -1 padded
+
+Settings (environment):
+    ANN_BACKEND                auto | hnsw | ivfpq | exact (auto: hnsw, else ivfpq, else exact)
+    ANN_HNSW_M                 default 16
+    ANN_HNSW_EF_CONSTRUCTION   default 200
+    ANN_HNSW_EF_SEARCH         default 128
+    ANN_IVF_NPROBE             default 16
+    ANN_REFINE                 default 25 - ivfpq fetches k * REFINE candidates to re-score
+    ANN_MIN_ROWS               default 20000 - smaller stores are searched exactly
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ANN_BACKEND = os.environ.get('ANN_BACKEND', 'auto')
+HNSW_M = int(os.environ.get('ANN_HNSW_M', '16'))
+HNSW_EF_CONSTRUCTION = int(os.environ.get('ANN_HNSW_EF_CONSTRUCTION', '200'))
+HNSW_EF_SEARCH = int(os.environ.get('ANN_HNSW_EF_SEARCH', '128'))
+IVF_NPROBE = int(os.environ.get('ANN_IVF_NPROBE', '16'))
+REFINE = int(os.environ.get('ANN_REFINE', '25'))
+MIN_ROWS = int(os.environ.get('ANN_MIN_ROWS', '20000'))
+
+# Rows per block for exact search and for index builds (bounds the float32 working set)
+BLOCK_ROWS = 65536
+
+MANIFEST = "ann.json"
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """float32 copy with unit-length rows (zero rows stay zero); 1-D input becomes one row"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def exact_search(vectors, queries, k: int, block_rows: int = BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k by inner product.
+
+    Args:
+        vectors: (count, dim) normalized rows (ndarray or memmap, any float dtype)
+        queries: (n, dim) or (dim,) query vectors (normalized here)
+        k: Neighbours per query
+
+    Returns:
+        (ids, scores), both (n, min(k, count)), best first
+    """
+    queries = normalize_rows(queries)
+    count = len(vectors)
+    k = min(k, count)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    if k <= 0:
+        return best_ids, best_scores
+
+    for start in range(0, count, block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        scores = queries @ block.T
+        if scores.shape[1] > k:
+            part = np.argpartition(scores, -k, axis=1)[:, -k:]
+        else:
+            part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        best_ids = np.concatenate([best_ids, part + start], axis=1)
+        best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+            best_ids = np.take_along_axis(best_ids, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    return np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class AnnIndex(ABC):
+    """
+    Base class: build once, save/load as a folder, search many.
+
+    Backends implement build, _search, _save_data and _load_data.
+
+    Attributes:
+        dim / count: Vector dimension and number of indexed rows
+        params: Build + search parameters (saved in ann.json)
+        refine: Candidates fetched per result when re-scoring against exact vectors
+    """
+
+    backend = None
+    data_file = None
+    refine = 1
+
+    def __init__(self, dim: int, **params):
+        self.dim = int(dim)
+        self.count = 0
+        self.params = params
+        self.build_seconds = None
+
+    @abstractmethod
+    def build(self, vectors) -> 'AnnIndex':
+        """Index (count, dim) vectors; returns self"""
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, scores) for normalized queries, best first"""
+
+    def set_search_params(self, **params):
+        """Update query-time parameters (ef_search, nprobe, refine)"""
+        self.params.update({k: v for k, v in params.items() if v is not None})
+        self._apply_search_params()
+
+    def _apply_search_params(self):
+        pass
+
+    def search(self, queries, k: int, vectors=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k.
+
+        Args:
+            queries: (n, dim) or (dim,) query vectors (normalized here)
+            k: Neighbours per query
+            vectors: The indexed (normalized) vectors; lets lossy backends re-score
+                     their candidates exactly
+
+        Returns:
+            (ids, scores), both (n, min(k, count)), best first; missing hits are -1 / -inf
+        """
+        queries = normalize_rows(queries)
+        k = min(k, self.count)
+        if k <= 0:
+            return (np.empty((len(queries), 0), dtype=np.int64),
+                    np.empty((len(queries), 0), dtype=np.float32))
+        refine = self.refine if vectors is not None else 1
+        ids, scores = self._search(queries, min(self.count, k * refine))
+        if refine > 1:
+            ids, scores = self._rescore(vectors, queries, ids, k)
+        return ids[:, :k], scores[:, :k]
+
+    @staticmethod
+    def _rescore(vectors, queries, ids, k):
+        """Exact scores for candidate ids, re-sorted (sorted ids keep memmap reads sequential)"""
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (query, candidates) in enumerate(zip(queries, ids)):
+            candidates = np.unique(candidates[candidates >= 0])
+            if len(candidates) == 0:
+                continue
+            scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+            top = np.argsort(-scores, kind='stable')[:k]
+            out_ids[row, :len(top)] = candidates[top]
+            out_scores[row, :len(top)] = scores[top]
+        return out_ids, out_scores
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, directory: Path) -> Path:
+        """Write the index folder atomically (built next to the target, then renamed)"""
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        self._save_data(tmp / self.data_file)
+        with open(tmp / MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump({
+                'backend': self.backend,
+                'dim': self.dim,
+                'count': self.count,
+                'params': self.params,
+                'build_seconds': self.build_seconds,
+                'built_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, f, indent=2)
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+        return directory
+
+    @abstractmethod
+    def _save_data(self, path: Path):
+        """Write the backend's index file"""
+
+    @abstractmethod
+    def _load_data(self, path: Path):
+        """Read the backend's index file written by _save_data"""
+
+    def get_stats(self) -> Dict:
+        return {'backend': self.backend, 'dim': self.dim, 'count': self.count,
+                'params': dict(self.params), 'build_seconds': self.build_seconds}
+
+
+class ExactIndex(AnnIndex):
+    """Brute force over the vectors it was built from (reference for benchmarks, never saved)"""
+
+    backend = 'exact'
+
+    def build(self, vectors) -> 'ExactIndex':
+        self._vectors = vectors
+        self.count = len(vectors)
+        self.build_seconds = 0.0
+        return self
+
+    def _search(self, queries, k):
+        return exact_search(self._vectors, queries, k)
+
+    def save(self, directory: Path) -> Path:
+        """No-op: the exact index is the vectors themselves, so nothing is written"""
+        return Path(directory)
+
+    def _save_data(self, path: Path):
+        pass
+
+    def _load_data(self, path: Path):
+        pass
+
+
+class HnswIndex(AnnIndex):
+    """hnswlib HNSW graph (space='ip'). Scores are exact; ef_search trades recall for latency."""
+
+    backend = 'hnsw'
+    data_file = 'hnsw.bin'
+
+    def __init__(self, dim: int, m: int = None, ef_construction: int = None, ef_search: int = None, **params):
+        if not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib is not installed (pip install hnswlib)")
+        super().__init__(dim, m=m or HNSW_M, ef_construction=ef_construction or HNSW_EF_CONSTRUCTION,
+                         ef_search=ef_search or HNSW_EF_SEARCH, **params)
+        self._index = None
+        self._ef_lock = threading.Lock()
+
+    def build(self, vectors) -> 'HnswIndex':
+        start = time.perf_counter()
+        self.count = len(vectors)
+        self._index = hnswlib.Index(space='ip', dim=self.dim)
+        self._index.init_index(max_elements=max(self.count, 1), M=self.params['m'],
+                               ef_construction=self.params['ef_construction'], random_seed=100)
+        for offset in range(0, self.count, BLOCK_ROWS):
+            block = normalize_rows(vectors[offset:offset + BLOCK_ROWS])
+            self._index.add_items(block, np.arange(offset, offset + len(block)))
+        self._apply_search_params()
+        self.build_seconds = round(time.perf_counter() - start, 2)
+        return self
+
+    def _apply_search_params(self):
+        if self._index is not None:
+            self._index.set_ef(self.params['ef_search'])
+
+    def _search(self, queries, k):
+        if k > self.params['ef_search']:
+            # hnswlib needs ef >= k; raise it for this query only
+            with self._ef_lock:
+                self._index.set_ef(k)
+                try:
+                    labels, distances = self._index.knn_query(queries, k=k, num_threads=1)
+                finally:
+                    self._index.set_ef(self.params['ef_search'])
+        else:
+            labels, distances = self._index.knn_query(queries, k=k, num_threads=1)
+        # hnswlib 'ip' distance is 1 - <a, b>
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+    def _save_data(self, path: Path):
+        self._index.save_index(str(path))
+
+    def _load_data(self, path: Path):
+        self._index = hnswlib.Index(space='ip', dim=self.dim)
+        self._index.load_index(str(path), max_elements=max(self.count, 1))
+        self._apply_search_params()
+
+
+class IvfPqIndex(AnnIndex):
+    """
+    FAISS IVF-PQ (inner product). Compressed codes give approximate scores, so
+    search(..., vectors=...) fetches k * refine candidates and re-scores them.
+    """
+
+    backend = 'ivfpq'
+    data_file = 'ivfpq.faiss'
+
+    def __init__(self, dim: int, nlist: int = None, m: int = None, nbits: int = 8,
+                 nprobe: int = None, refine: int = None, **params):
+        if not FAISS_AVAILABLE:
+            raise ImportError("faiss is not installed (pip install faiss-cpu)")
+        super().__init__(dim, nlist=nlist, m=m or self._default_m(dim), nbits=nbits,
+                         nprobe=nprobe or IVF_NPROBE, refine=refine or REFINE, **params)
+        self._index = None
+
+    @property
+    def refine(self) -> int:
+        return max(1, int(self.params.get('refine', 1)))
+
+    @staticmethod
+    def _default_m(dim: int) -> int:
+        """Largest sub-quantizer count <= dim / 8 that divides dim (48 for 384-dim)"""
+        for m in range(max(dim // 8, 1), 0, -1):
+            if dim % m == 0:
+                return m
+        return 1
+
+    def build(self, vectors) -> 'IvfPqIndex':
+        start = time.perf_counter()
+        self.count = len(vectors)
+        # ~39 training points per centroid is the FAISS minimum for both levels
+        nlist = self.params['nlist'] or max(1, min(int(4 * math.sqrt(self.count)), self.count // 39))
+        nbits = min(self.params['nbits'], max(1, int(math.log2(max(self.count // 39, 2)))))
+        self.params.update(nlist=nlist, nbits=nbits)
+
+        quantizer = faiss.IndexFlatIP(self.dim)
+        index = faiss.IndexIVFPQ(quantizer, self.dim, nlist, self.params['m'], nbits,
+                                 faiss.METRIC_INNER_PRODUCT)
+        sample_size = min(self.count, max(nlist * 64, (1 << nbits) * 64, 100000))
+        sample_ids = np.sort(np.random.default_rng(0).choice(self.count, sample_size, replace=False))
+        index.train(normalize_rows(vectors[sample_ids]))
+        for offset in range(0, self.count, BLOCK_ROWS):
+            index.add(normalize_rows(vectors[offset:offset + BLOCK_ROWS]))
+        self._index = index
+        self._apply_search_params()
+        self.build_seconds = round(time.perf_counter() - start, 2)
+        return self
+
+    def _apply_search_params(self):
+        if self._index is not None:
+            self._index.nprobe = int(self.params['nprobe'])
+
+    def _search(self, queries, k):
+        scores, ids = self._index.search(queries, k)
+        scores[ids < 0] = -np.inf
+        return ids.astype(np.int64), scores.astype(np.float32)
+
+    def _save_data(self, path: Path):
+        faiss.write_index(self._index, str(path))
+
+    def _load_data(self, path: Path):
+        self._index = faiss.read_index(str(path))
+        self._apply_search_params()
+
+
+BACKENDS = {'exact': ExactIndex, 'hnsw': HnswIndex, 'ivfpq': IvfPqIndex}
+
+
+def available_backends() -> Dict[str, bool]:
+    return {'exact': True, 'hnsw': HNSWLIB_AVAILABLE, 'ivfpq': FAISS_AVAILABLE}
+
+
+def resolve_backend(backend: str = None) -> str:
+    """'auto' -> best installed backend; raises ValueError for unknown names"""
+    backend = (backend or ANN_BACKEND).lower()
+    if backend == 'auto':
+        return 'hnsw' if HNSWLIB_AVAILABLE else 'ivfpq' if FAISS_AVAILABLE else 'exact'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ANN backend '{backend}' (expected one of {', '.join(BACKENDS)} or auto)")
+    return backend
+
+
+def build_index(vectors, backend: str = None, **params) -> AnnIndex:
+    """
+    Build an index over (count, dim) vectors.
+
+    Args:
+        vectors: ndarray or memmap; read in BLOCK_ROWS chunks
+        backend: exact | hnsw | ivfpq | auto (default ANN_BACKEND)
+        **params: Backend parameters (m, ef_construction, ef_search, nlist, nprobe, refine ...)
+    """
+    backend = resolve_backend(backend)
+    index = BACKENDS[backend](int(vectors.shape[1]), **params)
+    print(f"[ANN] Building {backend} index over {len(vectors):,} x {vectors.shape[1]} vectors...")
+    index.build(vectors)
+    print(f"[ANN] Built in {index.build_seconds:.1f}s")
+    return index
+
+
+def load_index(directory: Path) -> Optional[AnnIndex]:
+    """
+    Load a saved index folder.
+
+    Returns None if there is no index there or its backend library is not installed.
+    """
+    directory = Path(directory)
+    try:
+        with open(directory / MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    backend = manifest.get('backend')
+    if not available_backends().get(backend):
+        logger.warning(f"[ANN] {directory}: backend '{backend}' not installed, using exact search")
+        return None
+    index = BACKENDS[backend](manifest['dim'], **manifest.get('params', {}))
+    index.count = int(manifest['count'])
+    index.build_seconds = manifest.get('build_seconds')
+    index._load_data(directory / index.data_file)
+    return index
@@ -12,18 +12,44 @@ Methods:
 Features:
 - Confidence scoring (High/Medium/Low)
 - Multiple evidence aggregation
-- Pre-built activity index for fast lookup
+- Pre-built activity index for fast lookup (activity_index.py, compiled once
+  per javaMapping.db version and memory-mapped)
 """
 
 import re
-import sqlite3
 import pickle
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
 
+from activity_index import ActivityIndex, CAMEL_IDENTIFIER, extract_keywords
+
 logger = logging.getLogger(__name__)
 
+# Regex patterns for activity names, compiled once
+ACTIVITY_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    # Pattern 1: Explicit "Activity: Name" or "activity name: Name"
+    r'[Aa]ctivity[\s:]+([A-Z][a-zA-Z]+)',
+    
+    # Pattern 2: CamelCase with action verbs at start
+    r'\b((?:Validate|Create|Update|Delete|Process|Check|Get|Set|Add|Remove|Find|Search|Load|Save|Send|Receive|Submit|Cancel|Approve|Reject)[A-Z][a-zA-Z]+)\b',
+    
+    # Pattern 3: CamelCase with action verbs at end
+    r'\b([A-Z][a-z]+(?:Validate|Create|Update|Delete|Process|Check)[A-Z]?[a-zA-Z]*)\b',
+    
+    # Pattern 4: CamelCase with domain keywords
+    r'\b([A-Z][a-zA-Z]+(?:Address|Order|Customer|Account|Service|Payment|Product|Inventory|Shipment|Billing|Invoice|Quote|Contract)(?:Impl)?)\b',
+    
+    # Pattern 5: "SomethingImpl" pattern
+    r'\b([A-Z][a-zA-Z]{3,}Impl)\b',
+    
+    # Pattern 6: Activity mentioned in error context
+    r'(?:error in|failed at|exception in|at)\s+([A-Z][a-zA-Z]+(?:Impl|Service|Activity))',
+    
+    # Pattern 7: Quoted activity names
+    r'["\']([A-Z][a-zA-Z]+(?:Impl|Service|Activity)?)["\']',
+)]
+
 
 class ImprovedActivityFinder:
     """
@@ -44,7 +70,8 @@ class ImprovedActivityFinder:
         # }
     """
     
-    def __init__(self, vectorstore_handler, java_db_path: Path, class_index_path: Path = None):
+    def __init__(self, vectorstore_handler, java_db_path: Path, class_index_path: Path = None,
+                 activity_index_path: Path = None):
         """
         Initialize with vectorstore handler and database paths.
         
@@ -52,105 +79,18 @@ class ImprovedActivityFinder:
             vectorstore_handler: VectorstoreHandler instance for semantic search
             java_db_path: Path to javaMapping.db
             class_index_path: Path to comcast_java_classes.pkl (optional)
+            activity_index_path: Compiled activity index folder
+                                 (default: javaMapping.activity_index next to the db)
         """
         self.vectorstore = vectorstore_handler
-        self.java_db_path = java_db_path
+        self.java_db_path = Path(java_db_path)
         self.class_index_path = class_index_path or Path("vector store/comcast_java_classes.pkl")
         
-        # Pre-build indices at startup
-        print("[ACTIVITY FINDER] Building activity index...")
-        self.activity_index = self._build_activity_index()
+        # Compiled once per javaMapping.db version, memory-mapped afterwards
+        print("[ACTIVITY FINDER] Loading activity index...")
+        self.activity_index = ActivityIndex.load_or_build(self.java_db_path, activity_index_path)
         self.class_index = self._load_class_index()
-        print(f"[ACTIVITY FINDER] Index built: {len(self.activity_index.get('all_activities', []))} activities")
-    
-    def _build_activity_index(self) -> Dict:
-        """
-        Build searchable activity index from javaMapping.db.
-        Run ONCE at startup, not per SR.
-        
-        Returns:
-            {
-                'by_name': {"validateaddress": {class_name, activity_name, package, file_path}},
-                'by_keyword': {"address": ["ValidateAddress", "UpdateAddress", ...]},
-                'all_activities': ["ValidateAddress", "CreateOrder", ...],
-                'name_to_impl': {"ValidateAddress": "ValidateAddressImpl"}
-            }
-        """
-        activity_index = {
-            'by_name': {},
-            'by_keyword': {},
-            'all_activities': [],
-            'name_to_impl': {}
-        }
-        
-        try:
-            if not self.java_db_path.exists():
-                logger.warning(f"javaMapping.db not found at {self.java_db_path}")
-                return activity_index
-            
-            conn = sqlite3.connect(self.java_db_path)
-            cursor = conn.cursor()
-            
-            # Get all classes
-            cursor.execute("""
-                SELECT class_name, package, full_qualified_name, file_path, class_type, annotations 
-                FROM java_classes
-            """)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                class_name, package, fqn, file_path, class_type, annotations = row
-                
-                if not class_name:
-                    continue
-                
-                # Extract activity name (remove Impl suffix)
-                if class_name.endswith('Impl'):
-                    activity_name = class_name[:-4]
-                elif class_name.endswith('Service'):
-                    activity_name = class_name[:-7] if len(class_name) > 7 else class_name
-                else:
-                    activity_name = class_name
-                
-                # Store in by_name index (lowercase key for case-insensitive lookup)
-                activity_index['by_name'][activity_name.lower()] = {
-                    'class_name': class_name,
-                    'activity_name': activity_name,
-                    'package': package or '',
-                    'file_path': file_path or '',
-                    'class_type': class_type or '',
-                    'fqn': fqn or ''
-                }
-                
-                # Also store with class name as key
-                activity_index['by_name'][class_name.lower()] = {
-                    'class_name': class_name,
-                    'activity_name': activity_name,
-                    'package': package or '',
-                    'file_path': file_path or '',
-                    'class_type': class_type or '',
-                    'fqn': fqn or ''
-                }
-                
-                activity_index['name_to_impl'][activity_name] = class_name
-                
-                if activity_name not in activity_index['all_activities']:
-                    activity_index['all_activities'].append(activity_name)
-                
-                # Build keyword index (split CamelCase)
-                keywords = self._extract_keywords(activity_name)
-                for keyword in keywords:
-                    if keyword not in activity_index['by_keyword']:
-                        activity_index['by_keyword'][keyword] = []
-                    if activity_name not in activity_index['by_keyword'][keyword]:
-                        activity_index['by_keyword'][keyword].append(activity_name)
-            
-            conn.close()
-            
-        except Exception as e:
-            logger.error(f"Failed to build activity index: {e}")
-        
-        return activity_index
+        print(f"[ACTIVITY FINDER] Index {self.activity_index.origin}: {len(self.activity_index)} activities")
     
     def _extract_keywords(self, name: str) -> List[str]:
         """
@@ -160,8 +100,7 @@ class ImprovedActivityFinder:
             "ValidateAddress" -> ["validate", "address"]
             "CreateOrderService" -> ["create", "order", "service"]
         """
-        words = re.findall(r'[A-Z][a-z]+', name)
-        return [w.lower() for w in words if len(w) > 2]
+        return extract_keywords(name)
     
     def _load_class_index(self) -> Dict:
         """Load existing class index from comcast_java_classes.pkl"""
@@ -277,7 +216,7 @@ class ImprovedActivityFinder:
             best_name, best_info = ranked[0]
             
             # Get implementation details from index
-            impl_info = self.activity_index['by_name'].get(best_name.lower(), {})
+            impl_info = self.activity_index.lookup(best_name)
             
             result['activity_name'] = best_name
             result['methods_used'] = ', '.join(best_info['methods'])
@@ -299,34 +238,14 @@ class ImprovedActivityFinder:
     def _find_by_regex(self, text: str) -> List[str]:
         """
         Find activities using improved regex patterns.
-        """
-        matches = []
         
-        patterns = [
-            # Pattern 1: Explicit "Activity: Name" or "activity name: Name"
-            r'[Aa]ctivity[\s:]+([A-Z][a-zA-Z]+)',
-            
-            # Pattern 2: CamelCase with action verbs at start
-            r'\b((?:Validate|Create|Update|Delete|Process|Check|Get|Set|Add|Remove|Find|Search|Load|Save|Send|Receive|Submit|Cancel|Approve|Reject)[A-Z][a-zA-Z]+)\b',
-            
-            # Pattern 3: CamelCase with action verbs at end
-            r'\b([A-Z][a-z]+(?:Validate|Create|Update|Delete|Process|Check)[A-Z]?[a-zA-Z]*)\b',
-            
-            # Pattern 4: CamelCase with domain keywords
-            r'\b([A-Z][a-zA-Z]+(?:Address|Order|Customer|Account|Service|Payment|Product|Inventory|Shipment|Billing|Invoice|Quote|Contract)(?:Impl)?)\b',
-            
-            # Pattern 5: "SomethingImpl" pattern
-            r'\b([A-Z][a-zA-Z]{3,}Impl)\b',
-            
-            # Pattern 6: Activity mentioned in error context
-            r'(?:error in|failed at|exception in|at)\s+([A-Z][a-zA-Z]+(?:Impl|Service|Activity))',
-            
-            # Pattern 7: Quoted activity names
-            r'["\']([A-Z][a-zA-Z]+(?:Impl|Service|Activity)?)["\']',
-        ]
+        Known class/activity names are matched in one pass over the text's
+        CamelCase tokens; the patterns add names not (yet) in javaMapping.db.
+        """
+        matches = self.activity_index.match_names(text)
         
-        for pattern in patterns:
-            found = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in ACTIVITY_PATTERNS:
+            found = pattern.findall(text)
             for match in found:
                 # Normalize: remove "Impl" suffix for activity name
                 if isinstance(match, tuple):
@@ -334,9 +253,9 @@ class ImprovedActivityFinder:
                 clean_name = match[:-4] if match.endswith('Impl') else match
                 
                 # Validate against known activities
-                if clean_name.lower() in self.activity_index['by_name']:
+                if clean_name in self.activity_index:
                     matches.append(clean_name)
-                elif match.lower() in self.activity_index['by_name']:
+                elif match in self.activity_index:
                     matches.append(match)
                 elif clean_name and clean_name[0].isupper():
                     # Accept even if not in index (could be new activity)
@@ -371,20 +290,9 @@ class ImprovedActivityFinder:
             if word.endswith('s'):
                 word_stems.add(word[:-1])  # orders -> order
         
-        # Score each activity by keyword overlap
-        for activity_name in self.activity_index['all_activities']:
-            activity_keywords = set(self._extract_keywords(activity_name))
-            
-            if not activity_keywords:
-                continue
-            
-            # Count matching keywords (including stems)
-            overlap = word_stems & activity_keywords
-            
-            if overlap:
-                score = len(overlap) / len(activity_keywords)
-                if score >= 0.5:  # At least 50% keyword match
-                    matches.append((activity_name, score * 0.8))  # Max 0.8 confidence
+        # Score activities sharing a keyword (postings lookup, not a scan of all activities)
+        for activity_name, score in self.activity_index.keyword_matches(word_stems, min_ratio=0.5):
+            matches.append((activity_name, score * 0.8))  # Max 0.8 confidence
         
         # Sort by score, deduplicate
         matches.sort(key=lambda x: x[1], reverse=True)
@@ -461,8 +369,7 @@ class ImprovedActivityFinder:
             return matches
         
         # Extract potential class names (CamelCase)
-        class_pattern = r'\b([A-Z][a-z]+(?:[A-Z][a-z]+)+)\b'
-        potential = re.findall(class_pattern, text)
+        potential = CAMEL_IDENTIFIER.findall(text)
         
         for class_name in potential:
             if class_name in self.class_index:
@@ -0,0 +1,297 @@
+"""
+Streaming Ollama Client
+Async (httpx) client for the local Ollama server with keep-alive and bounded parallelism
+
+Why:
+- /api/generate is called with "stream": true, so time-to-first-token and
+  tokens/sec are measured per call (GenerationResult)
+- One pooled keep-alive HTTP connection set is reused for every call
+- The model is pinned in memory with keep_alive, so it is not unloaded
+  between SRs and reloaded on the next one
+- Up to `parallelism` prompts run concurrently, so the CPU box keeps working
+  while a response streams (the server must allow it: OLLAMA_NUM_PARALLEL)
+- /api/tags is cached for TAGS_CACHE_SECONDS
+
+Usage:
+    from ollama_client import OllamaClient
+
+    client = OllamaClient("qwen2.5-coder:14b-instruct-q8_0", parallelism=4)
+    client.warm_up()
+    result = client.generate(prompt, options={"temperature": 0.2, "num_predict": 1024})
+    print(result.text, result.ttft, result.tokens_per_second)
+
+    futures = [client.submit(p) for p in prompts]      # run concurrently
+    results = [f.result() for f in futures]
+
+Settings (environment):
+    OLLAMA_URL           default http://localhost:11434
+    OLLAMA_KEEP_ALIVE    how long the server keeps the model loaded (default 30m)
+    OLLAMA_PARALLELISM   concurrent generate calls (default 2)
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+OLLAMA_PARALLELISM = int(os.environ.get('OLLAMA_PARALLELISM', '2'))
+
+TAGS_CACHE_SECONDS = 30
+GENERATE_TIMEOUT = 2400  # 40 minutes for complex analysis on CPU
+
+
+@dataclass
+class GenerationResult:
+    """One /api/generate call: text plus timing reported by the client and the server"""
+    text: str
+    model: str
+    ttft: Optional[float] = None          # seconds from sending the request to the first token
+    total_seconds: float = 0.0            # wall clock for the whole call (incl. queueing)
+    queue_seconds: float = 0.0            # time spent waiting for a parallelism slot
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    tokens_per_second: float = 0.0        # server-side eval_count / eval_duration
+    load_seconds: float = 0.0             # > 0 means the model had to be (re)loaded
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class AsyncOllamaClient:
+    """
+    asyncio client for one Ollama model.
+
+    Must be used from a single event loop (the HTTP pool and semaphore are
+    created lazily on that loop). OllamaClient wraps it for synchronous code.
+    """
+
+    def __init__(self, model: str, base_url: str = None, parallelism: int = None,
+                 keep_alive: str = None, timeout: float = GENERATE_TIMEOUT):
+        self.model = model
+        self.base_url = (base_url or OLLAMA_URL).rstrip('/')
+        self.parallelism = max(1, parallelism or OLLAMA_PARALLELISM)
+        self.keep_alive = keep_alive or OLLAMA_KEEP_ALIVE
+        self.timeout = timeout
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tags: Optional[List[str]] = None
+        self._tags_at = 0.0
+
+        # Per-process counters
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_output_tokens = 0
+        self._ttft_sum = 0.0
+        self._tps_sum = 0.0
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(max_connections=self.parallelism + 2,
+                                    max_keepalive_connections=self.parallelism + 2)
+            )
+            self._slots = asyncio.Semaphore(self.parallelism)
+        return self._http
+
+    async def list_models(self, force: bool = False) -> List[str]:
+        """Model names from /api/tags (cached; [] if the server is unreachable)"""
+        if not force and self._tags is not None and time.monotonic() - self._tags_at < TAGS_CACHE_SECONDS:
+            return self._tags
+        try:
+            response = await self._client().get("/api/tags", timeout=5.0)
+            response.raise_for_status()
+            self._tags = [m['name'] for m in response.json().get('models', [])]
+        except (httpx.HTTPError, ValueError):
+            self._tags = None
+            return []
+        self._tags_at = time.monotonic()
+        return self._tags
+
+    async def is_running(self) -> bool:
+        if self._tags is not None and time.monotonic() - self._tags_at < TAGS_CACHE_SECONDS:
+            return True
+        try:
+            response = await self._client().get("/api/tags", timeout=2.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def warm_up(self) -> float:
+        """Load the model and pin it with keep_alive (empty prompt). Returns load seconds."""
+        start = time.perf_counter()
+        response = await self._client().post("/api/generate", json={
+            "model": self.model, "prompt": "", "keep_alive": self.keep_alive, "stream": False
+        })
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    async def generate(self, prompt: str, options: Dict = None,
+                       on_token: Callable[[str], None] = None) -> GenerationResult:
+        """
+        Stream one completion.
+
+        Args:
+            prompt: Full prompt text
+            options: Ollama options (temperature, num_predict, top_p, ...)
+            on_token: Optional callback for each streamed text chunk
+
+        Returns:
+            GenerationResult; on failure .error is set and .text is empty
+        """
+        client = self._client()
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options or {}
+        }
+        result = GenerationResult(text="", model=self.model)
+        start = time.perf_counter()
+
+        async with self._slots:
+            sent = time.perf_counter()
+            result.queue_seconds = sent - start
+            self.in_flight += 1
+            chunks = []
+            final = {}
+            try:
+                async with client.stream("POST", "/api/generate", json=payload) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise httpx.HTTPStatusError(f"API returned {response.status_code}",
+                                                    request=response.request, response=response)
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get('error'):
+                            raise RuntimeError(data['error'])
+                        token = data.get('response', '')
+                        if token:
+                            if result.ttft is None:
+                                result.ttft = time.perf_counter() - sent
+                            chunks.append(token)
+                            if on_token is not None:
+                                on_token(token)
+                        if data.get('done'):
+                            final = data
+                            break
+            except (httpx.HTTPError, RuntimeError, ValueError) as e:
+                result.error = str(e) or type(e).__name__
+            finally:
+                self.in_flight -= 1
+
+        result.text = "".join(chunks).strip()
+        result.total_seconds = time.perf_counter() - start
+        result.prompt_tokens = final.get('prompt_eval_count', 0) or 0
+        result.output_tokens = final.get('eval_count', 0) or 0
+        eval_ns = final.get('eval_duration', 0) or 0
+        result.tokens_per_second = result.output_tokens / (eval_ns / 1e9) if eval_ns else 0.0
+        result.load_seconds = (final.get('load_duration', 0) or 0) / 1e9
+
+        self.calls += 1
+        if result.error:
+            self.errors += 1
+        else:
+            self.total_output_tokens += result.output_tokens
+            self._ttft_sum += result.ttft or 0.0
+            self._tps_sum += result.tokens_per_second
+        return result
+
+    async def generate_many(self, prompts: List[str], options: Dict = None) -> List[GenerationResult]:
+        """Run prompts concurrently (at most `parallelism` at a time), results in input order"""
+        return await asyncio.gather(*(self.generate(p, options) for p in prompts))
+
+    def get_stats(self) -> Dict:
+        ok = self.calls - self.errors
+        return {
+            'model': self.model,
+            'parallelism': self.parallelism,
+            'keep_alive': self.keep_alive,
+            'calls': self.calls,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'output_tokens': self.total_output_tokens,
+            'avg_ttft_seconds': round(self._ttft_sum / ok, 3) if ok else None,
+            'avg_tokens_per_second': round(self._tps_sum / ok, 2) if ok else None
+        }
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class OllamaClient:
+    """
+    Thread-safe synchronous facade over AsyncOllamaClient.
+
+    Owns one event loop on a daemon thread, so every caller shares the same
+    keep-alive pool and parallelism limit. submit() returns a
+    concurrent.futures.Future, which lets sequential code keep several SR
+    prompts in flight.
+    """
+
+    def __init__(self, model: str, base_url: str = None, parallelism: int = None,
+                 keep_alive: str = None, timeout: float = GENERATE_TIMEOUT):
+        self.async_client = AsyncOllamaClient(model, base_url, parallelism, keep_alive, timeout)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ollama-client", daemon=True)
+        self._thread.start()
+
+    @property
+    def model(self) -> str:
+        return self.async_client.model
+
+    @property
+    def parallelism(self) -> int:
+        return self.async_client.parallelism
+
+    def _run(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(self, prompt: str, options: Dict = None,
+               on_token: Callable[[str], None] = None) -> "Future[GenerationResult]":
+        """Start a generation in the background; .result() gives the GenerationResult"""
+        return self._run(self.async_client.generate(prompt, options, on_token))
+
+    def generate(self, prompt: str, options: Dict = None,
+                 on_token: Callable[[str], None] = None) -> GenerationResult:
+        return self.submit(prompt, options, on_token).result()
+
+    def generate_many(self, prompts: List[str], options: Dict = None) -> List[GenerationResult]:
+        return self._run(self.async_client.generate_many(prompts, options)).result()
+
+    def list_models(self, force: bool = False) -> List[str]:
+        return self._run(self.async_client.list_models(force)).result()
+
+    def is_running(self) -> bool:
+        return self._run(self.async_client.is_running()).result()
+
+    def warm_up(self) -> float:
+        return self._run(self.async_client.warm_up()).result()
+
+    def get_stats(self) -> Dict:
+        return self.async_client.get_stats()
+
+    def close(self):
+        """Close the HTTP pool and stop the loop thread"""
+        if not self._loop.is_running():
+            return
+        self._run(self.async_client.aclose()).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
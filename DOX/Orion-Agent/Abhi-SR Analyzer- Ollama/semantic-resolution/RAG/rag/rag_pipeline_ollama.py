@@ -15,6 +15,7 @@ import json
 import sqlite3
 import pickle
 import numpy as np
+from collections import deque
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
@@ -23,13 +24,15 @@ import pandas as pd
 import requests
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import workaround-based Java analyzer
 from workaround_java_analyzer import WorkaroundJavaAnalyzer
 
+# Memory-mapped copies of comcast_code.db / history_data.db (converted on first use)
+from mmap_vector_store import load_or_convert, convert_comcast_code, convert_history_pickle
+
 # Import feedback storage system
 try:
     from feedback_storage import WorkaroundFeedbackStorage
@@ -72,27 +75,56 @@ except ImportError:
     PREPROCESSOR_AVAILABLE = False
     print("[WARN] SRTextPreprocessor not available - semantic search will use raw text")
 
+# 🆕 Import streaming Ollama client (needs httpx)
+try:
+    from ollama_client import OllamaClient, OLLAMA_URL, OLLAMA_PARALLELISM
+    OLLAMA_CLIENT_AVAILABLE = True
+except ImportError:
+    OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+    OLLAMA_PARALLELISM = 1
+    OLLAMA_CLIENT_AVAILABLE = False
+    print("[WARN] httpx not installed - Ollama calls are blocking and sequential (pip install httpx)")
+
 
 class OllamaAnalyzer:
-    """Ollama LLM Handler - Works with any Ollama model"""
+    """
+    Ollama LLM Handler - Works with any Ollama model
+
+    With httpx installed, calls stream through a shared OllamaClient (keep-alive
+    pool, model pinned with keep_alive, up to `parallelism` concurrent prompts)
+    and each call's time-to-first-token and tokens/sec are kept in last_result.
+    """
     
-    def __init__(self, model_name: str = "qwen2.5-coder:14b-instruct-q8_0"):
+    def __init__(self, model_name: str = "qwen2.5-coder:14b-instruct-q8_0", parallelism: int = None):
         self.model_name = model_name
-        self.base_url = "http://localhost:11434"
+        self.base_url = OLLAMA_URL
         self.api_url = f"{self.base_url}/api/generate"
+        self.last_result = None
+        
+        if OLLAMA_CLIENT_AVAILABLE:
+            self.client = OllamaClient(model_name, base_url=self.base_url, parallelism=parallelism)
+            self.parallelism = self.client.parallelism
+        else:
+            self.client = None
+            self.session = requests.Session()  # Keep-alive for the blocking fallback
+            self.parallelism = 1
         
     def check_ollama_running(self) -> bool:
         """Check if Ollama is running"""
+        if self.client:
+            return self.client.is_running()
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=2)
             return response.status_code == 200
         except:
             return False
     
     def list_available_models(self) -> List[str]:
         """List all available Ollama models"""
+        if self.client:
+            return self.client.list_models()
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return [model['name'] for model in data.get('models', [])]
@@ -129,29 +161,68 @@ class OllamaAnalyzer:
             return False
         
         print(f"[OK] Model '{self.model_name}' is ready")
+        
+        if self.client:
+            try:
+                load_seconds = self.client.warm_up()
+                print(f"[OK] Model loaded and pinned (keep_alive={self.client.async_client.keep_alive}, "
+                      f"{load_seconds:.1f}s, parallelism={self.parallelism})")
+            except Exception as e:
+                print(f"[WARN] Model warm-up failed: {e}")
         return True
     
-    def generate_response(self, prompt: str, max_tokens: int = 2048, temperature: float = 0.3) -> str:
-        """Generate response from Ollama model"""
-        try:
-            formatted_prompt = f"""You are an expert SR analysis system. Analyze service requests and provide INTELLIGENT, DETAILED technical solutions based on provided context.
+    @staticmethod
+    def _format_prompt(prompt: str) -> str:
+        return f"""You are an expert SR analysis system. Analyze service requests and provide INTELLIGENT, DETAILED technical solutions based on provided context.
 
 {prompt}
 
 Provide your analysis in a structured format with clear sections."""
-
+    
+    @staticmethod
+    def _options(max_tokens: int, temperature: float) -> Dict:
+        return {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "top_p": 0.95
+        }
+    
+    def submit_response(self, prompt: str, max_tokens: int = 2048, temperature: float = 0.3):
+        """
+        Start generating in the background (streaming client only).
+        
+        Returns:
+            concurrent.futures.Future resolving to a GenerationResult;
+            pass it to collect_response() for the response text
+        """
+        return self.client.submit(self._format_prompt(prompt), self._options(max_tokens, temperature))
+    
+    def collect_response(self, future) -> str:
+        """Wait for a submit_response() future; returns the text or an 'Error: ...' string"""
+        result = future.result()
+        self.last_result = result
+        if result.error:
+            print(f"[ERROR] Error generating response: {result.error}")
+            return f"Error: {result.error}"
+        print(f"   [LLM] {result.output_tokens} tokens, TTFT {result.ttft or 0:.1f}s, "
+              f"{result.tokens_per_second:.1f} tok/s, total {result.total_seconds:.1f}s"
+              + (f" (model load {result.load_seconds:.1f}s)" if result.load_seconds > 1 else ""))
+        return result.text
+    
+    def generate_response(self, prompt: str, max_tokens: int = 2048, temperature: float = 0.3) -> str:
+        """Generate response from Ollama model"""
+        if self.client:
+            return self.collect_response(self.submit_response(prompt, max_tokens, temperature))
+        
+        try:
             payload = {
                 "model": self.model_name,
-                "prompt": formatted_prompt,
+                "prompt": self._format_prompt(prompt),
                 "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    "top_p": 0.95
-                }
+                "options": self._options(max_tokens, temperature)
             }
             
-            response = requests.post(self.api_url, json=payload, timeout=2400)  # 40 minutes for complex analysis (handles concurrent model loading)
+            response = self.session.post(self.api_url, json=payload, timeout=2400)  # 40 minutes for complex analysis (handles concurrent model loading)
             
             if response.status_code == 200:
                 data = response.json()
@@ -192,55 +263,33 @@ class VectorstoreHandler:
             self._load_history_db()
     
     def _load_comcast_code_db(self):
-        """Load comcast_code.db FAISS vectorstore"""
+        """Open the memory-mapped comcast_code store (converted from the legacy folder, again when it changes)"""
         try:
             print(f"[*] Loading comcast_code.db from {self.comcast_code_db_path}...")
+            self.comcast_code_data = load_or_convert(self.comcast_code_db_path, convert_comcast_code)
+            if self.comcast_code_data is None:
+                return
             
-            # Load embeddings (numpy)
-            embeddings_path = self.comcast_code_db_path / "embeddings.npy"
-            embeddings = np.load(embeddings_path)
-            
-            # Load documents (pickle)
-            documents_path = self.comcast_code_db_path / "documents.pkl"
-            with open(documents_path, 'rb') as f:
-                documents = pickle.load(f)
-            
-            # Load metadata (pickle)
-            metadatas_path = self.comcast_code_db_path / "metadatas.pkl"
-            with open(metadatas_path, 'rb') as f:
-                metadatas = pickle.load(f)
-            
-            # Load config
-            config_path = self.comcast_code_db_path / "config.json"
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-            
-            self.comcast_code_data = {
-                'embeddings': embeddings,
-                'documents': documents,
-                'metadatas': metadatas,
-                'config': config
-            }
-            
-            print(f"[OK] comcast_code.db loaded")
-            print(f"     Total files: {config['total_files']}")
-            print(f"     Total chunks: {config['total_chunks']}")
-            print(f"     Modules: {len(config['modules'])}")
+            print(f"[OK] comcast_code.db loaded (memory-mapped)")
+            print(f"     Total files: {self.comcast_code_data.get('total_files', 'unknown')}")
+            print(f"     Total chunks: {len(self.comcast_code_data)}")
+            print(f"     Modules: {len(self.comcast_code_data.get('modules') or [])}")
             
         except Exception as e:
             print(f"[WARN] Error loading comcast_code.db: {e}")
             self.comcast_code_data = None
     
     def _load_history_db(self):
-        """Load history_data.db"""
+        """Open the memory-mapped history store (converted from the legacy pickle, again when it changes)"""
         try:
             print(f"[*] Loading history_data.db from {self.history_db_path}...")
-            with open(self.history_db_path, 'rb') as f:
-                self.history_data = pickle.load(f)
+            self.history_data = load_or_convert(self.history_db_path, convert_history_pickle)
+            if self.history_data is None:
+                return
             
-            print(f"[OK] history_data.db loaded")
-            print(f"     Total records: {self.history_data.get('total_records', 0)}")
-            print(f"     Model: {self.history_data.get('model_name', 'unknown')}")
+            print(f"[OK] history_data.db loaded (memory-mapped)")
+            print(f"     Total records: {self.history_data.get('total_records', len(self.history_data))}")
+            print(f"     Model: {self.history_data.get('model_name') or 'unknown'}")
             
         except Exception as e:
             print(f"[WARN] Error loading history_data.db: {e}")
@@ -308,25 +357,13 @@ class VectorstoreHandler:
             # Encode query
             query_embedding = self.semantic_model.encode([query_text])[0]
             
-            # Calculate similarity with all code chunks
-            similarities = cosine_similarity(
-                [query_embedding],
-                self.comcast_code_data['embeddings']
-            )[0]
-            
-            # Get top-k results
-            top_indices = similarities.argsort()[::-1][:top_k]
-            
+            # Top-k by cosine similarity (argpartition over the memory-mapped rows), 50% threshold
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.50:  # 50% threshold
-                    continue
-                
+            for idx, similarity in self.comcast_code_data.search(query_embedding, top_k=top_k, min_similarity=0.50):
                 results.append({
                     'similarity': similarity,
-                    'code': self.comcast_code_data['documents'][idx],
-                    'metadata': self.comcast_code_data['metadatas'][idx],
+                    'code': self.comcast_code_data.document(idx),
+                    'metadata': self.comcast_code_data.metadata(idx),
                     'source': 'comcast_code.db'
                 })
             
@@ -356,22 +393,10 @@ class VectorstoreHandler:
             # Encode query
             query_embedding = self.semantic_model.encode([query_text])[0]
             
-            # Calculate similarity with all historical SRs
-            similarities = cosine_similarity(
-                [query_embedding],
-                self.history_data['embeddings']
-            )[0]
-            
-            # Get top-k results
-            top_indices = similarities.argsort()[::-1][:top_k]
-            
+            # Top-k by cosine similarity (argpartition over the memory-mapped rows), 50% threshold
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.50:  # 50% threshold
-                    continue
-                
-                metadata = self.history_data['metadata'][idx]
+            for idx, similarity in self.history_data.search(query_embedding, top_k=top_k, min_similarity=0.50):
+                metadata = self.history_data.metadata(idx)
                 
                 # Build workaround text (Description + Workaround only, no summaries)
                 workaround_parts = []
@@ -405,7 +430,7 @@ class VectorstoreHandler:
 class SRAnalysisPipeline:
     """Main RAG Pipeline for SR Analysis"""
     
-    def __init__(self, ollama_model: str = "qwen2.5-coder:14b-instruct-q8_0"):
+    def __init__(self, ollama_model: str = "qwen2.5-coder:14b-instruct-q8_0", parallelism: int = None):
         self.base_dir = Path(__file__).parent.parent
         self.input_dir = self.base_dir / "input"
         self.output_dir = self.base_dir / "llm output"
@@ -419,7 +444,7 @@ class SRAnalysisPipeline:
         self._verify_databases()
         
         # Initialize components
-        self.analyzer = OllamaAnalyzer(ollama_model)
+        self.analyzer = OllamaAnalyzer(ollama_model, parallelism=parallelism)
         self.vectorstore = VectorstoreHandler(self.java_db, self.comcast_code_db, self.history_db)
         self.workaround_analyzer = WorkaroundJavaAnalyzer()
         
@@ -512,6 +537,12 @@ class SRAnalysisPipeline:
     
     def analyze_single_sr(self, sr_data: Dict, java_metadata_context: str) -> Dict:
         """Analyze a single service request using LLM with optimized context"""
+        prepared = self._prepare_sr_analysis(sr_data, java_metadata_context)
+        ai_response = self.analyzer.generate_response(prepared['analysis_prompt'], max_tokens=1024, temperature=0.2)
+        return self._complete_sr_analysis(prepared, ai_response)
+    
+    def _prepare_sr_analysis(self, sr_data: Dict, java_metadata_context: str) -> Dict:
+        """Steps 1-5: retrieval, Java error detection and prompt building (no LLM call)"""
         
         sr_id = sr_data.get('SR ID', sr_data.get('Call ID', 'Unknown'))
         priority = sr_data.get('Customer Priority', sr_data.get('Priority', 'Medium'))
@@ -913,8 +944,40 @@ After summarizing the known pattern:
 Analyze now:
 """
         
-        # Send to LLM
-        ai_response = self.analyzer.generate_response(analysis_prompt, max_tokens=1024, temperature=0.2)
+        return {
+            'analysis_prompt': analysis_prompt,
+            'sr_data': sr_data,
+            'sr_id': sr_id,
+            'priority': priority,
+            'description': description,
+            'notes': notes,
+            'resolution_category': resolution_category,
+            'status_reason': status_reason,
+            'has_input_semantic': has_input_semantic,
+            'semantic_workaround_input': semantic_workaround_input,
+            'historical_matches': historical_matches,
+            'java_code_matches': java_code_matches,
+            'detection_result': detection_result,
+            'java_file': java_file,
+            'java_path': java_path
+        }
+    
+    def _complete_sr_analysis(self, prepared: Dict, ai_response: str) -> Dict:
+        """Step 6: parse the LLM response into the output row"""
+        sr_data = prepared['sr_data']
+        sr_id = prepared['sr_id']
+        priority = prepared['priority']
+        description = prepared['description']
+        notes = prepared['notes']
+        resolution_category = prepared['resolution_category']
+        status_reason = prepared['status_reason']
+        has_input_semantic = prepared['has_input_semantic']
+        semantic_workaround_input = prepared['semantic_workaround_input']
+        historical_matches = prepared['historical_matches']
+        java_code_matches = prepared['java_code_matches']
+        detection_result = prepared['detection_result']
+        java_file = prepared['java_file']
+        java_path = prepared['java_path']
         
         # Step 6: Parse LLM Response (using workaround-based detection results)
         print("   [Parse] Extracting analysis from LLM response...")
@@ -1280,30 +1343,83 @@ Analyze now:
         print(f"{'='*80}")
         print(f"[INFO] Total SRs to process: {len(df)}")
         
-        for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing SRs"):
+        if self.analyzer.client and self.analyzer.parallelism > 1:
+            self._process_srs_pipelined(df, java_metadata_context)
+        else:
+            for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing SRs"):
+                try:
+                    sr_data = row.to_dict()
+                    result = self.analyze_single_sr(sr_data, java_metadata_context)
+                    self.results.append(result)
+                    
+                except Exception as e:
+                    print(f"\n[ERROR] Error processing SR {row.get('SR ID', idx)}: {e}")
+                    self.results.append(self._error_result(row, idx, e))
+        
+        print(f"\n[OK] Processed {len(self.results)} service requests")
+        if self.analyzer.client:
+            stats = self.analyzer.client.get_stats()
+            print(f"[STATS] LLM: {stats['calls']} calls, {stats['errors']} errors, "
+                  f"avg TTFT {stats['avg_ttft_seconds']}s, avg {stats['avg_tokens_per_second']} tok/s")
+    
+    def _process_srs_pipelined(self, df: pd.DataFrame, java_metadata_context: str):
+        """
+        Keep up to `parallelism` prompts generating while the next SRs are prepared.
+        
+        Retrieval and prompt building stay sequential (this thread); every prompt
+        is handed to the streaming client as soon as it is built, and responses
+        are parsed in input order, so the output matches the sequential path.
+        At most 2 x `parallelism` SRs are prepared ahead of the oldest unfinished
+        one, so contexts and queued prompts don't pile up for the whole input.
+        """
+        window = 2 * self.analyzer.parallelism
+        print(f"[INFO] Pipelined generation: up to {self.analyzer.parallelism} concurrent prompts, "
+              f"{window} SRs in flight")
+        pending = deque()
+        progress = tqdm(total=len(df), desc="Processing SRs")
+        
+        def collect_oldest():
+            idx, row, prepared, future, error = pending.popleft()
             try:
-                sr_data = row.to_dict()
-                result = self.analyze_single_sr(sr_data, java_metadata_context)
-                self.results.append(result)
-                
+                if error is not None:
+                    raise error
+                ai_response = self.analyzer.collect_response(future)
+                self.results.append(self._complete_sr_analysis(prepared, ai_response))
             except Exception as e:
                 print(f"\n[ERROR] Error processing SR {row.get('SR ID', idx)}: {e}")
-                self.results.append({
-                    'SR ID': row.get('SR ID', f'SR_{idx}'),
-                    'Priority': row.get('Customer Priority', row.get('Priority', 'Unknown')),
-                    'Resolution Category': row.get('Resolution Category', 'Unknown'),
-                    'Status Reason': row.get('Status Reason', 'Unknown'),
-                    'Java Failure Detected': 'Error',
-                    'Java Failure Path': 'N/A',
-                    'Match Similarity': 'N/A',
-                    'Semantic Workaround': str(row.get('Semantic Workaround', 'Not available')),
-                    'AI Workaround': f'Error during analysis: {str(e)}',
-                    'Troubleshooting Steps': 'Manual review required',
-                    'Original Notes': str(row.get('Notes', '')),
-                    'Original Summary': str(row.get('Description', ''))
-                })
+                self.results.append(self._error_result(row, idx, e))
+            progress.update(1)
         
-        print(f"\n[OK] Processed {len(self.results)} service requests")
+        for idx, row in df.iterrows():
+            if len(pending) >= window:
+                collect_oldest()
+            try:
+                prepared = self._prepare_sr_analysis(row.to_dict(), java_metadata_context)
+                future = self.analyzer.submit_response(prepared['analysis_prompt'], max_tokens=1024, temperature=0.2)
+                pending.append((idx, row, prepared, future, None))
+            except Exception as e:
+                pending.append((idx, row, None, None, e))
+        
+        while pending:
+            collect_oldest()
+        progress.close()
+    
+    def _error_result(self, row, idx, e: Exception) -> Dict:
+        """Output row for an SR whose analysis failed"""
+        return {
+            'SR ID': row.get('SR ID', f'SR_{idx}'),
+            'Priority': row.get('Customer Priority', row.get('Priority', 'Unknown')),
+            'Resolution Category': row.get('Resolution Category', 'Unknown'),
+            'Status Reason': row.get('Status Reason', 'Unknown'),
+            'Java Failure Detected': 'Error',
+            'Java Failure Path': 'N/A',
+            'Match Similarity': 'N/A',
+            'Semantic Workaround': str(row.get('Semantic Workaround', 'Not available')),
+            'AI Workaround': f'Error during analysis: {str(e)}',
+            'Troubleshooting Steps': 'Manual review required',
+            'Original Notes': str(row.get('Notes', '')),
+            'Original Summary': str(row.get('Description', ''))
+        }
     
     def save_results(self, input_filename: str):
         """Save results to Excel"""
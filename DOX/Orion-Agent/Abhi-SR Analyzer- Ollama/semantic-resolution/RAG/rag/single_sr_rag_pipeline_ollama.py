@@ -22,13 +22,15 @@ from datetime import datetime
 import pandas as pd
 import requests
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import workaround-based Java analyzer
 from workaround_java_analyzer import WorkaroundJavaAnalyzer
 
+# Memory-mapped copies of comcast_code.db / history_data.db (converted on first use)
+from mmap_vector_store import load_or_convert, convert_comcast_code, convert_history_pickle
+
 # Import feedback storage system
 try:
     from feedback_storage import WorkaroundFeedbackStorage
@@ -186,51 +188,33 @@ class VectorstoreHandler:
             self._load_history_db()
     
     def _load_comcast_code_db(self):
-        """Load comcast_code.db FAISS vectorstore"""
+        """Open the memory-mapped comcast_code store (converted from the legacy folder, again when it changes)"""
         try:
             print(f"[*] Loading comcast_code.db from {self.comcast_code_db_path}...")
+            self.comcast_code_data = load_or_convert(self.comcast_code_db_path, convert_comcast_code)
+            if self.comcast_code_data is None:
+                return
             
-            embeddings_path = self.comcast_code_db_path / "embeddings.npy"
-            embeddings = np.load(embeddings_path)
-            
-            documents_path = self.comcast_code_db_path / "documents.pkl"
-            with open(documents_path, 'rb') as f:
-                documents = pickle.load(f)
-            
-            metadatas_path = self.comcast_code_db_path / "metadatas.pkl"
-            with open(metadatas_path, 'rb') as f:
-                metadatas = pickle.load(f)
-            
-            config_path = self.comcast_code_db_path / "config.json"
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-            
-            self.comcast_code_data = {
-                'embeddings': embeddings,
-                'documents': documents,
-                'metadatas': metadatas,
-                'config': config
-            }
-            
-            print(f"[OK] comcast_code.db loaded")
-            print(f"     Total files: {config['total_files']}")
-            print(f"     Total chunks: {config['total_chunks']}")
-            print(f"     Modules: {len(config['modules'])}")
+            print(f"[OK] comcast_code.db loaded (memory-mapped)")
+            print(f"     Total files: {self.comcast_code_data.get('total_files', 'unknown')}")
+            print(f"     Total chunks: {len(self.comcast_code_data)}")
+            print(f"     Modules: {len(self.comcast_code_data.get('modules') or [])}")
             
         except Exception as e:
             print(f"[WARN] Error loading comcast_code.db: {e}")
             self.comcast_code_data = None
     
     def _load_history_db(self):
-        """Load history_data.db"""
+        """Open the memory-mapped history store (converted from the legacy pickle, again when it changes)"""
         try:
             print(f"[*] Loading history_data.db from {self.history_db_path}...")
-            with open(self.history_db_path, 'rb') as f:
-                self.history_data = pickle.load(f)
+            self.history_data = load_or_convert(self.history_db_path, convert_history_pickle)
+            if self.history_data is None:
+                return
             
-            print(f"[OK] history_data.db loaded")
-            print(f"     Total records: {self.history_data.get('total_records', 0)}")
-            print(f"     Model: {self.history_data.get('model_name', 'unknown')}")
+            print(f"[OK] history_data.db loaded (memory-mapped)")
+            print(f"     Total records: {self.history_data.get('total_records', len(self.history_data))}")
+            print(f"     Model: {self.history_data.get('model_name') or 'unknown'}")
             
         except Exception as e:
             print(f"[WARN] Error loading history_data.db: {e}")
@@ -296,23 +280,13 @@ class VectorstoreHandler:
             
             query_embedding = self.semantic_model.encode([query_text])[0]
             
-            similarities = cosine_similarity(
-                [query_embedding],
-                self.comcast_code_data['embeddings']
-            )[0]
-            
-            top_indices = similarities.argsort()[::-1][:top_k]
-            
+            # Top-k by cosine similarity (argpartition over the memory-mapped rows), 50% threshold
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.50:  # 50% threshold
-                    continue
-                
+            for idx, similarity in self.comcast_code_data.search(query_embedding, top_k=top_k, min_similarity=0.50):
                 results.append({
                     'similarity': similarity,
-                    'code': self.comcast_code_data['documents'][idx],
-                    'metadata': self.comcast_code_data['metadatas'][idx],
+                    'code': self.comcast_code_data.document(idx),
+                    'metadata': self.comcast_code_data.metadata(idx),
                     'source': 'comcast_code.db'
                 })
             
@@ -341,20 +315,10 @@ class VectorstoreHandler:
             
             query_embedding = self.semantic_model.encode([query_text])[0]
             
-            similarities = cosine_similarity(
-                [query_embedding],
-                self.history_data['embeddings']
-            )[0]
-            
-            top_indices = similarities.argsort()[::-1][:top_k]
-            
+            # Top-k by cosine similarity (argpartition over the memory-mapped rows), 50% threshold
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.50:  # 50% threshold
-                    continue
-                
-                metadata = self.history_data['metadata'][idx]
+            for idx, similarity in self.history_data.search(query_embedding, top_k=top_k, min_similarity=0.50):
+                metadata = self.history_data.metadata(idx)
                 
                 # Build workaround text (Description + Workaround only, no summaries)
                 workaround_parts = []
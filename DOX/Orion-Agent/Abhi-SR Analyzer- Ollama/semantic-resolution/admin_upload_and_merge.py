@@ -16,12 +16,11 @@ if sys.platform == 'win32':
         sys.stderr.reconfigure(encoding='utf-8', errors='replace')
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-import pickle
 import shutil
 from datetime import datetime
 from pathlib import Path
 from comprehensive_sr_analyzer import ComprehensiveSRAnalyzer
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scripts.core.historical_data_indexer import HistoricalDataIndexer
 
 def upload_and_merge(excel_path, progress_callback=None):
     """
@@ -103,11 +102,12 @@ def upload_and_merge(excel_path, progress_callback=None):
         log("Step 2: Loading historical data...", 40)
         log("-" * 80)
         
+        # load_index() reads the incremental store when it is newer than the pickle
         hist_path = 'vector store/historical_sr_index.pkl'
-        with open(hist_path, 'rb') as f:
-            hist_index = pickle.load(f)
+        indexer = HistoricalDataIndexer()
+        indexer.load_index(hist_path)
         
-        historical_data = hist_index.get('historical_data', [])
+        historical_data = indexer.historical_data
         existing_sr_ids = {sr.get('sr_id') for sr in historical_data}
         
         log(f"   Current historical records: {len(historical_data):,}", 45)
@@ -200,50 +200,25 @@ def upload_and_merge(excel_path, progress_callback=None):
         log("-" * 80)
         
         # Backup
-        backup_path = f"{hist_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        shutil.copy2(hist_path, backup_path)
-        log(f"   [BACKUP] Backup created", 68)
-        
-        # Add new records
-        historical_data.extend(new_records)
-        hist_index['historical_data'] = historical_data
-        hist_index['indexed_at'] = datetime.now().isoformat()
-        
-        # Save
-        with open(hist_path, 'wb') as f:
-            pickle.dump(hist_index, f)
-        
-        log(f"   [OK] Saved {len(historical_data):,} total records", 72)
+        if os.path.exists(hist_path):
+            backup_path = f"{hist_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            shutil.copy2(hist_path, backup_path)
+            log(f"   [BACKUP] Backup created", 68)
+        
+        # Add new records and update the TF-IDF vectors (existing vocabulary when
+        # the store is loaded, full refit for an index read from the pickle)
+        log(f"   Vectorizing {len(new_records)} new documents...", 70)
+        indexer.add_records(new_records, 'admin_upload')
+        log(f"   [OK] {len(historical_data):,} total records", 72)
         log("")
         
-        # Step 5: Rebuild vectors
-        log("Step 5: Rebuilding TF-IDF vectors...", 75)
+        # Step 5: Save pickle + incremental store (the scheduler continues from the store)
+        log("Step 5: Saving historical index...", 75)
         log("-" * 80)
         
-        log(f"   Preparing {len(historical_data):,} documents...", 76)
-        searchable_texts = [sr.get('searchable_text', '') for sr in historical_data]
-        
-        log("   Initializing TF-IDF vectorizer...", 78)
-        vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),
-            min_df=2,
-            max_df=0.8,
-            stop_words='english'
-        )
-        
-        log("   Computing TF-IDF matrix (this may take 10-30 seconds)...", 80)
-        # Note: This is a long-running operation with no intermediate progress
-        tfidf_matrix = vectorizer.fit_transform(searchable_texts)
-        log("   [OK] TF-IDF computation complete!", 85)
-        
-        hist_index['vectorizer'] = vectorizer
-        hist_index['tfidf_matrix'] = tfidf_matrix
-        
-        log("   Saving vectors to database...", 86)
-        # Save again with vectors
-        with open(hist_path, 'wb') as f:
-            pickle.dump(hist_index, f)
+        tfidf_matrix = indexer.tfidf_matrix
+        indexer.save_index(hist_path)
+        indexer.save_store(HistoricalDataIndexer.store_path(hist_path))
         
         log(f"   [OK] TF-IDF matrix: {tfidf_matrix.shape}", 88)
         log(f"   [OK] Features: {tfidf_matrix.shape[1]:,}")
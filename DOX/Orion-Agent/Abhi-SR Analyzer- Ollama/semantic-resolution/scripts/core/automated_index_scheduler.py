@@ -2,6 +2,17 @@
 Automated Index Scheduler for Continuous Learning
 Rebuilds historical SR index daily/weekly to include new Mukul uploads
 Runs as background service to enable continuous system learning
+
+Modes:
+- incremental (default): only new/changed past_data files and sr_tracking.db rows
+  are parsed and appended to the index store; the TF-IDF vocabulary is refitted by
+  a full rebuild on FULL_REBUILD_DAY or when the index outgrew it
+- full: reload everything and refit on every run
+
+Both modes write the pickle as well as the store whenever the index changed, so
+readers of historical_sr_index.pkl never lag behind. Records added by admin/daily
+uploads and user feedback (HistoricalDataIndexer.add_records) are kept by
+incremental runs and carried over by full rebuilds.
 """
 
 import schedule
@@ -27,19 +38,33 @@ logger = logging.getLogger(__name__)
 Path('logs').mkdir(exist_ok=True)
 
 
+INDEX_PATH = "historical_sr_index.pkl"
+SR_DB_CANDIDATES = ["sr_tracking.db", "vector store/sr_tracking.db"]
+FULL_REBUILD_DAY = "sunday"
+
+
 class IndexScheduler:
     """Automated scheduler for index rebuilding"""
     
-    def __init__(self, rebuild_frequency='daily', rebuild_time='23:00'):
+    def __init__(self, rebuild_frequency='daily', rebuild_time='23:00', mode='incremental',
+                 full_rebuild_day=FULL_REBUILD_DAY, index_path=INDEX_PATH, sr_db_path=None):
         """
         Initialize scheduler
         
         Args:
             rebuild_frequency: 'daily' or 'weekly' (default: 'daily')
             rebuild_time: Time in HH:MM format (default: '23:00' = 11 PM)
+            mode: 'incremental' or 'full' (default: 'incremental')
+            full_rebuild_day: Weekday of the full vocabulary refit in incremental mode
+            index_path: Legacy pickle path; the incremental store sits next to it (.idx)
+            sr_db_path: sr_tracking.db to index (default: first of SR_DB_CANDIDATES that exists)
         """
         self.rebuild_frequency = rebuild_frequency.lower()
         self.rebuild_time = rebuild_time
+        self.mode = mode.lower()
+        self.full_rebuild_day = full_rebuild_day.lower()
+        self.index_path = index_path
+        self.sr_db_path = sr_db_path or next((p for p in SR_DB_CANDIDATES if os.path.exists(p)), None)
         self.last_rebuild = None
         self.rebuild_count = 0
         self.errors = 0
@@ -48,11 +73,20 @@ class IndexScheduler:
         if self.rebuild_frequency not in ['daily', 'weekly']:
             logger.warning(f"Invalid frequency '{rebuild_frequency}', using 'daily'")
             self.rebuild_frequency = 'daily'
+        if self.mode not in ['incremental', 'full']:
+            logger.warning(f"Invalid mode '{mode}', using 'incremental'")
+            self.mode = 'incremental'
         
-        logger.info(f"[OK] Scheduler initialized - Mode: {self.rebuild_frequency.upper()} at {self.rebuild_time}")
+        logger.info(f"[OK] Scheduler initialized - Mode: {self.rebuild_frequency.upper()} at {self.rebuild_time} ({self.mode})")
     
-    def rebuild_index(self):
-        """Rebuild the historical SR index with new data"""
+    def rebuild_index(self, full=None):
+        """
+        Rebuild the historical SR index with new data
+        
+        Args:
+            full: Force a full rebuild (True) or an incremental update (False);
+                  None decides from the mode, the weekday and the store state
+        """
         try:
             logger.info("=" * 80)
             logger.info("[REBUILD] STARTING INDEX REBUILD")
@@ -64,30 +98,33 @@ class IndexScheduler:
             # Import here to avoid circular imports
             from historical_data_indexer import HistoricalDataIndexer
             
-            # Initialize indexer
-            logger.info("[1/4] Initializing indexer...")
-            indexer = HistoricalDataIndexer()
-            
-            # Load historical data (includes past_data/*.xls + sr_tracking.db)
-            logger.info("[2/4] Loading historical data from past_data/ and sr_tracking.db...")
-            records_loaded = indexer.load_historical_data()
-            logger.info(f"   [OK] Loaded {records_loaded:,} records")
+            indexer = HistoricalDataIndexer(sr_db_path=self.sr_db_path)
+            store_path = HistoricalDataIndexer.store_path(self.index_path)
+            if full is None:
+                full = (self.mode == 'full' or not os.path.isdir(store_path)
+                        or start_time.strftime('%A').lower() == self.full_rebuild_day)
             
-            # Build TF-IDF index
-            logger.info("[3/4] Building TF-IDF semantic search index...")
-            indexer.build_index()
-            logger.info(f"   [OK] Index built: {indexer.tfidf_matrix.shape[0]:,} documents × {indexer.tfidf_matrix.shape[1]:,} features")
+            if not full:
+                try:
+                    indexer.load_store(store_path)
+                except Exception as e:
+                    logger.warning(f"   Index store unreadable ({e}), falling back to full rebuild")
+                    full = True
+                else:
+                    if indexer.needs_full_rebuild():
+                        logger.info("   Index outgrew its vocabulary, running full rebuild")
+                        full = True
             
-            # Save index
-            logger.info("[4/4] Saving index to disk...")
-            indexer.save_index("historical_sr_index.pkl")
-            logger.info("   [OK] Index saved")
+            if full:
+                records_loaded = self._full_rebuild(indexer, store_path)
+            else:
+                records_loaded = self._incremental_update(indexer, store_path)
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
             logger.info("=" * 80)
-            logger.info(f"[OK] INDEX REBUILD SUCCESSFUL")
+            logger.info(f"[OK] INDEX {'REBUILD' if full else 'UPDATE'} SUCCESSFUL")
             logger.info(f"   Duration: {duration:.1f} seconds")
             logger.info(f"   Total records: {records_loaded:,}")
             logger.info(f"   Timestamp: {end_time}")
@@ -107,6 +144,57 @@ class IndexScheduler:
             logger.error(traceback.format_exc())
             return False
     
+    def _full_rebuild(self, indexer, store_path):
+        """Reload every source and refit the vocabulary; writes the pickle and the store"""
+        # Initialize indexer
+        logger.info(f"[1/4] Initializing indexer (full rebuild, sr_tracking.db: {self.sr_db_path or 'not found'})...")
+        if not indexer.historical_data and (os.path.exists(self.index_path) or os.path.isdir(store_path)):
+            try:
+                indexer.load_index(self.index_path)
+            except Exception as e:
+                logger.warning(f"   Previous index unreadable ({e}), upload/feedback records not carried over")
+        carried = indexer.external_records()
+        indexer.historical_data = []
+        
+        # Load historical data (past_data/*.xls + sr_tracking.db)
+        logger.info("[2/4] Loading historical data from past_data/ and sr_tracking.db...")
+        records_loaded = indexer.load_historical_data()
+        logger.info(f"   [OK] Loaded {records_loaded:,} records")
+        if carried:
+            indexer.historical_data.extend(carried)
+            records_loaded += len(carried)
+            logger.info(f"   [OK] Kept {len(carried):,} upload/feedback records from the previous index")
+        
+        # Build TF-IDF index
+        logger.info("[3/4] Building TF-IDF semantic search index...")
+        indexer.build_index()
+        logger.info(f"   [OK] Index built: {indexer.tfidf_matrix.shape[0]:,} documents × {indexer.tfidf_matrix.shape[1]:,} features")
+        
+        # Save index
+        logger.info("[4/4] Saving index to disk...")
+        indexer.save_index(self.index_path)
+        indexer.save_store(store_path)
+        logger.info("   [OK] Index saved")
+        return records_loaded
+    
+    def _incremental_update(self, indexer, store_path):
+        """Apply only new/changed files and tracking rows to the loaded store"""
+        logger.info(f"[1/3] Loaded index store: {len(indexer.historical_data):,} records")
+        
+        logger.info("[2/3] Applying changes from past_data/ and sr_tracking.db...")
+        changes = indexer.update_index()
+        logger.info("   [OK] " + ", ".join(f"{k}={v:,}" for k, v in changes.items()))
+        
+        logger.info("[3/3] Saving index store and pickle...")
+        if any(changes.values()):
+            # Pickle first: load_index() prefers the store only when it is at least as new
+            indexer.save_index(self.index_path)
+            indexer.save_store(store_path)
+            logger.info("   [OK] Index store and pickle saved")
+        else:
+            logger.info("   [OK] No changes - index store untouched")
+        return len(indexer.historical_data)
+    
     def schedule_daily(self):
         """Schedule rebuild every day at specified time"""
         schedule.every().day.at(self.rebuild_time).do(self.rebuild_index)
@@ -215,19 +303,43 @@ def main():
         action='store_true',
         help='Test rebuild once and exit'
     )
+    parser.add_argument(
+        '--mode',
+        choices=['incremental', 'full'],
+        default='incremental',
+        help='Incremental updates with a weekly full refit, or full rebuild every run (default: incremental)'
+    )
+    parser.add_argument(
+        '--full-day',
+        default=FULL_REBUILD_DAY,
+        help=f'Weekday of the full refit in incremental mode (default: {FULL_REBUILD_DAY})'
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='With --test: force a full rebuild'
+    )
+    parser.add_argument(
+        '--index',
+        default=INDEX_PATH,
+        help=f'Index pickle path; the store is written next to it (default: {INDEX_PATH})'
+    )
     
     args = parser.parse_args()
     
     # Create scheduler
     scheduler = IndexScheduler(
         rebuild_frequency=args.frequency,
-        rebuild_time=args.time
+        rebuild_time=args.time,
+        mode=args.mode,
+        full_rebuild_day=args.full_day,
+        index_path=args.index
     )
     
     # Test mode - single rebuild
     if args.test:
         logger.info("🧪 TEST MODE: Running single rebuild")
-        scheduler.rebuild_index()
+        scheduler.rebuild_index(full=True if args.full else None)
         return
     
     # Background mode
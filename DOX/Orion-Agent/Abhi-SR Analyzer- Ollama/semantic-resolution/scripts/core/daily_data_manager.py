@@ -8,6 +8,7 @@ import pandas as pd
 from datetime import datetime
 import logging
 from pathlib import Path
+from scripts.core.historical_data_indexer import HistoricalDataIndexer
 
 logger = logging.getLogger(__name__)
 
@@ -140,15 +141,15 @@ class DailyDataManager:
             logger.info("No staging data to merge")
             return 0
         
-        # Load historical index
+        # Load historical index (the incremental store when it is newer than the pickle)
+        indexer = HistoricalDataIndexer()
         try:
-            with open(self.historical_path, 'rb') as f:
-                historical_index = pickle.load(f)
+            indexer.load_index(self.historical_path)
         except FileNotFoundError:
             logger.error("Historical index not found!")
             return 0
         
-        historical_data = historical_index.get('historical_data', [])
+        historical_data = indexer.historical_data
         existing_sr_ids = {sr.get('sr_id') for sr in historical_data}
         
         # Convert staging SRs to historical format
@@ -189,11 +190,6 @@ class DailyDataManager:
             logger.info("No new records to add")
             return 0
         
-        # Add to historical data
-        historical_data.extend(new_records)
-        historical_index['historical_data'] = historical_data
-        historical_index['indexed_at'] = datetime.now().isoformat()
-        
         # Backup old index
         backup_path = f"{self.historical_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         try:
@@ -203,9 +199,11 @@ class DailyDataManager:
         except Exception as e:
             logger.warning(f"Could not create backup: {e}")
         
-        # Save updated index
-        with open(self.historical_path, 'wb') as f:
-            pickle.dump(historical_index, f)
+        # Add to historical data (vectorized on the way in), then save the pickle
+        # and the incremental store the scheduler continues from
+        indexer.add_records(new_records, 'daily_upload')
+        indexer.save_index(self.historical_path)
+        indexer.save_store(HistoricalDataIndexer.store_path(self.historical_path))
         
         logger.info(f"✓ Added {len(new_records)} new SRs to historical index")
         logger.info(f"✓ Total historical records: {len(historical_data)}")
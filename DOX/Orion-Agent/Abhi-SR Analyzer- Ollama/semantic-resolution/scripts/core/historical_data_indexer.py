@@ -1,80 +1,180 @@
 """
 Historical Data Indexer for SR Semantic Search
 Builds a searchable index from past SR data for predictions
+
+Two ways to keep the index current:
+- Full build:   load_historical_data() + build_index() fits the TF-IDF vocabulary
+                over every record (save_index() writes the classic pickle)
+- Incremental:  load_store() + update_index() re-reads only past_data files whose
+                mtime/size/SHA-1 changed and sr_tracking.db rows whose content
+                changed, vectorizes the new documents with the existing
+                vocabulary and recomputes IDF over all documents
+
+The incremental store (save_store) is a folder of .npy arrays - raw term counts
+and TF-IDF weights sharing one CSR structure - that load_store() memory-maps.
+
+Records from admin uploads, daily uploads and user feedback go through
+load_index() + add_records() + save_index()/save_store(), so the scheduler's
+next incremental run starts from a store that already has them.
 """
 
 import pandas as pd
 import os
 import json
 import pickle
+import shutil
+import sqlite3
+import hashlib
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import warnings
 warnings.filterwarnings('ignore')
 
+# Vocabulary fit (full build); incremental updates reuse the fitted vocabulary
+VECTORIZER_PARAMS = {
+    'max_features': 5000,
+    'ngram_range': (1, 3),
+    'stop_words': 'english',
+    'min_df': 2
+}
+
+STORE_FORMAT_VERSION = 1
+
+# source_file of records read from sr_tracking.db (sr_records table)
+TRACKING_SOURCE = 'sr_tracking.db'
+
+# source_file of records added through add_records() (not re-read from past_data/
+# or sr_tracking.db, so a full rebuild carries them over)
+EXTERNAL_SOURCES = ('admin_upload', 'daily_upload', 'user_feedback')
+
+# Refit the vocabulary once the index grew by this share since the last full build
+REFIT_RATIO = 0.2
+
 
 class HistoricalDataIndexer:
     """
     Indexes historical SR data for semantic search
     """
     
-    def __init__(self, past_data_dir: str = "past_data"):
+    def __init__(self, past_data_dir: str = "past_data", sr_db_path: str = None):
         self.past_data_dir = past_data_dir
+        self.sr_db_path = sr_db_path
         self.historical_data = []
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 3),
-            stop_words='english',
-            min_df=2
-        )
+        self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
         self.tfidf_matrix = None
         self.indexed_at = None
         
+        # Incremental state: raw term counts over the fitted vocabulary + what was indexed
+        self.counts_matrix = None
+        self.file_manifest = {}      # past_data filename -> {'mtime', 'size', 'sha1'}
+        self.tracking_rows = {}      # sr_tracking.db rowid -> row fingerprint
+        self.vocab_docs = 0          # documents the vocabulary was fitted on
+        
     def load_historical_data(self) -> int:
-        """Load all historical Excel files from past_data directory"""
+        """Load all historical Excel files from past_data directory (and sr_tracking.db if configured)"""
         print(f"Loading historical data from {self.past_data_dir}...")
         
+        self.file_manifest = {}
+        self.tracking_rows = {}
         total_records = 0
-        for filename in sorted(os.listdir(self.past_data_dir)):
-            if filename.endswith(('.xls', '.xlsx')):
-                file_path = os.path.join(self.past_data_dir, filename)
-                print(f"   Loading {filename}...", end='')
-                
-                try:
-                    # Read Excel file
-                    df = pd.read_excel(file_path)
-                    
-                    # Skip if it's a header row issue
-                    if len(df) > 0 and 'Inc ID' in str(df.iloc[0].values):
-                        # Column names are in first row
-                        df.columns = df.iloc[0]
-                        df = df[1:].reset_index(drop=True)
-                    
-                    records_added = self._process_dataframe(df, filename)
-                    total_records += records_added
-                    print(f" OK - {records_added} records")
-                    
-                except Exception as e:
-                    print(f" ERROR: {str(e)}")
-                    continue
+        for filename in self._data_files():
+            total_records += self._load_file(filename)
+        
+        if self.sr_db_path:
+            columns, rows = self._read_tracking_rows()
+            total_records += self._load_tracking_rows(columns, rows)
         
         print(f"\nTotal historical records loaded: {total_records}")
         return total_records
     
+    def _data_files(self) -> List[str]:
+        return [f for f in sorted(os.listdir(self.past_data_dir)) if f.endswith(('.xls', '.xlsx'))]
+    
+    def _file_signature(self, filename: str, with_hash: bool = True) -> Dict[str, Any]:
+        """mtime + size (cheap change check) and optionally the SHA-1 of the content"""
+        file_path = os.path.join(self.past_data_dir, filename)
+        stat = os.stat(file_path)
+        signature = {'mtime': stat.st_mtime, 'size': stat.st_size}
+        if with_hash:
+            sha1 = hashlib.sha1()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha1.update(chunk)
+            signature['sha1'] = sha1.hexdigest()
+        return signature
+    
+    def _load_file(self, filename: str) -> int:
+        """Load one past_data Excel file and record it in the manifest"""
+        file_path = os.path.join(self.past_data_dir, filename)
+        print(f"   Loading {filename}...", end='')
+        
+        try:
+            # Read Excel file
+            df = pd.read_excel(file_path)
+            
+            # Skip if it's a header row issue
+            if len(df) > 0 and 'Inc ID' in str(df.iloc[0].values):
+                # Column names are in first row
+                df.columns = df.iloc[0]
+                df = df[1:].reset_index(drop=True)
+            
+            records_added = self._process_dataframe(df, filename)
+            print(f" OK - {records_added} records")
+            
+        except Exception as e:
+            print(f" ERROR: {str(e)}")
+            return 0
+        
+        self.file_manifest[filename] = self._file_signature(filename)
+        return records_added
+    
+    def _read_tracking_rows(self) -> Tuple[List[str], Dict[int, tuple]]:
+        """All sr_records rows of sr_tracking.db keyed by rowid (empty if the table is missing)"""
+        if not self.sr_db_path or not os.path.exists(self.sr_db_path):
+            return [], {}
+        conn = sqlite3.connect(self.sr_db_path)
+        try:
+            cursor = conn.execute("SELECT rowid, * FROM sr_records")
+            columns = [d[0] for d in cursor.description][1:]
+            return columns, {row[0]: row[1:] for row in cursor}
+        except sqlite3.Error as e:
+            print(f"   sr_tracking.db not indexed: {e}")
+            return [], {}
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _row_fingerprint(row: tuple) -> str:
+        return hashlib.sha1(repr(row).encode('utf-8')).hexdigest()
+    
+    def _load_tracking_rows(self, columns: List[str], rows: Dict[int, tuple]) -> int:
+        """Index the given sr_tracking.db rows (records carry source_row = rowid)"""
+        if not rows:
+            return 0
+        print(f"   Loading {TRACKING_SOURCE} ({len(rows)} rows)...", end='')
+        df = pd.DataFrame(list(rows.values()), columns=columns, index=list(rows.keys()))
+        records_added = self._process_dataframe(df, TRACKING_SOURCE)
+        for rowid, row in rows.items():
+            self.tracking_rows[rowid] = self._row_fingerprint(row)
+        print(f" OK - {records_added} records")
+        return records_added
+    
     def _process_dataframe(self, df: pd.DataFrame, source_file: str) -> int:
         """Process a dataframe and extract relevant SR information"""
         records_added = 0
         
         # Identify key columns - updated for past_data format
-        id_col = self._find_column(df, ['Customer Call ID', 'Inc Call ID', 'Call ID', 'SR ID', 'Inc ID'])
+        id_col = self._find_column(df, ['Customer Call ID', 'Inc Call ID', 'Call ID', 'SR ID', 'Inc ID', 'sr_id'])
         desc_col = self._find_column(df, ['Description*', 'Description', 'Summary', 'Inc Description'])
         notes_col = self._find_column(df, ['Notes', 'Resolution', 'Resolution*', 'Inc Resolution'])
         status_col = self._find_column(df, ['Status*', 'STATUS', 'Status', 'Inc Current EIR - Status'])
         priority_col = self._find_column(df, ['Customer Priority', 'Priority', 'UTS Priority'])
-        group_col = self._find_column(df, ['Assigned Group*', 'Assigned Group', 'Assignee Support Group', 'Owner Support Group'])
+        group_col = self._find_column(df, ['Assigned Group*', 'Assigned Group', 'Assignee Support Group', 'Owner Support Group', 'assigned_group'])
         resolution_col = self._find_column(df, ['Resolution*', 'Resolution', 'Inc Resolution'])
         
         if not id_col or not desc_col:
@@ -110,6 +210,8 @@ class HistoricalDataIndexer:
                 'source_file': source_file,
                 'resolution': resolution[:500] if resolution else ''
             }
+            if source_file == TRACKING_SOURCE:
+                record['source_row'] = idx
             
             self.historical_data.append(record)
             records_added += 1
@@ -213,7 +315,7 @@ class HistoricalDataIndexer:
         return outcome
     
     def build_index(self):
-        """Build TF-IDF index for semantic search"""
+        """Build TF-IDF index for semantic search (fits the vocabulary)"""
         if not self.historical_data:
             raise ValueError("No historical data loaded. Call load_historical_data() first.")
         
@@ -222,12 +324,166 @@ class HistoricalDataIndexer:
         # Extract searchable texts
         texts = [record['searchable_text'] for record in self.historical_data]
         
-        # Build TF-IDF matrix
-        self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+        # Raw counts over the fitted vocabulary, then TF-IDF weights
+        # (CountVectorizer + the TfidfTransformer formula == TfidfVectorizer.fit_transform)
+        counter = CountVectorizer(**VECTORIZER_PARAMS, dtype=np.float32)
+        self.counts_matrix = counter.fit_transform(texts)
+        self.vectorizer = self._make_vectorizer(counter.vocabulary_)
+        self.vocab_docs = len(texts)
+        self._apply_idf()
         self.indexed_at = datetime.now()
         
         print(f"Index built with {self.tfidf_matrix.shape[0]} documents and {self.tfidf_matrix.shape[1]} features")
     
+    @staticmethod
+    def _make_vectorizer(vocabulary: Dict[str, int]) -> TfidfVectorizer:
+        """TfidfVectorizer bound to a fixed vocabulary (idf_ is set by _apply_idf)"""
+        return TfidfVectorizer(vocabulary=vocabulary, ngram_range=VECTORIZER_PARAMS['ngram_range'],
+                               stop_words=VECTORIZER_PARAMS['stop_words'], dtype=np.float32)
+    
+    def _apply_idf(self):
+        """Recompute smooth IDF over the current documents and re-weight the counts (L2 rows)"""
+        n_docs, n_features = self.counts_matrix.shape
+        doc_freq = np.bincount(self.counts_matrix.indices, minlength=n_features)
+        idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        self.vectorizer.idf_ = idf
+        
+        # Same CSR structure as the counts, so the store keeps one copy of indices/indptr
+        weighted = sparse.csr_matrix(
+            (self.counts_matrix.data * idf[self.counts_matrix.indices].astype(np.float32),
+             self.counts_matrix.indices, self.counts_matrix.indptr),
+            shape=self.counts_matrix.shape
+        )
+        self.tfidf_matrix = normalize(weighted, norm='l2', copy=False)
+    
+    def needs_full_rebuild(self) -> bool:
+        """True if there is no fitted vocabulary or the index grew REFIT_RATIO past the last fit"""
+        if self.counts_matrix is None or not self.vocab_docs:
+            return True
+        return len(self.historical_data) > self.vocab_docs * (1 + REFIT_RATIO)
+    
+    def update_index(self) -> Dict[str, int]:
+        """
+        Bring a loaded store up to date with past_data/ and sr_tracking.db
+        
+        Only new/changed files (mtime + size, confirmed by SHA-1) and changed
+        tracking rows are parsed. Records of changed or deleted sources are
+        dropped, new documents are vectorized with the existing vocabulary and
+        IDF is recomputed over all documents. Call after load_store().
+        
+        Returns:
+            Change counts (files_added/changed/removed, rows_changed/removed,
+            records_removed/added)
+        """
+        if self.counts_matrix is None:
+            raise ValueError("No incremental index loaded. Call load_store() or build_index() first.")
+        
+        stats = dict.fromkeys(['files_added', 'files_changed', 'files_removed', 'rows_changed',
+                               'rows_removed', 'records_removed', 'records_added'], 0)
+        
+        # past_data files
+        current_files = self._data_files()
+        stale_files = set(self.file_manifest) - set(current_files)
+        stats['files_removed'] = len(stale_files)
+        for filename in stale_files:
+            del self.file_manifest[filename]
+        
+        files_to_load = []
+        for filename in current_files:
+            known = self.file_manifest.get(filename)
+            signature = self._file_signature(filename, with_hash=False)
+            if known and known['mtime'] == signature['mtime'] and known['size'] == signature['size']:
+                continue
+            signature = self._file_signature(filename)
+            if known and known.get('sha1') == signature['sha1']:
+                self.file_manifest[filename] = signature  # Touched, same content
+                continue
+            if known:
+                stale_files.add(filename)
+                stats['files_changed'] += 1
+            else:
+                stats['files_added'] += 1
+            files_to_load.append(filename)
+        
+        # sr_tracking.db rows
+        stale_rows = set()
+        columns, changed_rows = [], {}
+        if self.sr_db_path:
+            columns, rows = self._read_tracking_rows()
+            fingerprints = {rowid: self._row_fingerprint(row) for rowid, row in rows.items()}
+            changed_rows = {rowid: rows[rowid] for rowid, fingerprint in fingerprints.items()
+                            if self.tracking_rows.get(rowid) != fingerprint}
+            removed_rows = set(self.tracking_rows) - set(fingerprints)
+            stale_rows = (set(changed_rows) & set(self.tracking_rows)) | removed_rows
+            for rowid in removed_rows:
+                del self.tracking_rows[rowid]
+            stats['rows_changed'] = len(changed_rows)
+            stats['rows_removed'] = len(removed_rows)
+        
+        # Drop records whose source changed or disappeared
+        if stale_files or stale_rows:
+            keep = [i for i, record in enumerate(self.historical_data)
+                    if record.get('source_file') not in stale_files
+                    and not (record['source_file'] == TRACKING_SOURCE and record.get('source_row') in stale_rows)]
+            stats['records_removed'] = len(self.historical_data) - len(keep)
+            if stats['records_removed']:
+                self.historical_data = [self.historical_data[i] for i in keep]
+                self.counts_matrix = self.counts_matrix[keep]
+        
+        # Parse and vectorize only what is new
+        start = len(self.historical_data)
+        for filename in files_to_load:
+            self._load_file(filename)
+        self._load_tracking_rows(columns, changed_rows)
+        added = self.historical_data[start:]
+        stats['records_added'] = len(added)
+        if added:
+            self._append_counts(added)
+        
+        if stats['records_added'] or stats['records_removed']:
+            self._apply_idf()
+            self.indexed_at = datetime.now()
+        return stats
+    
+    def _append_counts(self, records: List[Dict]):
+        """Vectorize records with the existing vocabulary and append them to the counts"""
+        counter = CountVectorizer(vocabulary=self.vectorizer.vocabulary, dtype=np.float32,
+                                  ngram_range=VECTORIZER_PARAMS['ngram_range'],
+                                  stop_words=VECTORIZER_PARAMS['stop_words'])
+        new_counts = counter.transform([record.get('searchable_text', '') for record in records])
+        self.counts_matrix = sparse.vstack([self.counts_matrix, new_counts], format='csr')
+    
+    def add_records(self, records: List[Dict], source: str) -> int:
+        """
+        Append records that don't come from past_data/ or sr_tracking.db
+        (admin uploads, daily uploads, user feedback)
+        
+        With a loaded store they are vectorized with the existing vocabulary and
+        IDF is recomputed, like update_index(); an index loaded from the legacy
+        pickle has no term counts and is refitted with build_index(). Records
+        keep source_file=source (one of EXTERNAL_SOURCES), so update_index()
+        never drops them and a full rebuild carries them over.
+        
+        Returns:
+            Number of records added
+        """
+        if not records:
+            return 0
+        for record in records:
+            record.setdefault('source_file', source)
+        self.historical_data.extend(records)
+        if self.counts_matrix is None:
+            self.build_index()
+        else:
+            self._append_counts(records)
+            self._apply_idf()
+            self.indexed_at = datetime.now()
+        return len(records)
+    
+    def external_records(self) -> List[Dict]:
+        """Records added through add_records() (kept across full rebuilds)"""
+        return [record for record in self.historical_data if record.get('source_file') in EXTERNAL_SOURCES]
+    
     def search_similar(self, query: str, top_k: int = 10) -> List[Tuple[Dict, float]]:
         """Search for similar historical SRs"""
         if self.tfidf_matrix is None:
@@ -237,10 +493,18 @@ class HistoricalDataIndexer:
         query_vector = self.vectorizer.transform([query])
         
         # Calculate similarities
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+        if self.counts_matrix is not None:
+            # Rows are L2-normalized: the dot product is the cosine, without copying the matrix
+            similarities = (self.tfidf_matrix @ query_vector.T).toarray().ravel()
+        else:
+            similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
         
         # Get top K results
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        if top_k < len(similarities):
+            top_indices = np.argpartition(similarities, -top_k)[-top_k:]
+            top_indices = top_indices[np.argsort(similarities[top_indices])[::-1]]
+        else:
+            top_indices = np.argsort(similarities)[::-1]
         
         results = []
         for idx in top_indices:
@@ -409,8 +673,105 @@ class HistoricalDataIndexer:
             }, f)
         print(f"Index saved to {filepath}")
     
+    @staticmethod
+    def store_path(filepath: str) -> str:
+        """Incremental store folder for a pickle path (historical_sr_index.pkl -> historical_sr_index.idx)"""
+        return os.path.splitext(filepath)[0] + '.idx'
+    
+    def save_store(self, directory: str = "historical_sr_index.idx"):
+        """
+        Save the index as a sparse, memory-mappable store (written next to the
+        target, then swapped in)
+        
+            manifest.json   counts, vectorizer settings, file manifest, vocabulary fit size
+            vocabulary.json terms in feature order
+            indices.npy / indptr.npy   CSR structure shared by both matrices
+            counts.npy / tfidf.npy     raw term counts / L2-normalized TF-IDF weights
+            idf.npy         current IDF
+            records.pkl     historical_data records (plain dicts)
+            tracking.json   sr_tracking.db rowid -> row fingerprint
+        """
+        if self.counts_matrix is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        directory = directory.rstrip('/\\')
+        tmp = directory + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        
+        counts = self.counts_matrix
+        index_dtype = np.int32 if counts.nnz < np.iinfo(np.int32).max else np.int64
+        np.save(os.path.join(tmp, 'indices.npy'), counts.indices.astype(index_dtype, copy=False))
+        np.save(os.path.join(tmp, 'indptr.npy'), counts.indptr.astype(index_dtype, copy=False))
+        np.save(os.path.join(tmp, 'counts.npy'), counts.data.astype(np.float32, copy=False))
+        np.save(os.path.join(tmp, 'tfidf.npy'), self.tfidf_matrix.data.astype(np.float32, copy=False))
+        np.save(os.path.join(tmp, 'idf.npy'), self.vectorizer.idf_)
+        
+        vocabulary = self.vectorizer.vocabulary
+        with open(os.path.join(tmp, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(sorted(vocabulary, key=vocabulary.get), f, ensure_ascii=False)
+        with open(os.path.join(tmp, 'records.pkl'), 'wb') as f:
+            pickle.dump(self.historical_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp, 'tracking.json'), 'w') as f:
+            json.dump({str(k): v for k, v in self.tracking_rows.items()}, f)
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump({
+                'format_version': STORE_FORMAT_VERSION,
+                'documents': counts.shape[0],
+                'features': counts.shape[1],
+                'nnz': int(counts.nnz),
+                'vocab_docs': self.vocab_docs,
+                'indexed_at': self.indexed_at.isoformat() if self.indexed_at else None,
+                'sr_db_path': self.sr_db_path,
+                'files': self.file_manifest
+            }, f, indent=2)
+        
+        if os.path.exists(directory):
+            old = directory + '.old'
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+            os.replace(tmp, directory)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, directory)
+        print(f"Index store saved to {directory} ({counts.shape[0]} documents, {counts.nnz} non-zeros)")
+    
+    def load_store(self, directory: str = "historical_sr_index.idx", mmap: bool = True):
+        """Load a store written by save_store (matrices memory-mapped unless mmap=False)"""
+        with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported index store format in {directory}")
+        
+        mode = 'r' if mmap else None
+        load = lambda name: np.load(os.path.join(directory, name), mmap_mode=mode)
+        indices, indptr = load('indices.npy'), load('indptr.npy')
+        shape = (manifest['documents'], manifest['features'])
+        self.counts_matrix = sparse.csr_matrix((load('counts.npy'), indices, indptr), shape=shape, copy=False)
+        self.tfidf_matrix = sparse.csr_matrix((load('tfidf.npy'), indices, indptr), shape=shape, copy=False)
+        
+        with open(os.path.join(directory, 'vocabulary.json'), 'r', encoding='utf-8') as f:
+            self.vectorizer = self._make_vectorizer({term: i for i, term in enumerate(json.load(f))})
+        self.vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+        with open(os.path.join(directory, 'records.pkl'), 'rb') as f:
+            self.historical_data = pickle.load(f)
+        with open(os.path.join(directory, 'tracking.json'), 'r') as f:
+            self.tracking_rows = {int(k): v for k, v in json.load(f).items()}
+        
+        self.file_manifest = manifest.get('files', {})
+        self.vocab_docs = manifest.get('vocab_docs', 0)
+        self.indexed_at = datetime.fromisoformat(manifest['indexed_at']) if manifest.get('indexed_at') else None
+        print(f"Index store loaded from {directory} ({shape[0]} documents)")
+    
     def load_index(self, filepath: str = "historical_sr_index.pkl"):
-        """Load index from disk"""
+        """Load index from disk (prefers an incremental store at least as new as the pickle)"""
+        store = filepath if os.path.isdir(filepath) else self.store_path(filepath)
+        store_manifest = os.path.join(store, 'manifest.json')
+        if os.path.exists(store_manifest) and (
+                not os.path.exists(filepath) or os.path.isdir(filepath)
+                or os.path.getmtime(store_manifest) >= os.path.getmtime(filepath)):
+            self.load_store(store)
+            return
+        
         with open(filepath, 'rb') as f:
             data = pickle.load(f)
             self.historical_data = data['historical_data']
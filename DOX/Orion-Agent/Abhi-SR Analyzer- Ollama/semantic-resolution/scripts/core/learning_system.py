@@ -3,7 +3,6 @@ Continuous Learning System - Auto-updates historical index with new data and fee
 """
 
 import os
-import pickle
 import logging
 from datetime import datetime
 from scripts.core.historical_data_indexer import HistoricalDataIndexer
@@ -19,34 +18,27 @@ class ContinuousLearningSystem:
         self.historical_path = 'vector store/historical_sr_index.pkl'
         self.feedback_path = 'vector store/user_feedback.pkl'
         
+    def _load_indexer(self):
+        """Historical index via load_index() (the incremental store when it is newer than the pickle)"""
+        indexer = HistoricalDataIndexer()
+        indexer.load_index(self.historical_path)
+        return indexer
+    
+    def _save_indexer(self, indexer):
+        """Write the pickle and the incremental store the scheduler continues from"""
+        indexer.save_index(self.historical_path)
+        indexer.save_store(HistoricalDataIndexer.store_path(self.historical_path))
+    
     def rebuild_vectors(self):
-        """Rebuild TF-IDF vectors after adding new data"""
+        """Rebuild TF-IDF vectors (refits the vocabulary over all records)"""
         logger.info("Rebuilding TF-IDF vectors...")
         
         try:
-            # Load historical index
-            with open(self.historical_path, 'rb') as f:
-                data = pickle.load(f)
-            
-            historical_data = data.get('historical_data', [])
-            
-            # Create new indexer
-            indexer = HistoricalDataIndexer()
+            indexer = self._load_indexer()
+            indexer.build_index()
+            self._save_indexer(indexer)
             
-            # Build vectors
-            indexer.historical_data = historical_data
-            indexer._build_tfidf_vectors()
-            
-            # Update data
-            data['vectorizer'] = indexer.vectorizer
-            data['tfidf_matrix'] = indexer.tfidf_matrix
-            data['indexed_at'] = datetime.now().isoformat()
-            
-            # Save
-            with open(self.historical_path, 'wb') as f:
-                pickle.dump(data, f)
-            
-            logger.info(f"✓ Rebuilt vectors for {len(historical_data)} records")
+            logger.info(f"✓ Rebuilt vectors for {len(indexer.historical_data)} records")
             return True
             
         except Exception as e:
@@ -74,10 +66,9 @@ class ContinuousLearningSystem:
                 return 0
             
             # Load historical index
-            with open(self.historical_path, 'rb') as f:
-                historical_index = pickle.load(f)
+            indexer = self._load_indexer()
             
-            historical_data = historical_index.get('historical_data', [])
+            historical_data = indexer.historical_data
             existing_sr_ids = {sr.get('sr_id') for sr in historical_data}
             
             # Create synthetic records from feedback
@@ -126,21 +117,13 @@ class ContinuousLearningSystem:
                 logger.info("No new feedback records to add")
                 return 0
             
-            # Add to historical data
-            historical_data.extend(new_records)
-            historical_index['historical_data'] = historical_data
-            historical_index['indexed_at'] = datetime.now().isoformat()
-            
-            # Save updated index
-            with open(self.historical_path, 'wb') as f:
-                pickle.dump(historical_index, f)
+            # Add to historical data (vectorized on the way in) and save
+            indexer.add_records(new_records, 'user_feedback')
+            self._save_indexer(indexer)
             
             logger.info(f"✓ Added {len(new_records)} user feedback records")
             logger.info(f"✓ Total historical records: {len(historical_data)}")
             
-            # Rebuild vectors
-            self.rebuild_vectors()
-            
             return len(new_records)
             
         except Exception as e:
@@ -151,10 +134,9 @@ class ContinuousLearningSystem:
         """Get statistics about the learning system"""
         try:
             # Load historical index
-            with open(self.historical_path, 'rb') as f:
-                data = pickle.load(f)
+            indexer = self._load_indexer()
             
-            historical_data = data.get('historical_data', [])
+            historical_data = indexer.historical_data
             
             # Count by source
             sources = {}
@@ -169,7 +151,8 @@ class ContinuousLearningSystem:
                 'total_records': len(historical_data),
                 'sources': sources,
                 'user_feedback_records': user_feedback_count,
-                'last_indexed': data.get('indexed_at', 'Unknown')
+                'last_indexed': indexer.indexed_at.isoformat() if isinstance(indexer.indexed_at, datetime)
+                                else (indexer.indexed_at or 'Unknown')
             }
             
         except Exception as e:
@@ -0,0 +1,329 @@
+# backend/activity_store.py
+"""
+Columnar Store + Query Engine for the OSO activity data
+
+The activity grid used to scan a list of dicts on every request: lowercase
+every cell for the global search, re-filter per column filter, fully sort the
+result and then slice one page. This store keeps the data column-wise, with
+everything a request needs precomputed:
+
+- Lowercased columns: one '\\x00'-joined string per column (plus one for the
+  whole row, cells split by '\\x01'), so a "contains" filter is a single
+  C-level regex scan, at most one match per cell, mapped back to rows with
+  searchsorted
+- Sort keys: a dense rank per column (equal values share a rank), so sorting
+  is integer work; the full-table permutation per column/direction is cached
+- Pagination: only the requested page is ordered (argpartition + sort of the
+  top rows) instead of sorting the whole filtered set
+- Filter masks for recent (column, term) pairs are kept (LRU), so paging and
+  re-sorting the same search never rescans
+- Distinct counts per column for /stats, computed once at build time
+- Rows: JSON-encoded per row in one byte blob, decoded only for the page
+
+On disk it is a folder next to the JSON (oso_activity_data.columns/) with
+.npy arrays + manifest.json, written by scripts/convert_excel_to_json.py or on
+first load; it is rebuilt when the JSON changes. Row blobs are memory-mapped.
+
+Matching rules are the same as the old list comprehensions:
+    search        any cell: term in str(value).lower()
+    columnFilters per column: value.lower() in str(cell).lower()
+    sortColumn    str(cell).lower(), stable (ties keep file order), asc/desc
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+CELL_SEP = '\x00'
+ROW_CELL_SEP = '\x01'  # Between the cells of one row in the whole-row text
+MASK_CACHE_SIZE = 32   # Recent (column, term) filter masks kept per store
+
+
+def store_path_for(json_path) -> Path:
+    """oso_activity_data.json -> oso_activity_data.columns/"""
+    return Path(json_path).with_suffix('.columns')
+
+
+def _source_signature(json_path) -> Dict:
+    stat = os.stat(json_path)
+    return {'path': str(json_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _joined(values: List[str]):
+    """(utf-8 bytes of the joined values, char offset of each value)"""
+    lengths = np.fromiter((len(v) + 1 for v in values), dtype=np.int64, count=len(values))
+    starts = np.zeros(len(values), dtype=np.int64)
+    if len(values):
+        starts[1:] = np.cumsum(lengths)[:-1]
+    blob = CELL_SEP.join(values).encode('utf-8')
+    return np.frombuffer(blob, dtype=np.uint8).copy(), starts
+
+
+def _dense_rank(values: List[str]) -> np.ndarray:
+    """Rank of each value in sorted order of the distinct values"""
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return np.fromiter((ranks[v] for v in values), dtype=np.int32, count=len(values))
+
+
+class ActivityStore:
+    """Columnar, pre-normalized view of the activity records"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Dict):
+        self.arrays = arrays
+        self.manifest = manifest
+        self.columns: List[str] = manifest['columns']
+        self.total_rows: int = manifest['total_rows']
+        self.distinct: Dict[str, int] = manifest['distinct']
+        self._lower_text: Dict[int, str] = {}
+        self._permutations: Dict[tuple, np.ndarray] = {}
+        self._masks: 'OrderedDict[tuple, np.ndarray]' = OrderedDict()
+        self._masks_lock = threading.Lock()
+
+    # ========================================================================
+    # BUILD / PERSIST
+    # ========================================================================
+
+    @classmethod
+    def build(cls, columns: List[str], records: List[Dict], source: Dict = None) -> 'ActivityStore':
+        """
+        Build the store from the records loaded from JSON/Excel.
+
+        Args:
+            columns: Column names (grid order)
+            records: One dict per row
+            source: Signature of the JSON it was built from (for staleness checks)
+        """
+        arrays = {}
+        # default=str: rows read from the Excel fallback carry pd.Timestamp cells
+        row_blobs = [json.dumps(r, ensure_ascii=False, default=str).encode('utf-8') for r in records]
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in row_blobs])
+        arrays['rows'] = np.frombuffer(b''.join(row_blobs), dtype=np.uint8).copy()
+        arrays['row_offsets'] = offsets
+
+        distinct = {}
+        for i, column in enumerate(columns):
+            cells = [r.get(column, '') for r in records]
+            lower = [str(v).lower() for v in cells]
+            arrays[f'lower_{i}'], arrays[f'starts_{i}'] = _joined(lower)
+            arrays[f'rank_{i}'] = _dense_rank(lower)
+            distinct[column] = len(set(str(v) for v in cells if v))
+
+        # Global search matches any value of the row dict
+        row_text = [ROW_CELL_SEP.join(str(v).lower() for v in r.values()) for r in records]
+        arrays['lower_row'], arrays['starts_row'] = _joined(row_text)
+
+        manifest = {
+            'format_version': STORE_FORMAT_VERSION,
+            'columns': list(columns),
+            'total_rows': len(records),
+            'distinct': distinct,
+            'source': source or {},
+            'built_at': datetime.now().isoformat()
+        }
+        return cls(arrays, manifest)
+
+    def save(self, directory: Path):
+        """Write the arrays + manifest next to the target, then swap it in"""
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, array in self.arrays.items():
+            np.save(tmp / f'{name}.npy', np.asarray(array))
+        with open(tmp / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+
+        if directory.exists():
+            old = directory.with_name(directory.name + '.old')
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+            os.replace(tmp, directory)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, directory)
+
+    @classmethod
+    def load(cls, directory: Path, source_json: Path = None) -> Optional['ActivityStore']:
+        """
+        Load a saved store.
+
+        Returns:
+            ActivityStore, or None if it is missing, from another format
+            version, or older than source_json
+        """
+        directory = Path(directory)
+        try:
+            with open(directory / 'manifest.json', 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('format_version') != STORE_FORMAT_VERSION:
+            return None
+        if source_json is not None:
+            current = _source_signature(source_json)
+            stored = manifest.get('source', {})
+            if (stored.get('mtime_ns'), stored.get('size')) != (current['mtime_ns'], current['size']):
+                return None
+
+        arrays = {}
+        names = ['rows', 'row_offsets', 'lower_row', 'starts_row'] + [
+            f'{kind}_{i}' for i in range(len(manifest['columns'])) for kind in ('lower', 'starts', 'rank')]
+        for name in names:
+            path = directory / f'{name}.npy'
+            try:
+                arrays[name] = np.load(path, mmap_mode='r')
+            except ValueError:
+                arrays[name] = np.load(path)  # Zero-length arrays cannot be mapped
+        return cls(arrays, manifest)
+
+    @classmethod
+    def load_or_build(cls, json_path: Path, loader, rebuild: bool = False) -> 'ActivityStore':
+        """
+        Load the store for json_path, rebuilding it (and saving, best effort)
+        when it is missing or stale.
+
+        Args:
+            json_path: oso_activity_data.json (None = Excel fallback, in-memory only)
+            loader: Callable returning {'columns': [...], 'data': [...]} (used to
+                rebuild; exceptions propagate)
+            rebuild: Ignore an up-to-date store
+        """
+        if json_path and not rebuild:
+            store = cls.load(store_path_for(json_path), source_json=json_path)
+            if store is not None:
+                print(f"[INFO] Activity store loaded: {store.total_rows} rows ({store_path_for(json_path)})")
+                return store
+
+        source = _source_signature(json_path) if json_path else None
+        data = loader()
+        store = cls.build(data.get('columns', []), data.get('data', []), source=source)
+        print(f"[INFO] Activity store built: {store.total_rows} rows, {len(store.columns)} columns")
+        if json_path:
+            try:
+                store.save(store_path_for(json_path))
+                print(f"[INFO] Activity store saved: {store_path_for(json_path)}")
+            except OSError as e:
+                print(f"[WARN] Could not save activity store: {e}")
+        return store
+
+    # ========================================================================
+    # QUERY
+    # ========================================================================
+
+    def _text(self, key) -> str:
+        if key not in self._lower_text:
+            self._lower_text[key] = np.asarray(self.arrays[f'lower_{key}']).tobytes().decode('utf-8')
+        return self._lower_text[key]
+
+    def _contains(self, key, term: str) -> np.ndarray:
+        """Boolean row mask (read-only, cached): term in the lowercased cell of column `key` (or 'row': any cell)"""
+        with self._masks_lock:
+            if (key, term) in self._masks:
+                self._masks.move_to_end((key, term))
+                return self._masks[(key, term)]
+
+        mask = self._scan(key, term)
+        mask.flags.writeable = False
+        with self._masks_lock:
+            self._masks[(key, term)] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+    def _scan(self, key, term: str) -> np.ndarray:
+        mask = np.zeros(self.total_rows, dtype=bool)
+        if CELL_SEP in term or (key == 'row' and ROW_CELL_SEP in term):
+            return mask
+        # The trailing [^\x00]* consumes the rest of the cell: one match per cell at most
+        pattern = re.escape(term) + '[^' + CELL_SEP + ']*'
+        positions = [m.start() for m in re.finditer(pattern, self._text(key))]
+        if positions:
+            mask[np.searchsorted(self.arrays[f'starts_{key}'], positions, side='right') - 1] = True
+        return mask
+
+    def filter(self, search: str = '', column_filters: Dict = None) -> Optional[np.ndarray]:
+        """
+        Row mask for the global search + column filters (None = no filter).
+
+        Args:
+            search: Lowercased term matched against every column
+            column_filters: {column: value}, value matched case-insensitively
+        """
+        mask = self._contains('row', search) if search else None
+
+        for column, value in (column_filters or {}).items():
+            if not value:
+                continue
+            if column in self.columns:
+                hits = self._contains(self.columns.index(column), str(value).lower())
+            else:
+                hits = np.zeros(self.total_rows, dtype=bool)  # Unknown column: cell is ''
+            mask = hits if mask is None else mask & hits
+        return mask
+
+    def _sort_keys(self, i: int, descending: bool, rows: np.ndarray) -> np.ndarray:
+        """Composite int64 key: column rank (flipped for desc), then row number (stable ties)"""
+        rank = np.asarray(self.arrays[f'rank_{i}'])[rows].astype(np.int64)
+        if descending:
+            rank = int(self.arrays[f'rank_{i}'].max()) - rank
+        return rank * max(self.total_rows, 1) + rows
+
+    def _permutation(self, i: int, descending: bool) -> np.ndarray:
+        """Full-table row order for one column/direction, computed once"""
+        key = (i, descending)
+        if key not in self._permutations:
+            rows = np.arange(self.total_rows, dtype=np.int64)
+            self._permutations[key] = np.argsort(self._sort_keys(i, descending, rows), kind='stable')
+        return self._permutations[key]
+
+    def page_rows(self, mask: Optional[np.ndarray], sort_column: str = '', descending: bool = False,
+                  start: int = 0, count: int = 100) -> np.ndarray:
+        """Row numbers for one page of the filtered, sorted result"""
+        end = start + count
+        if sort_column not in self.columns or self.total_rows == 0:
+            rows = np.arange(self.total_rows) if mask is None else np.flatnonzero(mask)
+            return rows[start:end]
+
+        i = self.columns.index(sort_column)
+        if mask is None:
+            return self._permutation(i, descending)[start:end]
+
+        rows = np.flatnonzero(mask)
+        if start >= len(rows):
+            return rows[:0]
+        keys = self._sort_keys(i, descending, rows)
+        if end < len(rows):
+            top = np.argpartition(keys, end - 1)[:end]  # Only the first `end` rows get ordered
+            order = top[np.argsort(keys[top])]
+        else:
+            order = np.argsort(keys)
+        return rows[order[start:end]]
+
+    def rows(self, row_numbers) -> List[Dict]:
+        """Decode rows back into the original dicts"""
+        blob, offsets = self.arrays['rows'], self.arrays['row_offsets']
+        return [json.loads(bytes(blob[offsets[r]:offsets[r + 1]])) for r in np.asarray(row_numbers).tolist()]
+
+    def query(self, search: str = '', column_filters: Dict = None, sort_column: str = '',
+              sort_direction: str = 'asc', page: int = 1, page_size: int = 100) -> Dict:
+        """
+        Filter, sort and paginate.
+
+        Returns:
+            dict: data (page rows), total_rows (filtered count)
+        """
+        mask = self.filter(search, column_filters)
+        total = self.total_rows if mask is None else int(mask.sum())
+        start = max(page - 1, 0) * page_size
+        rows = self.page_rows(mask, sort_column, sort_direction == 'desc', start, page_size)
+        return {'data': self.rows(rows), 'total_rows': total}
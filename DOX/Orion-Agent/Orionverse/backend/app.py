@@ -1,7 +1,9 @@
 # backend/app.py
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 
+import database
+
 # Import all blueprints
 from routes.auth import auth_bp
 from routes.billing import billing_bp
@@ -31,6 +33,11 @@ def create_app():
     app.register_blueprint(oni_api_bp, url_prefix='/api/oni')
     app.register_blueprint(activity_data_bp, url_prefix='/api/activity')
 
+    @app.route('/api/db/pool', methods=['GET'])
+    def db_pool_stats():
+        """Database connection pool metrics (wait time, in use, created, ...)"""
+        return jsonify(database.pool_stats())
+
     return app
 
 if __name__ == '__main__':
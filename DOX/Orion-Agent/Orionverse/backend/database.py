@@ -3,18 +3,323 @@
 Data Access Layer for Orionverse Hub
 
 This module handles all database connections and operations.
-SECURITY WARNING: Credentials are currently hardcoded. 
-TODO: Move to environment variables before production deployment.
+SECURITY WARNING: Credentials default to hardcoded values. 
+TODO: Set DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT before production deployment.
+
+Connections come from a process-wide pool (connections through pgbouncer are
+reused instead of opened per request):
+
+    with db_cursor() as cur:                    # RealDictCursor, rolled back on exit
+        execute_prepared(cur, 'workaround_by_id', (42,))
+        row = cur.fetchone()
+
+    with db_cursor(commit=True) as cur:         # committed if the block succeeds
+        cur.execute("UPDATE ...", (...))
+
+    pool_stats()                                # wait time, in use, created, ...
+
+Pool settings (environment):
+    DB_POOL_MIN               connections opened up front (default 1)
+    DB_POOL_MAX               connections kept open / in use at most (default 10)
+    DB_POOL_TIMEOUT           seconds to wait for a free connection (default 10)
+    DB_PREPARED_STATEMENTS    PREPARE the hot queries per connection (default 1, 0 = off)
 """
 
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
 from werkzeug.security import generate_password_hash
 
 
+DB_SETTINGS = {
+    'database': os.environ.get('DB_NAME', 'prodossdb'),
+    'user': os.environ.get('DB_USER', 'ossdb01uams'),
+    'password': os.environ.get('DB_PASSWORD', 'Pr0d_ossdb01uams'),
+    'host': os.environ.get('DB_HOST', 'oso-pstgr-rd.orion.comcast.com'),
+    'port': os.environ.get('DB_PORT', '6432')
+}
+
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', '1') != '0'
+
+# Hot read queries, prepared once per pooled connection ($n placeholders).
+# A prepared-statement failure rolls back the current transaction before the
+# plain fallback, so run these before any writes in a transaction.
+PREPARED_QUERIES = {
+    'user_by_email': "SELECT * FROM users WHERE email = $1",
+    'workaround_by_id': "SELECT * FROM workarounds WHERE id = $1",
+    'workarounds_recent': "SELECT * FROM workarounds ORDER BY created_date DESC LIMIT $1",
+    'workarounds_all': "SELECT * FROM workarounds ORDER BY created_date DESC",
+    'workarounds_search': """
+        SELECT * FROM workarounds
+        WHERE LOWER(category) LIKE $1
+           OR LOWER(issue) LIKE $1
+           OR LOWER(description) LIKE $1
+           OR LOWER(created_by) LIKE $1
+        ORDER BY created_date DESC
+    """,
+    'workaround_comments': """
+        SELECT * FROM workaround_comments
+        WHERE workaround_id = $1
+        ORDER BY created_date ASC
+    """
+}
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which PREPARED_QUERIES it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class _RetainingPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that keeps up to maxconn idle connections (the base
+    class closes every returned connection above minconn) and counts creations.
+    """
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self.created = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.minconn = maxconn  # Only the first minconn are opened up front
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        self.created += 1
+        return conn
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool with blocking checkout and metrics.
+
+    The base psycopg2 pool raises as soon as it is exhausted; here callers
+    wait up to `timeout` seconds for a connection to be returned.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT, **settings):
+        self.maxconn = max(1, maxconn)
+        self.timeout = timeout
+        self._pool = _RetainingPool(min(minconn, self.maxconn), self.maxconn,
+                                    connection_factory=PooledConnection, **settings)
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def getconn(self):
+        """Check out a connection (waits up to `timeout` when all are in use)"""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise psycopg2.pool.PoolError(
+                f"Timed out after {self.timeout:g}s waiting for a database connection ({self.maxconn} in use)")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                # Dropped while idle (pgbouncer restart, network): replace it
+                self._pool.putconn(conn, close=True)
+                with self._lock:
+                    self.discarded += 1
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if waited >= 0.001:
+                self.waits += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection (open transactions are rolled back; broken ones closed)"""
+        close = close or bool(conn.closed)
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                if close:
+                    self.discarded += 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max': self.maxconn,
+                'in_use': self.in_use,
+                'idle': len(self._pool._pool),
+                'peak_in_use': self.peak_in_use,
+                'created': self._pool.created,
+                'discarded': self.discarded,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.wait_seconds_max * 1000, 3)
+            }
+
+    def close(self):
+        self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_prepared_enabled = DB_PREPARED_STATEMENTS
+_prepared_executions = 0
+
+
+def get_pool():
+    """Process-wide ConnectionPool (created on first use)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**DB_SETTINGS)
+                print(f"✅ Database pool ready ({DB_SETTINGS['host']}:{DB_SETTINGS['port']}, max {_pool.maxconn} connections)")
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+    
+    Raises:
+        psycopg2.Error: Connection or pool failure (psycopg2.pool.PoolError on timeout)
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+@contextmanager
+def db_cursor(dict_rows=True, commit=False):
+    """
+    Cursor on a pooled connection.
+    
+    Args:
+        dict_rows (bool): Use RealDictCursor (rows as dicts)
+        commit (bool): Commit when the block completes; otherwise the
+            transaction is rolled back when the connection is returned
+    
+    Yields:
+        psycopg2 cursor (the connection is cursor.connection)
+    """
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor if dict_rows else None)
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        finally:
+            cur.close()
+
+
+def _pyformat(sql):
+    """$n placeholders -> %(pn)s for the non-prepared path"""
+    return re.sub(r'\$(\d+)', r'%(p\1)s', sql)
+
+
+def execute_prepared(cur, name, params=()):
+    """
+    Execute one of PREPARED_QUERIES, preparing it on first use per connection.
+    
+    Falls back to a plain execute (and stops preparing) if the server side
+    rejects prepared statements, e.g. pgbouncer in transaction pooling mode.
+    
+    Args:
+        cur: Cursor from db_cursor()
+        name (str): Key of PREPARED_QUERIES
+        params (tuple): Values for $1, $2, ...
+    
+    Returns:
+        The cursor, ready to fetch
+    """
+    global _prepared_enabled, _prepared_executions
+    sql = PREPARED_QUERIES[name]
+    conn = cur.connection
+
+    if _prepared_enabled and isinstance(conn, PooledConnection):
+        try:
+            if name not in conn.prepared:
+                cur.execute(f"PREPARE {name} AS {sql}")
+                conn.prepared.add(name)
+            placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ''
+            cur.execute(f"EXECUTE {name}{placeholders}", tuple(params))
+            _prepared_executions += 1
+            return cur
+        except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement) as e:
+            conn.rollback()
+            conn.prepared.clear()
+            _prepared_enabled = False
+            print(f"⚠️ Prepared statements disabled, using plain queries: {e}")
+
+    cur.execute(_pyformat(sql), {f'p{i + 1}': value for i, value in enumerate(params)})
+    return cur
+
+
+def pool_stats():
+    """
+    Pool metrics for monitoring.
+    
+    Returns:
+        dict: in_use, idle, created, discarded, checkouts, waits, timeouts,
+              avg/max wait in ms, prepared statement state ({} before first use)
+    """
+    if _pool is None:
+        return {}
+    stats = _pool.stats()
+    stats['prepared_statements'] = _prepared_enabled
+    stats['prepared_executions'] = _prepared_executions
+    return stats
+
+
 def get_db_connection():
     """
-    Establishes and returns a PostgreSQL database connection.
+    Establishes and returns a new (unpooled) PostgreSQL database connection.
+    
+    Request handlers should use db_cursor() instead; this is for scripts
+    that manage the connection themselves.
     
     Returns:
         psycopg2.connection: Database connection object, or None if connection fails
@@ -35,13 +340,7 @@ def get_db_connection():
         )
     """
     try:
-        conn = psycopg2.connect(
-            database="prodossdb",
-            user='ossdb01uams',
-            password='Pr0d_ossdb01uams',
-            host='oso-pstgr-rd.orion.comcast.com',
-            port='6432'
-        )
+        conn = psycopg2.connect(**DB_SETTINGS)
         return conn
     except psycopg2.OperationalError as e:
         print(f"❌ DATABASE CONNECTION FAILED: {e}")
@@ -65,39 +364,25 @@ def create_user(fullname, email, password):
         dict: User object with id, fullname, email, role, status
         None: If email already exists or connection fails
     """
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        # Check if email already exists
-        cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cur.fetchone():
-            cur.close()
-            conn.close()
-            return None
-        
-        # Hash password and insert new user
-        password_hash = generate_password_hash(password)
-        cur.execute(
-            """INSERT INTO users (fullname, email, password_hash, role, status)
-               VALUES (%s, %s, %s, 'user', 'pending')
-               RETURNING id, fullname, email, role, status""",
-            (fullname, email, password_hash)
-        )
-        new_user = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
-        return dict(new_user)
+        with db_cursor(commit=True) as cur:
+            # Check if email already exists
+            cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if cur.fetchone():
+                return None
+            
+            # Hash password and insert new user
+            password_hash = generate_password_hash(password)
+            cur.execute(
+                """INSERT INTO users (fullname, email, password_hash, role, status)
+                   VALUES (%s, %s, %s, 'user', 'pending')
+                   RETURNING id, fullname, email, role, status""",
+                (fullname, email, password_hash)
+            )
+            return dict(cur.fetchone())
     
     except psycopg2.Error as e:
         print(f"❌ ERROR creating user: {e}")
-        conn.rollback()
-        if conn:
-            conn.close()
         return None
 
 
@@ -112,22 +397,13 @@ def find_user_by_email(email):
         dict: User object including password_hash (for verification)
         None: If user not found or connection fails
     """
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cur.fetchone()
-        cur.close()
-        conn.close()
-        return dict(user) if user else None
+        with db_cursor() as cur:
+            user = execute_prepared(cur, 'user_by_email', (email,)).fetchone()
+            return dict(user) if user else None
     
     except psycopg2.Error as e:
         print(f"❌ ERROR finding user: {e}")
-        if conn:
-            conn.close()
         return None
 
 
@@ -139,26 +415,17 @@ def get_all_users():
         list: List of user dictionaries (without password_hash)
         []: Empty list if connection fails or no users exist
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(
-            """SELECT id, fullname, email, role, status, created_at 
-               FROM users 
-               ORDER BY created_at DESC"""
-        )
-        users = cur.fetchall()
-        cur.close()
-        conn.close()
-        return [dict(user) for user in users]
+        with db_cursor() as cur:
+            cur.execute(
+                """SELECT id, fullname, email, role, status, created_at 
+                   FROM users 
+                   ORDER BY created_at DESC"""
+            )
+            return [dict(user) for user in cur.fetchall()]
     
     except psycopg2.Error as e:
         print(f"❌ ERROR fetching users: {e}")
-        if conn:
-            conn.close()
         return []
 
 
@@ -173,27 +440,16 @@ def update_user_status(user_id, status):
     Returns:
         bool: True if update successful, False otherwise
     """
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
     try:
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE users SET status = %s WHERE id = %s",
-            (status, user_id)
-        )
-        conn.commit()
-        success = cur.rowcount > 0
-        cur.close()
-        conn.close()
-        return success
+        with db_cursor(dict_rows=False, commit=True) as cur:
+            cur.execute(
+                "UPDATE users SET status = %s WHERE id = %s",
+                (status, user_id)
+            )
+            return cur.rowcount > 0
     
     except psycopg2.Error as e:
         print(f"❌ ERROR updating user status: {e}")
-        conn.rollback()
-        if conn:
-            conn.close()
         return False
 
 
@@ -212,29 +468,18 @@ def update_workaround(id, data):
     Returns:
         bool: True if update successful, False otherwise
     """
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """UPDATE workarounds 
-               SET category = %s, issue = %s, description = %s
-               WHERE id = %s""",
-            (data['category'], data['issue'], data['description'], id)
-        )
-        conn.commit()
-        success = cur.rowcount > 0
-        cur.close()
-        conn.close()
-        return success
+        with db_cursor(dict_rows=False, commit=True) as cur:
+            cur.execute(
+                """UPDATE workarounds 
+                   SET category = %s, issue = %s, description = %s
+                   WHERE id = %s""",
+                (data['category'], data['issue'], data['description'], id)
+            )
+            return cur.rowcount > 0
     
     except psycopg2.Error as e:
         print(f"❌ ERROR updating workaround: {e}")
-        conn.rollback()
-        if conn:
-            conn.close()
         return False
 
 
@@ -248,24 +493,13 @@ def delete_workaround(id):
     Returns:
         bool: True if deletion successful, False otherwise
     """
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM workarounds WHERE id = %s", (id,))
-        conn.commit()
-        success = cur.rowcount > 0
-        cur.close()
-        conn.close()
-        return success
+        with db_cursor(dict_rows=False, commit=True) as cur:
+            cur.execute("DELETE FROM workarounds WHERE id = %s", (id,))
+            return cur.rowcount > 0
     
     except psycopg2.Error as e:
         print(f"❌ ERROR deleting workaround: {e}")
-        conn.rollback()
-        if conn:
-            conn.close()
         return False
 
 
@@ -280,22 +514,13 @@ def get_workaround_by_id(id):
         dict: Workaround object
         None: If not found or connection fails
     """
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("SELECT * FROM workarounds WHERE id = %s", (id,))
-        workaround = cur.fetchone()
-        cur.close()
-        conn.close()
-        return dict(workaround) if workaround else None
+        with db_cursor() as cur:
+            workaround = execute_prepared(cur, 'workaround_by_id', (id,)).fetchone()
+            return dict(workaround) if workaround else None
     
     except psycopg2.Error as e:
         print(f"❌ ERROR fetching workaround: {e}")
-        if conn:
-            conn.close()
         return None
 
 
@@ -305,28 +530,22 @@ def get_workaround_by_id(id):
 
 def test_connection():
     """
-    Tests the database connection.
+    Tests the database connection (through the pool).
     
     Returns:
         bool: True if connection successful, False otherwise
     """
-    conn = get_db_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
+    try:
+        with db_cursor(dict_rows=False) as cur:
             cur.execute("SELECT 1")
-            cur.close()
-            conn.close()
-            print("✅ Database connection successful!")
-            return True
-        except psycopg2.Error as e:
-            print(f"❌ Database query failed: {e}")
-            if conn:
-                conn.close()
-            return False
-    return False
+        print("✅ Database connection successful!")
+        return True
+    except psycopg2.Error as e:
+        print(f"❌ Database connection failed: {e}")
+        return False
 
 
 if __name__ == '__main__':
     # Test connection when running this file directly
-    test_connection()
\ No newline at end of file
+    if test_connection():
+        print(pool_stats())
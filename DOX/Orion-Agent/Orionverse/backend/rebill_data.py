@@ -0,0 +1,301 @@
+# backend/rebill_data.py
+"""
+Rebill Data Service - cached, indexed view of 'Rebill 2025.csv'
+
+The billing routes used to re-open and re-parse the CSV with csv.DictReader on
+every request and search by building a joined lowercase string per row. This
+service parses it once and keeps it until the file's mtime/size changes:
+
+- Rows: the csv.DictReader dicts, returned unchanged by the API
+- Typed columns: each column is inferred as date (Bill Run Date, in its mixed
+  formats), number or text; text is stored as category codes. Sorting uses
+  the typed value; equality filters and aggregates use the codes
+- Token index (search_engine.TokenIndex) over the whole-row text and, built on
+  first use, per column: a search term only verifies the rows its tokens point
+  to, with the same substring rule the route always used
+
+Usage:
+    service = get_rebill_service()
+    result = service.search('snp', field='RCA  Sub Category', filters={'Own By': 'OSO'},
+                            sort_by='Bill Run Date', sort_dir='desc', page=1, page_size=25)
+    stats = service.aggregates(group_by=['Own By', 'RCA Category'])
+"""
+
+import csv
+import io
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from search_engine import TokenIndex
+
+REBILL_CSV_PATH = os.environ.get(
+    'REBILL_CSV_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Rebill 2025.csv')
+)
+
+# The export is saved from Excel, so it is not always UTF-8
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+
+DATE_FORMATS = ('%d-%b-%y', '%d-%b-%Y', '%B %d, %Y', '%b %d, %Y', '%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d')
+
+# Share of non-blank values that must parse for a column to be typed date/number
+TYPE_INFERENCE_RATIO = 0.8
+
+# Columns summarized by default in aggregates()
+DEFAULT_GROUP_BY = ['Own By', 'RCA Category']
+UNIQUE_COLUMNS = ['Customer Id', 'Site ID']
+
+
+def _parse_date(value: str):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_number(value: str):
+    try:
+        return float(value.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _cell(row: Dict, column: str) -> str:
+    value = row.get(column)
+    return '' if value is None else str(value)
+
+
+class RebillColumn:
+    """One typed column: raw text, lowercase text, category codes and a sort rank"""
+
+    def __init__(self, name: str, values: List[str]):
+        self.name = name
+        self.values = values
+        self.lower = [v.lower() for v in values]
+
+        self.categories, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+        self.categories = self.categories.tolist()
+        self.codes = codes.astype(np.int32)
+        self._code_of = {value: code for code, value in enumerate(self.categories)}
+
+        blanks = [not v.strip() for v in values]
+        non_blank = len(values) - sum(blanks)
+        self.kind = 'text'
+        self.typed = None
+        for kind, parse in (('date', _parse_date), ('number', _parse_number)):
+            parsed = [None if blank else parse(v.strip()) for v, blank in zip(values, blanks)]
+            if non_blank and sum(p is not None for p in parsed) >= TYPE_INFERENCE_RATIO * non_blank:
+                self.kind, self.typed = kind, parsed
+                break
+
+        # Sort rank: typed value (unparseable / blank last), else case-insensitive text
+        if self.typed is not None:
+            keys = [(p is None, p if p is not None else 0, low) for p, low in zip(self.typed, self.lower)]
+        else:
+            keys = self.lower
+        order = {key: rank for rank, key in enumerate(sorted(set(keys)))}
+        self.rank = np.fromiter((order[k] for k in keys), dtype=np.int32, count=len(keys))
+        self._token_index = None
+
+    @property
+    def token_index(self) -> TokenIndex:
+        if self._token_index is None:
+            self._token_index = TokenIndex(self.lower)
+        return self._token_index
+
+    def code(self, value: str) -> int:
+        return self._code_of.get(value, -1)
+
+    def months(self, rows: np.ndarray) -> Dict[str, int]:
+        """Row counts per YYYY-MM (date columns only)"""
+        counts = Counter(self.typed[r].strftime('%Y-%m') for r in rows.tolist() if self.typed[r] is not None)
+        return dict(sorted(counts.items()))
+
+
+class RebillDataset:
+    """Immutable snapshot of one version of the CSV"""
+
+    def __init__(self, rows: List[Dict], fieldnames: List[str], encoding: str, signature: tuple):
+        self.rows = rows
+        self.fieldnames = fieldnames
+        self.encoding = encoding
+        self.signature = signature
+        self.loaded_at = datetime.now().isoformat()
+        self.columns = {name: RebillColumn(name, [_cell(r, name) for r in rows]) for name in fieldnames}
+        # Whole-row text, exactly as the old search built it
+        self.row_text = [' '.join(str(v).lower() for v in r.values()) for r in rows]
+        self.row_index = TokenIndex(self.row_text)
+
+    @classmethod
+    def read(cls, path: str) -> 'RebillDataset':
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        for encoding in CSV_ENCODINGS:
+            try:
+                text = raw.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        reader = csv.DictReader(io.StringIO(text, newline=''))
+        rows = list(reader)
+        return cls(rows, list(reader.fieldnames or []), encoding, (stat.st_mtime_ns, stat.st_size))
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def match(self, search: str = '', field: str = None, filters: Dict = None) -> np.ndarray:
+        """
+        Row ids matching a substring search and equality filters.
+
+        Args:
+            search: Lowercase term; matched against the whole row text, or
+                only against `field` when given
+            field: Column to scope the search to
+            filters: {column: exact value}
+        """
+        ids = np.arange(len(self.rows), dtype=np.int32)
+        for column, value in (filters or {}).items():
+            if value in (None, ''):
+                continue
+            if column not in self.columns:
+                return ids[:0]
+            ids = ids[self.columns[column].codes[ids] == self.columns[column].code(str(value))]
+
+        if search:
+            if field:
+                if field not in self.columns:
+                    return ids[:0]
+                index, texts = self.columns[field].token_index, self.columns[field].lower
+            else:
+                index, texts = self.row_index, self.row_text
+            candidates = index.candidates(search)
+            if candidates is not None:
+                ids = np.intersect1d(ids, candidates, assume_unique=True)
+            ids = np.array([i for i in ids.tolist() if search in texts[i]], dtype=np.int32)
+        return ids
+
+    def sort(self, ids: np.ndarray, sort_by: str = None, sort_dir: str = 'asc') -> np.ndarray:
+        if not sort_by or sort_by not in self.columns or not len(ids):
+            return ids
+        rank = self.columns[sort_by].rank[ids]
+        order = np.argsort(-rank if sort_dir == 'desc' else rank, kind='stable')
+        return ids[order]
+
+
+class RebillDataService:
+    """Keeps the latest RebillDataset; re-reads the CSV only when it changes on disk"""
+
+    def __init__(self, path: str = REBILL_CSV_PATH):
+        self.path = path
+        self._dataset: Optional[RebillDataset] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def dataset(self) -> RebillDataset:
+        """Current snapshot (raises FileNotFoundError if the CSV is missing)"""
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        current = self._dataset
+        if current is not None and current.signature == signature:
+            return current
+        with self._lock:
+            if self._dataset is None or self._dataset.signature != signature:
+                self._dataset = RebillDataset.read(self.path)
+                self.reloads += 1
+                print(f"[INFO] Rebill data loaded: {len(self._dataset)} rows "
+                      f"({self._dataset.encoding}) from {self.path}")
+            return self._dataset
+
+    def search(self, search: str = '', field: str = None, filters: Dict = None, sort_by: str = None,
+               sort_dir: str = 'asc', page: int = None, page_size: int = None) -> Dict:
+        """
+        Filter, sort and (optionally) paginate the rows.
+
+        Returns:
+            dict: data, total (matching rows), plus page/page_size/total_pages when paginated
+        """
+        dataset = self.dataset()
+        ids = dataset.sort(dataset.match(search, field, filters), sort_by, sort_dir)
+        result = {'total': len(ids)}
+        if page_size:
+            page = max(page or 1, 1)
+            ids = ids[(page - 1) * page_size:page * page_size]
+            result.update({
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (result['total'] + page_size - 1) // page_size
+            })
+        result['data'] = [dataset.rows[i] for i in ids.tolist()]
+        return result
+
+    def aggregates(self, search: str = '', field: str = None, filters: Dict = None,
+                   group_by: List[str] = None) -> Dict:
+        """
+        Server-side summary of the (optionally filtered) rows.
+
+        Returns:
+            dict: total, unique (distinct non-blank Customer Id / Site ID),
+            counts per value of each group_by column, by_month per date column
+        """
+        dataset = self.dataset()
+        ids = dataset.match(search, field, filters)
+        summary = {'total': len(ids), 'unique': {}, 'counts': {}, 'by_month': {}}
+
+        for name in UNIQUE_COLUMNS:
+            column = dataset.columns.get(name)
+            if column is not None:
+                codes = np.unique(column.codes[ids])
+                summary['unique'][name] = sum(1 for c in codes.tolist() if column.categories[c].strip())
+
+        for name in group_by or DEFAULT_GROUP_BY:
+            column = dataset.columns.get(name)
+            if column is None:
+                continue
+            counts = Counter()
+            for code, n in enumerate(np.bincount(column.codes[ids], minlength=len(column.categories)).tolist()):
+                if n:
+                    counts[column.categories[code].strip() or '(blank)'] += n  # Blank and '\xa0' share a bucket
+            summary['counts'][name] = dict(counts.most_common())
+
+        for name, column in dataset.columns.items():
+            if column.kind == 'date':
+                summary['by_month'][name] = column.months(ids)
+        return summary
+
+    def info(self) -> Dict:
+        dataset = self._dataset
+        return {
+            'path': self.path,
+            'loaded': dataset is not None,
+            'rows': len(dataset) if dataset else 0,
+            'encoding': dataset.encoding if dataset else None,
+            'loaded_at': dataset.loaded_at if dataset else None,
+            'reloads': self.reloads,
+            'columns': {n: c.kind for n, c in dataset.columns.items()} if dataset else {}
+        }
+
+
+_service = None
+
+
+def get_rebill_service() -> RebillDataService:
+    """Lazy singleton (one cached dataset per process)"""
+    global _service
+    if _service is None:
+        _service = RebillDataService()
+    return _service
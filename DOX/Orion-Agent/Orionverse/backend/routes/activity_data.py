@@ -4,18 +4,26 @@
 from flask import Blueprint, jsonify, request
 import json
 import os
+import threading
 from pathlib import Path
 
+from activity_store import ActivityStore, store_path_for
+
 activity_data_bp = Blueprint('activity_data', __name__)
 
 # Cache for activity data
 _activity_data_cache = None
 
+# Columnar store used by /search and /stats (see backend/activity_store.py)
+_activity_store = None
+_activity_store_lock = threading.Lock()
+
 def get_json_path():
     """Get the path to the JSON file"""
     # Try multiple possible locations
     script_dir = Path(__file__).parent
     possible_paths = [
+        script_dir.parent / 'data' / 'oso_activity_data.json',
         script_dir / 'data' / 'oso_activity_data.json',
         Path(r'C:\Users\abhisha3\Desktop\Projects\DOX\Orion-Agent\Orionverse\backend\data\oso_activity_data.json'),
         Path(r'C:\Users\abhisha3\Desktop\Projects\DOX\Orion-Agent\Orionverse\OSO_activity_data (1).xlsx').parent / 'backend' / 'data' / 'oso_activity_data.json',
@@ -101,6 +109,28 @@ def load_activity_data():
         print(f"[ERROR] Traceback: {traceback.format_exc()}")
         return {'columns': [], 'data': [], 'total_rows': 0, 'error': error_msg}
 
+def get_activity_store(rebuild=False):
+    """Columnar store for the activity data (loaded from disk, or built from JSON/Excel)"""
+    global _activity_store
+    
+    if _activity_store is not None and not rebuild:
+        return _activity_store
+    
+    # One build at a time - concurrent first builds would share the .columns.tmp directory
+    with _activity_store_lock:
+        if _activity_store is not None and not rebuild:
+            return _activity_store
+        json_path = get_json_path()
+        _activity_store = ActivityStore.load_or_build(json_path, _load_records_for_store, rebuild=rebuild)
+        return _activity_store
+
+def _load_records_for_store():
+    """Store loader: raises if neither JSON nor Excel could be read (nothing gets cached)"""
+    data = load_activity_data()
+    if data.get('error'):
+        raise RuntimeError(data['error'])
+    return data
+
 @activity_data_bp.route('/all', methods=['GET'])
 def get_all_activity_data():
     """Get all activity data"""
@@ -122,45 +152,25 @@ def search_activity_data():
         column_filters = request_data.get('columnFilters', {})
         sort_column = request_data.get('sortColumn', '')
         sort_direction = request_data.get('sortDirection', 'asc')
-        page = request_data.get('page', 1)
-        page_size = request_data.get('pageSize', 100)
-        
-        data = load_activity_data()
-        records = data.get('data', [])
+        page = int(request_data.get('page', 1))
+        page_size = int(request_data.get('pageSize', 100))
         
-        # Apply global search
-        if search_term:
-            records = [
-                row for row in records
-                if any(search_term in str(value).lower() for value in row.values())
-            ]
+        store = get_activity_store()
         
-        # Apply column-specific filters
-        for column, filter_value in column_filters.items():
-            if filter_value:
-                filter_value_lower = filter_value.lower()
-                records = [
-                    row for row in records
-                    if filter_value_lower in str(row.get(column, '')).lower()
-                ]
-        
-        # Apply sorting
-        if sort_column and sort_column in data.get('columns', []):
-            records = sorted(
-                records,
-                key=lambda x: str(x.get(sort_column, '')).lower(),
-                reverse=(sort_direction == 'desc')
-            )
-        
-        # Pagination
-        total_filtered = len(records)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_records = records[start_idx:end_idx]
+        # Global search + column filters + sort, only the requested page is ordered
+        result = store.query(
+            search=search_term,
+            column_filters=column_filters,
+            sort_column=sort_column,
+            sort_direction=sort_direction,
+            page=page,
+            page_size=page_size
+        )
+        total_filtered = result['total_rows']
         
         return jsonify({
-            'columns': data.get('columns', []),
-            'data': paginated_records,
+            'columns': store.columns,
+            'data': result['data'],
             'total_rows': total_filtered,
             'page': page,
             'page_size': page_size,
@@ -174,6 +184,13 @@ def search_activity_data():
 def get_status():
     """Check if data is loaded and ready"""
     global _activity_data_cache
+    if _activity_store is not None:
+        return jsonify({
+            'loaded': True,
+            'total_records': _activity_store.total_rows,
+            'columns': len(_activity_store.columns),
+            'store_built_at': _activity_store.manifest.get('built_at')
+        })
     if _activity_data_cache is not None:
         return jsonify({
             'loaded': True,
@@ -189,6 +206,7 @@ def get_status():
             'loaded': False,
             'json_exists': json_exists,
             'json_path': json_path,
+            'store_exists': bool(json_exists and store_path_for(json_path).exists()),
             'excel_exists': excel_exists,
             'excel_path': excel_path
         })
@@ -196,14 +214,16 @@ def get_status():
 @activity_data_bp.route('/refresh', methods=['POST'])
 def refresh_data():
     """Force refresh of activity data from Excel"""
-    global _activity_data_cache
+    global _activity_data_cache, _activity_store
     _activity_data_cache = None
+    _activity_store = None
     data = load_activity_data()
     if data.get('error'):
         return jsonify({
             'success': False,
             'error': data.get('error')
         }), 500
+    get_activity_store(rebuild=True)
     return jsonify({
         'success': True,
         'message': f'Refreshed {data.get("total_rows", 0)} records'
@@ -213,12 +233,12 @@ def refresh_data():
 def get_stats():
     """Get statistics about the activity data"""
     try:
-        data = load_activity_data()
-        
-        # Check if there was an error loading
-        if data.get('error'):
+        try:
+            store = get_activity_store()
+        except RuntimeError as e:
+            # Neither JSON nor Excel could be loaded
             return jsonify({
-                'error': data.get('error'),
+                'error': str(e),
                 'total_records': 0,
                 'columns': 0,
                 'unique_interfaces': 0,
@@ -226,15 +246,13 @@ def get_stats():
                 'unique_implementations': 0
             }), 500
         
-        records = data.get('data', [])
-        
-        # Get unique values for key columns
+        # Distinct counts are precomputed when the store is built
         stats = {
-            'total_records': len(records),
-            'columns': len(data.get('columns', [])),
-            'unique_interfaces': len(set(str(r.get('interface', '')) for r in records if r.get('interface'))),
-            'unique_profiles': len(set(str(r.get('profile', '')) for r in records if r.get('profile'))),
-            'unique_implementations': len(set(str(r.get('implementation', '')) for r in records if r.get('implementation'))),
+            'total_records': store.total_rows,
+            'columns': len(store.columns),
+            'unique_interfaces': store.distinct.get('interface', 0),
+            'unique_profiles': store.distinct.get('profile', 0),
+            'unique_implementations': store.distinct.get('implementation', 0),
         }
         
         return jsonify(stats)
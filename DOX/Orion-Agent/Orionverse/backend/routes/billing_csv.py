@@ -1,32 +1,32 @@
 # backend/routes/billing_csv.py
 from flask import Blueprint, jsonify, request
-import csv
-import os
+
+from rebill_data import get_rebill_service
 
 billing_csv_bp = Blueprint('billing_csv', __name__)
 
+def _int_arg(value):
+    return int(value) if value not in (None, '') else None
+
 @billing_csv_bp.route('/rebill-data', methods=['GET'])
 def get_rebill_data():
     """
-    Load and return Rebill 2025.csv data
+    Return Rebill 2025.csv data (served from the cached dataset, re-read only
+    when the file changes). Optional query args: page, page_size, sort_by, sort_dir
     """
     try:
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'Rebill 2025.csv')
-        
-        if not os.path.exists(csv_path):
+        service = get_rebill_service()
+        if not service.exists():
             return jsonify({'error': 'CSV file not found'}), 404
         
-        data = []
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                data.append(row)
+        result = service.search(
+            sort_by=request.args.get('sort_by'),
+            sort_dir=request.args.get('sort_dir', 'asc'),
+            page=_int_arg(request.args.get('page')),
+            page_size=_int_arg(request.args.get('page_size'))
+        )
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'total': len(data)
-        })
+        return jsonify({'success': True, **result})
     
     except Exception as e:
         return jsonify({
@@ -38,33 +38,33 @@ def get_rebill_data():
 def search_rebill_data():
     """
     Search through Rebill data
+    
+    Body:
+        search: Text to find (case-insensitive substring)
+        field: Optional column to search in (default: all columns)
+        filters: Optional {column: exact value}, e.g. {"Own By": "OSO"}
+        sort_by, sort_dir: Optional sort (dates/numbers sort by value)
+        page, page_size: Optional pagination (all matches if page_size is omitted)
     """
     try:
-        search_params = request.json
+        search_params = request.json or {}
         search_term = search_params.get('search', '').lower()
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'Rebill 2025.csv')
-        
-        if not os.path.exists(csv_path):
+        service = get_rebill_service()
+        if not service.exists():
             return jsonify({'error': 'CSV file not found'}), 404
         
-        data = []
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                # Search across all fields
-                if search_term:
-                    row_str = ' '.join(str(v).lower() for v in row.values())
-                    if search_term in row_str:
-                        data.append(row)
-                else:
-                    data.append(row)
+        result = service.search(
+            search=search_term,
+            field=search_params.get('field'),
+            filters=search_params.get('filters'),
+            sort_by=search_params.get('sort_by'),
+            sort_dir=search_params.get('sort_dir', 'asc'),
+            page=_int_arg(search_params.get('page')),
+            page_size=_int_arg(search_params.get('page_size'))
+        )
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'total': len(data)
-        })
+        return jsonify({'success': True, **result})
     
     except Exception as e:
         return jsonify({
@@ -72,5 +72,35 @@ def search_rebill_data():
             'error': str(e)
         }), 500
 
+@billing_csv_bp.route('/rebill-data/aggregates', methods=['GET'])
+def rebill_aggregates():
+    """
+    Server-side statistics for the billing page
+    
+    Query args:
+        group_by: Column to count values of (repeatable, default: Own By, RCA Category)
+        search, field: Optional search, same as /rebill-data/search
+    """
+    try:
+        service = get_rebill_service()
+        if not service.exists():
+            return jsonify({'error': 'CSV file not found'}), 404
+        
+        summary = service.aggregates(
+            search=request.args.get('search', '').lower(),
+            field=request.args.get('field'),
+            group_by=request.args.getlist('group_by') or None
+        )
+        
+        return jsonify({'success': True, **summary})
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-
+@billing_csv_bp.route('/rebill-data/status', methods=['GET'])
+def rebill_status():
+    """Cache status of the Rebill dataset"""
+    return jsonify(get_rebill_service().info())
@@ -2,8 +2,8 @@
 """ONI API Routes - Handles all ONI domain API calls with automatic token management"""
 
 from flask import Blueprint, request, jsonify
-import requests
-import json
+
+from upstream_client import SUCCESS_STATUSES, TOKEN_FIELDS, TokenCache, UpstreamClient, response_data
 
 oni_api_bp = Blueprint('oni_api', __name__)
 
@@ -17,39 +17,15 @@ ONI_CONFIG = {
     }
 }
 
-# Store token in memory
-token_cache = {
-    'oni_token': None
-}
+# Token is cached until it expires or gets a 401; connections are kept alive per host
+# (ONI returns the token in different formats, including 'UEM')
+oni_client = UpstreamClient('ONI', TokenCache(
+    'ONI', ONI_CONFIG['token_url'], ONI_CONFIG['default_credentials'], token_fields=TOKEN_FIELDS + ('UEM',)
+))
 
 def get_oni_token():
-    """Get ONI token, fetching new one if needed"""
-    try:
-        payload = json.dumps(ONI_CONFIG['default_credentials'])
-        headers = {'Content-Type': 'application/json'}
-        
-        response = requests.post(
-            ONI_CONFIG['token_url'],
-            headers=headers,
-            data=payload,
-            timeout=30,
-            verify=False
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            # ONI returns token in different formats
-            token_cache['oni_token'] = (
-                data.get('token') or 
-                data.get('access_token') or 
-                data.get('sessionToken') or
-                data.get('UEM')
-            )
-            return token_cache['oni_token'], None
-        else:
-            return None, f"Login failed: {response.status_code} - {response.text}"
-    except Exception as e:
-        return None, str(e)
+    """Get ONI token (cached, logs in only when needed)"""
+    return oni_client.tokens.get()
 
 @oni_api_bp.route('/status', methods=['GET'])
 def get_status():
@@ -65,13 +41,16 @@ def get_status():
         ]
     })
 
+@oni_api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Token cache state and per-endpoint latency / error counters"""
+    return jsonify({
+        'service': 'ONI API',
+        'clients': [oni_client.stats()]
+    })
+
 def make_find_request(criteria_properties):
     """Common function to make findcrosscontext requests"""
-    # Get fresh token
-    token, error = get_oni_token()
-    if error:
-        return {'success': False, 'error': f'Token Error: {error}'}, 401
-    
     payload = {
         "retrievalBehaviour": {
             "limit": 1000,
@@ -86,29 +65,15 @@ def make_find_request(criteria_properties):
         ]
     }
     
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {token}'
-    }
-    
     try:
-        response = requests.post(
-            ONI_CONFIG['find_cross_context_url'],
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = oni_client.post('find-cross-context', ONI_CONFIG['find_cross_context_url'], payload)
+        if error:
+            return {'success': False, 'error': f'Token Error: {error}'}, 401
         
         return {
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload
         }, response.status_code
         
@@ -3,7 +3,7 @@ from flask import Blueprint, jsonify, request
 import json
 import os
 import database
-import psycopg2.extras
+from search_engine import SearchEngine
 
 search_bp = Blueprint('search', __name__)
 
@@ -21,6 +21,9 @@ def load_json_data(filename):
 sr_data = load_json_data('sr_data.json')
 defect_data = load_json_data('defect_data.json')
 
+# Normalize + index once; /filter queries run against the indexes
+search_engine = SearchEngine(sr_data, defect_data)
+
 @search_bp.route('/all', methods=['GET'])
 def get_all_data():
     """
@@ -29,12 +32,8 @@ def get_all_data():
     """
     wa_data = []
     try:
-        conn = database.get_db_connection()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute('SELECT * FROM workarounds ORDER BY created_date DESC LIMIT 10;')
-        wa_data = cur.fetchall()
-        cur.close()
-        conn.close()
+        with database.db_cursor() as cur:
+            wa_data = database.execute_prepared(cur, 'workarounds_recent', (10,)).fetchall()
     except Exception as e:
         print(f"Database error in get_all_data: {e}")
     
@@ -56,13 +55,16 @@ def get_all_data():
 @search_bp.route('/filter', methods=['POST'])
 def filter_data():
     """
-    Performs a complex, multi-source search and returns ALL matching results.
+    Performs a complex, multi-source search and returns ALL matching results
+    (or one page of them when page_size is given).
     Supports multiple filter criteria:
     - search_anything: Free text search across multiple fields
     - customer_id: Exact or partial match on Customer ID
     - osite_id: Site ID in format OSite_%_1
     - sr_id: Service Request ID
     - id: Defect ID
+    - exact_ids: Match customer_id / sr_id exactly (hash lookup) instead of partially
+    - page, page_size: Optional pagination of the SR and Defect lists
     """
     filters = request.get_json()
     print(f"\n{'='*60}")
@@ -71,10 +73,6 @@ def filter_data():
     print(f"Filters received: {filters}")
     print(f"Starting with {len(sr_data)} SRs and {len(defect_data)} Defects")
     
-    # Start with all data
-    filtered_sr = sr_data
-    filtered_defect = defect_data
-    
     # Extract filter values
     search_anything = filters.get('search_anything', '').strip().lower()
     customer_id = filters.get('customer_id', '').strip()
@@ -82,116 +80,56 @@ def filter_data():
     sr_id = filters.get('sr_id', '').strip().upper()
     defect_id = filters.get('id', '').strip()
     
-    # Filter 1: Customer ID
-    # SR → CUSTOMER_ID | Defect → Name, Description
-    if customer_id:
-        print(f"  Filtering by Customer ID: {customer_id}")
-        filtered_sr = [
-            r for r in filtered_sr 
-            if str(r.get('CUSTOMER_ID', '')).lower().find(customer_id.lower()) != -1
-        ]
-        filtered_defect = [
-            d for d in filtered_defect 
-            if customer_id.lower() in str(d.get('Name', '')).lower() 
-            or customer_id.lower() in str(d.get('Description', '')).lower()
-        ]
-    
-    # Filter 2: OSite ID (format: OSite_%_1)
-    # SR → DETAILS, UPDATE_DETAILS | Defect → Name, Description
-    if osite_id:
-        print(f"  Filtering by OSite ID: {osite_id}")
-        filtered_sr = [
-            r for r in filtered_sr 
-            if osite_id in str(r.get('DETAILS', '')).lower() 
-            or osite_id in str(r.get('UPDATE_DETAILS', '')).lower()
-        ]
-        filtered_defect = [
-            d for d in filtered_defect 
-            if osite_id in str(d.get('Name', '')).lower() 
-            or osite_id in str(d.get('Description', '')).lower()
-        ]
-    
-    # Filter 3: SR ID
-    # SR → SR_ID | Defect → Name, Description
-    if sr_id:
-        print(f"  Filtering by SR ID: {sr_id}")
-        filtered_sr = [
-            r for r in filtered_sr 
-            if sr_id in str(r.get('SR_ID', '')).upper()
-        ]
-        filtered_defect = [
-            d for d in filtered_defect 
-            if sr_id in str(d.get('Name', '')).upper() 
-            or sr_id in str(d.get('Description', '')).upper()
-        ]
+    # Optional pagination (omit page_size to get ALL matching results)
+    page = filters.get('page')
+    page_size = filters.get('page_size')
     
-    # Filter 4: Defect ID
-    # SR → DETAILS, UPDATE_DETAILS | Defect → ID
-    if defect_id:
-        print(f"  Filtering by Defect ID: {defect_id}")
-        filtered_sr = [
-            r for r in filtered_sr 
-            if defect_id in str(r.get('DETAILS', '')) 
-            or defect_id in str(r.get('UPDATE_DETAILS', ''))
-        ]
-        filtered_defect = [
-            d for d in filtered_defect 
-            if str(d.get('ID', '')) == defect_id
-        ]
+    # Filter 1: Customer ID          SR → CUSTOMER_ID            | Defect → Name, Description
+    # Filter 2: OSite ID (OSite_%_1) SR → DETAILS, UPDATE_DETAILS | Defect → Name, Description
+    # Filter 3: SR ID                SR → SR_ID                  | Defect → Name, Description
+    # Filter 4: Defect ID            SR → DETAILS, UPDATE_DETAILS | Defect → ID
+    # Filter 5: Search Anything      SR → DETAILS, UPDATE_DETAILS | Defect → Name, Description
+    for label, value in (("Customer ID", customer_id), ("OSite ID", osite_id), ("SR ID", sr_id),
+                         ("Defect ID", defect_id), ("Search Anything", search_anything)):
+        if value:
+            print(f"  Filtering by {label}: {value}")
     
-    # Filter 5: Search Anything (free text)
-    # SR → DETAILS, UPDATE_DETAILS | Defect → Name, Description
-    if search_anything:
-        print(f"  Filtering by Search Anything: {search_anything}")
-        filtered_sr = [
-            r for r in filtered_sr 
-            if search_anything in str(r.get('DETAILS', '')).lower() 
-            or search_anything in str(r.get('UPDATE_DETAILS', '')).lower()
-        ]
-        filtered_defect = [
-            d for d in filtered_defect 
-            if search_anything in str(d.get('Name', '')).lower() 
-            or search_anything in str(d.get('Description', '')).lower()
-        ]
+    result = search_engine.search(
+        customer_id=customer_id,
+        osite_id=osite_id,
+        sr_id=sr_id,
+        defect_id=defect_id,
+        search_anything=search_anything,
+        exact_ids=bool(filters.get('exact_ids')),
+        page=int(page) if page else None,
+        page_size=int(page_size) if page_size else None
+    )
+    filtered_sr = result['sr_data']
+    filtered_defect = result['defect_data']
+    print(f"  Indexed search took {result['took_ms']} ms")
     
     # Fetch and filter WA data from the database
     wa_data = []
     try:
-        conn = database.get_db_connection()
-        if not conn:
-            print("[ERROR] Database connection failed for WA data")
-            wa_data = []
-        else:
-            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            
+        with database.db_cursor() as cur:
             # If search_anything is provided, search in all WA fields
             if search_anything:
-                query = """
-                    SELECT * FROM workarounds 
-                    WHERE LOWER(category) LIKE %s 
-                       OR LOWER(issue) LIKE %s 
-                       OR LOWER(description) LIKE %s 
-                       OR LOWER(created_by) LIKE %s
-                    ORDER BY created_date DESC;
-                """
                 search_pattern = f'%{search_anything}%'
-                cur.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern))
+                database.execute_prepared(cur, 'workarounds_search', (search_pattern,))
             else:
                 # Return all workarounds if no search term
-                cur.execute('SELECT * FROM workarounds ORDER BY created_date DESC;')
+                database.execute_prepared(cur, 'workarounds_all')
             
             wa_data = cur.fetchall()
-            cur.close()
-            conn.close()
-            print(f"  Found {len(wa_data)} workarounds")
+        print(f"  Found {len(wa_data)} workarounds")
             
     except Exception as e:
         print(f"[ERROR] Database error in filter_data: {e}")
         wa_data = []
 
     result_counts = {
-        "sr_count": len(filtered_sr),
-        "defect_count": len(filtered_defect),
+        "sr_count": result['sr_total'],
+        "defect_count": result['defect_total'],
         "wa_count": len(wa_data)
     }
     print(f"{'='*60}")
@@ -204,8 +142,16 @@ def filter_data():
         print(f"[WARN] No defects found! Original defect_data had {len(defect_data)} records")
     print(f"{'='*60}\n")
 
-    return jsonify({
+    response = {
         "sr_data": filtered_sr,
         "defect_data": filtered_defect,
         "wa_data": wa_data
-    })
\ No newline at end of file
+    }
+    if page_size:
+        response["pagination"] = {
+            "page": int(page) if page else 1,
+            "page_size": int(page_size),
+            "sr_total": result['sr_total'],
+            "defect_total": result['defect_total']
+        }
+    return jsonify(response)
\ No newline at end of file
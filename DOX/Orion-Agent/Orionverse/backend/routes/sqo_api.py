@@ -2,8 +2,8 @@
 """SQO API Routes - Handles all SQO domain API calls with automatic token management"""
 
 from flask import Blueprint, request, jsonify
-import requests
-import json
+
+from upstream_client import SUCCESS_STATUSES, TokenCache, UpstreamClient, response_data
 
 sqo_api_bp = Blueprint('sqo_api', __name__)
 
@@ -22,57 +22,17 @@ SQO_CONFIG = {
     }
 }
 
-# Store tokens in memory (in production, use proper session management)
-token_cache = {
-    'sqo_token': None,
-    'odo_token': None
-}
+# Tokens are cached until they expire or get a 401; connections are kept alive per host
+sqo_client = UpstreamClient('SQO', TokenCache('SQO', SQO_CONFIG['login_url'], SQO_CONFIG['default_credentials']))
+odo_client = UpstreamClient('ODO', TokenCache('ODO', SQO_CONFIG['odo_login_url'], SQO_CONFIG['default_credentials']))
 
 def get_sqo_token():
-    """Get SQO token, fetching new one if needed"""
-    try:
-        payload = json.dumps(SQO_CONFIG['default_credentials'])
-        headers = {'Content-Type': 'application/json'}
-        
-        response = requests.post(
-            SQO_CONFIG['login_url'],
-            headers=headers,
-            data=payload,
-            timeout=30,
-            verify=False
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            token_cache['sqo_token'] = data.get('token') or data.get('access_token') or data.get('sessionToken')
-            return token_cache['sqo_token'], None
-        else:
-            return None, f"Login failed: {response.status_code} - {response.text}"
-    except Exception as e:
-        return None, str(e)
+    """Get SQO token (cached, logs in only when needed)"""
+    return sqo_client.tokens.get()
 
 def get_odo_token():
-    """Get ODO token"""
-    try:
-        payload = json.dumps(SQO_CONFIG['default_credentials'])
-        headers = {'Content-Type': 'application/json'}
-        
-        response = requests.post(
-            SQO_CONFIG['odo_login_url'],
-            headers=headers,
-            data=payload,
-            timeout=30,
-            verify=False
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            token_cache['odo_token'] = data.get('token') or data.get('access_token') or data.get('sessionToken')
-            return token_cache['odo_token'], None
-        else:
-            return None, f"Login failed: {response.status_code} - {response.text}"
-    except Exception as e:
-        return None, str(e)
+    """Get ODO token (cached, logs in only when needed)"""
+    return odo_client.tokens.get()
 
 @sqo_api_bp.route('/status', methods=['GET'])
 def get_status():
@@ -89,17 +49,20 @@ def get_status():
         ]
     })
 
+@sqo_api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Token cache state and per-endpoint latency / error counters"""
+    return jsonify({
+        'service': 'SQO API',
+        'clients': [sqo_client.stats(), odo_client.stats()]
+    })
+
 @sqo_api_bp.route('/billing-manual', methods=['POST'])
 def billing_manual_call():
     """Execute Billing Manual Call API"""
     try:
         data = request.get_json()
         
-        # Get fresh token
-        token, error = get_sqo_token()
-        if error:
-            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
-        
         # Build payload
         payload = {
             "correlationId": data.get('correlationId', ''),
@@ -107,28 +70,14 @@ def billing_manual_call():
             "products": data.get('products', [])
         }
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(
-            SQO_CONFIG['billing_url'],
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = sqo_client.post('billing-manual', SQO_CONFIG['billing_url'], payload)
+        if error:
+            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
         
         return jsonify({
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload
         })
         
@@ -141,11 +90,6 @@ def submit_to_delivery():
     try:
         data = request.get_json()
         
-        # Get fresh token
-        token, error = get_sqo_token()
-        if error:
-            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
-        
         # Build payload
         payload = {
             "correlationId": data.get('correlationId', ''),
@@ -153,28 +97,14 @@ def submit_to_delivery():
             "productAgreementItems": data.get('productAgreementItems', [])
         }
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(
-            SQO_CONFIG['delivery_url'],
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = sqo_client.post('submit-delivery', SQO_CONFIG['delivery_url'], payload)
+        if error:
+            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
         
         return jsonify({
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload
         })
         
@@ -187,39 +117,20 @@ def set_product_status():
     try:
         data = request.get_json()
         
-        # Get fresh token
-        token, error = get_odo_token()
-        if error:
-            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
-        
         # Build payload
         payload = {
             "products": data.get('products', []),
             "correlationId": data.get('correlationId', '')
         }
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(
-            SQO_CONFIG['product_status_url'],
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = odo_client.post('set-product-status', SQO_CONFIG['product_status_url'], payload)
+        if error:
+            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
         
         return jsonify({
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload
         })
         
@@ -232,11 +143,6 @@ def send_to_fulfillment():
     try:
         data = request.get_json()
         
-        # Get fresh token
-        token, error = get_odo_token()
-        if error:
-            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
-        
         # Build payload
         payload = {
             "products": data.get('products', []),
@@ -246,28 +152,14 @@ def send_to_fulfillment():
             "fulfillmentGroupVersion": data.get('fulfillmentGroupVersion', '1')
         }
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(
-            SQO_CONFIG['fulfillment_url'],
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = odo_client.post('send-fulfillment', SQO_CONFIG['fulfillment_url'], payload)
+        if error:
+            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
         
         return jsonify({
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload
         })
         
@@ -280,11 +172,6 @@ def quote_alignment():
     try:
         data = request.get_json()
         
-        # Get fresh token
-        token, error = get_odo_token()
-        if error:
-            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
-        
         framework_agreement_id = data.get('frameworkAgreementId', '')
         request_type = data.get('requestType', 'Quote')
         
@@ -294,28 +181,14 @@ def quote_alignment():
             "requestType": request_type
         }
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(
-            url,
-            headers=headers,
-            json=payload,
-            timeout=60,
-            verify=False
-        )
-        
-        try:
-            response_data = response.json()
-        except:
-            response_data = {'raw_response': response.text}
+        response, error = odo_client.post('quote-alignment', url, payload)
+        if error:
+            return jsonify({'success': False, 'error': f'Token Error: {error}'}), 401
         
         return jsonify({
-            'success': response.status_code in [200, 201, 202],
+            'success': response.status_code in SUCCESS_STATUSES,
             'status_code': response.status_code,
-            'data': response_data,
+            'data': response_data(response),
             'request_payload': payload,
             'request_url': url
         })
@@ -0,0 +1,305 @@
+# backend/search_engine.py
+"""
+In-memory Search Engine for the SR / Defect JSON exports
+
+Built once when routes/search.py is imported, so /filter no longer lowercases
+every record on every request:
+
+- Fields are normalized once (str / lower / upper per filter rule)
+- Exact-match hash indexes on SR_ID, CUSTOMER_ID and defect ID
+- Short ID fields (SR_ID, CUSTOMER_ID): all values joined into one string, so
+  a partial match is a single C-level scan instead of a per-record loop
+- Long text (DETAILS + UPDATE_DETAILS, Name + Description): inverted token
+  index. A substring query is split into tokens; each token selects the
+  vocabulary entries it can fall into (whole token, prefix, suffix or inner
+  part, depending on its neighbours in the query) and their posting lists are
+  intersected. Candidates are then checked with the same substring test the
+  route always used, so results are identical to a full scan.
+
+The candidate sets of all filters are intersected (smallest first) before
+any record is verified; results keep export order and search() can paginate.
+
+Usage:
+    engine = SearchEngine(sr_data, defect_data)
+    result = engine.search(osite_id='osite_123_1', search_anything='timeout', page=1, page_size=25)
+    result['sr_data'], result['sr_total'], result['defect_data'], result['defect_total']
+"""
+
+import re
+import time
+from itertools import islice
+from typing import Dict, List, Optional
+
+import numpy as np
+
+TOKEN = re.compile(r'\w+')
+
+# Separates the fields of one record's text; never part of a query
+FIELD_SEP = '\x00'
+
+# A query token matching more vocabulary entries than this is not selective;
+# it is skipped for candidate generation (the final substring check still applies)
+MAX_TOKEN_EXPANSION = 2000
+
+
+def _ids(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.int32)
+
+
+class FieldScan:
+    """Partial matches over one short field per record, via one joined string"""
+
+    def __init__(self, values: List[str]):
+        self.values = values
+        self.joined = '\n'.join(v.replace('\n', ' ') for v in values)
+        lengths = np.fromiter((len(v) + 1 for v in values), dtype=np.int64, count=len(values))
+        self.starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(values) else np.zeros(0, dtype=np.int64)
+
+    def candidates(self, query: str) -> Optional[np.ndarray]:
+        """Records whose value may contain query (None = cannot tell, check all)"""
+        if not query or '\n' in query:
+            return None
+        # Past a quarter of the records the scan is not selective; verify directly
+        limit = len(self.values) // 4 + 1
+        positions = [m.start() for m in islice(re.finditer(re.escape(query), self.joined), limit)]
+        if len(positions) == limit:
+            return None
+        if not positions:
+            return _ids([])
+        return np.unique(np.searchsorted(self.starts, positions, side='right') - 1).astype(np.int32)
+
+
+class TokenIndex:
+    """Inverted token index over long text, answering substring queries with candidates"""
+
+    def __init__(self, texts: List[str]):
+        self.count = len(texts)
+        postings: Dict[str, List[int]] = {}
+        for rid, text in enumerate(texts):
+            for token in set(TOKEN.findall(text)):
+                postings.setdefault(token, []).append(rid)
+
+        vocab = sorted(postings)
+        # '\n'-joined vocabulary: whole/prefix/suffix/inner token lookups are one scan
+        self.vocab_joined = '\n' + '\n'.join(vocab) + '\n'
+        lengths = np.fromiter((len(t) + 1 for t in vocab), dtype=np.int64, count=len(vocab))
+        self.vocab_starts = 1 + np.concatenate(([0], np.cumsum(lengths)[:-1])) if vocab else np.zeros(0, dtype=np.int64)
+        self.ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        self.ptr[1:] = np.cumsum([len(postings[t]) for t in vocab])
+        self.ids = _ids([rid for t in vocab for rid in postings[t]])
+
+    def _vocab_matches(self, token: str, starts_token: bool, ends_token: bool) -> Optional[np.ndarray]:
+        """Vocabulary ids of tokens that `token` can be part of (None = too many to be selective)"""
+        pattern = ('\n' if starts_token else '') + re.escape(token) + ('\n' if ends_token else '')
+        offset = 1 if starts_token else 0
+        matches = islice(re.finditer(pattern, self.vocab_joined), 2 * MAX_TOKEN_EXPANSION)
+        positions = [m.start() + offset for m in matches]
+        if len(positions) == 2 * MAX_TOKEN_EXPANSION:
+            return None
+        if not positions:
+            return _ids([])
+        vocab_ids = np.unique(np.searchsorted(self.vocab_starts, positions, side='right') - 1)
+        return None if len(vocab_ids) > MAX_TOKEN_EXPANSION else vocab_ids
+
+    def candidates(self, query: str) -> Optional[np.ndarray]:
+        """
+        Records that may contain `query` (already lowercased).
+
+        Returns:
+            Sorted record ids, or None if no token of the query is selective
+            (caller checks every record)
+        """
+        if not query.isascii():
+            return None  # lower() is not always length-preserving outside ASCII
+        result = None
+        for match in TOKEN.finditer(query):
+            # A neighbouring non-word char in the query fixes the token boundary
+            starts_token = match.start() > 0
+            ends_token = match.end() < len(query)
+            vocab_ids = self._vocab_matches(match.group(), starts_token, ends_token)
+            if vocab_ids is None:
+                continue
+            if len(vocab_ids):
+                # Union of the posting lists (a mask is far cheaper than np.unique here)
+                hit = np.zeros(self.count, dtype=bool)
+                for v in vocab_ids.tolist():
+                    hit[self.ids[self.ptr[v]:self.ptr[v + 1]]] = True
+                ids = np.flatnonzero(hit).astype(np.int32)
+            else:
+                ids = _ids([])
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+
+class SearchEngine:
+    """
+    Pre-normalized, indexed view of the SR and Defect exports.
+
+    Filter semantics match the original /filter list comprehensions:
+        customer_id      SR CUSTOMER_ID (partial, case-insensitive) | Defect Name/Description
+        osite_id         SR DETAILS/UPDATE_DETAILS | Defect Name/Description (case-insensitive)
+        sr_id            SR SR_ID (partial, upper-case) | Defect Name/Description (upper-case)
+        defect_id        SR DETAILS/UPDATE_DETAILS (case-sensitive) | Defect ID (exact)
+        search_anything  SR DETAILS/UPDATE_DETAILS | Defect Name/Description (case-insensitive)
+    """
+
+    def __init__(self, sr_data: List[Dict], defect_data: List[Dict]):
+        start = time.perf_counter()
+        self.sr_data = sr_data
+        self.defect_data = defect_data
+
+        # SR fields, normalized once. Multi-field text is kept as one string per
+        # record joined by FIELD_SEP, so "in any field" is a single substring test
+        self.sr_text_raw = [FIELD_SEP.join((str(r.get('DETAILS', '')), str(r.get('UPDATE_DETAILS', ''))))
+                            for r in sr_data]
+        self.sr_text_lower = [v.lower() for v in self.sr_text_raw]
+        self.sr_ids_upper = [str(r.get('SR_ID', '')).upper() for r in sr_data]
+        self.sr_customers_lower = [str(r.get('CUSTOMER_ID', '')).lower() for r in sr_data]
+
+        self.sr_text = TokenIndex(self.sr_text_lower)
+        self.sr_non_ascii = self._non_ascii(self.sr_text_raw)
+        self.sr_id_scan = FieldScan(self.sr_ids_upper)
+        self.sr_customer_scan = FieldScan(self.sr_customers_lower)
+        self.sr_by_id = self._hash_index(self.sr_ids_upper)
+        self.sr_by_customer = self._hash_index(self.sr_customers_lower)
+
+        # Defect fields
+        defect_text = [FIELD_SEP.join((str(d.get('Name', '')), str(d.get('Description', '')))) for d in defect_data]
+        self.defect_text_lower = [v.lower() for v in defect_text]
+        self.defect_text_upper = [v.upper() for v in defect_text]
+
+        self.defect_text = TokenIndex(self.defect_text_lower)
+        self.defect_non_ascii = self._non_ascii(defect_text)
+        self.defect_by_id = self._hash_index([str(d.get('ID', '')) for d in defect_data])
+
+        self.build_seconds = time.perf_counter() - start
+        print(f"[SEARCH] Index built: {len(sr_data)} SRs, {len(defect_data)} Defects "
+              f"({len(self.sr_text.ptr) - 1 + len(self.defect_text.ptr) - 1} tokens) in {self.build_seconds:.2f}s")
+
+    @staticmethod
+    def _hash_index(values: List[str]) -> Dict[str, np.ndarray]:
+        index: Dict[str, List[int]] = {}
+        for rid, value in enumerate(values):
+            index.setdefault(value, []).append(rid)
+        return {value: _ids(rids) for value, rids in index.items()}
+
+    @staticmethod
+    def _non_ascii(texts: List[str]) -> np.ndarray:
+        """Ids whose text isn't ASCII. Case mapping can change their length or form
+        (e.g. 'ß'.upper() == 'SS'), so the lowercase token index can't vouch for
+        their raw / uppercase text."""
+        return _ids([i for i, text in enumerate(texts) if not text.isascii()])
+
+    @staticmethod
+    def _with(candidates: Optional[np.ndarray], always: np.ndarray) -> Optional[np.ndarray]:
+        if candidates is None or not len(always):
+            return candidates
+        return np.union1d(candidates, always).astype(np.int32)
+
+    @staticmethod
+    def _verify(candidates: Optional[np.ndarray], query: str, texts: List[str]) -> np.ndarray:
+        """Ids (from candidates, or all) whose text contains query in one of its fields"""
+        if FIELD_SEP in query:
+            return _ids([])
+        if candidates is None:
+            return _ids([i for i, text in enumerate(texts) if query in text])
+        return _ids([i for i in candidates.tolist() if query in texts[i]])
+
+    # ------------------------------------------------------------------
+    # Per-filter checks: (candidates or None, query, texts to verify against;
+    # texts=None means the candidates are already the exact answer)
+    # ------------------------------------------------------------------
+
+    def _sr_text_check(self, query: str, case_sensitive: bool = False):
+        candidates = self.sr_text.candidates(query.lower())
+        if case_sensitive:
+            return self._with(candidates, self.sr_non_ascii), query, self.sr_text_raw
+        return candidates, query, self.sr_text_lower
+
+    def _defect_text_check(self, query: str, upper: bool = False):
+        candidates = self.defect_text.candidates(query.lower())
+        if upper:
+            return self._with(candidates, self.defect_non_ascii), query, self.defect_text_upper
+        return candidates, query, self.defect_text_lower
+
+    @staticmethod
+    def _field_check(scan: FieldScan, exact: Dict[str, np.ndarray], query: str, exact_match: bool):
+        if exact_match:
+            return exact.get(query, _ids([])), query, None
+        return scan.candidates(query), query, scan.values
+
+    def _resolve(self, checks: List, count: int) -> np.ndarray:
+        """Intersect the candidates of all filters (smallest first), then verify each filter on the rest"""
+        if not checks:
+            return np.arange(count, dtype=np.int32)
+        ids = None
+        for candidates, _, _ in sorted(checks, key=lambda c: count + 1 if c[0] is None else len(c[0])):
+            if candidates is not None:
+                ids = candidates if ids is None else np.intersect1d(ids, candidates, assume_unique=True)
+        for _, query, texts in checks:
+            if texts is not None:
+                ids = self._verify(ids, query, texts)
+        return ids
+
+    def search(self, customer_id: str = '', osite_id: str = '', sr_id: str = '', defect_id: str = '',
+               search_anything: str = '', exact_ids: bool = False,
+               page: int = None, page_size: int = None) -> Dict:
+        """
+        Run all given filters (AND) over SRs and Defects.
+
+        Args:
+            customer_id, osite_id, sr_id, defect_id, search_anything: Filter
+                values as sent by the UI (empty = not applied)
+            exact_ids: Match customer_id / sr_id exactly via the hash indexes
+                instead of partially
+            page, page_size: 1-based page of each result list (all results if
+                page_size is not given)
+
+        Returns:
+            dict: sr_data, defect_data (records), sr_total, defect_total, took_ms
+        """
+        start = time.perf_counter()
+        sr_checks, defect_checks = [], []
+
+        if customer_id:
+            query = customer_id.lower()
+            sr_checks.append(self._field_check(self.sr_customer_scan, self.sr_by_customer, query, exact_ids))
+            defect_checks.append(self._defect_text_check(query))
+
+        if osite_id:
+            query = osite_id.lower()
+            sr_checks.append(self._sr_text_check(query))
+            defect_checks.append(self._defect_text_check(query))
+
+        if sr_id:
+            query = sr_id.upper()
+            sr_checks.append(self._field_check(self.sr_id_scan, self.sr_by_id, query, exact_ids))
+            defect_checks.append(self._defect_text_check(query, upper=True))
+
+        if defect_id:
+            sr_checks.append(self._sr_text_check(defect_id, case_sensitive=True))
+            defect_checks.append((self.defect_by_id.get(defect_id, _ids([])), defect_id, None))
+
+        if search_anything:
+            query = search_anything.lower()
+            sr_checks.append(self._sr_text_check(query))
+            defect_checks.append(self._defect_text_check(query))
+
+        sr_ids = self._resolve(sr_checks, len(self.sr_data))
+        defect_ids = self._resolve(defect_checks, len(self.defect_data))
+
+        sr_page, defect_page = sr_ids, defect_ids
+        if page_size:
+            offset = (max(page or 1, 1) - 1) * page_size
+            sr_page = sr_ids[offset:offset + page_size]
+            defect_page = defect_ids[offset:offset + page_size]
+
+        return {
+            'sr_data': [self.sr_data[i] for i in sr_page.tolist()],
+            'defect_data': [self.defect_data[i] for i in defect_page.tolist()],
+            'sr_total': len(sr_ids),
+            'defect_total': len(defect_ids),
+            'took_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
@@ -0,0 +1,286 @@
+# backend/upstream_client.py
+"""
+Upstream Client - shared HTTP access for the SQO / ODO / ONI API routes
+
+The API routes used to log in again before every single call and send each
+request with a bare requests.post (new TCP + TLS handshake every time). This
+module keeps, per process:
+
+- Sessions: one keep-alive requests.Session per upstream host, with an
+  HTTPAdapter connection pool
+- Tokens: a TokenCache per login endpoint. A token is reused until its TTL
+  runs out (the login's expires_in when it sends one, else UPSTREAM_TOKEN_TTL)
+  or the upstream answers 401; concurrent callers share a single login
+- Metrics: call count, errors, status codes and avg/max latency per endpoint
+
+Usage:
+    tokens = TokenCache('sqo', login_url, {'user': ..., 'password': ...})
+    client = UpstreamClient('sqo', tokens)
+    response, error = client.post('billing-manual', billing_url, payload)
+    client.stats()
+
+Settings (environment):
+    UPSTREAM_TOKEN_TTL      seconds a token is reused without expires_in (default 1500)
+    UPSTREAM_POOL_SIZE      keep-alive connections per host (default 10)
+    UPSTREAM_VERIFY_SSL     verify upstream certificates (default 0, as before)
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+UPSTREAM_TOKEN_TTL = float(os.environ.get('UPSTREAM_TOKEN_TTL', '1500'))
+UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', '10'))
+UPSTREAM_VERIFY_SSL = os.environ.get('UPSTREAM_VERIFY_SSL', '0') != '0'
+
+LOGIN_TIMEOUT = 30
+
+# Refresh this many seconds before a login's expires_in runs out
+EXPIRY_MARGIN = 60
+
+# Fields a login response may carry the token in, in order of preference
+TOKEN_FIELDS = ('token', 'access_token', 'sessionToken')
+
+SUCCESS_STATUSES = (200, 201, 202)
+
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """Keep-alive session for the host of `url` (created on first use)"""
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.verify = UPSTREAM_VERIFY_SSL
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPSTREAM_POOL_SIZE)
+                session.mount(f"{parts.scheme}://", adapter)
+                _sessions[key] = session
+    return session
+
+
+def session_hosts():
+    return sorted(_sessions)
+
+
+def response_data(response: requests.Response):
+    """JSON body, or the raw text when the upstream did not send JSON"""
+    try:
+        return response.json()
+    except ValueError:
+        return {'raw_response': response.text}
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class EndpointMetrics:
+    """Latency and error counters per endpoint name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict] = {}
+
+    def record(self, endpoint: str, elapsed_ms: float, status: Optional[int] = None, error: str = None):
+        with self._lock:
+            m = self._endpoints.setdefault(endpoint, {
+                'calls': 0, 'errors': 0, 'statuses': {}, 'total_ms': 0.0, 'max_ms': 0.0,
+                'last_status': None, 'last_error': None, 'last_call': None
+            })
+            m['calls'] += 1
+            m['total_ms'] += elapsed_ms
+            m['max_ms'] = max(m['max_ms'], elapsed_ms)
+            m['last_status'] = status
+            m['last_call'] = datetime.now().isoformat()
+            if status is not None:
+                m['statuses'][str(status)] = m['statuses'].get(str(status), 0) + 1
+            if error is not None or status is None or status >= 400:
+                m['errors'] += 1
+                m['last_error'] = error or f"HTTP {status}"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            result = {}
+            for endpoint, m in self._endpoints.items():
+                stats = {k: v for k, v in m.items() if k != 'total_ms'}
+                stats['statuses'] = dict(m['statuses'])
+                stats['avg_ms'] = round(m['total_ms'] / m['calls'], 1)
+                stats['max_ms'] = round(m['max_ms'], 1)
+                result[endpoint] = stats
+            return result
+
+
+# ============================================================================
+# TOKENS
+# ============================================================================
+
+class TokenCache:
+    """One login endpoint's bearer token, reused until it expires or is rejected"""
+
+    def __init__(self, name: str, login_url: str, credentials: Dict,
+                 token_fields=TOKEN_FIELDS, ttl: float = UPSTREAM_TOKEN_TTL):
+        self.name = name
+        self.login_url = login_url
+        self.credentials = credentials
+        self.token_fields = token_fields
+        self.ttl = ttl
+        self.metrics = EndpointMetrics()
+        self.logins = 0
+        self.invalidations = 0
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    def get(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Cached token, logging in only when there is none or it has expired.
+
+        Returns:
+            tuple: (token, None) or (None, error message)
+        """
+        if self._valid():
+            return self._token, None
+        with self._lock:
+            # Another thread may have logged in while we waited
+            if self._valid():
+                return self._token, None
+            return self._login()
+
+    def invalidate(self, token: str = None):
+        """Drop the cached token (only if it is still `token`, when given)"""
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = None
+                self._expires_at = 0.0
+                self.invalidations += 1
+
+    def _login(self) -> Tuple[Optional[str], Optional[str]]:
+        started = time.perf_counter()
+        try:
+            response = get_session(self.login_url).post(
+                self.login_url,
+                headers={'Content-Type': 'application/json'},
+                data=json.dumps(self.credentials),
+                timeout=LOGIN_TIMEOUT
+            )
+        except Exception as e:
+            self.metrics.record('login', (time.perf_counter() - started) * 1000, error=str(e))
+            return None, str(e)
+        self.metrics.record('login', (time.perf_counter() - started) * 1000, response.status_code)
+        self.logins += 1
+
+        if response.status_code != 200:
+            return None, f"Login failed: {response.status_code} - {response.text}"
+        try:
+            data = response.json()
+        except ValueError as e:
+            return None, f"Login failed: invalid JSON response ({e})"
+        token = next((data[f] for f in self.token_fields if data.get(f)), None)
+        if token is None:
+            return None, "Login failed: no token in response"
+
+        ttl = self.ttl
+        expires_in = data.get('expires_in')
+        if isinstance(expires_in, (int, float)) and expires_in > 0:
+            ttl = min(ttl, max(expires_in - EXPIRY_MARGIN, expires_in / 2))
+        self._token = token
+        self._expires_at = time.monotonic() + ttl
+        print(f"[INFO] {self.name} token refreshed (valid for {int(ttl)}s, login #{self.logins})")
+        return token, None
+
+    def info(self) -> Dict:
+        remaining = self._expires_at - time.monotonic() if self._token is not None else 0
+        return {
+            'name': self.name,
+            'login_url': self.login_url,
+            'cached': self._valid(),
+            'expires_in_s': max(int(remaining), 0),
+            'logins': self.logins,
+            'invalidations': self.invalidations,
+            'login_metrics': self.metrics.snapshot().get('login', {})
+        }
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class UpstreamClient:
+    """Authenticated calls to one upstream service, with a retry on 401"""
+
+    def __init__(self, name: str, tokens: TokenCache):
+        self.name = name
+        self.tokens = tokens
+        self.metrics = EndpointMetrics()
+
+    def post(self, endpoint: str, url: str, payload: Dict,
+             timeout: float = 60) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """
+        POST `payload` as JSON with the cached bearer token.
+
+        A 401 drops the token, logs in again and resends once. Network errors
+        are recorded and re-raised.
+
+        Args:
+            endpoint: Name the call is recorded under in stats()
+            url: Target URL
+            payload: JSON body
+            timeout: Request timeout in seconds
+
+        Returns:
+            tuple: (response, None), or (None, token error message)
+        """
+        token, error = self.tokens.get()
+        if error:
+            return None, error
+        response = self._send(endpoint, url, token, payload, timeout)
+        if response.status_code == 401:
+            print(f"[WARN] {self.name} {endpoint} returned 401, refreshing token")
+            self.tokens.invalidate(token)
+            token, error = self.tokens.get()
+            if error:
+                return None, error
+            response = self._send(endpoint, url, token, payload, timeout)
+        return response, None
+
+    def _send(self, endpoint: str, url: str, token: str, payload: Dict, timeout: float) -> requests.Response:
+        headers = {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+        started = time.perf_counter()
+        try:
+            response = get_session(url).post(url, headers=headers, json=payload, timeout=timeout)
+        except Exception as e:
+            self.metrics.record(endpoint, (time.perf_counter() - started) * 1000, error=str(e))
+            raise
+        self.metrics.record(endpoint, (time.perf_counter() - started) * 1000, response.status_code)
+        return response
+
+    def stats(self) -> Dict:
+        return {
+            'service': self.name,
+            'token': self.tokens.info(),
+            'endpoints': self.metrics.snapshot()
+        }
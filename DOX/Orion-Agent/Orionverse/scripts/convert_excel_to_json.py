@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 """
 Convert OSO Activity Data Excel file to JSON for faster loading
-Run this script once to convert the Excel file to JSON format
+Run this script once to convert the Excel file to JSON format.
+Also writes the columnar store (backend/data/oso_activity_data.columns/)
+that the Activity Data grid queries.
 """
 
 import pandas as pd
 import json
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+from activity_store import ActivityStore
+
 def convert_excel_to_json():
     """Convert Excel file to JSON format"""
     # Paths
@@ -57,6 +63,12 @@ def convert_excel_to_json():
         print(f"[INFO] JSON file size: {file_size:.2f} MB")
         print(f"[INFO] JSON file saved at: {json_path}")
         
+        # Columnar store for /api/activity/search (lowercased columns, sort keys, distinct counts)
+        def read_json():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        ActivityStore.load_or_build(json_path, read_json, rebuild=True)
+        
         return True
         
     except Exception as e:
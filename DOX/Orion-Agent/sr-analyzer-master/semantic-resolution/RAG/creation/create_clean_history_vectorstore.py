@@ -1,21 +1,40 @@
 #!/usr/bin/env python3
 """
-Script to create clean_history_data.db vectorstore with PREPROCESSING
-Loads Excel files from past_data folder and applies text cleaning before embedding
+Script to create the clean_history_data vectorstore with PREPROCESSING
+Loads Excel/CSV files from past_data folder and applies text cleaning before embedding
+
+Default mode streams into the ChromaDB 'clean_history_data' collection:
+    - files are read in chunks (openpyxl read-only for .xlsx, chunked read_csv for .csv)
+    - rows are preprocessed, embedded and upserted in fixed-size batches
+    - a checkpoint (file + row offset) is written after every batch, so a
+      crashed run resumes where it stopped instead of starting over
+    - call_ids already in the collection keep the AI workarounds, user
+      corrections and assignments the app wrote to them
+Peak memory is bounded by --batch-size, not by the size of the history.
+
+Usage:
+    python RAG/creation/create_clean_history_vectorstore.py                  # stream / resume
+    python RAG/creation/create_clean_history_vectorstore.py --reset          # drop collection, start over
+    python RAG/creation/create_clean_history_vectorstore.py --batch-size 256 --source past_data
+    python RAG/creation/create_clean_history_vectorstore.py --mode pickle    # legacy clean_history_data.db
 """
 import os
 import sys
+import json
+import argparse
 import pandas as pd
 import pickle
 import numpy as np
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
-# Add current directory to path for imports
+# Project root on path for analyzers/ and RAG.utils imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 
 # Import preprocessing utility
-from analyzers.sr_text_preprocessor import SRTextPreprocessor
+from analyzers.sr_text_preprocessor import SRTextPreprocessor, shutdown_pool
 
 # Try to import sentence transformers
 try:
@@ -46,6 +65,17 @@ NEW_COLUMNS = {
     'user_corrected_workaround': ''   # User-provided corrections (empty by default)
 }
 
+# Fields the app writes to stored records (AI workarounds, user corrections,
+# assignments). Re-ingesting a call_id keeps their stored values
+APP_OWNED_FIELDS = ('ai_generated_workaround', 'user_corrected_workaround',
+                    'assigned_to', 'current_assignee', 'assigned_date')
+PLACEHOLDER_VALUES = ('', 'NA', 'N/A', 'None', 'nan', 'Not Assigned')
+
+COLLECTION_NAME = 'clean_history_data'
+DEFAULT_CHROMADB_PATH = 'data/vectorstore/chromadb_store'
+CHECKPOINT_FILE = 'clean_history_ingest_checkpoint.json'
+SOURCE_PATTERNS = ('*.xls', '*.xlsx', '*.csv')
+
 
 def load_excel_files(folder_path='past_data'):
     """Load all Excel files from the specified folder"""
@@ -281,16 +311,348 @@ def validate_vectorstore(db_path='data/vectorstore/clean_history_data.db'):
         return False
 
 
+# ============================================================================
+# STREAMING INGESTION (ChromaDB)
+# ============================================================================
+
+def _is_blank(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and np.isnan(value):
+        return True
+    return str(value).strip().lower() in ('', 'nan', 'none', 'nat')
+
+
+def iter_source_rows(file_path: Path, chunk_rows: int = 5000) -> Iterator[List[Dict]]:
+    """
+    Yield a file's rows as chunks of dicts (columns renamed via COLUMN_MAPPING).
+    
+    .xlsx is read with openpyxl in read-only mode and .csv with chunked
+    read_csv, so only one chunk is in memory. .xls has no streaming reader and
+    is loaded whole (one file at a time).
+    """
+    suffix = file_path.suffix.lower()
+    
+    if suffix == '.csv':
+        for chunk in pd.read_csv(file_path, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+            chunk.rename(columns=COLUMN_MAPPING, inplace=True)
+            yield chunk.to_dict('records')
+        return
+    
+    if suffix == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [COLUMN_MAPPING.get(str(h).strip(), str(h).strip()) if h is not None else f'col_{i}'
+                       for i, h in enumerate(header)]
+            chunk = []
+            for values in rows:
+                if values is None or all(v is None for v in values):
+                    continue
+                chunk.append(dict(zip(columns, values)))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+        return
+    
+    df = pd.read_excel(file_path)
+    df.rename(columns=COLUMN_MAPPING, inplace=True)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_dict('records')
+    del df
+
+
+def clean_descriptions(rows: List[Dict]):
+    """Preprocess a chunk's descriptions in one preprocess_batch call (shared process pool for large chunks)"""
+    descriptions = ['' if _is_blank(row.get('description')) else str(row['description']).strip()
+                    for row in rows]
+    for row, cleaned_value in zip(rows, SRTextPreprocessor.preprocess_batch(descriptions)):
+        row['_clean_description'] = cleaned_value
+
+
+def build_document_and_metadata(row: Dict) -> Tuple[str, Dict]:
+    """
+    Searchable text + ChromaDB metadata for one row (after clean_descriptions).
+    
+    Same text as create_searchable_text_with_preprocessing (cleaned description
+    + categorization fields); metadata values are flattened to strings as
+    ChromaDB requires, workarounds kept unmodified.
+    """
+    parts = []
+    cleaned_value = row.get('_clean_description')
+    if cleaned_value and len(cleaned_value) > 5:
+        parts.append(cleaned_value)
+    
+    for field in ('resolution_categorization', 'resolution_categorization_tier3',
+                  'sla_resolution_categorization_t1', 'sla_resolution_category'):
+        value = row.get(field)
+        if not _is_blank(value):
+            parts.append(f"{field}: {' '.join(str(value).split())}")
+    
+    metadata = {}
+    for key, value in row.items():
+        if key is None or str(key).startswith(('col_', '_')):
+            continue
+        if _is_blank(value):
+            metadata[key] = ''
+        elif isinstance(value, (datetime, pd.Timestamp)):
+            metadata[key] = value.isoformat()
+        else:
+            metadata[key] = str(value)[:10000 if key == 'ai_generated_workaround' else 5000]
+    for col, default_val in NEW_COLUMNS.items():
+        if not metadata.get(col):
+            metadata[col] = default_val
+    metadata['call_id'] = str(row.get('call_id') or '').strip().upper()
+    metadata['source'] = metadata.get('source') or 'past_data'
+    # added_date means "came in that day" (daily loads, reassignment); history rows
+    # keep the source's own value or stay blank and fall back to their reported date
+    metadata['added_date'] = metadata.get('added_date') or ''
+    
+    return " ".join(parts), metadata
+
+
+def preserve_app_fields(metadata: Dict, existing: Optional[Dict]) -> Dict:
+    """
+    Carry app-written fields of an already stored record over into its re-ingested metadata.
+    
+    Fields the source files don't have (marked_done_by, ai_workaround_updated, ...)
+    are kept as they are; APP_OWNED_FIELDS keep their stored value unless it is
+    only a placeholder.
+    """
+    if not existing:
+        return metadata
+    for key, value in existing.items():
+        if key not in metadata:
+            metadata[key] = value
+        elif key in APP_OWNED_FIELDS and str(value).strip() not in PLACEHOLDER_VALUES:
+            metadata[key] = value
+    return metadata
+
+
+def load_checkpoint(checkpoint_path: Path) -> Dict:
+    if checkpoint_path.exists():
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+    return {'completed_files': [], 'current_file': None, 'file_signature': None,
+            'last_call_id': None, 'rows_in_file': 0, 'total_upserted': 0}
+
+
+def _file_signature(file_path: Path) -> List[int]:
+    stat = file_path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def save_checkpoint(checkpoint_path: Path, state: Dict):
+    """Write the checkpoint atomically (a crash mid-write keeps the previous one)"""
+    state['updated_at'] = datetime.now().isoformat()
+    tmp_path = checkpoint_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def stream_vectorstore_to_chromadb(source_folder='past_data', chromadb_path=DEFAULT_CHROMADB_PATH,
+                                   batch_size=512, chunk_rows=5000, reset=False) -> Optional[Dict]:
+    """
+    Stream past_data files into the clean_history_data collection in batches.
+    
+    Args:
+        source_folder: Folder with .xls/.xlsx/.csv exports
+        chromadb_path: ChromaDB store directory
+        batch_size: Rows preprocessed, embedded and upserted together
+        chunk_rows: Rows read from a file at a time
+        reset: Drop the collection and checkpoint and start from scratch
+    
+    Returns:
+        Final checkpoint state, or None on setup failure
+    """
+    from RAG.utils.shared_resources import get_embedding_model, get_chromadb_client
+    
+    print(f"\n{'='*80}")
+    print(f"STREAMING INGESTION INTO CHROMADB ({COLLECTION_NAME})")
+    print(f"{'='*80}")
+    
+    folder = Path(source_folder)
+    files = sorted(f for pattern in SOURCE_PATTERNS for f in folder.glob(pattern))
+    if not files:
+        print(f"ERROR: No Excel/CSV files found in {source_folder}")
+        return None
+    
+    chromadb_dir = Path(chromadb_path)
+    chromadb_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = chromadb_dir / CHECKPOINT_FILE
+    
+    client = get_chromadb_client(chromadb_dir)
+    model = get_embedding_model('all-MiniLM-L6-v2')
+    if client is None or model is None:
+        print("ERROR: ChromaDB or embedding model not available")
+        return None
+    
+    if reset:
+        try:
+            client.delete_collection(COLLECTION_NAME)
+            print(f"  Dropped existing collection '{COLLECTION_NAME}'")
+        except Exception:
+            pass
+        if checkpoint_path.exists():
+            checkpoint_path.unlink()
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+    
+    state = load_checkpoint(checkpoint_path)
+    if state['total_upserted']:
+        print(f"↻ Resuming: {len(state['completed_files'])} files done, "
+              f"{state['total_upserted']} rows upserted, {state.get('rows_in_file', 0)} rows "
+              f"of {state['current_file']} (last call_id {state['last_call_id']})")
+    print(f"Found {len(files)} source files | batch size {batch_size} | chunk rows {chunk_rows}")
+    
+    started = datetime.now()
+    run_upserted = 0
+    
+    for file_index, file_path in enumerate(files, 1):
+        if file_path.name in state['completed_files']:
+            continue
+        
+        signature = _file_signature(file_path)
+        skip_rows = 0
+        if state['current_file'] == file_path.name and state.get('rows_in_file'):
+            if state.get('file_signature') in (None, signature):  # None: checkpoint from an older run
+                skip_rows = state['rows_in_file']
+            else:
+                print(f"    ⚠️ {file_path.name} changed since the checkpoint - "
+                      f"re-ingesting it from the start (upserts are idempotent)")
+        if not skip_rows:
+            state.update({'current_file': file_path.name, 'file_signature': signature,
+                          'last_call_id': None, 'rows_in_file': 0})
+        print(f"  [{file_index}/{len(files)}] {file_path.name}"
+              + (f" (skipping the first {skip_rows} rows)" if skip_rows else ""))
+        
+        batch: List[Dict] = []
+        
+        def flush_batch():
+            nonlocal run_upserted
+            if not batch:
+                return
+            ids, documents, metadatas = [], [], []
+            seen = {}
+            for row in batch:
+                document, metadata = build_document_and_metadata(row)
+                record_id = metadata['call_id'] or f"{file_path.stem}_{row['_row']}"
+                if record_id in seen:
+                    # Duplicate call_id within a batch - keep the later row (upsert semantics)
+                    position = seen[record_id]
+                    documents[position], metadatas[position] = document, metadata
+                    continue
+                seen[record_id] = len(ids)
+                ids.append(record_id)
+                documents.append(document)
+                metadatas.append(metadata)
+            
+            # Upsert replaces the whole metadata dict - keep what the app wrote to these records
+            existing = collection.get(ids=ids, include=['metadatas'])
+            stored = dict(zip(existing['ids'], existing['metadatas'] or []))
+            for position, record_id in enumerate(ids):
+                preserve_app_fields(metadatas[position], stored.get(record_id))
+            
+            embeddings = model.encode(documents, batch_size=64, show_progress_bar=False)
+            collection.upsert(ids=ids, embeddings=embeddings.tolist(),
+                              documents=documents, metadatas=metadatas)
+            
+            state['last_call_id'] = batch[-1]['_call_id']
+            state['rows_in_file'] = batch[-1]['_row'] + 1
+            state['total_upserted'] += len(ids)
+            run_upserted += len(ids)
+            save_checkpoint(checkpoint_path, state)
+            
+            elapsed = max((datetime.now() - started).total_seconds(), 1e-6)
+            print(f"    ✓ {state['total_upserted']} upserted ({run_upserted / elapsed:.0f} rows/s)")
+            batch.clear()
+        
+        row_number = 0
+        for chunk in iter_source_rows(file_path, chunk_rows):
+            pending = []
+            for row in chunk:
+                row['_row'] = row_number
+                row['_call_id'] = str(row.get('call_id') or '').strip().upper() or f"#{row_number}"
+                row_number += 1
+                # Rows before the checkpointed offset are already stored
+                if row['_row'] >= skip_rows:
+                    pending.append(row)
+            
+            clean_descriptions(pending)
+            for row in pending:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush_batch()
+        
+        flush_batch()
+        state['completed_files'].append(file_path.name)
+        state.update({'current_file': None, 'file_signature': None, 'last_call_id': None, 'rows_in_file': 0})
+        save_checkpoint(checkpoint_path, state)
+    
+    # Every chunk reused one preprocessing pool; release its workers
+    shutdown_pool()
+    
+    state['finished_at'] = datetime.now().isoformat()
+    save_checkpoint(checkpoint_path, state)
+    print(f"\n✓ Ingestion complete: {state['total_upserted']} rows upserted "
+          f"({run_upserted} this run), collection size {collection.count()}")
+    
+    # Side index is rebuilt here rather than on the next app start
+    try:
+        from RAG.utils.history_index import get_history_index
+        get_history_index().rebuild(collection)
+    except Exception as e:
+        print(f"⚠️ Side index rebuild skipped: {e}")
+    
+    # Bulk upserts bypass the dashboard counters - recount them on the next /admin/stats
+    try:
+        from RAG.utils.dashboard_stats import get_dashboard_stats
+        dashboard_stats = get_dashboard_stats()
+        dashboard_stats.mark_history_stale()
+        dashboard_stats.flush()
+    except Exception as e:
+        print(f"⚠️ Dashboard counters not invalidated: {e}")
+    
+    return state
+
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Create the clean_history_data vectorstore")
+    parser.add_argument('--mode', choices=['chromadb', 'pickle'], default='chromadb',
+                        help='chromadb: streaming upsert with checkpoints (default); pickle: legacy .db file')
+    parser.add_argument('--source', default='past_data', help='Folder with Excel/CSV exports')
+    parser.add_argument('--chromadb-path', default=DEFAULT_CHROMADB_PATH, help='ChromaDB store directory')
+    parser.add_argument('--batch-size', type=int, default=512, help='Rows embedded/upserted per batch')
+    parser.add_argument('--chunk-rows', type=int, default=5000, help='Rows read from a file at a time')
+    parser.add_argument('--reset', action='store_true', help='Drop collection and checkpoint, start over')
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print(" CREATE CLEAN HISTORY VECTORSTORE WITH PREPROCESSING")
     print("="*80)
     print(f" Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*80)
     
+    if args.mode == 'chromadb':
+        state = stream_vectorstore_to_chromadb(args.source, args.chromadb_path, args.batch_size,
+                                               args.chunk_rows, reset=args.reset)
+        print(f"\nFinished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return state is not None
+    
     # Step 1: Load Excel files
-    df = load_excel_files('past_data')
+    df = load_excel_files(args.source)
     if df is None:
         print("\n✗ Failed to load data. Exiting.")
         return False
@@ -0,0 +1,148 @@
+"""
+Concurrency Benchmark for MultiModelSRPipeline.process_all_srs
+
+Starts a local stub of the /api/v1/call_llm endpoint that answers after a fixed
+latency, then pushes a synthetic SR batch through process_all_srs at several
+concurrency levels and reports SRs/minute.
+
+Only the orchestration is exercised (thread pool, ordered emission, sequential
+LLM 5, token throttling, checkpointing) - vectorstore search and the real
+prompts are replaced by a stub that makes the same number of LLM calls per SR.
+
+Usage:
+    python RAG/pipeline/benchmark_concurrency.py
+    python RAG/pipeline/benchmark_concurrency.py --srs 80 --latency 0.5 --levels 1 4 8 16
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import argparse
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from multi_model_rag_pipeline_chatgpt import MultiModelSRPipeline, MultiModelLLM, TokenManager
+
+
+def start_stub_llm_server(latency: float) -> ThreadingHTTPServer:
+    """Start a local HTTP server mimicking call_llm with a fixed response latency"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+            time.sleep(latency)
+            body = json.dumps({
+                'message': '{"is_java_error": false, "issue_type": "Data"}',
+                'input_tokens': 1500,
+                'output_tokens': 200,
+                'cost': 0.004,
+                'finish_reason': 'stop'
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubPipeline(MultiModelSRPipeline):
+    """Pipeline with the heavy components (vectorstore, DBs) replaced by stubs"""
+
+    def __init__(self, llm: MultiModelLLM):
+        self.token_manager = llm.token_manager
+        self.llm = llm
+        self.results = []
+        self.daily_loads = {}
+        self.daily_date = None
+
+    def analyze_single_sr(self, sr_data, assign=True):
+        # LLM calls 1-4 (workaround, java detection, keywords, resolution)
+        for call_name in ["find_workaround", "java_detection", "extract_keywords", "general_resolution"]:
+            self.llm.call(f"SR {sr_data['SR ID']}", call_name=call_name)
+        result = {
+            'SR ID': sr_data['SR ID'],
+            'Priority': sr_data['Priority'],
+            'Is Java Error': 'No',
+            'Issue Type': 'Data',
+            'Assigned To': None
+        }
+        if assign:
+            result['Assigned To'] = self._llm_skill_assignment(sr_data, False, 'Data')
+        return result
+
+    def _llm_skill_assignment(self, sr_data, is_java_error, issue_type):
+        # LLM call 5
+        self.llm.call(f"Assign {sr_data['SR ID']}", call_name="skill_assignment")
+        return "Stub Member"
+
+
+def run_benchmark(num_srs: int, latency: float, levels, rpm: int):
+    server = start_stub_llm_server(latency)
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/call_llm"
+
+    df = pd.DataFrame({
+        'SR ID': [f"CAS{i:07d}" for i in range(num_srs)],
+        'Priority': [['P1', 'P2', 'P3', 'P4'][i % 4] for i in range(num_srs)],
+        'Description': [f"Synthetic SR {i}" for i in range(num_srs)],
+    })
+
+    print(f"\n{'='*60}")
+    print(f"Concurrency benchmark: {num_srs} SRs, {latency:.2f}s stub latency, 5 LLM calls/SR")
+    print(f"{'='*60}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tokens_file = Path(tmp) / "Tokens.xlsx"
+        pd.DataFrame({'Email': ['bench@local'], 'Token': ['stub-token']}).to_excel(tokens_file, index=False)
+
+        for level in levels:
+            token_manager = TokenManager(tokens_file, max_calls_per_minute=rpm)
+            pipeline = StubPipeline(MultiModelLLM(token_manager, api_url=api_url))
+            checkpoint = Path(tmp) / f"bench_{level}.jsonl"
+
+            start = time.perf_counter()
+            pipeline.process_all_srs(df, concurrency=level, checkpoint_path=checkpoint)
+            elapsed = time.perf_counter() - start
+
+            rows.append((level, elapsed, num_srs / elapsed * 60))
+
+    server.shutdown()
+
+    print(f"\n{'Concurrency':>12} | {'Seconds':>8} | {'SRs/min':>8} | {'Speedup':>7}")
+    print("-" * 46)
+    base = rows[0][2] if rows else 1
+    for level, elapsed, rate in rows:
+        print(f"{level:>12} | {elapsed:>8.1f} | {rate:>8.1f} | {rate / base:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process_all_srs concurrency")
+    parser.add_argument('--srs', type=int, default=64, help='Number of synthetic SRs')
+    parser.add_argument('--latency', type=float, default=0.5, help='Stub LLM latency in seconds')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 4, 8, 16], help='Concurrency levels')
+    parser.add_argument('--rpm', type=int, default=0, help='Per-token calls/minute limit (0 = unlimited)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('PYTHONIOENCODING', 'utf-8')
+    run_benchmark(args.srs, args.latency, args.levels, args.rpm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Retrieval Micro-Benchmark for VectorstoreHandler
+
+Measures per-SR vector retrieval latency for the Java path of analyze_single_sr
+with and without query planning:
+
+    before (batch_queries=False): one encode() + one collection.query() per text
+    after  (batch_queries=True):  one batched encode() per SR, multi-embedding
+                                  queries per collection, memoized inside the plan
+
+Per SR the same searches as the pipeline are issued:
+    - search_historical_srs (LLM 1/2 context)
+    - search_java_classes_fuzzy with up to 10 keywords (LLM 3a -> fuzzy search)
+    - search_java_code_semantically x3 (LLM 3b, first try + 2 retries)
+    - search_java_code_batch for 3 impl classes (LLM 4a)
+
+By default a temporary ChromaDB store with random vectors is built so the run is
+repeatable; --store points it at the real data/vectorstore/chromadb_store.
+
+Usage:
+    python RAG/pipeline/benchmark_retrieval.py
+    python RAG/pipeline/benchmark_retrieval.py --srs 50 --docs 20000
+    python RAG/pipeline/benchmark_retrieval.py --store data/vectorstore/chromadb_store
+"""
+
+import sys
+import time
+import random
+import tempfile
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from multi_model_rag_pipeline_chatgpt import VectorstoreHandler
+
+WORDS = ("order activation billing address validate decompose provisioning service account "
+         "customer payment invoice modem equipment port number transfer disconnect suspend "
+         "resume credit adjustment tax rate plan discount promotion device serial").split()
+
+
+def build_synthetic_store(path: Path, num_docs: int, dim: int = 384):
+    """Create clean_history_data / java_mapping / comcast_code with random unit vectors"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(path))
+    rng = np.random.default_rng(42)
+    sizes = {'clean_history_data': num_docs, 'java_mapping': max(num_docs // 4, 100),
+             'comcast_code': max(num_docs // 2, 100)}
+
+    for name, size in sizes.items():
+        collection = client.create_collection(name, metadata={"hnsw:space": "cosine"})
+        for start in range(0, size, 5000):
+            count = min(5000, size - start)
+            vectors = rng.normal(size=(count, dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            ids = [f"{name}_{start + i}" for i in range(count)]
+            collection.add(
+                ids=ids,
+                embeddings=vectors.tolist(),
+                documents=[f"doc {i}" for i in ids],
+                metadatas=[{'call_id': i, 'class_name': f"Class{i.split('_')[-1]}Impl",
+                            'file_path': f"src/{i}.java"} for i in ids]
+            )
+    print(f"[OK] Synthetic store: {sizes}")
+
+
+def synthetic_sr(rng: random.Random) -> dict:
+    return {
+        'SR ID': f"CAS{rng.randint(0, 9999999):07d}",
+        'Description': " ".join(rng.choices(WORDS, k=40)),
+        'Notes': " ".join(rng.choices(WORDS, k=25)),
+    }
+
+
+def retrieve_for_sr(handler: VectorstoreHandler, sr: dict, rng: random.Random):
+    """Same vector searches analyze_single_sr makes for a Java SR"""
+    with handler.retrieval_plan(sr):
+        query_text = f"{sr['Description']} {sr['Notes']}".strip()
+        handler.search_historical_srs(query_text, top_k=10)
+
+        keywords = rng.sample(WORDS, 10)
+        handler.search_java_classes_fuzzy(keywords, max_results=100)
+
+        code_query = f"{sr['Description']} {sr['Notes']}"
+        for _ in range(3):
+            handler.search_java_code_semantically(code_query, top_k=5)
+
+        handler.search_java_code_batch([f"{k.title()}ActivityImpl" for k in keywords[:3]], top_k=2)
+
+
+def run(handler: VectorstoreHandler, srs, seed: int):
+    rng = random.Random(seed)
+    retrieve_for_sr(handler, srs[0], rng)  # warm-up (model/HNSW load)
+    timings = []
+    for sr in srs:
+        start = time.perf_counter()
+        retrieve_for_sr(handler, sr, rng)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-SR retrieval latency, before/after query planning")
+    parser.add_argument('--srs', type=int, default=30, help='Number of synthetic SRs')
+    parser.add_argument('--docs', type=int, default=20000, help='History docs in the synthetic store')
+    parser.add_argument('--store', default=None, help='Use an existing ChromaDB store instead')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    srs = [synthetic_sr(rng) for _ in range(args.srs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(args.store) if args.store else Path(tmp) / "chromadb_store"
+        if not args.store:
+            build_synthetic_store(store, args.docs)
+
+        rows = []
+        for label, batched in (("before (per-text)", False), ("after (planned)", True)):
+            handler = VectorstoreHandler(chromadb_path=store, batch_queries=batched)
+            timings = run(handler, srs, seed=11)
+            rows.append((label, statistics.mean(timings), statistics.median(timings),
+                         sorted(timings)[int(len(timings) * 0.95) - 1]))
+
+    print(f"\n{'='*60}")
+    print(f"Per-SR retrieval latency ({args.srs} SRs, Java path: history + 10 keywords + 3 code + 3 impl)")
+    print(f"{'='*60}")
+    print(f"{'Mode':<20} | {'Mean ms':>8} | {'Median':>8} | {'p95':>8}")
+    print("-" * 54)
+    for label, mean, median, p95 in rows:
+        print(f"{label:<20} | {mean:>8.1f} | {median:>8.1f} | {p95:>8.1f}")
+    if len(rows) == 2 and rows[1][1]:
+        print(f"\nSpeedup (mean): {rows[0][1] / rows[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
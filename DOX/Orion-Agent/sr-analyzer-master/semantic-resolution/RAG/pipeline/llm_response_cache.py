@@ -0,0 +1,189 @@
+"""
+LLM Response Cache
+Disk-backed (SQLite) cache for call_llm responses.
+
+Responses are keyed on a SHA-256 of (model, system message, prompt, temperature),
+so re-running the same input file or regenerating an SR with unchanged context
+is answered locally instead of hitting the API again.
+
+Eviction:
+    - TTL: entries older than ttl_hours are ignored and purged
+    - Size: at most max_entries rows are kept, least recently used go first
+
+Settings (environment):
+    LLM_CACHE_ENABLED      1/0 (default 1)
+    LLM_CACHE_TTL_HOURS    default 168 (7 days)
+    LLM_CACHE_MAX_ENTRIES  default 50000
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "database" / "llm_response_cache.db"
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed LLM response cache with TTL and LRU size eviction.
+
+    Each entry stores the response message together with the token counts and
+    cost of the original call, so cache hits can report what they saved.
+
+    Safe to share between threads; separate processes (gunicorn workers, admin
+    uploads) share the same file through SQLite WAL mode.
+
+    Attributes:
+        hits / misses: Lookup counters for this process
+        tokens_saved / cost_saved: Usage avoided by cache hits
+    """
+
+    def __init__(self, db_path: Path = None, ttl_hours: float = None, max_entries: int = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = float(ttl_hours if ttl_hours is not None
+                                 else os.environ.get('LLM_CACHE_TTL_HOURS', '168')) * 3600
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.environ.get('LLM_CACHE_MAX_ENTRIES', '50000'))
+
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.cost_saved = 0.0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Create cache table (WAL mode so readers don't block the writer)"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    call_name TEXT,
+                    response TEXT NOT NULL,
+                    input_tokens INTEGER DEFAULT 0,
+                    output_tokens INTEGER DEFAULT 0,
+                    cost REAL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(last_accessed)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, system_msg: str, prompt: str, temperature: float) -> str:
+        """Stable cache key for one LLM request"""
+        raw = json.dumps([model, system_msg, prompt, round(float(temperature), 4)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached response for key, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, input_tokens, output_tokens, cost, created_at FROM llm_cache WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None or (self.ttl_seconds and now - row[4] > self.ttl_seconds):
+                    if row is not None:
+                        self._conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                        self._conn.commit()
+                    self.misses += 1
+                    return None
+
+                self._conn.execute(
+                    "UPDATE llm_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                    (now, key)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[LLM-CACHE] Read error: {e}")
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.tokens_saved += (row[1] or 0) + (row[2] or 0)
+            self.cost_saved += row[3] or 0
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = "", call_name: str = "",
+            input_tokens: int = 0, output_tokens: int = 0, cost: float = 0.0):
+        """Store a successful response"""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("""
+                    INSERT OR REPLACE INTO llm_cache
+                    (cache_key, model, call_name, response, input_tokens, output_tokens, cost, created_at, last_accessed, hit_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                """, (key, model, call_name, response, input_tokens, output_tokens, cost, now, now))
+                self._conn.commit()
+
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= 100:
+                    self._evict()
+            except sqlite3.Error as e:
+                print(f"[LLM-CACHE] Write error: {e}")
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows above max_entries (lock held)"""
+        self._puts_since_evict = 0
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute("""
+                DELETE FROM llm_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        self._conn.commit()
+
+    def evict(self):
+        """Run TTL and size eviction now"""
+        with self._lock:
+            try:
+                self._evict()
+            except sqlite3.Error as e:
+                print(f"[LLM-CACHE] Eviction error: {e}")
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache size"""
+        with self._lock:
+            try:
+                entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            except sqlite3.Error:
+                entries = -1
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'tokens_saved': self.tokens_saved,
+                'cost_saved': round(self.cost_saved, 6),
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl_hours': self.ttl_seconds / 3600
+            }
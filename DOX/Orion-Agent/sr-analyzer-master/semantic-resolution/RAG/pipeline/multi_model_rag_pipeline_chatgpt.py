@@ -33,11 +33,14 @@ from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 import urllib3
 import concurrent.futures
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 
 import pandas as pd
 import requests
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import warnings
 warnings.filterwarnings('ignore')
@@ -60,6 +63,20 @@ except ImportError as e:
     ACTIVITY_FINDER_AVAILABLE = False
     print(f"[WARN] ActivityFinder not available - activity validation will be skipped ({e})")
 
+# Process-wide embedding model / ChromaDB client shared with the Flask app
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from RAG.utils.shared_resources import get_embedding_model, get_chromadb_client, get_collection
+from RAG.utils.embedding_cache import get_embedding_cache
+from RAG.utils.history_index import get_history_index
+from RAG.utils.mmap_vector_store import load_or_convert, open_store, convert_comcast_code, convert_history_pickle
+
+try:
+    from llm_response_cache import LLMResponseCache
+    LLM_CACHE_AVAILABLE = os.environ.get('LLM_CACHE_ENABLED', '1') != '0'
+except ImportError as e:
+    LLM_CACHE_AVAILABLE = False
+    print(f"[WARN] LLMResponseCache not available - responses will not be cached ({e})")
+
 try:
     sys.path.append(str(Path(__file__).parent.parent.parent / 'analyzers'))
     from sr_text_preprocessor import SRTextPreprocessor
@@ -68,6 +85,21 @@ except ImportError:
     PREPROCESSOR_AVAILABLE = False
     print("[WARN] SRTextPreprocessor not available")
 
+# Concurrency settings (override via environment for admin uploads / cron runs)
+# SR_PIPELINE_CONCURRENCY: number of SRs analyzed in parallel (1 = sequential)
+# LLM_TOKEN_RPM: max LLM calls per minute per API token (0 = unlimited)
+DEFAULT_SR_CONCURRENCY = int(os.environ.get('SR_PIPELINE_CONCURRENCY', '1'))
+DEFAULT_TOKEN_RPM = int(os.environ.get('LLM_TOKEN_RPM', '0'))
+
+# Batched retrieval: one encode() per SR and multi-embedding queries per collection
+# (RAG_BATCH_RETRIEVAL=0 restores one encode + one query per text)
+BATCH_RETRIEVAL = os.environ.get('RAG_BATCH_RETRIEVAL', '1') != '0'
+
+# Collections answered from an exported store + ANN index (data/vectorstore/<name>.mmap,
+# see RAG/utils/ann_index.py) instead of ChromaDB, e.g. "clean_history_data,java_mapping".
+# The export is a snapshot: re-export after bulk uploads. Empty = ChromaDB only.
+ANN_COLLECTIONS = {c.strip() for c in os.environ.get('ANN_COLLECTIONS', '').split(',') if c.strip()}
+
 
 # ============================================================================
 # PROMPTS
@@ -602,13 +634,18 @@ class TokenManager:
         - Automatically rotates to next available token
         - Continues until all tokens exhausted
     
+    Thread Safety:
+        All token state is guarded by a lock so concurrent SR workers can share
+        one manager. throttle() enforces a per-token calls-per-minute budget
+        (max_calls_per_minute, 0 = unlimited) before each API call.
+    
     Attributes:
         tokens: List of {email, token} dicts loaded from Excel
         current_index: Index of currently active token
         exhausted_tokens: Set of token indices that hit their daily limit
     """
     
-    def __init__(self, tokens_file: Path = None):
+    def __init__(self, tokens_file: Path = None, max_calls_per_minute: int = None):
         if tokens_file is None:
             # Tokens are now in tokens/ folder
             tokens_file = Path(__file__).parent.parent.parent / "tokens" / "Tokens.xlsx"
@@ -617,6 +654,9 @@ class TokenManager:
         self.tokens: List[Dict[str, str]] = []
         self.current_index = 0
         self.exhausted_tokens: set = set()
+        self.max_calls_per_minute = DEFAULT_TOKEN_RPM if max_calls_per_minute is None else max_calls_per_minute
+        self._lock = threading.RLock()
+        self._call_times: Dict[int, deque] = {}
         self._load_tokens()
     
     def _load_tokens(self):
@@ -662,31 +702,79 @@ class TokenManager:
             raise ValueError(f"Error loading tokens: {e}")
     
     def get_current_token(self) -> Optional[str]:
-        available = [i for i in range(len(self.tokens)) if i not in self.exhausted_tokens]
-        if not available:
-            return None
-        while self.current_index in self.exhausted_tokens:
-            self.current_index = (self.current_index + 1) % len(self.tokens)
-        return self.tokens[self.current_index]['token']
+        with self._lock:
+            available = [i for i in range(len(self.tokens)) if i not in self.exhausted_tokens]
+            if not available:
+                return None
+            while self.current_index in self.exhausted_tokens:
+                self.current_index = (self.current_index + 1) % len(self.tokens)
+            return self.tokens[self.current_index]['token']
     
     def get_current_email(self) -> Optional[str]:
-        if not self.tokens or self.current_index >= len(self.tokens):
-            return None
-        return self.tokens[self.current_index]['email']
-    
-    def mark_exhausted(self) -> bool:
-        self.exhausted_tokens.add(self.current_index)
-        print(f"[TOKEN] ⚠️ Token #{self.current_index + 1} exhausted")
-        for i in range(len(self.tokens)):
-            next_idx = (self.current_index + 1 + i) % len(self.tokens)
-            if next_idx not in self.exhausted_tokens:
-                self.current_index = next_idx
-                print(f"[TOKEN] ✅ Rotated to token #{self.current_index + 1}")
-                return True
-        return False
+        with self._lock:
+            if not self.tokens or self.current_index >= len(self.tokens):
+                return None
+            return self.tokens[self.current_index]['email']
+    
+    def get_current_credentials(self) -> Tuple[Optional[str], Optional[str]]:
+        """Return (token, email) of the active token as one consistent pair"""
+        with self._lock:
+            token = self.get_current_token()
+            if token is None:
+                return None, None
+            return token, self.tokens[self.current_index]['email']
+    
+    def throttle(self, token: str) -> None:
+        """
+        Block until `token` has budget left in the current 60s window.
+        
+        Each token keeps a sliding window of call timestamps; when the window
+        is full the caller sleeps until the oldest call ages out. The lock is
+        released while sleeping so other workers on other tokens proceed.
+        """
+        if not self.max_calls_per_minute:
+            return
+        
+        while True:
+            with self._lock:
+                idx = next((i for i, t in enumerate(self.tokens) if t['token'] == token), None)
+                if idx is None:
+                    return
+                window = self._call_times.setdefault(idx, deque())
+                now = time.monotonic()
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                if len(window) < self.max_calls_per_minute:
+                    window.append(now)
+                    return
+                wait = 60 - (now - window[0])
+            time.sleep(max(wait, 0.05))
+    
+    def mark_exhausted(self, token: str = None) -> bool:
+        """
+        Mark the active token exhausted and rotate to the next one.
+        
+        When `token` is given and another worker already rotated away from it,
+        the token is not marked again - this only reports whether a usable
+        token remains, so concurrent 429s don't burn through healthy tokens.
+        """
+        with self._lock:
+            if token is not None and self.tokens[self.current_index]['token'] != token:
+                return len(self.exhausted_tokens) < len(self.tokens)
+            
+            self.exhausted_tokens.add(self.current_index)
+            print(f"[TOKEN] ⚠️ Token #{self.current_index + 1} exhausted")
+            for i in range(len(self.tokens)):
+                next_idx = (self.current_index + 1 + i) % len(self.tokens)
+                if next_idx not in self.exhausted_tokens:
+                    self.current_index = next_idx
+                    print(f"[TOKEN] ✅ Rotated to token #{self.current_index + 1}")
+                    return True
+            return False
     
     def get_status(self) -> str:
-        available = len(self.tokens) - len(self.exhausted_tokens)
+        with self._lock:
+            available = len(self.tokens) - len(self.exhausted_tokens)
         return f"Tokens: {available}/{len(self.tokens)} available"
 
 
@@ -702,18 +790,36 @@ class MultiModelLLM:
         - Automatic token rotation on 429 (rate limit) errors
         - JSON response parsing with markdown code block handling
         - Usage tracking (calls, tokens, cost) for monitoring
+        - Persistent response cache keyed on (model, system message, prompt,
+          temperature) - identical requests are served from disk
     
     API Endpoint:
         https://ai-framework1:8085/api/v1/call_llm
     
     Response Parsing:
         Handles both direct JSON and markdown-wrapped JSON (```json...```)
+    
+    Thread Safety:
+        call() may be used from several SR workers at once; usage counters
+        are updated under a lock.
     """
     
-    def __init__(self, token_manager: TokenManager, model_name: str = "gpt-4.1"):
+    def __init__(self, token_manager: TokenManager, model_name: str = "gpt-4.1",
+                 api_url: str = "https://ai-framework1:8085/api/v1/call_llm",
+                 cache: "LLMResponseCache" = None):
         self.token_manager = token_manager
         self.model_name = model_name
-        self.api_url = "https://ai-framework1:8085/api/v1/call_llm"
+        self.api_url = api_url
+        self._usage_lock = threading.Lock()
+        self._scope_local = threading.local()
+        
+        # Response cache (pass cache explicitly or rely on the default on-disk cache)
+        self.cache = cache
+        if self.cache is None and LLM_CACHE_AVAILABLE:
+            try:
+                self.cache = LLMResponseCache()
+            except Exception as e:
+                print(f"[WARN] LLM response cache disabled: {e}")
         
         # Usage tracking
         self.total_calls = 0
@@ -722,26 +828,73 @@ class MultiModelLLM:
         self.total_cost = 0.0
         self.call_history = []
     
-    def call(self, prompt: str, call_name: str = "unknown", temperature: float = 0.2) -> str:
-        """Make LLM call with automatic token rotation"""
+    @contextmanager
+    def sr_scope(self, use_cache: bool = True):
+        """
+        Scope the calls made for one SR (thread-local, so concurrent SRs don't mix).
+        
+        Yields the list of errors call() returned inside the block (exhausted
+        tokens, API errors, ...). The callers fall back to defaults on those,
+        so the SR's result is degraded even though nothing was raised.
+        With use_cache=False every call in the block bypasses the response cache.
+        """
+        errors = []
+        previous = (getattr(self._scope_local, 'errors', None),
+                    getattr(self._scope_local, 'use_cache', True))
+        self._scope_local.errors = errors
+        self._scope_local.use_cache = use_cache
+        try:
+            yield errors
+        finally:
+            self._scope_local.errors, self._scope_local.use_cache = previous
+    
+    def _error(self, message: str) -> str:
+        """Error response for call(), recorded in the current sr_scope"""
+        errors = getattr(self._scope_local, 'errors', None)
+        if errors is not None:
+            errors.append(message)
+        return json.dumps({"error": message})
+    
+    def call(self, prompt: str, call_name: str = "unknown", temperature: float = 0.2,
+             use_cache: bool = True) -> str:
+        """
+        Make LLM call with automatic token rotation.
+        
+        Successful responses are cached; pass use_cache=False (or run inside
+        sr_scope(use_cache=False)) to force a fresh call. The new response
+        still replaces the cached one.
+        """
+        use_cache = use_cache and getattr(self._scope_local, 'use_cache', True)
+        # Use different system messages based on call type
+        # Resolution calls expect TEXT output, other calls expect JSON
+        if call_name in ["java_resolution", "general_resolution"]:
+            system_msg = "You are an expert SR resolution analyst. Generate clear, actionable workaround steps in text format. Do NOT output JSON. Start your response with '**AI WORKAROUND:**' followed by numbered steps with details."
+        elif call_name == "skill_assignment":
+            system_msg = "You are an SR assignment system. Output ONLY the name of the person to assign, nothing else. No explanation, no JSON, just the name."
+        else:
+            system_msg = "You are an expert SR analysis system. Always respond with valid JSON only, no markdown or explanation outside JSON."
+        
+        # skill_assignment depends on live daily loads, never serve it from cache
+        cacheable = self.cache is not None and call_name != "skill_assignment"
+        cache_key = None
+        if cacheable:
+            cache_key = self.cache.make_key(self.model_name, system_msg, prompt, temperature)
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print(f"   [LLM] Cache hit ({call_name}): {len(cached)} chars")
+                    return cached
         
         max_retries = len(self.token_manager.tokens)
         
         for attempt in range(max_retries):
-            token = self.token_manager.get_current_token()
+            token, email = self.token_manager.get_current_credentials()
             if not token:
-                return json.dumps({"error": "All API tokens exhausted"})
+                return self._error("All API tokens exhausted")
+            
+            self.token_manager.throttle(token)
             
             try:
-                # Use different system messages based on call type
-                # Resolution calls expect TEXT output, other calls expect JSON
-                if call_name in ["java_resolution", "general_resolution"]:
-                    system_msg = "You are an expert SR resolution analyst. Generate clear, actionable workaround steps in text format. Do NOT output JSON. Start your response with '**AI WORKAROUND:**' followed by numbered steps with details."
-                elif call_name == "skill_assignment":
-                    system_msg = "You are an SR assignment system. Output ONLY the name of the person to assign, nothing else. No explanation, no JSON, just the name."
-                else:
-                    system_msg = "You are an expert SR analysis system. Always respond with valid JSON only, no markdown or explanation outside JSON."
-                
                 payload = {
                     "llm_model": self.model_name,
                     "messages": [
@@ -758,7 +911,7 @@ class MultiModelLLM:
                     "Content-Type": "application/json",
                     "accept": "application/json",
                     "API-Key": token,
-                    "X-Effective-Caller": self.token_manager.get_current_email() or "sr_rag_pipeline@amdocs.com"
+                    "X-Effective-Caller": email or "sr_rag_pipeline@amdocs.com"
                 }
                 
                 response = requests.post(
@@ -770,26 +923,27 @@ class MultiModelLLM:
                 )
                 
                 if response.status_code == 429:
-                    if self.token_manager.mark_exhausted():
+                    if self.token_manager.mark_exhausted(token):
                         continue
-                    return json.dumps({"error": "All tokens exhausted"})
+                    return self._error("All tokens exhausted")
                 
                 if response.status_code == 200:
                     data = response.json()
                     
                     # Track usage
-                    self.total_calls += 1
                     input_tokens = data.get('input_tokens', 0)
                     output_tokens = data.get('output_tokens', 0)
-                    self.total_input_tokens += input_tokens
-                    self.total_output_tokens += output_tokens
-                    self.total_cost += data.get('cost', 0)
-                    self.call_history.append({
-                        'call_name': call_name,
-                        'input_tokens': input_tokens,
-                        'output_tokens': output_tokens,
-                        'cost': data.get('cost', 0)
-                    })
+                    with self._usage_lock:
+                        self.total_calls += 1
+                        self.total_input_tokens += input_tokens
+                        self.total_output_tokens += output_tokens
+                        self.total_cost += data.get('cost', 0)
+                        self.call_history.append({
+                            'call_name': call_name,
+                            'input_tokens': input_tokens,
+                            'output_tokens': output_tokens,
+                            'cost': data.get('cost', 0)
+                        })
                     
                     message = data.get('message', '').strip()
                     finish_reason = data.get('finish_reason', 'unknown')
@@ -801,19 +955,25 @@ class MultiModelLLM:
                     if finish_reason == 'length' or output_tokens >= 3900:
                         print(f"   [LLM] ⚠️ Response may be truncated!")
                     
+                    # Cache complete responses only (truncated ones should be retried later)
+                    if cacheable and message and finish_reason != 'length':
+                        self.cache.put(cache_key, message, model=self.model_name, call_name=call_name,
+                                       input_tokens=input_tokens, output_tokens=output_tokens,
+                                       cost=data.get('cost', 0))
+                    
                     return message
                 else:
                     print(f"[LLM] Error: {response.status_code}")
-                    return json.dumps({"error": f"API error {response.status_code}"})
+                    return self._error(f"API error {response.status_code}")
                     
             except requests.exceptions.Timeout:
                 print(f"[LLM] Timeout on {call_name}, retrying...")
                 continue
             except Exception as e:
                 print(f"[LLM] Error: {e}")
-                return json.dumps({"error": str(e)})
+                return self._error(str(e))
         
-        return json.dumps({"error": "Failed after all retries"})
+        return self._error("Failed after all retries")
     
     def parse_json_response(self, response: str) -> Dict:
         """
@@ -847,14 +1007,16 @@ class MultiModelLLM:
         return {"error": "Failed to parse JSON", "raw_response": response[:500]}
     
     def get_usage_summary(self) -> Dict:
-        return {
-            'total_calls': self.total_calls,
-            'total_input_tokens': self.total_input_tokens,
-            'total_output_tokens': self.total_output_tokens,
-            'total_cost': self.total_cost,
-            'call_breakdown': self.call_history,
-            'tokens_status': self.token_manager.get_status()
-        }
+        with self._usage_lock:
+            return {
+                'total_calls': self.total_calls,
+                'total_input_tokens': self.total_input_tokens,
+                'total_output_tokens': self.total_output_tokens,
+                'total_cost': self.total_cost,
+                'call_breakdown': list(self.call_history),
+                'tokens_status': self.token_manager.get_status(),
+                'cache': self.cache.get_stats() if self.cache else {'enabled': False}
+            }
 
 
 # ============================================================================
@@ -874,39 +1036,39 @@ class VectorstoreHandler:
         Sentence Transformers all-MiniLM-L6-v2 (384-dim, fast inference)
     
     Fallback Support:
-        Legacy pickle/SQLite vectorstores if ChromaDB unavailable
+        Legacy comcast_code.db / history_data.db if ChromaDB unavailable, served
+        from memory-mapped copies (RAG/utils/mmap_vector_store.py, converted on
+        first use) so workers share pages instead of each unpickling the data
+    
+    Query Planning:
+        retrieval_plan(sr_data) scopes one SR: the query texts known up front are
+        encoded in a single batch, and embeddings/results are memoized for the rest
+        of the SR. Multi-text searches (fuzzy keywords, impl-class code lookups)
+        send all embeddings in one collection.query() call.
     """
     
-    def __init__(self, java_db_path: Path = None, comcast_code_db_path: Path = None, history_db_path: Path = None):
+    def __init__(self, java_db_path: Path = None, comcast_code_db_path: Path = None, history_db_path: Path = None,
+                 chromadb_path: Path = None, batch_queries: bool = None):
         # ChromaDB path - all vectorstores are now in ChromaDB
-        self.chromadb_path = Path(__file__).parent.parent.parent / "data" / "vectorstore" / "chromadb_store"
-        
-        print("[*] Loading Sentence Transformer model...")
-        # Try loading with fallback options for version compatibility
-        local_model_path = Path(__file__).parent.parent.parent / "models" / "sentence-transformers_all-MiniLM-L6-v2"
-        try:
-            if local_model_path.exists():
-                self.semantic_model = SentenceTransformer(str(local_model_path))
-                print(f"[OK] Model loaded from local: {local_model_path}")
-            else:
-                self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
-                print("[OK] Model loaded from HuggingFace")
-        except Exception as e:
-            print(f"[WARN] Primary load failed: {e}")
-            print("[*] Trying fallback with local model...")
-            try:
-                if local_model_path.exists():
-                    self.semantic_model = SentenceTransformer(str(local_model_path))
-                    print("[OK] Model loaded (fallback - local)")
-                else:
-                    # Last resort: try without any options
-                    import torch
-                    torch.set_default_dtype(torch.float32)
-                    self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
-                    print("[OK] Model loaded (fallback)")
-            except Exception as e2:
-                print(f"[ERROR] All model loading methods failed: {e2}")
-                raise
+        self.chromadb_path = Path(chromadb_path) if chromadb_path else \
+            Path(__file__).parent.parent.parent / "data" / "vectorstore" / "chromadb_store"
+        vectorstore_dir = Path(__file__).parent.parent.parent / "data" / "vectorstore"
+        self.comcast_code_db_path = Path(comcast_code_db_path) if comcast_code_db_path else \
+            vectorstore_dir / "comcast_code.db"
+        self.history_db_path = Path(history_db_path) if history_db_path else \
+            vectorstore_dir / "history_data.db"
+        self.comcast_code_data = None
+        self.history_data = None
+        self.batch_queries = BATCH_RETRIEVAL if batch_queries is None else batch_queries
+        self._plan_local = threading.local()
+        
+        print("[*] Loading Sentence Transformer model (shared)...")
+        # Shared loader tries the local copy first, then HuggingFace, then a float32 fallback
+        self.semantic_model = get_embedding_model('all-MiniLM-L6-v2')
+        if self.semantic_model is None:
+            print("[ERROR] All model loading methods failed")
+            raise RuntimeError("Sentence Transformer model could not be loaded")
+        print("[OK] Model ready")
         
         self.preprocessor = SRTextPreprocessor() if PREPROCESSOR_AVAILABLE else None
         
@@ -917,6 +1079,11 @@ class VectorstoreHandler:
         self.java_mapping_collection = None
         self.comcast_code_collection = None
         self._init_chromadb()
+        
+        # Legacy fallbacks (memory-mapped, so opening them is cheap)
+        if not self.use_chromadb:
+            self._load_comcast_code_db()
+            self._load_history_db()
     
     def _init_chromadb(self):
         """Initialize ChromaDB client and collections"""
@@ -924,17 +1091,17 @@ class VectorstoreHandler:
             import chromadb
             
             if self.chromadb_path.exists():
-                # Use basic PersistentClient without Settings to avoid "different settings" error
-                self.chromadb_client = chromadb.PersistentClient(path=str(self.chromadb_path))
+                # Shared client/collections - opened once per process
+                self.chromadb_client = get_chromadb_client(self.chromadb_path)
                 collections = [c.name for c in self.chromadb_client.list_collections()]
                 
                 # Load collections
                 if 'clean_history_data' in collections:
-                    self.history_collection = self.chromadb_client.get_collection('clean_history_data')
+                    self.history_collection = get_collection('clean_history_data', self.chromadb_path)
                 if 'java_mapping' in collections:
-                    self.java_mapping_collection = self.chromadb_client.get_collection('java_mapping')
+                    self.java_mapping_collection = get_collection('java_mapping', self.chromadb_path)
                 if 'comcast_code' in collections:
-                    self.comcast_code_collection = self.chromadb_client.get_collection('comcast_code')
+                    self.comcast_code_collection = get_collection('comcast_code', self.chromadb_path)
                 
                 self.use_chromadb = True
                 print(f"[OK] ChromaDB initialized ({len(collections)} collections)")
@@ -949,24 +1116,26 @@ class VectorstoreHandler:
             print(f"[ERROR] ChromaDB init error: {e}")
     
     def _load_comcast_code_db(self):
+        """Open the memory-mapped comcast_code store (converted from the legacy folder, again when it changes)"""
         try:
             print(f"[*] Loading comcast_code.db...")
-            self.comcast_code_data = {
-                'embeddings': np.load(self.comcast_code_db_path / "embeddings.npy"),
-                'documents': pickle.load(open(self.comcast_code_db_path / "documents.pkl", 'rb')),
-                'metadatas': pickle.load(open(self.comcast_code_db_path / "metadatas.pkl", 'rb')),
-                'config': json.load(open(self.comcast_code_db_path / "config.json", 'r'))
-            }
-            print(f"[OK] comcast_code.db loaded ({self.comcast_code_data['config']['total_chunks']} chunks)")
+            self.comcast_code_data = load_or_convert(self.comcast_code_db_path, convert_comcast_code)
+            if self.comcast_code_data is None:
+                print(f"[WARN] comcast_code.db not found at {self.comcast_code_db_path}")
+                return
+            print(f"[OK] comcast_code.db loaded ({len(self.comcast_code_data)} chunks, memory-mapped)")
         except Exception as e:
             print(f"[WARN] Error loading comcast_code.db: {e}")
     
     def _load_history_db(self):
+        """Open the memory-mapped history store (converted from the legacy pickle, again when it changes)"""
         try:
             print(f"[*] Loading history_data.db...")
-            with open(self.history_db_path, 'rb') as f:
-                self.history_data = pickle.load(f)
-            print(f"[OK] history_data.db loaded ({self.history_data.get('total_records', 0)} records)")
+            self.history_data = load_or_convert(self.history_db_path, convert_history_pickle)
+            if self.history_data is None:
+                print(f"[WARN] history_data.db not found at {self.history_db_path}")
+                return
+            print(f"[OK] history_data.db loaded ({self.history_data.get('total_records', len(self.history_data))} records, memory-mapped)")
         except Exception as e:
             print(f"[WARN] Error loading history_data.db: {e}")
     
@@ -981,6 +1150,125 @@ class VectorstoreHandler:
             print(f"[WARN] Error loading abbreviation.db: {e}")
             self.abbreviation_data = None
     
+    # ========================================================================
+    # QUERY PLANNING
+    # ========================================================================
+    
+    @contextmanager
+    def retrieval_plan(self, sr_data: Dict):
+        """
+        Scope retrieval for one SR (thread-local, so concurrent SRs don't mix).
+        
+        Pre-encodes the history and code query texts in one batch; every search
+        inside the block reuses those embeddings and memoizes its results, so
+        retries (e.g. LLM 3b re-running the code search) don't query again.
+        """
+        if not self.batch_queries:
+            yield None
+            return
+        
+        plan = {'embeddings': {}, 'results': {}}
+        previous = getattr(self._plan_local, 'plan', None)
+        self._plan_local.plan = plan
+        try:
+            self.encode_queries(self._planned_query_texts(sr_data))
+            yield plan
+        finally:
+            self._plan_local.plan = previous
+    
+    def _planned_query_texts(self, sr_data: Dict) -> List[str]:
+        """Query texts analyze_single_sr will search with (must match the search calls exactly)"""
+        description = str(sr_data.get('Description', sr_data.get('description', '')))
+        notes = str(sr_data.get('Notes', sr_data.get('notes', '')))
+        return [
+            self._history_query_text(f"{description} {notes}".strip()),
+            f"{sr_data.get('Description', '')} {sr_data.get('Notes', '')}"
+        ]
+    
+    def _history_query_text(self, query_text: str) -> str:
+        if self.preprocessor:
+            return self.preprocessor.clean_for_semantic_search(query_text)
+        return query_text
+    
+    def encode_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encode query texts in one batched encode() call.
+        
+        Inside a retrieval_plan, embeddings are memoized for the rest of the SR;
+        across SRs/runs the shared embedding cache skips texts already encoded.
+        """
+        plan = getattr(self._plan_local, 'plan', None)
+        memo = plan['embeddings'] if plan is not None else {}
+        
+        missing = list(dict.fromkeys(t for t in texts if t not in memo))
+        if missing:
+            cache = get_embedding_cache('all-MiniLM-L6-v2') if self.batch_queries else None
+            if cache is not None:
+                vectors = cache.encode(missing, batch_size=max(len(missing), 1))
+            elif self.batch_queries:
+                vectors = self.semantic_model.encode(missing, batch_size=max(len(missing), 1),
+                                                     show_progress_bar=False)
+            else:
+                vectors = [self.semantic_model.encode([t])[0] for t in missing]
+            for text, vector in zip(missing, vectors):
+                memo[text] = vector.tolist()
+        return [memo[t] for t in texts]
+    
+    def _query_collection(self, name: str, texts: List[str], n_results: int,
+                          include: List[str]) -> List[Dict[str, list]]:
+        """
+        Nearest neighbours for several query texts against one collection.
+        
+        Batched mode sends all embeddings in a single collection.query(); otherwise
+        one query per text. Results are memoized inside a retrieval_plan.
+        Collections listed in ANN_COLLECTIONS are served from their exported store.
+        
+        Returns:
+            One dict per text with flat 'ids', 'documents', 'metadatas', 'distances' lists
+        """
+        ann_store = open_store(self.chromadb_path.parent / f"{name}.mmap") if name in ANN_COLLECTIONS else None
+        collection = None if ann_store is not None else get_collection(name, self.chromadb_path)
+        if ann_store is None and collection is None:
+            raise RuntimeError(f"Collection '{name}' not available")
+        
+        plan = getattr(self._plan_local, 'plan', None)
+        memo = plan['results'] if plan is not None else {}
+        key_of = lambda t: (name, t, n_results, tuple(include))
+        pending = [t for t in dict.fromkeys(texts) if key_of(t) not in memo]
+        
+        if pending and ann_store is not None:
+            hits = ann_store.search_many(self.encode_queries(pending), n_results)
+            for text, rows in zip(pending, hits):
+                memo[key_of(text)] = {
+                    'ids': [ann_store.id(i) for i, _ in rows],
+                    'documents': [ann_store.document(i) for i, _ in rows] if 'documents' in include else [],
+                    'metadatas': [ann_store.metadata(i) for i, _ in rows] if 'metadatas' in include else [],
+                    'distances': [1 - score for _, score in rows] if 'distances' in include else []
+                }
+        elif pending:
+            if self.batch_queries:
+                embeddings = self.encode_queries(pending)
+                raw_batches = [(pending, collection.query(
+                    query_embeddings=embeddings,
+                    n_results=n_results,
+                    include=include
+                ))]
+            else:
+                raw_batches = [([t], collection.query(
+                    query_embeddings=self.encode_queries([t]),
+                    n_results=n_results,
+                    include=include
+                )) for t in pending]
+            
+            for batch_texts, raw in raw_batches:
+                for i, text in enumerate(batch_texts):
+                    memo[key_of(text)] = {
+                        field: (raw.get(field)[i] if raw.get(field) else [])
+                        for field in ('ids', 'documents', 'metadatas', 'distances')
+                    }
+        
+        return [memo[key_of(t)] for t in texts]
+    
     def search_abbreviations(self, query_text: str, top_k: int = 15) -> str:
         """
         Search abbreviation database for relevant terms in the SR text.
@@ -1064,7 +1352,7 @@ class VectorstoreHandler:
         # Try ChromaDB first
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('java_mapping')
+                collection = get_collection('java_mapping', self.chromadb_path)
                 # Get sample of classes
                 results = collection.get(limit=limit, include=['metadatas'])
                 
@@ -1109,30 +1397,26 @@ class VectorstoreHandler:
         """Search Java class mappings semantically using ChromaDB"""
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('java_mapping')
-                query_embedding = self.semantic_model.encode([query_text])[0].tolist()
-                
-                results_raw = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=top_k,
+                hits = self._query_collection(
+                    'java_mapping', [query_text], top_k,
                     include=["documents", "metadatas", "distances"]
-                )
+                )[0]
                 
                 results = []
-                if results_raw and results_raw['ids'] and len(results_raw['ids']) > 0:
-                    for i, id_ in enumerate(results_raw['ids'][0]):
-                        distance = results_raw['distances'][0][i] if results_raw['distances'] else 1.0
-                        similarity = 1 - distance
-                        if similarity < 0.4:
-                            continue
-                        results.append({
-                            'similarity': similarity,
-                            'class_name': results_raw['metadatas'][0][i].get('class_name', '') if results_raw['metadatas'] else '',
-                            'package': results_raw['metadatas'][0][i].get('package', '') if results_raw['metadatas'] else '',
-                            'class_type': results_raw['metadatas'][0][i].get('class_type', '') if results_raw['metadatas'] else '',
-                            'file_path': results_raw['metadatas'][0][i].get('file_path', '') if results_raw['metadatas'] else '',
-                            'fqn': results_raw['metadatas'][0][i].get('full_qualified_name', '') if results_raw['metadatas'] else ''
-                        })
+                for i, id_ in enumerate(hits['ids']):
+                    distance = hits['distances'][i] if hits['distances'] else 1.0
+                    similarity = 1 - distance
+                    if similarity < 0.4:
+                        continue
+                    meta = hits['metadatas'][i] if hits['metadatas'] else {}
+                    results.append({
+                        'similarity': similarity,
+                        'class_name': meta.get('class_name', ''),
+                        'package': meta.get('package', ''),
+                        'class_type': meta.get('class_type', ''),
+                        'file_path': meta.get('file_path', ''),
+                        'fqn': meta.get('full_qualified_name', '')
+                    })
                 return results
             except Exception as e:
                 print(f"[WARN] ChromaDB java_mapping search error: {e}")
@@ -1164,32 +1448,19 @@ class VectorstoreHandler:
         # Method 1: Use ChromaDB metadata filtering if available
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('java_mapping')
+                # ChromaDB doesn't support LIKE queries, so we use semantic search per keyword -
+                # all keywords encoded together and sent as one multi-embedding query
+                search_keywords = [k for k in keywords[:10] if len(k) >= 3]  # Limit keywords to prevent too many queries
                 
-                # Get all class metadata (ChromaDB doesn't support LIKE queries, so we fetch and filter)
-                # For efficiency, we use semantic search with each keyword
-                for keyword in keywords[:10]:  # Limit keywords to prevent too many queries
-                    if len(keyword) < 3:
-                        continue
-                    
-                    # Semantic search for classes related to this keyword
-                    query_embedding = self.semantic_model.encode([keyword])[0].tolist()
-                    results_raw = collection.query(
-                        query_embeddings=[query_embedding],
-                        n_results=30,
-                        include=["metadatas"]
+                if search_keywords:
+                    keyword_hits = self._query_collection(
+                        'java_mapping', search_keywords, 30, include=["metadatas"]
                     )
-                    
-                    if results_raw and results_raw['metadatas'] and len(results_raw['metadatas']) > 0:
-                        for metadata in results_raw['metadatas'][0]:
-                            class_name = metadata.get('class_name', '')
+                    for hits in keyword_hits:
+                        for metadata in hits['metadatas']:
+                            class_name = (metadata or {}).get('class_name', '')
                             if class_name:
-                                # Also do substring check for better matching
-                                if keyword.lower() in class_name.lower():
-                                    matching_classes.add(class_name)
-                                else:
-                                    # Still add if semantic match found
-                                    matching_classes.add(class_name)
+                                matching_classes.add(class_name)
                 
                 print(f"   [FUZZY] Found {len(matching_classes)} matching classes from {len(keywords)} keywords")
                 return list(matching_classes)[:max_results]
@@ -1234,7 +1505,7 @@ class VectorstoreHandler:
         
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('java_mapping')
+                collection = get_collection('java_mapping', self.chromadb_path)
                 # Get random sample using a generic query
                 results = collection.get(
                     limit=sample_size,
@@ -1251,53 +1522,56 @@ class VectorstoreHandler:
         return class_names
     
     def search_java_code_semantically(self, query_text: str, top_k: int = 5) -> List[Dict]:
+        return self.search_java_code_batch([query_text], top_k=top_k)[0]
+    
+    def search_java_code_batch(self, query_texts: List[str], top_k: int = 5) -> List[List[Dict]]:
+        """Code search for several texts (e.g. impl classes) in one comcast_code query"""
+        if not query_texts:
+            return []
+        
         # Use ChromaDB if available
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('comcast_code')
-                query_embedding = self.semantic_model.encode([query_text])[0].tolist()
-                
-                results_raw = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=top_k,
+                all_hits = self._query_collection(
+                    'comcast_code', query_texts, top_k,
                     include=["documents", "metadatas", "distances"]
                 )
                 
-                results = []
-                if results_raw and results_raw['ids'] and len(results_raw['ids']) > 0:
-                    for i, id_ in enumerate(results_raw['ids'][0]):
-                        distance = results_raw['distances'][0][i] if results_raw['distances'] else 1.0
+                batch_results = []
+                for hits in all_hits:
+                    results = []
+                    for i, id_ in enumerate(hits['ids']):
+                        distance = hits['distances'][i] if hits['distances'] else 1.0
                         similarity = 1 - distance
                         if similarity < 0.45:
                             continue
                         results.append({
                             'similarity': similarity,
-                            'code': results_raw['documents'][0][i] if results_raw['documents'] else '',
-                            'metadata': results_raw['metadatas'][0][i] if results_raw['metadatas'] else {}
+                            'code': hits['documents'][i] if hits['documents'] else '',
+                            'metadata': hits['metadatas'][i] if hits['metadatas'] else {}
                         })
-                return results
+                    batch_results.append(results)
+                return batch_results
                 
             except Exception as e:
                 print(f"[WARN] ChromaDB code search error: {e}")
         
+        return [self._search_java_code_legacy(text, top_k) for text in query_texts]
+    
+    def _search_java_code_legacy(self, query_text: str, top_k: int = 5) -> List[Dict]:
+        """In-memory comcast_code search used when ChromaDB is unavailable"""
         # Fallback if no data loaded
-        if not self.comcast_code_data:
+        if self.comcast_code_data is None:
             return []
         
         try:
-            query_embedding = self.semantic_model.encode([query_text])[0]
-            similarities = cosine_similarity([query_embedding], self.comcast_code_data['embeddings'])[0]
-            top_indices = similarities.argsort()[::-1][:top_k]
-            
+            query_embedding = self.encode_queries([query_text])[0]
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.45:
-                    continue
+            for idx, similarity in self.comcast_code_data.search(query_embedding, top_k, min_similarity=0.45):
                 results.append({
                     'similarity': similarity,
-                    'code': self.comcast_code_data['documents'][idx],
-                    'metadata': self.comcast_code_data['metadatas'][idx]
+                    'code': self.comcast_code_data.document(idx),
+                    'metadata': self.comcast_code_data.metadata(idx)
                 })
             return results
         except Exception as e:
@@ -1318,30 +1592,23 @@ class VectorstoreHandler:
         """
         if self.use_chromadb and self.chromadb_client:
             try:
-                collection = self.chromadb_client.get_collection('clean_history_data')
-                
                 # Preprocess query if available
-                search_query = query_text
-                if self.preprocessor:
-                    search_query = self.preprocessor.clean_for_semantic_search(query_text)
-                
-                query_embedding = self.semantic_model.encode([search_query])[0].tolist()
+                search_query = self._history_query_text(query_text)
                 
-                results_raw = collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=top_k,
+                hits = self._query_collection(
+                    'clean_history_data', [search_query], top_k,
                     include=["documents", "metadatas", "distances"]
-                )
+                )[0]
                 
                 results = []
-                if results_raw and results_raw['ids'] and len(results_raw['ids']) > 0:
-                    for i, id_ in enumerate(results_raw['ids'][0]):
-                        distance = results_raw['distances'][0][i] if results_raw['distances'] else 1.0
+                if hits['ids']:
+                    for i, id_ in enumerate(hits['ids']):
+                        distance = hits['distances'][i] if hits['distances'] else 1.0
                         similarity = 1 - distance
                         if similarity < 0.55:
                             continue
                         
-                        meta = results_raw['metadatas'][0][i] if results_raw['metadatas'] else {}
+                        meta = hits['metadatas'][i] if hits['metadatas'] else {}
                         
                         # Build workaround text
                         workaround_parts = []
@@ -1366,8 +1633,8 @@ class VectorstoreHandler:
             except Exception as e:
                 print(f"[WARN] ChromaDB historical search error: {e}")
         
-        # Fallback to legacy pickle
-        if not self.history_data:
+        # Fallback to legacy (memory-mapped) history store
+        if self.history_data is None:
             return []
         
         try:
@@ -1386,17 +1653,12 @@ class VectorstoreHandler:
             if self.history_data.get('preprocessed', False) and self.preprocessor:
                 query_text = self.preprocessor.clean_for_semantic_search(query_text)
             
-            query_embedding = self.semantic_model.encode([query_text])[0]
-            similarities = cosine_similarity([query_embedding], self.history_data['embeddings'])[0]
-            top_indices = similarities.argsort()[::-1][:top_k]
+            query_embedding = self.encode_queries([query_text])[0]
             
             results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity < 0.30:  # Lower threshold to get more candidates for LLM
-                    continue
-                
-                metadata = self.history_data['metadata'][idx]
+            # Lower threshold to get more candidates for LLM
+            for idx, similarity in self.history_data.search(query_embedding, top_k, min_similarity=0.30):
+                metadata = self.history_data.metadata(idx)
                 
                 # Build workaround text from available fields
                 workaround_parts = []
@@ -1897,9 +2159,9 @@ class MultiModelSRPipeline:
         
         # Get Java code for validated activities
         java_code_context = ""
-        for act in validated_activities[:3]:
-            impl_class = act.get('impl_class', act['activity_name'])
-            code_matches = self.vectorstore.search_java_code_semantically(impl_class, top_k=2)
+        impl_classes = [act.get('impl_class', act['activity_name']) for act in validated_activities[:3]]
+        for impl_class, code_matches in zip(impl_classes,
+                                            self.vectorstore.search_java_code_batch(impl_classes, top_k=2)):
             for match in code_matches:
                 meta = match.get('metadata', {})
                 java_code_context += f"\n--- {impl_class} ({match['similarity']:.1%}) ---\n"
@@ -2031,26 +2293,44 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             
             # Load actual daily assignments from ChromaDB to ensure accurate load balancing
             try:
-                import chromadb
-                if self.chromadb_path.exists():
-                    client = chromadb.PersistentClient(path=str(self.chromadb_path))
-                    collection = client.get_collection('clean_history_data')
+                collection = get_collection('clean_history_data', self.chromadb_path)
+                if collection is not None:
                     today_str = datetime.now().strftime('%Y-%m-%d')
-                    all_records = collection.get(include=['metadatas'])
-                    for metadata in all_records.get('metadatas', []):
-                        if metadata:
-                            sr_date = metadata.get('added_date', '') or metadata.get('opened_date', '')
-                            if today_str in str(sr_date):
-                                assigned_to = metadata.get('assigned_to', '')
-                                if assigned_to:
-                                    # Normalize name (handle underscores vs spaces)
-                                    normalized_name = assigned_to.replace('_', ' ')
-                                    self.daily_loads[normalized_name] = self.daily_loads.get(normalized_name, 0) + 1
+                    for assigned_to, count in self._count_assignments_added_on(collection, today_str).items():
+                        # Normalize name (handle underscores vs spaces)
+                        normalized_name = assigned_to.replace('_', ' ')
+                        self.daily_loads[normalized_name] = self.daily_loads.get(normalized_name, 0) + count
                     if self.daily_loads:
                         print(f"   [LLM 5] Loaded actual loads from ChromaDB: {dict(sorted(self.daily_loads.items(), key=lambda x: -x[1]))}")
             except Exception as e:
                 print(f"   [LLM 5] Could not load loads from ChromaDB: {e}")
     
+    def _count_assignments_added_on(self, collection, date_prefix: str) -> Dict[str, int]:
+        """
+        {assignee: SRs added on date_prefix}, from the history side index.
+        
+        Falls back to a paged metadata-only scan of the collection when the
+        side index is unavailable.
+        """
+        try:
+            side_index = get_history_index()
+            if side_index.ensure_built(collection):
+                return side_index.assignee_counts_added_on(date_prefix)
+        except Exception as e:
+            print(f"   [LLM 5] Side index unavailable, scanning collection: {e}")
+        
+        counts = {}
+        total = collection.count()
+        for offset in range(0, total, 5000):
+            page = collection.get(include=['metadatas'], limit=5000, offset=offset)
+            for metadata in page.get('metadatas') or []:
+                if metadata:
+                    sr_date = metadata.get('added_date', '') or metadata.get('opened_date', '')
+                    assigned_to = metadata.get('assigned_to', '')
+                    if assigned_to and str(sr_date).startswith(date_prefix):
+                        counts[assigned_to] = counts.get(assigned_to, 0) + 1
+        return counts
+    
     def _get_team_members_context(self) -> str:
         """Get all team members with skills, load, and availability from people_skills.db"""
         db_path = Path(__file__).parent.parent.parent / 'data' / 'database' / 'people_skills.db'
@@ -2292,6 +2572,79 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             print(f"   [LLM 5] ❌ Fallback failed: {e}")
             return "Not Assigned"
     
+    def _parse_assignment_response(self, response: str) -> Tuple[str, str]:
+        """Parse LLM 5 output into (name, reason); accepts JSON or a bare name (legacy)"""
+        assigned_name = ""
+        assignment_reason = ""
+        
+        try:
+            # Try to parse as JSON
+            import json
+            # Clean up response - find JSON object
+            response_clean = response.strip()
+            # Find JSON in response (may have extra text before/after)
+            json_start = response_clean.find('{')
+            json_end = response_clean.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                json_str = response_clean[json_start:json_end]
+                parsed = json.loads(json_str)
+                assigned_name = parsed.get('name', '').strip()
+                assignment_reason = parsed.get('reason', '').strip()
+        except (json.JSONDecodeError, Exception) as e:
+            # Fallback: treat as plain name (old format)
+            assigned_name = response.strip().split('\n')[0].strip()
+            # Remove any punctuation
+            assigned_name = re.sub(r'[^\w\s_-]', '', assigned_name).strip()
+            assignment_reason = "(No reason provided - legacy format)"
+        
+        # Normalize underscores to spaces (LLM sometimes uses underscores)
+        return assigned_name.replace('_', ' ').strip(), assignment_reason
+    
+    def _llm_resolve_assignment_tie(self, sr_data: Dict, candidates: List[Dict],
+                                    is_java_error: bool = False, issue_type: str = 'Unknown') -> Optional[str]:
+        """
+        LLM Call 5 restricted to a tie from the batch assignment engine.
+        
+        Same prompt as _llm_skill_assignment, but the team and workload sections
+        only list the tied candidates (all matching the application, equal load
+        and skill fit, each with a specialization hit). Does not touch daily_loads -
+        the engine owns load tracking in batch mode.
+        
+        Returns:
+            One of the candidate names, or None if the LLM picked none of them
+        """
+        team_context = ""
+        for c in candidates:
+            team_context += f"\n--- {c['name']} ---\n"
+            team_context += f"Availability: {c['availability']}%\n"
+            team_context += f"Current Load Today: {c['load']} SRs\n"
+            team_context += f"  • {sr_data.get('Application', 'Unknown')}: Skill {c['skill_level']}/5, "
+            team_context += f"Max Load: {c['capacity']}\n"
+            if c['specializations']:
+                team_context += f"    Specializations: {', '.join(c['specializations'])}\n"
+        workload_status = "✅ EQUAL DISTRIBUTION: all candidates are tied on load and skill fit - decide on specialization fit\n"
+        
+        prompt = PROMPT_SKILL_BASED_ASSIGNMENT.format(
+            sr_id=sr_data.get('SR ID', 'Unknown'),
+            priority=sr_data.get('Priority', 'P3'),
+            description=sr_data.get('Description', '')[:1000],
+            application=sr_data.get('Application', 'Unknown'),
+            complexity_score=f"{self._calculate_complexity(sr_data, is_java_error):.1f}",
+            is_java_error="Yes" if is_java_error else "No",
+            issue_type=issue_type,
+            team_members_context=team_context,
+            workload_status=workload_status
+        )
+        response = self.llm.call(prompt, call_name="skill_assignment_tie", temperature=0.1)
+        assigned_name, assignment_reason = self._parse_assignment_response(response)
+        
+        names = {c['name'].lower(): c['name'] for c in candidates}
+        picked = names.get(assigned_name.lower())
+        if picked:
+            print(f"   [LLM 5] ✅ Tie resolved → {picked}")
+            print(f"   [LLM 5] 📋 REASON: {assignment_reason}")
+        return picked
+    
     def _llm_skill_assignment(self, sr_data: Dict, is_java_error: bool, 
                                issue_type: str) -> str:
         """
@@ -2345,33 +2698,7 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
         
         # Call LLM with very low temperature for deterministic output
         response = self.llm.call(prompt, call_name="skill_assignment", temperature=0.1)
-        
-        # Parse JSON response for name and reason
-        assigned_name = ""
-        assignment_reason = ""
-        
-        try:
-            # Try to parse as JSON
-            import json
-            # Clean up response - find JSON object
-            response_clean = response.strip()
-            # Find JSON in response (may have extra text before/after)
-            json_start = response_clean.find('{')
-            json_end = response_clean.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_clean[json_start:json_end]
-                parsed = json.loads(json_str)
-                assigned_name = parsed.get('name', '').strip()
-                assignment_reason = parsed.get('reason', '').strip()
-        except (json.JSONDecodeError, Exception) as e:
-            # Fallback: treat as plain name (old format)
-            assigned_name = response.strip().split('\n')[0].strip()
-            # Remove any punctuation
-            assigned_name = re.sub(r'[^\w\s_-]', '', assigned_name).strip()
-            assignment_reason = "(No reason provided - legacy format)"
-        
-        # Normalize underscores to spaces (LLM sometimes uses underscores)
-        assigned_name = assigned_name.replace('_', ' ').strip()
+        assigned_name, assignment_reason = self._parse_assignment_response(response)
         
         # Validate and log with reasoning
         if assigned_name and assigned_name.upper() != 'UNASSIGNED':
@@ -2395,10 +2722,13 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
     # MAIN ANALYSIS ORCHESTRATION
     # ========================================================================
     
-    def analyze_single_sr(self, sr_data: Dict) -> Dict:
+    def analyze_single_sr(self, sr_data: Dict, assign: bool = True, use_cache: bool = True) -> Dict:
         """
         Main orchestration method - analyze single SR through complete pipeline.
         
+        Runs inside a VectorstoreHandler.retrieval_plan so the SR's query texts
+        are embedded in one batch and repeated searches are served from memory.
+        
         Pipeline Steps:
             1. Semantic search for similar historical SRs
             2. Filter garbage workarounds from results
@@ -2408,9 +2738,27 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             6. LLM 4: Generate resolution (Java or General)
             7. LLM 5: Skill-based team assignment
         
+        Args:
+            sr_data: SR row as dict
+            assign: Run LLM 5 here. Concurrent runs pass False and assign later,
+                in priority order, so load balancing sees a consistent state.
+            use_cache: False skips the LLM response cache for every call (used
+                by "Regenerate", which would otherwise get the cached answer back)
+        
         Returns:
-            Dict with SR ID, Java detection, activities, AI workaround, assignment
+            Dict with SR ID, Java detection, activities, AI workaround, assignment.
+            If an LLM call failed (e.g. all tokens exhausted) the result holds
+            the fallback values and 'LLM Errors' lists what went wrong.
         """
+        with self.vectorstore.retrieval_plan(sr_data), self.llm.sr_scope(use_cache) as llm_errors:
+            result = self._analyze_single_sr(sr_data, assign)
+        if llm_errors:
+            result['LLM Errors'] = '; '.join(dict.fromkeys(llm_errors))
+            print(f"   [WARN] {result['SR ID']} analyzed with LLM errors: {result['LLM Errors']}")
+        return result
+    
+    def _analyze_single_sr(self, sr_data: Dict, assign: bool) -> Dict:
+        """Pipeline body of analyze_single_sr (runs inside the SR's retrieval plan)"""
         sr_id = sr_data.get('SR ID', sr_data.get('Call ID', sr_data.get('call_id', 'Unknown')))
         priority = sr_data.get('Priority', sr_data.get('Customer Priority', 'Medium'))
         description = str(sr_data.get('Description', sr_data.get('description', '')))
@@ -2473,11 +2821,13 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
         ai_workaround = self._extract_ai_workaround(ai_response)
         
         # LLM Call 5: Assign to best-suited team member
-        assigned_to = self._llm_skill_assignment(
-            sr_data, 
-            is_java_error, 
-            java_result.get('issue_type', 'Unknown')
-        )
+        assigned_to = None
+        if assign:
+            assigned_to = self._llm_skill_assignment(
+                sr_data, 
+                is_java_error, 
+                java_result.get('issue_type', 'Unknown')
+            )
         
         # Safe string conversion to avoid 'float' object is not subscriptable error
         semantic_wa_str = str(semantic_workaround) if semantic_workaround and not isinstance(semantic_workaround, float) else ''
@@ -2498,7 +2848,10 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             'Assigned To': assigned_to
         }
         
-        print(f"   [OK] ✅ Analysis complete for {sr_id} (Assigned: {assigned_to})")
+        if assign:
+            print(f"   [OK] ✅ Analysis complete for {sr_id} (Assigned: {assigned_to})")
+        else:
+            print(f"   [OK] ✅ Analysis complete for {sr_id} (assignment pending)")
         return result
     
     def _extract_ai_workaround(self, response: str) -> str:
@@ -2603,8 +2956,8 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             print(f"[ERROR] Error reading Excel: {e}")
             return None
     
-    def process_all_srs(self, df: pd.DataFrame):
-        """Process all SRs - AGING SRs first, then sorted by priority (P1 first, then P2, P3, P4)"""
+    def _sort_by_assignment_priority(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Sort SRs for processing - AGING SRs first, then by priority (P1 first, then P2, P3, P4)"""
         from assignment.priority_age_calculator import PriorityAgeCalculator
         
         # Initialize age calculator
@@ -2694,25 +3047,144 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
         print(f"[SORT] ✓ OK SRs: {non_aging_count} (processed after aging)")
         print(f"[SORT] Order: Aging → P1 → P2 → P3 → P4")
         
+        return df
+    
+    def process_all_srs(self, df: pd.DataFrame, concurrency: int = None,
+                        checkpoint_path: Path = None):
+        """
+        Process all SRs - AGING SRs first, then sorted by priority (P1 first, then P2, P3, P4).
+        
+        Concurrency:
+            With concurrency > 1, LLM calls 1-4 for up to `concurrency` SRs run
+            in a thread pool. Results are emitted (and LLM 5 assignment is run)
+            strictly in the sorted order, so aging/priority ordering and daily
+            load balancing behave exactly as in a sequential run.
+        
+        Checkpointing:
+            If checkpoint_path is given, each successful result is appended to
+            it as one JSON line. SRs already present in the file are not
+            re-analyzed, so a crashed run resumes where it stopped; SRs that
+            failed, or whose result fell back to defaults because an LLM call
+            failed ('LLM Errors'), are not checkpointed and are retried on resume.
+        
+        Args:
+            df: Input SRs
+            concurrency: SRs in flight at once (default: SR_PIPELINE_CONCURRENCY env, 1)
+            checkpoint_path: Optional JSONL file for incremental results
+        """
+        if concurrency is None:
+            concurrency = DEFAULT_SR_CONCURRENCY
+        concurrency = max(1, int(concurrency))
+        
+        df = self._sort_by_assignment_priority(df)
+        
+        completed = self._load_checkpoint(checkpoint_path) if checkpoint_path else {}
+        
         total_srs = len(df)
-        print(f"\n[START] Processing {total_srs} SRs with Multi-Model Pipeline")
+        print(f"\n[START] Processing {total_srs} SRs with Multi-Model Pipeline (concurrency={concurrency})")
         print(f"[INFO] {self.token_manager.get_status()}")
+        if completed:
+            print(f"[RESUME] {len(completed)} SRs already in checkpoint - skipping them")
         
-        for idx, row in tqdm(df.iterrows(), total=total_srs, desc="Processing SRs"):
-            try:
-                sr_data = row.to_dict()
-                result = self.analyze_single_sr(sr_data)
+        rows = [(idx, row.to_dict()) for idx, row in df.iterrows()]
+        
+        def error_result(idx, sr_data, e):
+            print(f"\n[ERROR] Error processing SR {sr_data.get('SR ID', idx)}: {e}")
+            return {
+                'SR ID': sr_data.get('SR ID', f'SR_{idx}'),
+                'AI Workaround': f'Error: {str(e)}',
+                'Is Java Error': 'Error'
+            }
+        
+        if concurrency == 1:
+            for idx, sr_data in tqdm(rows, total=total_srs, desc="Processing SRs"):
+                sr_key = str(sr_data.get('SR ID', f'SR_{idx}'))
+                if sr_key in completed:
+                    self.results.append(completed[sr_key])
+                    continue
+                try:
+                    result = self.analyze_single_sr(sr_data)
+                    self._checkpoint_result(checkpoint_path, result)
+                except Exception as e:
+                    result = error_result(idx, sr_data, e)
                 self.results.append(result)
-            except Exception as e:
-                print(f"\n[ERROR] Error processing SR {row.get('SR ID', idx)}: {e}")
-                self.results.append({
-                    'SR ID': row.get('SR ID', f'SR_{idx}'),
-                    'AI Workaround': f'Error: {str(e)}',
-                    'Is Java Error': 'Error'
-                })
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency,
+                                                       thread_name_prefix="sr-worker") as executor:
+                futures = []
+                for idx, sr_data in rows:
+                    sr_key = str(sr_data.get('SR ID', f'SR_{idx}'))
+                    if sr_key in completed:
+                        futures.append(None)
+                    else:
+                        futures.append(executor.submit(self.analyze_single_sr, sr_data, False))
+                
+                # Consume in submission (= priority) order; later SRs keep running meanwhile
+                for (idx, sr_data), future in tqdm(zip(rows, futures), total=total_srs, desc="Processing SRs"):
+                    if future is None:
+                        self.results.append(completed[str(sr_data.get('SR ID', f'SR_{idx}'))])
+                        continue
+                    try:
+                        result = future.result()
+                        # LLM Call 5 runs here, sequentially, in priority order
+                        with self.llm.sr_scope() as llm_errors:
+                            result['Assigned To'] = self._llm_skill_assignment(
+                                sr_data,
+                                result.get('Is Java Error') == 'Yes',
+                                result.get('Issue Type', 'Unknown')
+                            )
+                        if llm_errors:
+                            result['LLM Errors'] = '; '.join(dict.fromkeys(
+                                [e for e in [result.get('LLM Errors')] if e] + llm_errors))
+                        print(f"   [OK] ✅ {result['SR ID']} assigned to {result['Assigned To']}")
+                        self._checkpoint_result(checkpoint_path, result)
+                    except Exception as e:
+                        result = error_result(idx, sr_data, e)
+                    self.results.append(result)
         
         print(f"\n[OK] Processed {len(self.results)} service requests")
     
+    def _load_checkpoint(self, checkpoint_path: Path) -> Dict[str, Dict]:
+        """Load finished results from a JSONL checkpoint, keyed by SR ID"""
+        completed = {}
+        if not checkpoint_path or not Path(checkpoint_path).exists():
+            return completed
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial last line from a crash
+                    if result.get('Is Java Error') == 'Error' or result.get('LLM Errors'):
+                        continue  # Failed SRs (rate limit, timeout, ...) are retried
+                    completed[str(result.get('SR ID'))] = result
+        except Exception as e:
+            print(f"[WARN] Could not read checkpoint {checkpoint_path}: {e}")
+        return completed
+    
+    def _checkpoint_result(self, checkpoint_path: Path, result: Dict):
+        """Checkpoint a result unless an LLM call failed for it (it is retried on resume)"""
+        if result.get('LLM Errors'):
+            print(f"   [WARN] {result['SR ID']} not checkpointed - it will be re-analyzed on resume")
+            return
+        self._append_checkpoint(checkpoint_path, result)
+    
+    def _append_checkpoint(self, checkpoint_path: Path, result: Dict):
+        """Append one finished result to the JSONL checkpoint (flushed immediately)"""
+        if not checkpoint_path:
+            return
+        try:
+            with open(checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f"[WARN] Could not write checkpoint: {e}")
+    
     def save_results(self, input_filename: str) -> Optional[Path]:
         """Save results to Excel"""
         try:
@@ -2735,6 +3207,10 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             print(f"[USAGE] Total tokens: {usage['total_input_tokens']} in / {usage['total_output_tokens']} out")
             print(f"[USAGE] Total cost: ${usage['total_cost']:.4f}")
             print(f"[USAGE] {usage['tokens_status']}")
+            cache_stats = usage.get('cache', {})
+            if cache_stats.get('hits') is not None:
+                print(f"[CACHE] {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                      f"(saved {cache_stats['tokens_saved']} tokens, ${cache_stats['cost_saved']:.4f})")
             
             # Print call breakdown
             if usage['call_breakdown']:
@@ -2754,7 +3230,7 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
             print(f"[ERROR] Error saving results: {e}")
             return None
     
-    def run(self):
+    def run(self, concurrency: int = None):
         """Main pipeline execution"""
         print("\n" + "="*70)
         print("Multi-Model SR Analysis RAG Pipeline (ChatGPT + 4 LLM Calls)")
@@ -2771,12 +3247,16 @@ IMPORTANT: Incorporate the user's guidance into your response. This takes priori
         if df is None:
             return False
         
-        # Process all SRs
-        self.process_all_srs(df)
+        # Process all SRs (results are checkpointed per SR so a crash can resume)
+        checkpoint_path = self.output_dir / f"{input_file.stem}_multimodel_checkpoint.jsonl"
+        self.process_all_srs(df, concurrency=concurrency, checkpoint_path=checkpoint_path)
         
         # Save results
         output_path = self.save_results(input_file.name)
         
+        if output_path is not None and checkpoint_path.exists():
+            checkpoint_path.unlink()
+        
         return output_path is not None
 
 
@@ -2791,13 +3271,15 @@ def main():
     parser = argparse.ArgumentParser(description="Multi-Model SR Analysis Pipeline")
     parser.add_argument('--tokens', type=str, default=None, help='Path to Tokens.xlsx')
     parser.add_argument('--model', type=str, default='gpt-4.1', help='Model name')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help=f'SRs analyzed in parallel (default: {DEFAULT_SR_CONCURRENCY})')
     
     args = parser.parse_args()
     
     try:
         tokens_file = Path(args.tokens) if args.tokens else None
         pipeline = MultiModelSRPipeline(tokens_file=tokens_file, model_name=args.model)
-        success = pipeline.run()
+        success = pipeline.run(concurrency=args.concurrency)
         sys.exit(0 if success else 1)
         
     except KeyboardInterrupt:
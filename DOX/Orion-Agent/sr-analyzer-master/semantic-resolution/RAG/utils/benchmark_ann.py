@@ -0,0 +1,141 @@
+"""
+ANN Benchmark: recall@k and latency vs. exact search
+
+For each backend (hnsw, ivfpq) the index is built once over a memory-mapped
+store, then the query-time knob (ef_search / nprobe) is swept. Per setting:
+
+    recall@k   |ANN top-k  ∩  exact top-k| / k, averaged over the queries
+    p50 / p95  single-query latency in ms (what one SR lookup pays)
+
+Exact search (block-wise dot product over the float16 memmap) is the baseline.
+
+By default a synthetic clustered store is generated so the run is repeatable;
+--rows 1180000 matches the SR history size. --store benchmarks an existing
+store instead (e.g. one exported with: mmap_vector_store.py chroma clean_history_data),
+with queries drawn from perturbed stored rows.
+
+Usage:
+    python RAG/utils/benchmark_ann.py
+    python RAG/utils/benchmark_ann.py --rows 1180000 --queries 300
+    python RAG/utils/benchmark_ann.py --store data/vectorstore/clean_history_data.mmap --backends hnsw
+"""
+
+import sys
+import time
+import tempfile
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from RAG.utils.ann_index import available_backends, build_index, exact_search, normalize_rows
+from RAG.utils.mmap_vector_store import build_store, open_store
+
+SWEEPS = {
+    'hnsw': ('ef_search', (16, 32, 64, 128, 256)),
+    'ivfpq': ('nprobe', (4, 8, 16, 32, 64)),
+}
+
+
+def clustered_vectors(rng, count: int, dim: int, centers: np.ndarray, spread: float = 1.0) -> np.ndarray:
+    """
+    Points scattered around random topic centers (closer to real SR text than
+    uniform noise, which no ANN index handles well). spread=1.0 puts a point at
+    cosine ~0.7 from its center and ~0.5 from its cluster neighbours.
+    """
+    picks = rng.integers(0, len(centers), count)
+    noise = rng.normal(scale=spread / np.sqrt(dim), size=(count, dim))
+    return normalize_rows(centers[picks] + noise)
+
+
+def build_synthetic_store(path: Path, rows: int, dim: int, queries: int, seed: int = 42):
+    """Write a float16 store of clustered vectors; return held-out queries from the same distribution"""
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.normal(size=(max(rows // 500, 50), dim)))
+    scratch = np.lib.format.open_memmap(path.with_name("raw.npy"), mode='w+', dtype=np.float32, shape=(rows, dim))
+    for start in range(0, rows, 100000):
+        count = min(100000, rows - start)
+        scratch[start:start + count] = clustered_vectors(rng, count, dim, centers)
+    empty = [''] * rows
+    build_store(path, scratch, empty, [{}] * rows, dtype='float16', source='synthetic')
+    del scratch
+    path.with_name("raw.npy").unlink()
+    print(f"[OK] Synthetic store: {rows:,} x {dim} ({len(centers)} clusters)")
+    return clustered_vectors(rng, queries, dim, centers)
+
+
+def time_queries(search, queries) -> list:
+    """Per-query latency in ms, one query at a time"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query[None, :])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * pct) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN recall@k and latency vs. exact search")
+    parser.add_argument('--store', default=None, help='Benchmark an existing mmap store')
+    parser.add_argument('--rows', type=int, default=200000, help='Rows in the synthetic store')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimension (synthetic)')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query (recall@k)')
+    parser.add_argument('--backends', default='hnsw,ivfpq', help='Comma-separated backends')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.store:
+            store = open_store(Path(args.store))
+            if store is None:
+                print(f"[ERROR] No store at {args.store}")
+                sys.exit(1)
+            rng = np.random.default_rng(7)
+            picks = np.sort(rng.choice(len(store), args.queries, replace=False))
+            base = np.asarray(store.vectors[picks], dtype=np.float32)
+            queries = normalize_rows(base + rng.normal(scale=0.3 / np.sqrt(store.dim), size=base.shape))
+        else:
+            queries = build_synthetic_store(Path(tmp) / "bench.mmap", args.rows, args.dim, args.queries)
+            store = open_store(Path(tmp) / "bench.mmap")
+        vectors = store.vectors
+
+        truth, _ = exact_search(vectors, queries, args.k)
+        exact_ms = time_queries(lambda q: exact_search(vectors, q, args.k), queries)
+        rows = [("exact", "-", 1.0, statistics.median(exact_ms), percentile(exact_ms, 0.95), 0.0)]
+
+        installed = available_backends()
+        for backend in [b.strip() for b in args.backends.split(',') if b.strip()]:
+            if not installed.get(backend):
+                print(f"[SKIP] {backend}: library not installed")
+                continue
+            index = build_index(vectors, backend)
+            knob, values = SWEEPS[backend]
+            for value in values:
+                index.set_search_params(**{knob: value})
+                ids, _ = index.search(queries, args.k, vectors=vectors)
+                recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, truth)])
+                timings = time_queries(lambda q: index.search(q, args.k, vectors=vectors), queries)
+                rows.append((backend, f"{knob}={value}", recall, statistics.median(timings),
+                             percentile(timings, 0.95), index.build_seconds))
+
+    print(f"\n{'='*72}")
+    print(f"ANN vs exact: {len(store):,} x {store.dim} ({store.get('dtype')}), "
+          f"{len(queries)} queries, recall@{args.k}")
+    print(f"{'='*72}")
+    print(f"{'Backend':<8} | {'Setting':<14} | {'Recall':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'Build s':>8}")
+    print("-" * 72)
+    for backend, setting, recall, p50, p95, build in rows:
+        print(f"{backend:<8} | {setting:<14} | {recall:>7.3f} | {p50:>8.2f} | {p95:>8.2f} | {build:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
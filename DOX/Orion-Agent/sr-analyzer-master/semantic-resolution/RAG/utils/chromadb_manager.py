@@ -23,6 +23,14 @@ try:
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
+# Process-wide model/client shared with the other managers
+import sys
+_PROJECT_ROOT = str(Path(__file__).parent.parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from RAG.utils.shared_resources import get_embedding_model, get_chromadb_client
+from RAG.utils.embedding_cache import get_embedding_cache
+
 logger = logging.getLogger(__name__)
 
 # Default paths - databases are now in data/
@@ -97,33 +105,28 @@ class ChromaDBManager:
             self._init_model()
     
     def _init_client(self):
-        """Initialize ChromaDB client"""
+        """Initialize ChromaDB client (shared with the rest of the process)"""
         try:
-            ChromaDBManager._client = chromadb.PersistentClient(path=self.chromadb_path)
+            ChromaDBManager._client = get_chromadb_client(self.chromadb_path)
+            if ChromaDBManager._client is None:
+                raise RuntimeError(f"ChromaDB store not available at {self.chromadb_path}")
             logger.info(f"ChromaDB client initialized at: {self.chromadb_path}")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             raise
     
     def _init_model(self):
-        """Initialize embedding model"""
-        from pathlib import Path
-        try:
-            # Try local model first for reliability
-            local_model_path = Path(__file__).parent.parent.parent / "models" / "sentence-transformers_all-MiniLM-L6-v2"
-            if local_model_path.exists():
-                ChromaDBManager._model = SentenceTransformer(str(local_model_path))
-                logger.info("Sentence Transformer model loaded from local")
-            else:
-                ChromaDBManager._model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("Sentence Transformer model loaded from HuggingFace")
-        except Exception as e:
-            logger.warning(f"Model load failed: {e}, trying fallback...")
-            try:
-                ChromaDBManager._model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("Model loaded (fallback)")
-            except Exception as e2:
-                logger.error(f"All model loading methods failed: {e2}")
+        """Initialize embedding model (shared with the rest of the process)"""
+        ChromaDBManager._model = get_embedding_model('all-MiniLM-L6-v2')
+        if ChromaDBManager._model is None:
+            logger.error("All model loading methods failed")
+    
+    def _encode(self, text: str) -> List[float]:
+        """Embedding for a query/document text via the shared embedding cache"""
+        cache = get_embedding_cache('all-MiniLM-L6-v2')
+        if cache is not None:
+            return cache.encode_one(text).tolist()
+        return self.model.encode([text])[0].tolist()
     
     @property
     def client(self):
@@ -177,7 +180,7 @@ class ChromaDBManager:
         try:
             # Generate query embedding
             if self.model:
-                query_embedding = self.model.encode([query])[0].tolist()
+                query_embedding = self._encode(query)
                 results = collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k,
@@ -271,7 +274,7 @@ class ChromaDBManager:
             
             # Generate embedding and upsert
             if self.model:
-                embedding = self.model.encode([doc_text])[0].tolist()
+                embedding = self._encode(doc_text)
                 collection.upsert(
                     ids=[unique_id],
                     embeddings=[embedding],
@@ -344,7 +347,7 @@ class ChromaDBManager:
         
         try:
             if self.model:
-                query_embedding = self.model.encode([query])[0].tolist()
+                query_embedding = self._encode(query)
                 results = collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k,
@@ -490,7 +493,7 @@ class ChromaDBManager:
         
         try:
             if self.model:
-                query_embedding = self.model.encode([query])[0].tolist()
+                query_embedding = self._encode(query)
                 results = collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k,
@@ -578,7 +581,7 @@ class ChromaDBManager:
         
         try:
             if self.model:
-                query_embedding = self.model.encode([query])[0].tolist()
+                query_embedding = self._encode(query)
                 results = collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k,
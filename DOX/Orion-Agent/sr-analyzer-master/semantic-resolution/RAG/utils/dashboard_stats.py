@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Dashboard Statistics
+Incrementally maintained counters behind /admin/stats.
+
+Writers record events as they happen instead of the dashboard recomputing
+everything per page load:
+    - HistoryDatabaseManager.index_record()  -> record added / correction flag changed
+    - admin upload                           -> upload saved, LLM run usage
+    - SemanticWASummarizer                   -> summarization call usage
+
+Counters are served from memory. A background flush (every SNAPSHOT_INTERVAL
+seconds, and at exit) merges pending deltas into data/database/dashboard_stats.json,
+so the Flask app, the admin upload CLI and the email processor can all write
+without losing each other's increments. The flush also picks up counts written
+by other processes.
+
+On first use without a snapshot, counters are seeded once from the sources
+(collection count, side index, output/reports listing, llm_usage_stats.json).
+Writers that cannot tell what a write changed (bulk ingestion, a side index not
+yet verified) call mark_history_stale(); the history counters are then recounted
+from the sources on the next ensure_seeded() call.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows - single-process flush only
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_SNAPSHOT_PATH = PROJECT_ROOT / "data" / "database" / "dashboard_stats.json"
+LLM_USAGE_FILE = PROJECT_ROOT / "data" / "database" / "llm_usage_stats.json"
+REPORTS_DIR = PROJECT_ROOT / "output" / "reports"
+
+SNAPSHOT_INTERVAL = float(os.environ.get('DASHBOARD_STATS_SNAPSHOT_SECONDS', '30'))
+
+# Additive counters (merged as deltas across processes)
+COUNTER_KEYS = (
+    'historical_srs',
+    'user_corrections',
+    'uploads',
+    'llm.cumulative.total_cost',
+    'llm.cumulative.total_tokens',
+    'llm.cumulative.total_calls',
+    'llm.summarization.total_calls',
+    'llm.summarization.total_input_tokens',
+    'llm.summarization.total_output_tokens',
+    'llm.summarization.total_cost',
+)
+
+_shared_stats = None
+_shared_lock = threading.Lock()
+
+
+class DashboardStats:
+    """
+    In-memory dashboard counters with periodic, multi-process-safe snapshots.
+
+    Two kinds of values:
+        counters - additive (record counts, costs); pending deltas are merged on flush
+        fields   - last-writer-wins (latest upload name, last run usage, timestamps)
+    """
+
+    def __init__(self, snapshot_path: Path = None, snapshot_interval: float = SNAPSHOT_INTERVAL):
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else DEFAULT_SNAPSHOT_PATH
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.RLock()
+        self._counters: Dict[str, float] = {key: 0 for key in COUNTER_KEYS}
+        self._fields: Dict[str, Any] = {}
+        self._pending_counters: Dict[str, float] = {}
+        self._pending_fields: Dict[str, Any] = {}
+        self._pending_absolute: Dict[str, float] = {}
+        self._seeded = False
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._load_snapshot()
+
+    # ========================================================================
+    # SNAPSHOT I/O
+    # ========================================================================
+
+    def _read_disk(self) -> Optional[Dict[str, Any]]:
+        if not self.snapshot_path.exists():
+            return None
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"[STATS] Could not read snapshot: {e}")
+            return None
+
+    def _load_snapshot(self):
+        data = self._read_disk()
+        if data is None:
+            return
+        with self._lock:
+            self._counters.update({k: v for k, v in data.get('counters', {}).items() if k in COUNTER_KEYS})
+            self._fields.update(data.get('fields', {}))
+            self._seeded = True
+
+    def flush(self):
+        """Merge pending deltas into the on-disk snapshot and refresh memory from it"""
+        with self._lock:
+            if not self._seeded and not self.snapshot_path.exists():
+                # Nothing authoritative to add deltas to yet - seeding will count them
+                return
+            pending_counters = self._pending_counters
+            pending_fields = self._pending_fields
+            pending_absolute = self._pending_absolute
+            self._pending_counters = {}
+            self._pending_fields = {}
+            self._pending_absolute = {}
+
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(str(self.snapshot_path) + '.lock', 'w')
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                disk = self._read_disk()
+                if disk is None:
+                    # First snapshot - memory already holds the seeded values
+                    counters = dict(self._counters)
+                    fields = dict(self._fields)
+                else:
+                    counters = {key: disk.get('counters', {}).get(key, 0) for key in COUNTER_KEYS}
+                    counters.update(pending_absolute)  # Recounts replace the disk value
+                    for key, delta in pending_counters.items():
+                        counters[key] = counters.get(key, 0) + delta
+                    fields = disk.get('fields', {})
+                    fields.update(pending_fields)
+
+                tmp_path = self.snapshot_path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'counters': counters,
+                        'fields': fields,
+                        'snapshot_at': datetime.now().isoformat()
+                    }, f, indent=2)
+                os.replace(tmp_path, self.snapshot_path)
+
+                self._counters = counters
+                self._fields = fields
+            except Exception as e:
+                # Keep the deltas for the next attempt
+                for key, delta in pending_counters.items():
+                    self._pending_counters[key] = self._pending_counters.get(key, 0) + delta
+                self._pending_fields = {**pending_fields, **self._pending_fields}
+                self._pending_absolute = {**pending_absolute, **self._pending_absolute}
+                logger.warning(f"[STATS] Snapshot failed: {e}")
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def start_background_flush(self):
+        """Flush every snapshot_interval seconds in a daemon thread, and once at exit"""
+        with self._lock:
+            if self._timer is not None:
+                return
+
+            def _loop():
+                while not self._stop.wait(self.snapshot_interval):
+                    self.flush()
+
+            self._timer = threading.Thread(target=_loop, name="dashboard-stats-flush", daemon=True)
+            self._timer.start()
+            atexit.register(self.flush)
+
+    # ========================================================================
+    # RECORDING
+    # ========================================================================
+
+    def increment(self, key: str, delta: float = 1):
+        if not delta:
+            return
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + delta
+            self._pending_counters[key] = self._pending_counters.get(key, 0) + delta
+
+    def set_field(self, key: str, value: Any):
+        with self._lock:
+            self._fields[key] = value
+            self._pending_fields[key] = value
+
+    def record_history_write(self, is_new: bool, correction_delta: int = 0):
+        """A clean_history_data record was added/updated (correction_delta: -1, 0 or +1)"""
+        if is_new:
+            self.increment('historical_srs')
+        self.increment('user_corrections', correction_delta)
+
+    def mark_history_stale(self):
+        """History counters can no longer be maintained by deltas - recount on next ensure_seeded()"""
+        self.set_field('history_stale', True)
+
+    def _set_counter(self, key: str, value: float):
+        """Replace a counter with an absolute value (survives the next flush's merge)"""
+        with self._lock:
+            self._counters[key] = value
+            self._pending_counters.pop(key, None)
+            self._pending_absolute[key] = value
+
+    def record_upload(self, filename: str):
+        """An Admin_Upload_*.xlsx report was written"""
+        self.increment('uploads')
+        latest = self._fields.get('latest_upload')
+        name = os.path.basename(filename)
+        if not latest or name > latest:
+            self.set_field('latest_upload', name)
+
+    def record_llm_run(self, last_run: Dict[str, Any]):
+        """
+        Record one RAG pipeline run's usage.
+
+        Args:
+            last_run: Same shape as llm_usage_stats.json 'last_run'
+                      (total_calls, input_tokens, output_tokens, cost, ...)
+        """
+        self.set_field('llm.last_run', dict(last_run))
+        self.set_field('llm.last_updated', datetime.now().isoformat())
+        self.increment('llm.cumulative.total_cost', last_run.get('cost', 0))
+        self.increment('llm.cumulative.total_tokens',
+                       last_run.get('input_tokens', 0) + last_run.get('output_tokens', 0))
+        self.increment('llm.cumulative.total_calls', last_run.get('total_calls', 0))
+
+    def record_summarization_call(self, input_tokens: int, output_tokens: int, cost: float):
+        self.increment('llm.summarization.total_calls')
+        self.increment('llm.summarization.total_input_tokens', input_tokens)
+        self.increment('llm.summarization.total_output_tokens', output_tokens)
+        self.increment('llm.summarization.total_cost', cost)
+        self.set_field('llm.summarization.last_updated', datetime.now().isoformat())
+
+    # ========================================================================
+    # SEEDING
+    # ========================================================================
+
+    def ensure_seeded(self, count_records: Callable[[], int] = None,
+                      count_corrections: Callable[[], int] = None):
+        """
+        Initialise counters from the sources once, if no snapshot exists yet,
+        and recount the history counters if they were marked stale.
+
+        Args:
+            count_records: Returns total clean_history_data records
+            count_corrections: Returns SRs with user-corrected workarounds
+        """
+        if self._seeded:
+            if self._fields.get('history_stale'):
+                self._recount_history(count_records, count_corrections)
+            return
+        with self._lock:
+            if self._seeded:
+                return
+            logger.info("[STATS] No dashboard snapshot - seeding counters from sources")
+            try:
+                if count_records:
+                    self._counters['historical_srs'] = count_records()
+                if count_corrections:
+                    self._counters['user_corrections'] = count_corrections()
+            except Exception as e:
+                logger.warning(f"[STATS] Could not seed history counters: {e}")
+
+            if REPORTS_DIR.exists():
+                files = sorted(f for f in os.listdir(REPORTS_DIR)
+                               if f.startswith('Admin_Upload_') and f.endswith('.xlsx'))
+                self._counters['uploads'] = len(files)
+                if files:
+                    self._fields['latest_upload'] = files[-1]
+
+            if LLM_USAGE_FILE.exists():
+                try:
+                    with open(LLM_USAGE_FILE, 'r') as f:
+                        usage = json.load(f)
+                    for key, value in usage.get('cumulative', {}).items():
+                        if f'llm.cumulative.{key}' in self._counters:
+                            self._counters[f'llm.cumulative.{key}'] = value
+                    for key, value in usage.get('summarization', {}).items():
+                        if f'llm.summarization.{key}' in self._counters:
+                            self._counters[f'llm.summarization.{key}'] = value
+                    if usage.get('last_run'):
+                        self._fields['llm.last_run'] = usage['last_run']
+                    if usage.get('last_updated'):
+                        self._fields['llm.last_updated'] = usage['last_updated']
+                except Exception as e:
+                    logger.warning(f"[STATS] Could not seed LLM usage: {e}")
+
+            # Sources already include anything recorded before seeding
+            self._pending_counters = {}
+            self._fields.pop('history_stale', None)
+            self._pending_fields.pop('history_stale', None)
+            self._seeded = True
+        self.flush()
+
+    def _recount_history(self, count_records: Callable[[], int] = None,
+                         count_corrections: Callable[[], int] = None):
+        with self._lock:
+            if not self._fields.get('history_stale'):
+                return
+            logger.info("[STATS] History counters marked stale - recounting from sources")
+            try:
+                if count_records:
+                    self._set_counter('historical_srs', count_records())
+                if count_corrections:
+                    self._set_counter('user_corrections', count_corrections())
+            except Exception as e:
+                logger.warning(f"[STATS] Could not recount history counters: {e}")
+                return
+            self.set_field('history_stale', False)
+        self.flush()
+
+    # ========================================================================
+    # READING
+    # ========================================================================
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Current values in the /admin/stats shape (no I/O)"""
+        with self._lock:
+            c = self._counters
+            f = self._fields
+            llm_usage = None
+            if f.get('llm.last_run') or c.get('llm.cumulative.total_calls'):
+                llm_usage = {
+                    'last_updated': f.get('llm.last_updated'),
+                    'last_run': f.get('llm.last_run', {}),
+                    'cumulative': {
+                        'total_cost': c.get('llm.cumulative.total_cost', 0),
+                        'total_tokens': int(c.get('llm.cumulative.total_tokens', 0)),
+                        'total_calls': int(c.get('llm.cumulative.total_calls', 0))
+                    }
+                }
+                if c.get('llm.summarization.total_calls'):
+                    llm_usage['summarization'] = {
+                        'total_calls': int(c['llm.summarization.total_calls']),
+                        'total_input_tokens': int(c.get('llm.summarization.total_input_tokens', 0)),
+                        'total_output_tokens': int(c.get('llm.summarization.total_output_tokens', 0)),
+                        'total_cost': c.get('llm.summarization.total_cost', 0),
+                        'last_updated': f.get('llm.summarization.last_updated')
+                    }
+            return {
+                'historical_srs': int(c.get('historical_srs', 0)),
+                'user_corrections': int(c.get('user_corrections', 0)),
+                'uploads': int(c.get('uploads', 0)),
+                'latest_upload': f.get('latest_upload'),
+                'llm_usage': llm_usage
+            }
+
+
+def get_dashboard_stats() -> DashboardStats:
+    """Process-wide DashboardStats with background snapshots started"""
+    global _shared_stats
+    if _shared_stats is None:
+        with _shared_lock:
+            if _shared_stats is None:
+                _shared_stats = DashboardStats()
+                _shared_stats.start_background_flush()
+    return _shared_stats
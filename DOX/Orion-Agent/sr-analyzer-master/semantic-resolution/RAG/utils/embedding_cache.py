@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Embedding Cache
+Two-level (in-memory LRU + SQLite) cache for sentence-transformer embeddings.
+
+The same SR text is embedded by the batch analyzer, the RAG pipeline, the
+history manager on merge and find_similar_srs on every portal view. Going
+through this cache, each distinct text is encoded once per model.
+
+Key: SHA-256 of (model name, preprocessing version, whitespace-normalized text).
+With preprocess=True the key is taken on the raw text and SRTextPreprocessor
+only runs on misses, so cleaning is cached too; bumping
+SRTextPreprocessor.VERSION invalidates those entries.
+
+Settings (environment):
+    EMBEDDING_CACHE_ENABLED       1/0 (default 1)
+    EMBEDDING_CACHE_MEMORY_SIZE   in-memory LRU entries (default 20000)
+    EMBEDDING_CACHE_MAX_ENTRIES   on-disk entries (default 500000, ~800 MB at 384 dims)
+
+Usage:
+    from RAG.utils.embedding_cache import encode_cached
+
+    vectors = encode_cached(["text one", "text two"])          # np.ndarray (2, 384)
+    vectors = encode_cached(raw_texts, preprocess=True)        # clean + encode
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "database" / "embedding_cache.db"
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+EMBEDDING_CACHE_ENABLED = os.environ.get('EMBEDDING_CACHE_ENABLED', '1') != '0'
+
+_WHITESPACE = re.compile(r'\s+')
+
+_caches: Dict[str, 'EmbeddingCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def _preprocess_version() -> str:
+    try:
+        from analyzers.sr_text_preprocessor import SRTextPreprocessor
+        return str(SRTextPreprocessor.VERSION)
+    except ImportError:
+        return 'none'
+
+
+class EmbeddingCache:
+    """
+    LRU + SQLite embedding cache for one model.
+
+    Vectors are stored as float32 blobs. Thread-safe; processes share the
+    SQLite file through WAL mode.
+
+    Attributes:
+        memory_hits / disk_hits / misses: Lookup counters for this process
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, model=None, db_path: Path = None,
+                 memory_size: int = None, max_entries: int = None):
+        self.model_name = model_name
+        self._model = model
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.memory_size = int(memory_size if memory_size is not None
+                               else os.environ.get('EMBEDDING_CACHE_MEMORY_SIZE', '20000'))
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.environ.get('EMBEDDING_CACHE_MAX_ENTRIES', '500000'))
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._puts_since_evict = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+        self._conn = None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            self._init_db()
+        except sqlite3.Error as e:
+            logger.warning(f"[EMB-CACHE] Disk cache unavailable, memory only: {e}")
+            self._conn = None
+
+    def _init_db(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    dim INTEGER,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_emb_accessed ON embeddings(last_accessed)")
+            self._conn.commit()
+
+    @property
+    def model(self):
+        if self._model is None:
+            from RAG.utils.shared_resources import get_embedding_model
+            self._model = get_embedding_model(self.model_name)
+            if self._model is None:
+                raise RuntimeError(f"Embedding model '{self.model_name}' could not be loaded")
+        return self._model
+
+    def make_key(self, text: str, preprocess_version: str = 'raw') -> str:
+        normalized = _WHITESPACE.sub(' ', str(text)).strip()
+        raw = f"{self.model_name}\x1f{preprocess_version}\x1f{normalized}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # ========================================================================
+    # LOOKUP / STORE
+    # ========================================================================
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._conn is None or not keys:
+            return {}
+        found = {}
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cache_key, vector FROM embeddings WHERE cache_key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_accessed = ? WHERE cache_key = ?",
+                    [(time.time(), key) for key in found]
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[EMB-CACHE] Read error: {e}")
+        return found
+
+    def _disk_put_many(self, items: Dict[str, np.ndarray]):
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        try:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO embeddings (cache_key, model, dim, vector, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(key, self.model_name, len(vec), vec.astype(np.float32).tobytes(), now, now)
+                  for key, vec in items.items()])
+            self._conn.commit()
+
+            self._puts_since_evict += len(items)
+            if self._puts_since_evict >= 1000:
+                self._evict()
+        except sqlite3.Error as e:
+            logger.warning(f"[EMB-CACHE] Write error: {e}")
+
+    def _evict(self):
+        """Trim least recently used rows above max_entries (lock held)"""
+        self._puts_since_evict = 0
+        if self.max_entries:
+            self._conn.execute("""
+                DELETE FROM embeddings WHERE cache_key IN (
+                    SELECT cache_key FROM embeddings ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def encode(self, texts: List[str], preprocess: bool = False, batch_size: int = 64) -> np.ndarray:
+        """
+        Embeddings for texts, encoding only the ones not cached.
+
+        Args:
+            texts: Texts to embed (duplicates are encoded once)
+            preprocess: Run SRTextPreprocessor.clean_for_semantic_search before
+                encoding; the key is then taken on the raw text + preprocessor version
+            batch_size: Batch size for the model on misses
+
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        texts = [str(t) if t is not None else '' for t in texts]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        version = _preprocess_version() if preprocess else 'raw'
+        keys = [self.make_key(t, version) for t in texts]
+
+        with self._lock:
+            vectors: Dict[str, np.ndarray] = {}
+            for key in keys:
+                vector = self._memory_get(key)
+                if vector is not None:
+                    vectors[key] = vector
+            memory_found = len(vectors)
+
+            missing_keys = [k for k in dict.fromkeys(keys) if k not in vectors]
+            disk_found = self._disk_get_many(missing_keys)
+            for key, vector in disk_found.items():
+                vectors[key] = vector
+                self._memory_put(key, vector)
+
+        to_encode = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in to_encode:
+                to_encode[key] = text
+
+        if to_encode:
+            encode_texts = list(to_encode.values())
+            if preprocess:
+                from analyzers.sr_text_preprocessor import SRTextPreprocessor
+                encode_texts = [SRTextPreprocessor.clean_for_semantic_search(t) or t for t in encode_texts]
+
+            start = time.perf_counter()
+            encoded = np.asarray(
+                self.model.encode(encode_texts, batch_size=batch_size, show_progress_bar=False),
+                dtype=np.float32
+            )
+            new_items = dict(zip(to_encode.keys(), encoded))
+
+            with self._lock:
+                self.encode_seconds += time.perf_counter() - start
+                for key, vector in new_items.items():
+                    self._memory_put(key, vector)
+                self._disk_put_many(new_items)
+            vectors.update(new_items)
+
+        with self._lock:
+            self.memory_hits += memory_found
+            self.disk_hits += len(disk_found)
+            self.misses += len(to_encode)
+
+        return np.stack([vectors[k] for k in keys])
+
+    def encode_one(self, text: str, preprocess: bool = False) -> np.ndarray:
+        return self.encode([text], preprocess=preprocess)[0]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings WHERE model = ?", (self.model_name,))
+                self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for this process plus cache sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = -1
+            if self._conn is not None:
+                try:
+                    disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            return {
+                'model': self.model_name,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'encode_seconds': round(self.encode_seconds, 3),
+                'memory_entries': len(self._memory),
+                'memory_size': self.memory_size,
+                'disk_entries': disk_entries,
+                'max_entries': self.max_entries
+            }
+
+
+def get_embedding_cache(model_name: str = DEFAULT_MODEL_NAME) -> Optional[EmbeddingCache]:
+    """Process-wide cache for a model (None if disabled via EMBEDDING_CACHE_ENABLED=0)"""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    cache = _caches.get(model_name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(model_name)
+            if cache is None:
+                cache = EmbeddingCache(model_name)
+                _caches[model_name] = cache
+    return cache
+
+
+def encode_cached(texts: List[str], model=None, model_name: str = DEFAULT_MODEL_NAME,
+                  preprocess: bool = False) -> np.ndarray:
+    """
+    Embed texts through the shared cache.
+
+    Falls back to model.encode (or the shared model) when the cache is disabled,
+    so callers can use this unconditionally.
+    """
+    cache = get_embedding_cache(model_name)
+    if cache is not None:
+        return cache.encode(texts, preprocess=preprocess)
+
+    if model is None:
+        from RAG.utils.shared_resources import get_embedding_model
+        model = get_embedding_model(model_name)
+    if preprocess:
+        from analyzers.sr_text_preprocessor import SRTextPreprocessor
+        texts = [SRTextPreprocessor.clean_for_semantic_search(t) or t for t in texts]
+    return np.asarray(model.encode(list(texts), show_progress_bar=False), dtype=np.float32)
+
+
+def get_all_cache_stats() -> Dict[str, Dict]:
+    return {name: cache.get_stats() for name, cache in list(_caches.items())}
@@ -1,381 +1,534 @@
 """
 Workaround Feedback Storage System
 Stores and retrieves upvote/downvote feedback for workarounds using SQLite
+
+Votes are written behind: upvote()/downvote() update in-memory aggregates and
+enqueue the vote; a background thread coalesces queued votes into one
+transaction every FLUSH_INTERVAL seconds over a single shared WAL connection.
+During the daily review burst this replaces one connection + two statements per
+vote (and the resulting 'database is locked' errors) with a few batched writes.
+
+Reads (get_votes, get_all_votes_for_sr, get_statistics, top/bottom lists) are
+served from the materialized per-SR and per-type aggregates. Votes committed by
+other processes (other gunicorn workers) are picked up through SQLite's
+PRAGMA data_version, checked at most once per REFRESH_INTERVAL.
+
+Settings (environment):
+    FEEDBACK_WRITE_BEHIND     1/0 (default 1) - 0 writes every vote synchronously
+    FEEDBACK_FLUSH_INTERVAL   seconds between batched writes (default 0.5)
 """
 
+import os
+import time
+import queue
+import atexit
 import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+FLUSH_INTERVAL = float(os.environ.get('FEEDBACK_FLUSH_INTERVAL', '0.5'))
+FLUSH_BATCH_SIZE = 1000
+REFRESH_INTERVAL = 1.0
+WRITE_RETRIES = 5
+
 
 class WorkaroundFeedbackStorage:
     """Store and retrieve upvote/downvote feedback for workarounds"""
-    
-    def __init__(self, db_path: str = None):
+
+    def __init__(self, db_path: str = None, write_behind: bool = None):
         if db_path is None:
             # Default path: data/database/workaround_feedback.db
             base_dir = Path(__file__).parent.parent.parent  # semantic-resolution folder
             db_path = base_dir / "data" / "database" / "workaround_feedback.db"
-        
+
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if write_behind is None:
+            write_behind = os.environ.get('FEEDBACK_WRITE_BEHIND', '1') != '0'
+        self.write_behind = write_behind
+
+        # One long-lived connection; _db_lock serialises it and every drain + write
+        self._db_lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         self._init_database()
-    
+
+        # Materialized aggregates: (sr_id, type) -> entry, plus lower(sr_id) -> {type: entry}
+        self._agg_lock = threading.RLock()
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self._by_sr: Dict[str, Dict[str, Dict]] = {}
+        self._stats: Optional[Dict] = None
+        self._data_version = None
+        self._last_refresh = 0.0
+        self._load_aggregates()
+
+        # Write-behind queue
+        self._pending: "queue.Queue[tuple]" = queue.Queue()
+        self._has_votes = threading.Event()
+        self._closed = threading.Event()
+        self._writer = None
+        self.votes_written = 0
+        self.batches_written = 0
+        if self.write_behind:
+            self._writer = threading.Thread(target=self._writer_loop, name="feedback-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
     def _init_database(self):
         """Create feedback table if not exists"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Main feedback table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS workaround_feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sr_id TEXT NOT NULL,
-            workaround_type TEXT NOT NULL,
-            workaround_text TEXT NOT NULL,
-            upvotes INTEGER DEFAULT 0,
-            downvotes INTEGER DEFAULT 0,
-            score INTEGER GENERATED ALWAYS AS (upvotes - downvotes) STORED,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(sr_id, workaround_type)
-        )
-        """)
-        
-        # Create indices for fast lookups
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sr_workaround 
-        ON workaround_feedback(sr_id, workaround_type)
-        """)
-        
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_vote_score 
-        ON workaround_feedback(score DESC, upvotes DESC)
-        """)
-        
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sr_id 
-        ON workaround_feedback(sr_id)
-        """)
-        
-        # Vote history table (optional - for tracking individual votes over time)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS vote_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sr_id TEXT NOT NULL,
-            workaround_type TEXT NOT NULL,
-            vote_type TEXT NOT NULL,
-            user_id TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (sr_id, workaround_type) 
-                REFERENCES workaround_feedback(sr_id, workaround_type)
-        )
-        """)
-        
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_vote_history_sr 
-        ON vote_history(sr_id, workaround_type)
-        """)
-        
-        conn.commit()
-        conn.close()
-        
+        with self._db_lock:
+            cursor = self._conn.cursor()
+
+            # Main feedback table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workaround_feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sr_id TEXT NOT NULL,
+                workaround_type TEXT NOT NULL,
+                workaround_text TEXT NOT NULL,
+                upvotes INTEGER DEFAULT 0,
+                downvotes INTEGER DEFAULT 0,
+                score INTEGER GENERATED ALWAYS AS (upvotes - downvotes) STORED,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(sr_id, workaround_type)
+            )
+            """)
+
+            # Create indices for fast lookups
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sr_workaround
+            ON workaround_feedback(sr_id, workaround_type)
+            """)
+
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_vote_score
+            ON workaround_feedback(score DESC, upvotes DESC)
+            """)
+
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sr_id
+            ON workaround_feedback(sr_id)
+            """)
+
+            # Vote history table (optional - for tracking individual votes over time)
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vote_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sr_id TEXT NOT NULL,
+                workaround_type TEXT NOT NULL,
+                vote_type TEXT NOT NULL,
+                user_id TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (sr_id, workaround_type)
+                    REFERENCES workaround_feedback(sr_id, workaround_type)
+            )
+            """)
+
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_vote_history_sr
+            ON vote_history(sr_id, workaround_type)
+            """)
+
+            self._conn.commit()
+
         print(f"[OK] Feedback database initialized: {self.db_path}")
-    
+
+    # ========================================================================
+    # MATERIALIZED AGGREGATES
+    # ========================================================================
+
+    def _load_aggregates(self):
+        """
+        (Re)build the in-memory aggregates from workaround_feedback.
+
+        Votes still on the write-behind queue (including ones put back after a
+        failed write) are applied on top, so a reload doesn't hide them.
+        """
+        with self._agg_lock, self._db_lock:
+            rows = self._conn.execute("""
+            SELECT sr_id, workaround_type, workaround_text, upvotes, downvotes, last_updated
+            FROM workaround_feedback
+            ORDER BY id
+            """).fetchall()
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            self._last_refresh = time.monotonic()
+
+            self._entries = {}
+            self._by_sr = {}
+            for sr_id, workaround_type, text, upvotes, downvotes, last_updated in rows:
+                entry = {
+                    'sr_id': sr_id,
+                    'workaround_type': workaround_type,
+                    'workaround_text': text,
+                    'upvotes': upvotes or 0,
+                    'downvotes': downvotes or 0,
+                    'last_updated': str(last_updated or '')
+                }
+                self._entries[(sr_id, workaround_type)] = entry
+                self._by_sr.setdefault(sr_id.lower(), {}).setdefault(workaround_type, entry)
+            self._stats = None
+
+            pending = getattr(self, '_pending', None)
+            if pending is not None:
+                with pending.mutex:
+                    queued = list(pending.queue)
+                for sr_id, workaround_type, workaround_text, _user_id, vote_type, timestamp in queued:
+                    self._apply_vote(sr_id, workaround_type, workaround_text, vote_type, timestamp)
+
+    def _refresh_if_changed(self):
+        """Reload aggregates if another process committed votes (throttled)"""
+        now = time.monotonic()
+        if now - self._last_refresh < REFRESH_INTERVAL:
+            return
+        with self._db_lock:
+            self._last_refresh = now
+            try:
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"[ERROR] Feedback data_version check failed: {e}")
+                return
+            if data_version == self._data_version:
+                return
+        # Our own queued votes must reach the file before it is re-read
+        with self._agg_lock:
+            self.flush()
+            self._load_aggregates()
+
+    def _apply_vote(self, sr_id: str, workaround_type: str, workaround_text: str,
+                    vote_type: str, timestamp: str):
+        """Apply one vote to the in-memory aggregates (agg lock held)"""
+        entry = self._entries.get((sr_id, workaround_type))
+        if entry is None:
+            entry = {
+                'sr_id': sr_id,
+                'workaround_type': workaround_type,
+                'workaround_text': workaround_text[:500],
+                'upvotes': 0,
+                'downvotes': 0,
+                'last_updated': timestamp
+            }
+            self._entries[(sr_id, workaround_type)] = entry
+            self._by_sr.setdefault(sr_id.lower(), {}).setdefault(workaround_type, entry)
+        entry['upvotes' if vote_type == 'upvote' else 'downvotes'] += 1
+        entry['last_updated'] = timestamp
+        self._stats = None
+
+    @staticmethod
+    def _counts(entry: Optional[Dict]) -> Dict[str, int]:
+        if entry is None:
+            return {'upvotes': 0, 'downvotes': 0, 'score': 0}
+        return {
+            'upvotes': entry['upvotes'],
+            'downvotes': entry['downvotes'],
+            'score': entry['upvotes'] - entry['downvotes']
+        }
+
+    @classmethod
+    def _as_row(cls, entry: Dict) -> Dict:
+        return {
+            'sr_id': entry['sr_id'],
+            'workaround_type': entry['workaround_type'],
+            'workaround_text': entry['workaround_text'],
+            **cls._counts(entry)
+        }
+
+    # ========================================================================
+    # WRITE-BEHIND QUEUE
+    # ========================================================================
+
+    def _record_vote(self, sr_id: str, workaround_type: str, workaround_text: str,
+                     user_id: Optional[str], vote_type: str):
+        # Normalize SR ID to uppercase for consistent storage
+        sr_id = sr_id.upper().strip()
+        workaround_text = workaround_text or ""
+        # Same format and clock (UTC) as SQLite CURRENT_TIMESTAMP
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        vote = (sr_id, workaround_type, workaround_text, user_id, vote_type, timestamp)
+
+        # Applied and queued under one lock so a concurrent reload can't drop the vote
+        with self._agg_lock:
+            if self.write_behind and not self._closed.is_set():
+                self._apply_vote(sr_id, workaround_type, workaround_text, vote_type, timestamp)
+                self._pending.put(vote)
+                self._has_votes.set()
+                return
+            # Synchronous: nothing would retry the vote, so a failed write is the caller's error
+            with self._db_lock:
+                if not self._write_batch([vote]):
+                    raise sqlite3.OperationalError(f"Could not record {vote_type} for {sr_id}")
+            self._apply_vote(sr_id, workaround_type, workaround_text, vote_type, timestamp)
+
+    def _writer_loop(self):
+        """Background thread: wait for a vote, let the burst accumulate, write it in batches"""
+        while not self._closed.is_set():
+            if not self._has_votes.wait(timeout=1.0):
+                continue
+            self._has_votes.clear()
+            self._closed.wait(FLUSH_INTERVAL)
+            self.flush()
+
+    def _drain(self) -> List[tuple]:
+        votes = []
+        while len(votes) < FLUSH_BATCH_SIZE:
+            try:
+                votes.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return votes
+
+    def _write_batch(self, votes: List[tuple]) -> bool:
+        """
+        Write votes in one transaction, coalescing counts per (sr_id, type) (db lock held).
+
+        Votes that still cannot be written after WRITE_RETRIES attempts are put
+        back on the queue for the next flush (write-behind mode only).
+
+        Returns:
+            True if the votes were committed
+        """
+        if not votes:
+            return True
+
+        deltas: Dict[Tuple[str, str], list] = {}
+        history = []
+        for sr_id, workaround_type, workaround_text, user_id, vote_type, timestamp in votes:
+            delta = deltas.setdefault((sr_id, workaround_type), [workaround_text[:500], 0, 0, timestamp])
+            delta[1 if vote_type == 'upvote' else 2] += 1
+            delta[3] = max(delta[3], timestamp)
+            history.append((sr_id, workaround_type, vote_type, user_id, timestamp))
+        rows = [(sr_id, workaround_type, text, up, down, ts)
+                for (sr_id, workaround_type), (text, up, down, ts) in deltas.items()]
+
+        for attempt in range(WRITE_RETRIES):
+            try:
+                with self._conn:
+                    self._conn.executemany("""
+                    INSERT INTO workaround_feedback (sr_id, workaround_type, workaround_text, upvotes, downvotes, last_updated)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(sr_id, workaround_type)
+                    DO UPDATE SET
+                        upvotes = upvotes + excluded.upvotes,
+                        downvotes = downvotes + excluded.downvotes,
+                        last_updated = excluded.last_updated
+                    """, rows)
+
+                    # Log to vote history
+                    self._conn.executemany("""
+                    INSERT INTO vote_history (sr_id, workaround_type, vote_type, user_id, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                    """, history)
+                self.votes_written += len(votes)
+                self.batches_written += 1
+                print(f"[FEEDBACK] {len(votes)} vote(s) recorded for {len(rows)} workaround(s)")
+                return True
+            except sqlite3.OperationalError as e:
+                if 'locked' in str(e) and attempt < WRITE_RETRIES - 1:
+                    time.sleep(0.05 * (2 ** attempt))
+                    continue
+                print(f"[ERROR] Failed to record {len(votes)} vote(s): {e}")
+                break
+            except Exception as e:
+                print(f"[ERROR] Failed to record {len(votes)} vote(s): {e}")
+                break
+
+        if self.write_behind and not self._closed.is_set():
+            for vote in votes:
+                self._pending.put(vote)
+            self._has_votes.set()
+        return False
+
+    def flush(self):
+        """Write all queued votes now (stops at the first failed batch; it stays queued)"""
+        with self._db_lock:
+            while True:
+                votes = self._drain()
+                if not votes or not self._write_batch(votes):
+                    return
+
+    def close(self):
+        """Stop the writer thread and write any remaining votes"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._writer is not None:
+            self._writer.join(timeout=10)
+        self.flush()
+
+    def get_queue_stats(self) -> Dict:
+        """Write-behind counters for this process"""
+        return {
+            'write_behind': self.write_behind,
+            'pending_votes': self._pending.qsize(),
+            'votes_written': self.votes_written,
+            'batches_written': self.batches_written,
+            'materialized_workarounds': len(self._entries)
+        }
+
+    # ========================================================================
+    # VOTES
+    # ========================================================================
+
     def upvote(self, sr_id: str, workaround_type: str, workaround_text: str = "", user_id: str = None):
         """
         Add an upvote to a workaround
-        
+
         Args:
             sr_id: Service request ID
             workaround_type: Type of workaround ('original', 'ai', 'user_corrected')
             workaround_text: Text of the workaround (first 500 chars stored for reference)
             user_id: Optional user identifier for tracking
         """
-        # Normalize SR ID to uppercase for consistent storage
-        sr_id = sr_id.upper().strip()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            # Upsert (insert or update)
-            cursor.execute("""
-            INSERT INTO workaround_feedback (sr_id, workaround_type, workaround_text, upvotes)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(sr_id, workaround_type) 
-            DO UPDATE SET 
-                upvotes = upvotes + 1,
-                last_updated = CURRENT_TIMESTAMP
-            """, (sr_id, workaround_type, workaround_text[:500]))
-            
-            # Log to vote history
-            cursor.execute("""
-            INSERT INTO vote_history (sr_id, workaround_type, vote_type, user_id)
-            VALUES (?, ?, 'upvote', ?)
-            """, (sr_id, workaround_type, user_id))
-            
-            conn.commit()
-            print(f"[FEEDBACK] Upvote recorded: SR={sr_id}, Type={workaround_type}")
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to record upvote: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
-    
+        self._record_vote(sr_id, workaround_type, workaround_text, user_id, 'upvote')
+
     def downvote(self, sr_id: str, workaround_type: str, workaround_text: str = "", user_id: str = None):
         """
         Add a downvote to a workaround
-        
+
         Args:
             sr_id: Service request ID
             workaround_type: Type of workaround ('original', 'ai', 'user_corrected')
             workaround_text: Text of the workaround (first 500 chars stored for reference)
             user_id: Optional user identifier for tracking
         """
-        # Normalize SR ID to uppercase for consistent storage
-        sr_id = sr_id.upper().strip()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-            INSERT INTO workaround_feedback (sr_id, workaround_type, workaround_text, downvotes)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(sr_id, workaround_type) 
-            DO UPDATE SET 
-                downvotes = downvotes + 1,
-                last_updated = CURRENT_TIMESTAMP
-            """, (sr_id, workaround_type, workaround_text[:500]))
-            
-            # Log to vote history
-            cursor.execute("""
-            INSERT INTO vote_history (sr_id, workaround_type, vote_type, user_id)
-            VALUES (?, ?, 'downvote', ?)
-            """, (sr_id, workaround_type, user_id))
-            
-            conn.commit()
-            print(f"[FEEDBACK] Downvote recorded: SR={sr_id}, Type={workaround_type}")
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to record downvote: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
-    
+        self._record_vote(sr_id, workaround_type, workaround_text, user_id, 'downvote')
+
     def get_votes(self, sr_id: str, workaround_type: str) -> Dict[str, int]:
         """
         Get vote counts for a specific workaround
-        
+
         Returns:
             Dictionary with 'upvotes', 'downvotes', and 'score' (upvotes - downvotes)
         """
         # Normalize SR ID to uppercase for consistent lookup
         sr_id = sr_id.upper().strip()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT upvotes, downvotes, score FROM workaround_feedback
-        WHERE sr_id = ? AND workaround_type = ?
-        """, (sr_id, workaround_type))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'upvotes': row[0],
-                'downvotes': row[1],
-                'score': row[2]
-            }
-        return {'upvotes': 0, 'downvotes': 0, 'score': 0}
-    
+        self._refresh_if_changed()
+        with self._agg_lock:
+            return self._counts(self._entries.get((sr_id, workaround_type)))
+
     def get_all_votes_for_sr(self, sr_id: str) -> Dict[str, Dict[str, int]]:
         """
         Get votes for all workaround types of a specific SR
-        
+
         Returns:
             Dictionary mapping workaround_type to vote counts
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT workaround_type, upvotes, downvotes, score 
-        FROM workaround_feedback
-        WHERE LOWER(sr_id) = LOWER(?)
-        """, (sr_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        result = {}
-        for row in rows:
-            result[row[0]] = {
-                'upvotes': row[1],
-                'downvotes': row[2],
-                'score': row[3]
+        self._refresh_if_changed()
+        with self._agg_lock:
+            return {
+                workaround_type: self._counts(entry)
+                for workaround_type, entry in self._by_sr.get(sr_id.lower(), {}).items()
             }
-        
-        return result
-    
+
     def get_vote_score(self, sr_id: str, workaround_type: str) -> int:
         """
         Calculate priority score (upvotes - downvotes)
-        
+
         Returns:
             Integer score (can be negative)
         """
         votes = self.get_votes(sr_id, workaround_type)
         return votes['score']
-    
+
     def get_top_workarounds(self, limit: int = 10, min_votes: int = 1) -> List[Dict]:
         """
         Get highest-voted workarounds across all SRs
-        
+
         Args:
             limit: Maximum number of results
             min_votes: Minimum number of upvotes to include
-        
+
         Returns:
             List of workaround dictionaries sorted by score
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT sr_id, workaround_type, workaround_text, upvotes, downvotes, score
-        FROM workaround_feedback
-        WHERE upvotes >= ?
-        ORDER BY score DESC, upvotes DESC, last_updated DESC
-        LIMIT ?
-        """, (min_votes, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'sr_id': row[0],
-                'workaround_type': row[1],
-                'workaround_text': row[2],
-                'upvotes': row[3],
-                'downvotes': row[4],
-                'score': row[5]
-            }
-            for row in rows
-        ]
-    
+        self._refresh_if_changed()
+        with self._agg_lock:
+            entries = [e for e in self._entries.values() if e['upvotes'] >= min_votes]
+        # ORDER BY score DESC, upvotes DESC, last_updated DESC
+        entries.sort(key=lambda e: (e['upvotes'] - e['downvotes'], e['upvotes'], e['last_updated']), reverse=True)
+        return [self._as_row(e) for e in entries[:limit]]
+
     def get_bottom_workarounds(self, limit: int = 10) -> List[Dict]:
         """
         Get lowest-voted workarounds (for identifying problems)
-        
+
         Returns:
             List of workaround dictionaries sorted by score (ascending)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT sr_id, workaround_type, workaround_text, upvotes, downvotes, score
-        FROM workaround_feedback
-        WHERE downvotes > 0
-        ORDER BY score ASC, downvotes DESC, last_updated DESC
-        LIMIT ?
-        """, (limit,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'sr_id': row[0],
-                'workaround_type': row[1],
-                'workaround_text': row[2],
-                'upvotes': row[3],
-                'downvotes': row[4],
-                'score': row[5]
-            }
-            for row in rows
-        ]
-    
+        self._refresh_if_changed()
+        with self._agg_lock:
+            entries = [e for e in self._entries.values() if e['downvotes'] > 0]
+        # ORDER BY score ASC, downvotes DESC, last_updated DESC
+        entries.sort(key=lambda e: e['last_updated'], reverse=True)
+        entries.sort(key=lambda e: (e['upvotes'] - e['downvotes'], -e['downvotes']))
+        return [self._as_row(e) for e in entries[:limit]]
+
     def get_statistics(self) -> Dict:
         """
         Get overall statistics about feedback
-        
+
         Returns:
-            Dictionary with various statistics
+            Dictionary with various statistics, including per workaround type
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total workarounds with feedback
-        cursor.execute("SELECT COUNT(*) FROM workaround_feedback WHERE upvotes > 0 OR downvotes > 0")
-        total_with_feedback = cursor.fetchone()[0]
-        
-        # Total votes
-        cursor.execute("SELECT SUM(upvotes), SUM(downvotes) FROM workaround_feedback")
-        total_votes = cursor.fetchone()
-        
-        # Average score
-        cursor.execute("SELECT AVG(score) FROM workaround_feedback WHERE upvotes > 0 OR downvotes > 0")
-        avg_score = cursor.fetchone()[0] or 0
-        
-        # Best workaround
-        cursor.execute("""
-        SELECT sr_id, workaround_type, score 
-        FROM workaround_feedback 
-        ORDER BY score DESC, upvotes DESC 
-        LIMIT 1
-        """)
-        best = cursor.fetchone()
-        
-        # Worst workaround
-        cursor.execute("""
-        SELECT sr_id, workaround_type, score 
-        FROM workaround_feedback 
-        ORDER BY score ASC, downvotes DESC 
-        LIMIT 1
-        """)
-        worst = cursor.fetchone()
-        
-        conn.close()
-        
-        return {
-            'total_workarounds_with_feedback': total_with_feedback,
-            'total_upvotes': total_votes[0] or 0,
-            'total_downvotes': total_votes[1] or 0,
-            'average_score': round(avg_score, 2),
-            'best_workaround': {
-                'sr_id': best[0] if best else None,
-                'type': best[1] if best else None,
-                'score': best[2] if best else None
-            },
-            'worst_workaround': {
-                'sr_id': worst[0] if worst else None,
-                'type': worst[1] if worst else None,
-                'score': worst[2] if worst else None
+        self._refresh_if_changed()
+        with self._agg_lock:
+            if self._stats is not None:
+                return self._stats
+
+            entries = list(self._entries.values())
+            voted = [e for e in entries if e['upvotes'] > 0 or e['downvotes'] > 0]
+            total_upvotes = sum(e['upvotes'] for e in entries)
+            total_downvotes = sum(e['downvotes'] for e in entries)
+            scores = [e['upvotes'] - e['downvotes'] for e in voted]
+
+            best = max(entries, key=lambda e: (e['upvotes'] - e['downvotes'], e['upvotes']), default=None)
+            worst = min(entries, key=lambda e: (e['upvotes'] - e['downvotes'], -e['downvotes']), default=None)
+
+            by_type: Dict[str, Dict] = {}
+            for e in voted:
+                t = by_type.setdefault(e['workaround_type'], {'workarounds': 0, 'upvotes': 0, 'downvotes': 0, 'score': 0})
+                t['workarounds'] += 1
+                t['upvotes'] += e['upvotes']
+                t['downvotes'] += e['downvotes']
+                t['score'] += e['upvotes'] - e['downvotes']
+            for t in by_type.values():
+                t['average_score'] = round(t['score'] / t['workarounds'], 2)
+
+            self._stats = {
+                'total_workarounds_with_feedback': len(voted),
+                'total_upvotes': total_upvotes,
+                'total_downvotes': total_downvotes,
+                'average_score': round(sum(scores) / len(scores), 2) if scores else 0,
+                'best_workaround': {
+                    'sr_id': best['sr_id'] if best else None,
+                    'type': best['workaround_type'] if best else None,
+                    'score': best['upvotes'] - best['downvotes'] if best else None
+                },
+                'worst_workaround': {
+                    'sr_id': worst['sr_id'] if worst else None,
+                    'type': worst['workaround_type'] if worst else None,
+                    'score': worst['upvotes'] - worst['downvotes'] if worst else None
+                },
+                'by_type': by_type
             }
-        }
-    
+            return self._stats
+
     def export_to_csv(self, output_path: str):
         """Export all feedback data to CSV"""
         import pandas as pd
-        
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query("""
-        SELECT sr_id, workaround_type, upvotes, downvotes, score, 
-               created_at, last_updated
-        FROM workaround_feedback
-        ORDER BY score DESC
-        """, conn)
-        conn.close()
-        
+
+        self.flush()
+        with self._db_lock:
+            df = pd.read_sql_query("""
+            SELECT sr_id, workaround_type, upvotes, downvotes, score,
+                   created_at, last_updated
+            FROM workaround_feedback
+            ORDER BY score DESC
+            """, self._conn)
+
         df.to_csv(output_path, index=False)
         print(f"[OK] Feedback data exported to: {output_path}")
 
@@ -383,19 +536,19 @@ class WorkaroundFeedbackStorage:
 # Utility functions for easy access
 def record_upvote(sr_id: str, workaround_type: str, workaround_text: str = ""):
     """Quick utility to record an upvote"""
-    storage = WorkaroundFeedbackStorage()
+    storage = WorkaroundFeedbackStorage(write_behind=False)
     storage.upvote(sr_id, workaround_type, workaround_text)
 
 
 def record_downvote(sr_id: str, workaround_type: str, workaround_text: str = ""):
     """Quick utility to record a downvote"""
-    storage = WorkaroundFeedbackStorage()
+    storage = WorkaroundFeedbackStorage(write_behind=False)
     storage.downvote(sr_id, workaround_type, workaround_text)
 
 
 def get_feedback(sr_id: str, workaround_type: str) -> Dict[str, int]:
     """Quick utility to get feedback for a workaround"""
-    storage = WorkaroundFeedbackStorage()
+    storage = WorkaroundFeedbackStorage(write_behind=False)
     return storage.get_votes(sr_id, workaround_type)
 
 
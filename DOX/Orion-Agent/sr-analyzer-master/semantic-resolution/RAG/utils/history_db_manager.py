@@ -15,7 +15,7 @@ import logging
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -50,6 +50,17 @@ try:
 except ImportError:
     PREPROCESSOR_AVAILABLE = False
 
+# Process-wide model/client (loaded once, shared with the other managers)
+# Project root must be importable even when this file is loaded as a top-level module
+import sys
+_PROJECT_ROOT = str(Path(__file__).parent.parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from RAG.utils.shared_resources import get_embedding_model, get_chromadb_client, get_collection
+from RAG.utils.history_index import get_history_index
+from RAG.utils.dashboard_stats import get_dashboard_stats
+from RAG.utils.embedding_cache import get_embedding_cache
+
 
 class HistoryDatabaseManager:
     """
@@ -78,6 +89,9 @@ class HistoryDatabaseManager:
         self.chromadb_collection = None
         self.use_chromadb = False
         
+        # SQLite side index for call_id/assignee/source lookups (see history_index.py)
+        self.side_index = None
+        
         # Determine ChromaDB path
         if chromadb_path:
             self.chromadb_path = Path(chromadb_path)
@@ -86,15 +100,20 @@ class HistoryDatabaseManager:
             base_dir = Path(__file__).parent.parent.parent
             self.chromadb_path = base_dir / "data" / "vectorstore" / "chromadb_store"
         
-        # Initialize ChromaDB
+        # Initialize ChromaDB (shared client - cheap after the first construction)
         if CHROMADB_AVAILABLE and self.chromadb_path.exists():
             try:
-                # Use basic PersistentClient without Settings to avoid "different settings" error
-                self.chromadb_client = chromadb.PersistentClient(path=str(self.chromadb_path))
-                self.chromadb_collection = self.chromadb_client.get_collection('clean_history_data')
+                self.chromadb_client = get_chromadb_client(self.chromadb_path)
+                self.chromadb_collection = get_collection('clean_history_data', self.chromadb_path)
+                if self.chromadb_collection is None:
+                    raise ValueError("collection 'clean_history_data' not found")
                 self.use_chromadb = True
                 logger.info(f"[OK] ChromaDB initialized (records: {self.chromadb_collection.count()})")
                 self._load_model()
+                try:
+                    self.side_index = get_history_index()
+                except Exception as e:
+                    logger.warning(f"Side index unavailable, lookups will scan ChromaDB: {e}")
             except Exception as e:
                 logger.error(f"ChromaDB init failed: {e}")
                 self.use_chromadb = False
@@ -105,18 +124,59 @@ class HistoryDatabaseManager:
                 logger.error(f"ChromaDB store not found at {self.chromadb_path}")
     
     def _load_model(self):
-        """Load the sentence transformer model"""
+        """Attach the shared sentence transformer model (loaded once per process)"""
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             return
         
+        self.model = get_embedding_model('all-MiniLM-L6-v2')
+        self.model_name = 'all-MiniLM-L6-v2'
+        if self.model is None:
+            logger.warning("Model load failed - embeddings won't be updated")
+    
+    def encode_text(self, text: str) -> List[float]:
+        """Embedding for a document/query text via the shared embedding cache"""
+        cache = get_embedding_cache(self.model_name)
+        if cache is not None:
+            return cache.encode_one(text).tolist()
+        return self.model.encode([text])[0].tolist()
+    
+    def _get_side_index(self):
+        """Side index, built from ChromaDB on first use if missing/out of date (None if unavailable)"""
+        if self.side_index is None or not self.use_chromadb:
+            return None
+        return self.side_index if self.side_index.ensure_built(self.chromadb_collection) else None
+    
+    def index_record(self, record_id: str, metadata: Dict[str, Any]):
+        """
+        Refresh the side index for a record written to clean_history_data.
+        
+        Called by every write in this class; code that writes the collection
+        directly (e.g. reassignment routes) should call it too. Also feeds the
+        dashboard counters (new records, user corrections added).
+        
+        Never rebuilds the side index (that belongs to reads, not a single-record
+        write). If it has not been verified in this process yet, the row is still
+        upserted but the counters are marked stale instead of trusting its old row.
+        """
+        if not self.use_chromadb:
+            return
+        side_index = self.side_index
+        verified = side_index is not None and side_index.is_verified
+        was_corrected = side_index.get_correction_flag(record_id) if verified else None
+        if side_index is not None:
+            side_index.upsert(record_id, metadata)
+        
+        is_corrected = bool(str(metadata.get('user_corrected_workaround', '') or '').strip())
         try:
-            # Load without device parameter to avoid meta tensor error
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            self.model_name = 'all-MiniLM-L6-v2'
-            logger.info("[OK] Model loaded")
+            if not verified:
+                get_dashboard_stats().mark_history_stale()
+                return
+            get_dashboard_stats().record_history_write(
+                is_new=was_corrected is None,
+                correction_delta=int(is_corrected) - int(bool(was_corrected))
+            )
         except Exception as e:
-            logger.warning(f"Model load failed: {e}")
-            self.model = None
+            logger.warning(f"Dashboard stats update failed: {e}")
     
     def load_database(self) -> bool:
         """Load the history database"""
@@ -342,7 +402,7 @@ class HistoryDatabaseManager:
                     
                     # Re-encode document (only description, summary removed as redundant)
                     doc_text = existing_metadata.get('description', '')
-                    new_embedding = self.model.encode([doc_text])[0].tolist()
+                    new_embedding = self.encode_text(doc_text)
                     
                     # Delete old and add updated (ChromaDB update pattern)
                     self.chromadb_collection.delete(ids=[record_id])
@@ -352,6 +412,7 @@ class HistoryDatabaseManager:
                         documents=[doc_text],
                         metadatas=[existing_metadata]
                     )
+                    self.index_record(record_id, existing_metadata)
                     
                     logger.info(f"[OK] Updated SR {sr_id_upper} in ChromaDB (user_feedback: {is_user_feedback})")
                     return True
@@ -361,7 +422,7 @@ class HistoryDatabaseManager:
                     logger.info(f"[ADD] SR {sr_id_upper} is new - adding to ChromaDB")
                     
                     doc_text = f"{description_str} {notes_str}"
-                    embedding = self.model.encode([doc_text])[0].tolist()
+                    embedding = self.encode_text(doc_text)
                     
                     # Build initial user workaround as JSON if provided
                     user_wa_json = ''
@@ -402,6 +463,7 @@ class HistoryDatabaseManager:
                         documents=[doc_text],
                         metadatas=[metadata]
                     )
+                    self.index_record(unique_id, metadata)
                     
                     logger.info(f"[OK] Added new SR {sr_id_upper} to ChromaDB")
                     return True
@@ -553,7 +615,7 @@ class HistoryDatabaseManager:
                     # Re-encode if model available
                     new_embedding = None
                     if self.model:
-                        new_embedding = self.model.encode([old_doc])[0].tolist()
+                        new_embedding = self.encode_text(old_doc)
                     
                     # Delete and re-add (ChromaDB doesn't support direct metadata update)
                     self.chromadb_collection.delete(ids=[record_id])
@@ -563,6 +625,7 @@ class HistoryDatabaseManager:
                         documents=[old_doc],
                         metadatas=[old_metadata]
                     )
+                    self.index_record(record_id, old_metadata)
                     
                     logger.info(f"✅ Successfully updated workaround for SR {sr_id} in ChromaDB")
                     return True
@@ -645,7 +708,7 @@ class HistoryDatabaseManager:
                     # Re-encode if model available
                     new_embedding = None
                     if self.model:
-                        new_embedding = self.model.encode([old_doc])[0].tolist()
+                        new_embedding = self.encode_text(old_doc)
                     
                     # Delete and re-add (ChromaDB doesn't support direct metadata update)
                     self.chromadb_collection.delete(ids=[record_id])
@@ -655,6 +718,7 @@ class HistoryDatabaseManager:
                         documents=[old_doc],
                         metadatas=[old_metadata]
                     )
+                    self.index_record(record_id, old_metadata)
                     
                     logger.info(f"✅ Successfully updated AI workaround for SR {sr_id} in ChromaDB")
                     logger.info(f"   Old: {str(old_workaround)[:50]}...")
@@ -832,7 +896,7 @@ class HistoryDatabaseManager:
                 doc_text = existing_metadata.get('description', '')
                 new_embedding = None
                 if self.model:
-                    new_embedding = self.model.encode([doc_text])[0].tolist()
+                    new_embedding = self.encode_text(doc_text)
                 
                 # Delete and re-add
                 self.chromadb_collection.delete(ids=[record_id])
@@ -842,6 +906,7 @@ class HistoryDatabaseManager:
                     documents=[doc_text],
                     metadatas=[existing_metadata]
                 )
+                self.index_record(record_id, existing_metadata)
                 
                 logger.info(f"✅ Updated SR {sr_id} from admin upload in ChromaDB (preserved user feedback: {preserve_user_feedback and bool(existing_user_workaround)})")
                 return True
@@ -1143,10 +1208,22 @@ class HistoryDatabaseManager:
             return []
         
         try:
-            # Get all records and filter by assignee
-            all_results = self.chromadb_collection.get(
-                include=["metadatas", "documents"]
-            )
+            side_index = self._get_side_index()
+            if side_index is not None:
+                # Point lookup via the assignee index, then fetch only those records
+                matched_ids = [row['record_id'] for row in side_index.find_by_assignee(assignee_name)]
+                if not matched_ids:
+                    logger.info(f"Found 0 SRs assigned to {assignee_name}")
+                    return []
+                all_results = self.chromadb_collection.get(
+                    ids=matched_ids,
+                    include=["metadatas"]
+                )
+            else:
+                # No index - get all records and filter by assignee
+                all_results = self.chromadb_collection.get(
+                    include=["metadatas", "documents"]
+                )
             
             if not all_results or not all_results['ids']:
                 return []
@@ -1190,6 +1267,121 @@ class HistoryDatabaseManager:
             logger.error(f"Error getting SRs for assignee {assignee_name}: {e}")
             return []
     
+    def find_record_by_sr_id(self, sr_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata for an SR, tolerant of case/whitespace differences in stored call_id.
+        
+        Tries the exact ChromaDB filter first, then resolves the record ID through
+        the side index (no collection scan).
+        """
+        if not self.use_chromadb or not self.chromadb_collection:
+            return None
+        
+        sr_id_upper = str(sr_id).upper().strip()
+        results = self.chromadb_collection.get(where={"call_id": sr_id_upper}, limit=1, include=['metadatas'])
+        if results and results.get('metadatas'):
+            return results['metadatas'][0]
+        
+        side_index = self._get_side_index()
+        if side_index is None:
+            return None
+        record_ids = side_index.find_record_ids(sr_id_upper)
+        if not record_ids:
+            return None
+        results = self.chromadb_collection.get(ids=record_ids[:1], include=['metadatas'])
+        if results and results.get('metadatas'):
+            return results['metadatas'][0]
+        return None
+    
+    def get_records_added_on(self, date_prefix: str, page_size: int = 5000) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        IDs and metadata of records added/opened (or reported) on date_prefix.
+        
+        Only metadata is fetched - no documents or embeddings. The side index
+        supplies the candidate IDs; without it the collection is scanned in
+        metadata-only pages, so memory stays flat either way.
+        
+        Args:
+            date_prefix: Date as stored in the metadata, e.g. '2025-01-31'
+            page_size: Records per ChromaDB get()
+        
+        Returns:
+            (record_ids, metadatas) for records whose added_date, opened_date or
+            Reported Date starts with date_prefix
+        """
+        if not self.use_chromadb or not self.chromadb_collection:
+            return [], []
+        
+        def matches(metadata):
+            sr_date = metadata.get('added_date', '') or metadata.get('opened_date', '') or metadata.get('Reported Date', '')
+            return bool(sr_date) and str(sr_date).startswith(date_prefix)
+        
+        record_ids, metadatas = [], []
+        side_index = self._get_side_index()
+        if side_index is not None:
+            candidate_ids = side_index.find_added_on(date_prefix, include_reported=True)
+            for start in range(0, len(candidate_ids), page_size):
+                page = self.chromadb_collection.get(ids=candidate_ids[start:start + page_size], include=['metadatas'])
+                for record_id, metadata in zip(page.get('ids') or [], page.get('metadatas') or []):
+                    if metadata and matches(metadata):
+                        record_ids.append(record_id)
+                        metadatas.append(metadata)
+        else:
+            total = self.chromadb_collection.count()
+            for offset in range(0, total, page_size):
+                page = self.chromadb_collection.get(include=['metadatas'], limit=page_size, offset=offset)
+                for record_id, metadata in zip(page.get('ids') or [], page.get('metadatas') or []):
+                    if metadata and matches(metadata):
+                        record_ids.append(record_id)
+                        metadatas.append(metadata)
+        
+        logger.info(f"Found {len(record_ids)} records for {date_prefix}")
+        return record_ids, metadatas
+    
+    def update_metadata_batch(self, record_ids: List[str], metadatas: List[Dict[str, Any]],
+                              batch_size: int = 1000) -> int:
+        """
+        Replace metadata of existing records in batched collection.update() calls.
+        
+        Documents and embeddings are left untouched (no delete + re-add). Meant
+        for field changes like reassignment; the side index is refreshed in one
+        transaction per batch.
+        
+        Returns:
+            Number of records updated
+        """
+        if not self.use_chromadb or not self.chromadb_collection or not record_ids:
+            return 0
+        
+        updated = 0
+        side_index = self._get_side_index()
+        for start in range(0, len(record_ids), batch_size):
+            ids = record_ids[start:start + batch_size]
+            metas = metadatas[start:start + batch_size]
+            self.chromadb_collection.update(ids=ids, metadatas=metas)
+            if side_index is not None:
+                side_index.upsert_many(zip(ids, metas))
+            updated += len(ids)
+        
+        logger.info(f"Updated metadata of {updated} records")
+        return updated
+    
+    def count_user_corrections(self) -> int:
+        """Number of SRs with at least one user-corrected workaround"""
+        side_index = self._get_side_index()
+        if side_index is not None:
+            return side_index.count_user_corrections()
+        
+        if self.use_chromadb and self.chromadb_collection:
+            all_metadata = self.chromadb_collection.get(include=['metadatas'])
+            metadata_list = all_metadata.get('metadatas', [])
+        else:
+            metadata_list = self.db_data.get('metadata', []) if self.db_data else []
+        return sum(
+            1 for m in metadata_list
+            if m and str(m.get('user_corrected_workaround', '') or '').strip()
+        )
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics"""
         # Use ChromaDB if available
@@ -1199,19 +1391,26 @@ class HistoryDatabaseManager:
                 
                 # Count user feedback entries
                 user_feedback_count = 0
-                try:
-                    user_feedback_results = self.chromadb_collection.get(
-                        where={"source": {"$eq": "user_feedback"}},
-                        include=['metadatas']
-                    )
-                    if user_feedback_results and user_feedback_results.get('ids'):
-                        user_feedback_count = len(user_feedback_results['ids'])
-                except Exception:
-                    pass  # ChromaDB might not support this query
+                user_corrections = None
+                side_index = self._get_side_index()
+                if side_index is not None:
+                    user_feedback_count = side_index.count_by_source('user_feedback')
+                    user_corrections = side_index.count_user_corrections()
+                else:
+                    try:
+                        user_feedback_results = self.chromadb_collection.get(
+                            where={"source": {"$eq": "user_feedback"}},
+                            include=[]
+                        )
+                        if user_feedback_results and user_feedback_results.get('ids'):
+                            user_feedback_count = len(user_feedback_results['ids'])
+                    except Exception:
+                        pass  # ChromaDB might not support this query
                 
                 return {
                     'total_records': count,
                     'user_feedback_count': user_feedback_count,
+                    'user_corrections': user_corrections,
                     'columns': ['call_id', 'description', 'workaround', 'ai_generated_workaround', 'user_corrected_workaround'],
                     'model_name': 'all-MiniLM-L6-v2',
                     'storage': 'ChromaDB',
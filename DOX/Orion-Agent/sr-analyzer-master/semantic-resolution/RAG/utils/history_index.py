@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+History Side Index
+SQLite side table over the clean_history_data ChromaDB collection.
+
+ChromaDB's where-filters are exact-match only and unfiltered get() pulls every
+metadata record into Python. The lookups the app does all the time (SR ID,
+assignee, source, "has a user correction") only need a handful of scalar
+fields, so they are kept here with B-tree indexes:
+
+    record_id | call_id_norm | assigned_to | assigned_to_norm | source
+              | reported_date | added_date | has_user_correction
+
+HistoryDatabaseManager keeps rows in sync on every write
+(add_user_feedback_entry, update_workaround, update_ai_workaround,
+update_sr_from_admin); other writers call HistoryDatabaseManager.index_record().
+If the row count drifts from the collection count (e.g. a bulk vectorstore
+rebuild), the index is rebuilt from ChromaDB in pages. The ingestion and admin
+upload scripts do that synchronously; in the web app ensure_built() starts it
+in a background thread and callers use their paged ChromaDB fallback until it
+has finished.
+
+Usage:
+    python RAG/utils/history_index.py --rebuild     # Force full rebuild
+    python RAG/utils/history_index.py --stats       # Show index stats
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent.parent / "data" / "database" / "history_side_index.db"
+
+# Bump when the table layout changes - an index with another version is rebuilt
+SCHEMA_VERSION = 1
+
+REBUILD_PAGE_SIZE = 5000
+
+# A failed background rebuild is not retried before this many seconds
+REBUILD_RETRY_SECONDS = 300
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def normalize_call_id(call_id: Any) -> str:
+    """Case/whitespace-normalized SR ID used as the lookup key"""
+    return str(call_id or '').strip().upper()
+
+
+def normalize_assignee(name: Any) -> str:
+    return str(name or '').strip().lower()
+
+
+def _row_from_metadata(record_id: str, metadata: Dict[str, Any]) -> tuple:
+    """Extract indexed columns from a ChromaDB metadata dict"""
+    metadata = metadata or {}
+    assigned_to = str(metadata.get('assigned_to', '') or metadata.get('current_assignee', '') or '')
+    reported_date = str(metadata.get('Reported Date', '') or metadata.get('reported_date', '') or '')
+    added_date = str(metadata.get('added_date', '') or metadata.get('opened_date', '') or '')
+    has_correction = 1 if str(metadata.get('user_corrected_workaround', '') or '').strip() else 0
+    return (
+        str(record_id),
+        normalize_call_id(metadata.get('call_id', record_id)),
+        assigned_to,
+        normalize_assignee(assigned_to),
+        str(metadata.get('source', '') or ''),
+        reported_date,
+        added_date,
+        has_correction,
+        time.time()
+    )
+
+
+class HistorySideIndex:
+    """
+    SQLite index of scalar SR metadata, keyed on the ChromaDB record ID.
+
+    Thread-safe (one connection guarded by a lock); processes share the file
+    through WAL mode, so the admin upload script and the Flask app see each
+    other's writes.
+    """
+
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_INDEX_PATH
+        self._lock = threading.RLock()
+        self._verified = False
+        self._rebuild_thread = None
+        self._rebuild_failed_at = 0.0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+            row = self._conn.execute("SELECT value FROM index_meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and int(row[0]) != SCHEMA_VERSION:
+                logger.info(f"[INDEX] Schema {row[0]} -> {SCHEMA_VERSION}, dropping old index")
+                self._conn.execute("DROP TABLE IF EXISTS sr_index")
+                self._conn.execute("DELETE FROM index_meta")
+
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sr_index (
+                    record_id TEXT PRIMARY KEY,
+                    call_id_norm TEXT NOT NULL,
+                    assigned_to TEXT,
+                    assigned_to_norm TEXT,
+                    source TEXT,
+                    reported_date TEXT,
+                    added_date TEXT,
+                    has_user_correction INTEGER DEFAULT 0,
+                    indexed_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sr_call_id ON sr_index(call_id_norm)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sr_assignee ON sr_index(assigned_to_norm)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sr_source ON sr_index(source)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sr_added_date ON sr_index(added_date)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sr_correction ON sr_index(has_user_correction)")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+            )
+            self._conn.commit()
+
+    # ========================================================================
+    # WRITES
+    # ========================================================================
+
+    def upsert(self, record_id: str, metadata: Dict[str, Any]):
+        """Insert or refresh one record's indexed fields"""
+        self.upsert_many([(record_id, metadata)])
+
+    def upsert_many(self, records: Iterable[tuple]):
+        """Insert or refresh (record_id, metadata) pairs in one transaction"""
+        rows = [_row_from_metadata(rid, meta) for rid, meta in records if rid]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._conn.executemany("""
+                    INSERT OR REPLACE INTO sr_index
+                    (record_id, call_id_norm, assigned_to, assigned_to_norm, source,
+                     reported_date, added_date, has_user_correction, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"[INDEX] Write error: {e}")
+
+    def remove(self, record_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sr_index WHERE record_id = ?", (str(record_id),))
+            self._conn.commit()
+
+    def rebuild(self, collection, page_size: int = REBUILD_PAGE_SIZE) -> int:
+        """
+        Rebuild the whole index from a ChromaDB collection (metadata only, paged).
+
+        The lock is taken per page, so queries and write hooks from other
+        threads are not blocked for the length of the rebuild.
+
+        Returns:
+            Number of records indexed
+        """
+        start = time.perf_counter()
+        total = collection.count()
+        logger.info(f"[INDEX] Rebuilding side index from {total:,} records...")
+
+        with self._lock:
+            self._verified = False
+            self._conn.execute("DELETE FROM sr_index")
+            self._conn.commit()
+
+        indexed = 0
+        offset = 0
+        while offset < total:
+            page = collection.get(include=['metadatas'], limit=page_size, offset=offset)
+            ids = page.get('ids') or []
+            if not ids:
+                break
+            self.upsert_many(zip(ids, page.get('metadatas') or [{}] * len(ids)))
+            indexed += len(ids)
+            offset += page_size
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('last_rebuild', ?)", (str(time.time()),)
+            )
+            self._conn.commit()
+            self._verified = True
+
+        logger.info(f"[INDEX] Indexed {indexed:,} records in {time.perf_counter() - start:.1f}s")
+        return indexed
+
+    @property
+    def is_verified(self) -> bool:
+        """True once ensure_built()/rebuild() has checked the index in this process"""
+        return self._verified
+
+    @property
+    def is_rebuilding(self) -> bool:
+        return self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+
+    def ensure_built(self, collection, background: bool = True) -> bool:
+        """
+        True if the index can be queried (its row count matches the collection).
+
+        Checked once per process; after that the write hooks keep it current.
+        A missing or stale index is rebuilt - in a background thread by default,
+        returning False until it has finished so the caller uses its fallback.
+        A full rebuild reads every record's metadata and must not run inside a
+        web request.
+
+        Args:
+            collection: The clean_history_data collection
+            background: False to rebuild in the calling thread (ingestion/admin scripts)
+        """
+        if self._verified:
+            return True
+        with self._lock:
+            if self._verified:
+                return True
+            if self.is_rebuilding:
+                return False
+            try:
+                if self.count() == collection.count():
+                    self._verified = True
+                    return True
+            except Exception as e:
+                logger.warning(f"[INDEX] Could not verify side index: {e}")
+                return False
+
+            if background:
+                if time.time() - self._rebuild_failed_at < REBUILD_RETRY_SECONDS:
+                    return False
+                self._rebuild_thread = threading.Thread(
+                    target=self._rebuild_in_background, args=(collection,),
+                    name='history-index-rebuild', daemon=True
+                )
+                self._rebuild_thread.start()
+                return False
+
+        try:
+            self.rebuild(collection)
+        except Exception as e:
+            logger.warning(f"[INDEX] Could not rebuild side index: {e}")
+        return self._verified
+
+    def _rebuild_in_background(self, collection):
+        try:
+            self.rebuild(collection)
+        except Exception as e:
+            self._rebuild_failed_at = time.time()
+            logger.warning(f"[INDEX] Background rebuild failed: {e}")
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def find_record_ids(self, call_id: str) -> List[str]:
+        """ChromaDB record IDs whose call_id matches (case/whitespace-insensitive)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record_id FROM sr_index WHERE call_id_norm = ?", (normalize_call_id(call_id),)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def get_correction_flag(self, record_id: str) -> Optional[bool]:
+        """has_user_correction for a record, or None if it isn't indexed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT has_user_correction FROM sr_index WHERE record_id = ?", (str(record_id),)
+            ).fetchone()
+        return None if row is None else bool(row[0])
+
+    def find_by_assignee(self, assignee_name: str) -> List[Dict[str, Any]]:
+        """
+        Records whose assignee contains assignee_name (case-insensitive).
+
+        Partial matching runs over the distinct assignee names (a few hundred),
+        then the matching names are fetched through the assignee index.
+        """
+        needle = normalize_assignee(assignee_name)
+        if not needle:
+            return []
+        with self._lock:
+            names = [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT assigned_to_norm FROM sr_index WHERE assigned_to_norm != ''"
+            ).fetchall()]
+            matched = [n for n in names if needle in n]
+            if not matched:
+                return []
+            placeholders = ','.join('?' * len(matched))
+            rows = self._conn.execute(
+                f"SELECT record_id, assigned_to, reported_date, added_date, has_user_correction "
+                f"FROM sr_index WHERE assigned_to_norm IN ({placeholders})",
+                matched
+            ).fetchall()
+        return [
+            {'record_id': r[0], 'assigned_to': r[1], 'reported_date': r[2],
+             'added_date': r[3], 'has_user_correction': bool(r[4])}
+            for r in rows
+        ]
+
+    def find_by_source(self, source: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT record_id FROM sr_index WHERE source = ?", (source,)).fetchall()
+        return [r[0] for r in rows]
+
+    def find_added_on(self, date_prefix: str, include_reported: bool = False) -> List[str]:
+        """
+        Record IDs whose added/opened date starts with date_prefix (e.g. '2025-01-31').
+        
+        With include_reported, records without an added/opened date also match
+        on their Reported Date.
+        """
+        upper = date_prefix + '\uffff'
+        with self._lock:
+            if include_reported:
+                rows = self._conn.execute("""
+                    SELECT record_id FROM sr_index
+                    WHERE (added_date >= ? AND added_date < ?)
+                       OR (added_date = '' AND reported_date >= ? AND reported_date < ?)
+                """, (date_prefix, upper, date_prefix, upper)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT record_id FROM sr_index WHERE added_date >= ? AND added_date < ?",
+                    (date_prefix, upper)
+                ).fetchall()
+        return [r[0] for r in rows]
+    
+    def assignee_counts_added_on(self, date_prefix: str) -> Dict[str, int]:
+        """{assignee: number of records} for records added on date_prefix"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT assigned_to, COUNT(*) FROM sr_index
+                WHERE added_date >= ? AND added_date < ? AND assigned_to != ''
+                GROUP BY assigned_to
+            """, (date_prefix, date_prefix + '\uffff')).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sr_index").fetchone()[0]
+
+    def count_by_source(self, source: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sr_index WHERE source = ?", (source,)).fetchone()[0]
+
+    def count_user_corrections(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sr_index WHERE has_user_correction = 1"
+            ).fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            last_rebuild = self._conn.execute(
+                "SELECT value FROM index_meta WHERE key = 'last_rebuild'"
+            ).fetchone()
+            assignees = self._conn.execute(
+                "SELECT COUNT(DISTINCT assigned_to_norm) FROM sr_index WHERE assigned_to_norm != ''"
+            ).fetchone()[0]
+        return {
+            'records': self.count(),
+            'user_corrections': self.count_user_corrections(),
+            'user_feedback': self.count_by_source('user_feedback'),
+            'assignees': assignees,
+            'last_rebuild': float(last_rebuild[0]) if last_rebuild else None,
+            'db_path': str(self.db_path)
+        }
+
+
+def get_history_index(db_path: Path = None) -> HistorySideIndex:
+    """Process-wide HistorySideIndex (one SQLite connection per process)"""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_lock:
+            if _shared_index is None:
+                _shared_index = HistorySideIndex(db_path)
+    return _shared_index
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from RAG.utils.shared_resources import get_collection
+
+    parser = argparse.ArgumentParser(description="History side index maintenance")
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index from ChromaDB')
+    parser.add_argument('--stats', action='store_true', help='Show index statistics')
+    parser.add_argument('--chromadb-path', default=None, help='ChromaDB store path')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    index = HistorySideIndex()
+
+    if args.rebuild:
+        collection = get_collection('clean_history_data', args.chromadb_path)
+        if collection is None:
+            print("[ERROR] clean_history_data collection not found")
+            sys.exit(1)
+        index.rebuild(collection)
+
+    stats = index.get_stats()
+    print("\nHistory side index:")
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
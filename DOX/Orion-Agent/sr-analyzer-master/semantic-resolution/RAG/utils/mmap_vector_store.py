@@ -0,0 +1,484 @@
+"""
+Memory-Mapped Vector Store
+On-disk embedding store for the legacy (non-ChromaDB) vectorstore fallbacks
+
+The legacy comcast_code.db (embeddings.npy + documents.pkl + metadatas.pkl) and
+history_data.db (one big pickle) had to be unpickled into RAM by every process
+before the first search. This format is opened with np.load(mmap_mode='r'), so
+startup takes milliseconds and all workers share the same pages through the OS
+page cache:
+
+    <store>/
+        manifest.json     count, dim, dtype, model_name, source (+ its size/mtime), extra fields
+        vectors.npy       (count, dim) float16/float32, rows L2-normalized
+        documents.bin     UTF-8 texts back to back
+        documents.idx     int64 offsets, count + 1 entries (npy)
+        metadata.bin      JSON objects back to back
+        metadata.idx      int64 offsets, count + 1 entries (npy)
+        ids.bin / ids.idx optional record ids (stores exported from ChromaDB)
+        ann/              optional ANN index (RAG/utils/ann_index.py)
+
+Because rows are pre-normalized, cosine similarity is one dot product per row.
+search() scores the matrix in blocks and keeps the top-k with argpartition
+instead of a full argsort - or, once the store has an ann/ index and at least
+ANN_MIN_ROWS rows, asks the index instead.
+
+Usage:
+    from RAG.utils.mmap_vector_store import open_store, convert_comcast_code
+
+    convert_comcast_code("data/vectorstore/comcast_code.db", "data/vectorstore/comcast_code.db.mmap")
+    store = open_store("data/vectorstore/comcast_code.db.mmap")
+    for idx, score in store.search(query_vector, top_k=5):
+        print(score, store.metadata(idx)['file_path'], store.document(idx)[:80])
+
+CLI:
+    python RAG/utils/mmap_vector_store.py comcast <comcast_code.db dir> [out dir]
+    python RAG/utils/mmap_vector_store.py history <history_data.db pickle> [out dir]
+    python RAG/utils/mmap_vector_store.py chroma <collection> [out dir]
+    python RAG/utils/mmap_vector_store.py ann <store dir> [auto|hnsw|ivfpq]
+"""
+
+import os
+import sys
+import json
+import uuid
+import pickle
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows - conversions are only serialized within the process
+    FCNTL_AVAILABLE = False
+
+_PROJECT_ROOT = str(Path(__file__).parent.parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from RAG.utils.ann_index import ANN_BACKEND, MIN_ROWS, exact_search, build_index, load_index, normalize_rows
+
+FORMAT_VERSION = 1
+
+# Rows scored / converted per block (bounds the float32 working set for float16 stores)
+SEARCH_BLOCK_ROWS = 65536
+
+ANN_DIR = "ann"
+
+_stores: Dict[str, 'MmapVectorStore'] = {}
+_stores_lock = threading.Lock()
+_convert_lock = threading.Lock()
+
+
+def default_store_path(source: Path) -> Path:
+    """Where the memmap copy of a legacy vectorstore lives: <source>.mmap next to it"""
+    source = Path(source)
+    return source.with_name(source.name + ".mmap")
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class MmapVectorStore:
+    """
+    Read-only, memory-mapped vectors + documents + metadata.
+
+    Attributes:
+        manifest: Contents of manifest.json (count, dim, dtype, model_name, extra ...)
+        vectors: np.memmap of shape (count, dim)
+        ann: AnnIndex from <store>/ann, or None (loaded on first search)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / "manifest.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported mmap store format in {self.directory}")
+
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode='r')
+        self._doc_offsets = np.load(self.directory / "documents.idx", mmap_mode='r')
+        self._meta_offsets = np.load(self.directory / "metadata.idx", mmap_mode='r')
+        self._doc_bytes = self._map_bytes(self.directory / "documents.bin")
+        self._meta_bytes = self._map_bytes(self.directory / "metadata.bin")
+        self._id_offsets = self._id_bytes = None
+        if (self.directory / "ids.idx").exists():
+            self._id_offsets = np.load(self.directory / "ids.idx", mmap_mode='r')
+            self._id_bytes = self._map_bytes(self.directory / "ids.bin")
+        self._ann = None
+        self._ann_loaded = False
+        self._ann_lock = threading.Lock()
+
+    @staticmethod
+    def _map_bytes(path: Path):
+        # np.memmap can't map an empty file
+        if path.stat().st_size == 0:
+            return b""
+        return np.memmap(path, dtype=np.uint8, mode='r')
+
+    def __len__(self) -> int:
+        return int(self.manifest['count'])
+
+    @property
+    def dim(self) -> int:
+        return int(self.manifest['dim'])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Manifest value (e.g. 'preprocessed', 'total_records', 'model_name')"""
+        return self.manifest.get(key, default)
+
+    def document(self, idx: int) -> str:
+        start, end = int(self._doc_offsets[idx]), int(self._doc_offsets[idx + 1])
+        return bytes(self._doc_bytes[start:end]).decode('utf-8')
+
+    def metadata(self, idx: int) -> Dict:
+        start, end = int(self._meta_offsets[idx]), int(self._meta_offsets[idx + 1])
+        return json.loads(bytes(self._meta_bytes[start:end]).decode('utf-8'))
+
+    def id(self, idx: int) -> str:
+        """Record id (ChromaDB exports); the row number for stores built without ids"""
+        if self._id_offsets is None:
+            return str(idx)
+        start, end = int(self._id_offsets[idx]), int(self._id_offsets[idx + 1])
+        return bytes(self._id_bytes[start:end]).decode('utf-8')
+
+    @property
+    def ann(self):
+        """ANN index for this store (None if not built, stale, disabled or its library is missing)"""
+        if not self._ann_loaded:
+            with self._ann_lock:
+                if not self._ann_loaded:
+                    self._ann = self._load_ann()
+                    self._ann_loaded = True
+        return self._ann
+
+    def _load_ann(self):
+        if ANN_BACKEND == 'exact' or len(self) < MIN_ROWS:
+            return None
+        index = load_index(self.directory / ANN_DIR)
+        if index is not None and (index.count != len(self) or index.dim != self.dim):
+            print(f"[WARN] {self.directory.name}: ANN index is stale ({index.count} rows vs {len(self)}), "
+                  f"using exact search - rebuild with: mmap_vector_store.py ann {self.directory}")
+            return None
+        return index
+
+    def build_ann(self, backend: str = None, **params):
+        """Build (or rebuild) <store>/ann from the stored vectors and start using it"""
+        index = build_index(self.vectors, backend, **params)
+        if index.backend == 'exact':
+            return None
+        index.save(self.directory / ANN_DIR)
+        with self._ann_lock:
+            self._ann, self._ann_loaded = index, True
+        return index
+
+    def search_many(self, query_vectors, top_k: int = 5, min_similarity: float = None,
+                    exact: bool = False) -> List[List[Tuple[int, float]]]:
+        """
+        Cosine top-k for several queries.
+
+        Args:
+            query_vectors: (n, dim) query embeddings (normalized here)
+            top_k: Results per query
+            min_similarity: Drop results below this score
+            exact: Skip the ANN index (benchmarks / recall checks)
+
+        Returns:
+            One [(row index, similarity)] list per query, best first
+        """
+        queries = normalize_rows(query_vectors)
+        if len(self) == 0 or top_k <= 0:
+            return [[] for _ in queries]
+        index = None if exact else self.ann
+        if index is not None:
+            ids, scores = index.search(queries, top_k, vectors=self.vectors)
+        else:
+            ids, scores = exact_search(self.vectors, queries, top_k, SEARCH_BLOCK_ROWS)
+
+        results = []
+        for row_ids, row_scores, query in zip(ids, scores, queries):
+            if not query.any():
+                results.append([])
+                continue
+            hits = [(int(i), float(s)) for i, s in zip(row_ids, row_scores) if i >= 0]
+            if min_similarity is not None:
+                hits = [h for h in hits if h[1] >= min_similarity]
+            results.append(hits)
+        return results
+
+    def search(self, query_vector: Sequence[float], top_k: int = 5,
+               min_similarity: float = None, exact: bool = False) -> List[Tuple[int, float]]:
+        """
+        Cosine top-k over all rows.
+
+        Args:
+            query_vector: Query embedding (normalized here)
+            top_k: Results to return
+            min_similarity: Drop results below this score
+            exact: Skip the ANN index
+
+        Returns:
+            [(row index, similarity)] best first
+        """
+        return self.search_many([np.ravel(query_vector)], top_k, min_similarity, exact)[0]
+
+
+def open_store(directory: Path) -> Optional[MmapVectorStore]:
+    """Process-wide MmapVectorStore for a directory (None if there is no store there)"""
+    key = os.path.abspath(directory)
+    store = _stores.get(key)
+    if store is None:
+        if not (Path(key) / "manifest.json").exists():
+            return None
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = MmapVectorStore(Path(key))
+                _stores[key] = store
+    return store
+
+
+# ============================================================================
+# BUILD / CONVERT
+# ============================================================================
+
+def _write_blobs(values, bin_path: Path, idx_path: Path, encode):
+    """Concatenate encoded values into bin_path with an int64 offset index"""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(bin_path, 'wb') as f:
+        for i, value in enumerate(values):
+            data = encode(value)
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    with open(idx_path, 'wb') as f:  # np.save(path) would append ".npy"
+        np.save(f, offsets)
+
+
+def build_store(directory: Path, embeddings, documents: Sequence[str], metadatas: Sequence[Dict],
+                dtype: str = 'float16', ids: Sequence[str] = None, **extra) -> Path:
+    """
+    Write a store (atomically: built next to the target, then renamed into place).
+
+    Args:
+        directory: Target store directory (replaced if it exists)
+        embeddings: (count, dim) array-like
+        documents: One text per row
+        metadatas: One JSON-serialisable dict per row (non-JSON values are stringified)
+        dtype: 'float16' (half the size, ~1e-3 score error) or 'float32'
+        ids: Optional record id per row (returned by MmapVectorStore.id)
+        **extra: Stored in the manifest (e.g. preprocessed=True, total_records=...)
+    """
+    directory = Path(directory)
+    if not hasattr(embeddings, 'shape'):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+    if len(embeddings.shape) != 2:
+        raise ValueError(f"embeddings must be 2-D, got shape {embeddings.shape}")
+    count, dim = embeddings.shape
+    if not (count == len(documents) == len(metadatas)) or (ids is not None and len(ids) != count):
+        raise ValueError(f"row count mismatch: {count} vectors, {len(documents)} documents, "
+                         f"{len(metadatas)} metadatas" + (f", {len(ids)} ids" if ids is not None else ""))
+
+    # Unique per writer, so concurrent builds never delete each other's files
+    suffix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    tmp = directory.with_name(f"{directory.name}.tmp-{suffix}")
+    tmp.mkdir(parents=True)
+
+    # Normalize block by block straight into the target file (embeddings may be a memmap)
+    vectors = np.lib.format.open_memmap(tmp / "vectors.npy", mode='w+', dtype=np.dtype(dtype), shape=(count, dim))
+    for start in range(0, count, SEARCH_BLOCK_ROWS):
+        vectors[start:start + SEARCH_BLOCK_ROWS] = normalize_rows(embeddings[start:start + SEARCH_BLOCK_ROWS])
+    vectors.flush()
+    del vectors
+
+    if ids is not None:
+        _write_blobs(ids, tmp / "ids.bin", tmp / "ids.idx", lambda i: str(i).encode('utf-8'))
+    _write_blobs(documents, tmp / "documents.bin", tmp / "documents.idx",
+                 lambda d: str(d if d is not None else '').encode('utf-8'))
+    _write_blobs(metadatas, tmp / "metadata.bin", tmp / "metadata.idx",
+                 lambda m: json.dumps(m or {}, ensure_ascii=False, default=str).encode('utf-8'))
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'count': int(count),
+        'dim': int(dim),
+        'dtype': str(np.dtype(dtype)),
+        **extra
+    }
+    with open(tmp / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    old = directory.with_name(f"{directory.name}.old-{suffix}")
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    with _stores_lock:
+        _stores.pop(os.path.abspath(directory), None)
+    return directory
+
+
+def convert_comcast_code(source_dir: Path, directory: Path = None, dtype: str = 'float16', **extra) -> Path:
+    """comcast_code.db folder (embeddings.npy, documents.pkl, metadatas.pkl, config.json) -> store"""
+    source_dir = Path(source_dir)
+    directory = Path(directory) if directory else default_store_path(source_dir)
+    embeddings = np.load(source_dir / "embeddings.npy")
+    with open(source_dir / "documents.pkl", 'rb') as f:
+        documents = pickle.load(f)
+    with open(source_dir / "metadatas.pkl", 'rb') as f:
+        metadatas = pickle.load(f)
+    config = {}
+    if (source_dir / "config.json").exists():
+        with open(source_dir / "config.json", 'r') as f:
+            config = json.load(f)
+    return build_store(directory, embeddings, documents, metadatas, dtype=dtype,
+                       source=str(source_dir), **{**config, **extra})
+
+
+def convert_history_pickle(source_path: Path, directory: Path = None, dtype: str = 'float16', **extra) -> Path:
+    """history_data.db pickle ({'embeddings', 'documents', 'metadata', ...}) -> store"""
+    source_path = Path(source_path)
+    directory = Path(directory) if directory else default_store_path(source_path)
+    with open(source_path, 'rb') as f:
+        data = pickle.load(f)
+    embeddings = data.get('embeddings')
+    if embeddings is None or not hasattr(embeddings, 'shape') or hasattr(embeddings, 'tocsr'):
+        raise ValueError(f"{source_path} has no dense embeddings (TF-IDF stores can't be memory-mapped)")
+    metadatas = data.get('metadata') or data.get('metadatas') or [{} for _ in range(len(embeddings))]
+    documents = data.get('documents') or [''] * len(embeddings)
+    return build_store(directory, embeddings, documents, metadatas, dtype=dtype,
+                       source=str(source_path),
+                       model_name=data.get('model_name'),
+                       preprocessed=bool(data.get('preprocessed', False)),
+                       total_records=data.get('total_records', len(embeddings)),
+                       created_at=data.get('created_at'),
+                       **extra)
+
+
+def convert_chroma_collection(name: str, directory: Path = None, chromadb_path: Path = None,
+                              dtype: str = 'float16', page_size: int = 5000) -> Path:
+    """
+    ChromaDB collection -> store (ids, embeddings, documents, metadatas), so it can
+    get an ANN index. Default target: data/vectorstore/<name>.mmap
+
+    Embeddings are paged into a temporary float32 memmap, so memory stays at one page.
+    """
+    from RAG.utils.shared_resources import get_collection, PROJECT_ROOT
+
+    collection = get_collection(name, chromadb_path)
+    if collection is None:
+        raise ValueError(f"Collection '{name}' not available")
+    directory = Path(directory) if directory else PROJECT_ROOT / "data" / "vectorstore" / f"{name}.mmap"
+    total = collection.count()
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    scratch = directory.with_name(directory.name + ".export.npy")
+
+    ids, documents, metadatas = [], [], []
+    embeddings = None
+    try:
+        for offset in range(0, total, page_size):
+            page = collection.get(limit=page_size, offset=offset,
+                                  include=["embeddings", "documents", "metadatas"])
+            vectors = np.asarray(page['embeddings'], dtype=np.float32)
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(scratch, mode='w+', dtype=np.float32,
+                                                       shape=(total, vectors.shape[1]))
+            embeddings[offset:offset + len(vectors)] = vectors
+            ids.extend(page['ids'])
+            documents.extend(page.get('documents') or [''] * len(vectors))
+            metadatas.extend(page.get('metadatas') or [{}] * len(vectors))
+            print(f"   [MMAP] {name}: {len(ids):,}/{total:,}")
+        if embeddings is None:
+            raise ValueError(f"Collection '{name}' is empty")
+        return build_store(directory, embeddings[:len(ids)], documents, metadatas, dtype=dtype, ids=ids,
+                           source=f"chromadb:{name}", collection=name, total_records=len(ids))
+    finally:
+        del embeddings
+        if scratch.exists():
+            scratch.unlink()
+
+
+def source_signature(source: Path) -> Dict[str, int]:
+    """Size + latest mtime of a legacy source (a file, or a folder such as comcast_code.db)"""
+    source = Path(source)
+    files = [f for f in source.rglob('*') if f.is_file()] if source.is_dir() else [source]
+    stats = [f.stat() for f in files]
+    return {
+        'files': len(stats),
+        'size': sum(st.st_size for st in stats),
+        'mtime_ns': max((st.st_mtime_ns for st in stats), default=0)
+    }
+
+
+@contextmanager
+def _conversion_lock(directory: Path):
+    """Serialize conversions of one store across threads and worker processes"""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    with _convert_lock:
+        lock_file = open(directory.with_name(directory.name + ".lock"), 'w')
+        try:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+
+def _is_current(store: Optional[MmapVectorStore], signature: Dict[str, int]) -> bool:
+    return store is not None and store.get('source_signature') == signature
+
+
+def load_or_convert(source: Path, convert) -> Optional[MmapVectorStore]:
+    """
+    Open the memmap copy of a legacy vectorstore, converting it on first use and
+    again whenever the source changes (its size/mtime differ from the manifest).
+
+    Returns None if neither the store nor the legacy source exists.
+    """
+    source = Path(source)
+    directory = default_store_path(source)
+    store = open_store(directory)
+    if not source.exists():
+        return store  # Nothing to compare against - serve what we have
+    signature = source_signature(source)
+    if _is_current(store, signature):
+        return store
+
+    with _conversion_lock(directory):
+        # Another worker may have converted it while we waited
+        with _stores_lock:
+            _stores.pop(os.path.abspath(directory), None)
+        store = open_store(directory)
+        if _is_current(store, signature):
+            return store
+        action = "Reconverting (source changed)" if store is not None else "Converting"
+        print(f"[MMAP] {action} {source.name} to memory-mapped store...")
+        convert(source, directory, source_signature=signature)
+    return open_store(directory)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('comcast', 'history', 'chroma', 'ann'):
+        print(__doc__)
+        sys.exit(1)
+    if sys.argv[1] == 'ann':
+        store = open_store(Path(sys.argv[2]))
+        if store is None:
+            print(f"[ERROR] No store at {sys.argv[2]}")
+            sys.exit(1)
+        index = store.build_ann(sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"[OK] {store.directory / ANN_DIR}: {index.get_stats() if index else 'exact (no index)'}")
+        sys.exit(0)
+    out_arg = Path(sys.argv[3]) if len(sys.argv) > 3 else None
+    if sys.argv[1] == 'chroma':
+        out = convert_chroma_collection(sys.argv[2], out_arg)
+    else:
+        converter = convert_comcast_code if sys.argv[1] == 'comcast' else convert_history_pickle
+        out = converter(Path(sys.argv[2]), out_arg)
+    store = open_store(out)
+    print(f"[OK] {out}: {len(store)} rows x {store.dim} ({store.get('dtype')})")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Shared Resources
+Process-wide, thread-safe holders for the heavy objects used across the app:
+- SentenceTransformer embedding model (all-MiniLM-L6-v2)
+- ChromaDB PersistentClient (one per store path)
+- ChromaDB collections
+
+Every consumer (HistoryDatabaseManager, ChromaDBManager, VectorstoreHandler,
+AIEnhancedServiceRequestAnalyzer, Flask routes) gets the same instances, so the
+model is loaded and the store is opened once per process instead of per request.
+
+Usage:
+    from RAG.utils.shared_resources import get_embedding_model, get_collection
+
+    model = get_embedding_model()
+    collection = get_collection('clean_history_data')
+
+    warm_up(background=True)      # At app start
+    get_resource_health()         # Load times + memory for /api/health/resources
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fix for meta tensor error with accelerate library
+# Must be set BEFORE importing sentence_transformers
+os.environ.setdefault('ACCELERATE_TORCH_DEVICE', 'cpu')
+os.environ.setdefault('ACCELERATE_DISABLE_RICH', '1')
+
+try:
+    import chromadb
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CHROMADB_PATH = PROJECT_ROOT / "data" / "vectorstore" / "chromadb_store"
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+LOCAL_MODEL_DIRS = {
+    'all-MiniLM-L6-v2': PROJECT_ROOT / "models" / "sentence-transformers_all-MiniLM-L6-v2",
+}
+
+# Collections loaded by warm_up() when none are specified
+WARMUP_COLLECTIONS = ('clean_history_data', 'java_mapping', 'comcast_code')
+
+_lock = threading.RLock()
+_models: Dict[str, Any] = {}
+_clients: Dict[str, Any] = {}
+_collections: Dict[tuple, Any] = {}
+_load_times: Dict[str, float] = {}
+_warmup = {'status': 'not_started', 'started_at': None, 'finished_at': None, 'error': None}
+
+
+def _resolve_path(chromadb_path=None) -> str:
+    return str(Path(chromadb_path).resolve()) if chromadb_path else str(DEFAULT_CHROMADB_PATH.resolve())
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME):
+    """
+    Return the shared SentenceTransformer, loading it on first use.
+
+    Tries the bundled local copy under models/ first, then the HuggingFace name.
+    Returns None if sentence-transformers is missing or loading fails.
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return None
+
+    with _lock:
+        if model_name in _models:
+            return _models[model_name]
+
+        start = time.perf_counter()
+        local_dir = LOCAL_MODEL_DIRS.get(model_name)
+        model = None
+        try:
+            if local_dir and local_dir.exists():
+                model = SentenceTransformer(str(local_dir))
+                logger.info(f"[OK] Shared model loaded from local: {local_dir}")
+            else:
+                model = SentenceTransformer(model_name)
+                logger.info(f"[OK] Shared model loaded: {model_name}")
+        except Exception as e:
+            logger.warning(f"Primary model load failed: {e}, trying fallback...")
+            try:
+                import torch
+                torch.set_default_dtype(torch.float32)
+                if local_dir and local_dir.exists():
+                    model = SentenceTransformer(str(local_dir))
+                    logger.info(f"[OK] Shared model loaded (fallback - local): {local_dir}")
+                else:
+                    model = SentenceTransformer(model_name)
+                    logger.info(f"[OK] Shared model loaded (fallback): {model_name}")
+            except Exception as e2:
+                logger.error(f"All model loading methods failed: {e2}")
+                return None
+
+        _models[model_name] = model
+        _load_times[f"model:{model_name}"] = round(time.perf_counter() - start, 3)
+        return model
+
+
+def get_chromadb_client(chromadb_path=None):
+    """Return the shared ChromaDB PersistentClient for a store path (None if unavailable)"""
+    path = _resolve_path(chromadb_path)
+    client = _clients.get(path)
+    if client is not None:
+        return client
+
+    if not CHROMADB_AVAILABLE:
+        logger.error("ChromaDB not installed - pip install chromadb")
+        return None
+    if not Path(path).exists():
+        logger.error(f"ChromaDB store not found at {path}")
+        return None
+
+    with _lock:
+        if path in _clients:
+            return _clients[path]
+        start = time.perf_counter()
+        # Use basic PersistentClient without Settings to avoid "different settings" error
+        client = chromadb.PersistentClient(path=path)
+        _clients[path] = client
+        _load_times[f"client:{path}"] = round(time.perf_counter() - start, 3)
+        logger.info(f"[OK] Shared ChromaDB client opened at {path}")
+        return client
+
+
+def get_collection(name: str, chromadb_path=None):
+    """Return a shared collection handle, or None if the store/collection doesn't exist"""
+    key = (_resolve_path(chromadb_path), name)
+    collection = _collections.get(key)
+    if collection is not None:
+        return collection
+
+    client = get_chromadb_client(chromadb_path)
+    if client is None:
+        return None
+
+    with _lock:
+        if key in _collections:
+            return _collections[key]
+        start = time.perf_counter()
+        try:
+            collection = client.get_collection(name)
+        except Exception as e:
+            logger.warning(f"Collection '{name}' not available: {e}")
+            return None
+        _collections[key] = collection
+        _load_times[f"collection:{name}"] = round(time.perf_counter() - start, 3)
+        return collection
+
+
+def warm_up(collections: Iterable[str] = WARMUP_COLLECTIONS, chromadb_path=None,
+            background: bool = False) -> Optional[threading.Thread]:
+    """
+    Load the model, client and collections ahead of the first request.
+
+    Args:
+        collections: Collection names to open
+        chromadb_path: Store path (defaults to data/vectorstore/chromadb_store)
+        background: Run in a daemon thread and return it, so app start isn't blocked
+    """
+    def _run():
+        with _lock:
+            if _warmup['status'] in ('running', 'done'):
+                return
+            _warmup.update(status='running', started_at=time.time(), error=None)
+        try:
+            get_embedding_model()
+            for name in collections:
+                get_collection(name, chromadb_path)
+            _warmup.update(status='done', finished_at=time.time())
+            logger.info(f"[OK] Shared resources warmed up in "
+                        f"{_warmup['finished_at'] - _warmup['started_at']:.1f}s")
+        except Exception as e:
+            _warmup.update(status='failed', finished_at=time.time(), error=str(e))
+            logger.error(f"Warm-up failed: {e}")
+
+    if background:
+        thread = threading.Thread(target=_run, name="shared-resources-warmup", daemon=True)
+        thread.start()
+        return thread
+    _run()
+    return None
+
+
+def _process_memory_mb() -> Optional[float]:
+    """Current resident set size of this process in MB (None if unknown)"""
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except Exception:
+        return None
+
+
+def get_resource_health() -> Dict[str, Any]:
+    """Snapshot of loaded resources, their load times and process memory"""
+    with _lock:
+        collections = {}
+        for (path, name), collection in _collections.items():
+            try:
+                collections[name] = collection.count()
+            except Exception as e:
+                collections[name] = f"error: {e}"
+
+        warmup = dict(_warmup)
+        if warmup['started_at'] and warmup['finished_at']:
+            warmup['duration_seconds'] = round(warmup['finished_at'] - warmup['started_at'], 3)
+
+        try:
+            from RAG.utils.embedding_cache import get_all_cache_stats
+            embedding_cache = get_all_cache_stats()
+        except Exception as e:
+            embedding_cache = f"error: {e}"
+
+        return {
+            'chromadb_available': CHROMADB_AVAILABLE,
+            'sentence_transformers_available': SENTENCE_TRANSFORMERS_AVAILABLE,
+            'models_loaded': list(_models.keys()),
+            'clients_open': list(_clients.keys()),
+            'collections': collections,
+            'load_times_seconds': dict(_load_times),
+            'warmup': warmup,
+            'embedding_cache': embedding_cache,
+            'process_memory_mb': _process_memory_mb(),
+            'pid': os.getpid()
+        }
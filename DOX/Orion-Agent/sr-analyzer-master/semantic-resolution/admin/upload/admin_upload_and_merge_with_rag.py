@@ -171,6 +171,11 @@ def upload_and_merge_with_rag(excel_path, progress_callback=None):
         
         results_df.to_excel(admin_upload_path, index=False)
         log(f"   [OK] Saved: {admin_upload_path}", 45)
+        try:
+            from RAG.utils.dashboard_stats import get_dashboard_stats
+            get_dashboard_stats().record_upload(admin_upload_path)
+        except Exception as stats_error:
+            log(f"   [NOTE] Dashboard stats not updated: {stats_error}", 45)
         log("")
         
         # ==================================================
@@ -266,6 +271,10 @@ def upload_and_merge_with_rag(excel_path, progress_callback=None):
                     log(f"   📥 Input Tokens: {usage.get('total_input_tokens', 0):,}", 76)
                     log(f"   📤 Output Tokens: {usage.get('total_output_tokens', 0):,}", 76)
                     log(f"   💵 Total Cost: ${usage.get('total_cost', 0):.4f}", 76)
+                    cache_stats = usage.get('cache', {})
+                    if cache_stats.get('hits') is not None:
+                        log(f"   ♻️ Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                            f"(saved ${cache_stats['cost_saved']:.4f})", 76)
                     log("")
                     
                     # Save usage to JSON file for admin dashboard
@@ -278,7 +287,9 @@ def upload_and_merge_with_rag(excel_path, progress_callback=None):
                             'input_tokens': usage.get('total_input_tokens', 0),
                             'output_tokens': usage.get('total_output_tokens', 0),
                             'cost': usage.get('total_cost', 0),
-                            'srs_processed': len(rag_results)
+                            'srs_processed': len(rag_results),
+                            'cache_hits': usage.get('cache', {}).get('hits', 0),
+                            'cost_saved': usage.get('cache', {}).get('cost_saved', 0)
                         }
                     }
                     
@@ -300,6 +311,9 @@ def upload_and_merge_with_rag(excel_path, progress_callback=None):
                     
                     with open(usage_file, 'w') as f:
                         json.dump(usage_data, f, indent=2)
+                    
+                    from RAG.utils.dashboard_stats import get_dashboard_stats
+                    get_dashboard_stats().record_llm_run(usage_data['last_run'])
                         
                 except Exception as usage_error:
                     log(f"   [NOTE] Could not retrieve usage stats: {usage_error}", 76)
@@ -328,6 +342,10 @@ def upload_and_merge_with_rag(excel_path, progress_callback=None):
         if not hist_manager.use_chromadb:
             log("[WARNING] History database not loaded. Data will not be merged.", 82)
         else:
+            # Bring the side index up to date here rather than in the web app's first request
+            if hist_manager.side_index is not None:
+                hist_manager.side_index.ensure_built(hist_manager.chromadb_collection, background=False)
+            
             # Get existing SR IDs from ChromaDB
             existing_sr_ids = set()
             try:
@@ -114,6 +114,7 @@ class AIEnhancedServiceRequestAnalyzer:
         
         # Also keep old indexer as fallback
         self.historical_indexer = None
+        self.historical_term_index = None  # Inverted term index over historical_indexer.historical_data
         self.phase1_enhanced = False
         
         # Initialize SR text preprocessor if available
@@ -138,20 +139,23 @@ class AIEnhancedServiceRequestAnalyzer:
         
         if self.chromadb_path.exists() and SENTENCE_TRANSFORMERS_AVAILABLE:
             try:
-                import chromadb
+                from RAG.utils.shared_resources import get_embedding_model, get_chromadb_client, get_collection
                 
                 logger.info(f"🔄 Loading ChromaDB from {self.chromadb_path}")
-                # Use basic PersistentClient without Settings to avoid "different settings" error
-                self.chromadb_client = chromadb.PersistentClient(path=str(self.chromadb_path))
+                # Shared client/collections/model - loaded once per process
+                self.chromadb_client = get_chromadb_client(self.chromadb_path)
                 
                 # Load collections
-                self.history_collection = self.chromadb_client.get_collection('clean_history_data')
-                self.java_mapping_collection = self.chromadb_client.get_collection('java_mapping')
+                self.history_collection = get_collection('clean_history_data', self.chromadb_path)
+                self.java_mapping_collection = get_collection('java_mapping', self.chromadb_path)
+                if self.history_collection is None or self.java_mapping_collection is None:
+                    raise ValueError("clean_history_data / java_mapping collections not found")
                 
                 # Load the Sentence Transformer model
                 logger.info("🔄 Loading Sentence Transformer model (all-MiniLM-L6-v2)...")
-                # Load without device parameter to avoid meta tensor error
-                self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.semantic_model = get_embedding_model('all-MiniLM-L6-v2')
+                if self.semantic_model is None:
+                    raise RuntimeError("Sentence Transformer model could not be loaded")
                 
                 self.index_loaded = True
                 total_records = self.history_collection.count()
@@ -254,6 +258,14 @@ class AIEnhancedServiceRequestAnalyzer:
         logger.info(f"Semantic Search: {'✅' if self.index_loaded else '❌'} ChromaDB collections")
         logger.info("=" * 80)
         
+    def _encode_query(self, text: str) -> List[float]:
+        """Query embedding via the shared embedding cache (each SR text is encoded once)"""
+        from RAG.utils.embedding_cache import get_embedding_cache
+        cache = get_embedding_cache('all-MiniLM-L6-v2')
+        if cache is not None:
+            return cache.encode_one(text).tolist()
+        return self.semantic_model.encode([text])[0].tolist()
+    
     def connect_database(self, db_path: Path) -> Optional[sqlite3.Connection]:
         """Connect to a SQLite database"""
         try:
@@ -398,7 +410,7 @@ class AIEnhancedServiceRequestAnalyzer:
             try:
                 # Search java_mapping collection
                 query_text = full_text[:500]  # Limit query size
-                query_embedding = self.semantic_model.encode([query_text])[0].tolist()
+                query_embedding = self._encode_query(query_text)
                 
                 results = self.java_mapping_collection.query(
                     query_embeddings=[query_embedding],
@@ -776,7 +788,7 @@ class AIEnhancedServiceRequestAnalyzer:
             
             # Encode query using Sentence Transformers
             logger.debug(f"🔍 Encoding query with Sentence Transformers...")
-            query_embedding = self.semantic_model.encode([query_text])[0].tolist()
+            query_embedding = self._encode_query(query_text)
             
             # Query ChromaDB
             chroma_results = self.history_collection.query(
@@ -949,6 +961,27 @@ class AIEnhancedServiceRequestAnalyzer:
             'match_count': len(similar_srs)
         }
     
+    def load_historical_term_index(self):
+        """
+        Build (or load the persisted) term -> record index for the loaded historical_data.
+        
+        Called after historical_sr_index.pkl is loaded; comprehensive_historical_analysis
+        also builds it on first use. Persisted next to the pickle as <name>.terms.pkl.
+        """
+        records = getattr(self.historical_indexer, 'historical_data', None)
+        if not records:
+            self.historical_term_index = None
+            return None
+        try:
+            from analyzers.historical_term_index import HistoricalTermIndex
+            self.historical_term_index = HistoricalTermIndex.load_or_build(
+                records, getattr(self, 'historical_index_path', None)
+            )
+        except Exception as exc:
+            logger.warning(f"Historical term index unavailable, using full scan: {exc}")
+            self.historical_term_index = None
+        return self.historical_term_index
+    
     def comprehensive_historical_analysis(self, description: str, category: str, priority: str) -> Dict:
         """
         Enhanced historical analysis using pickle file (historical_sr_index.pkl)
@@ -979,28 +1012,40 @@ class AIEnhancedServiceRequestAnalyzer:
             
             if search_terms and hasattr(self.historical_indexer, 'historical_data'):
                 similar_cases = []
+                historical_data = self.historical_indexer.historical_data
                 
-                # Search through historical data
-                for record in self.historical_indexer.historical_data:
-                    # Safely convert to string and lowercase
-                    searchable_text = str(record.get('searchable_text', '')).lower()
-                    description_text = str(record.get('description', '')).lower()
-                    resolution_text = str(record.get('resolution', '')).lower()
-                    
-                    # Check if any search term matches
-                    match_count = 0
-                    for term in search_terms[:4]:
-                        # Ensure term is a string
-                        term_str = str(term) if term else ""
-                        term_lower = term_str.lower()
-                        if term_lower in searchable_text or term_lower in description_text or term_lower in resolution_text:
-                            match_count += 1
-                    
-                    if match_count > 0:
-                        similar_cases.append({
-                            'record': record,
-                            'match_score': match_count
-                        })
+                term_index = self.historical_term_index
+                if term_index is None or term_index.record_count != len(historical_data):
+                    term_index = self.load_historical_term_index()
+                
+                # Posting-list lookup (same top 15 as the scan below)
+                if term_index is not None:
+                    similar_cases = [
+                        {'record': historical_data[position], 'match_score': match_count}
+                        for position, match_count in term_index.top_matches(search_terms[:4], historical_data)
+                    ]
+                else:
+                    # Search through historical data
+                    for record in historical_data:
+                        # Safely convert to string and lowercase
+                        searchable_text = str(record.get('searchable_text', '')).lower()
+                        description_text = str(record.get('description', '')).lower()
+                        resolution_text = str(record.get('resolution', '')).lower()
+                        
+                        # Check if any search term matches
+                        match_count = 0
+                        for term in search_terms[:4]:
+                            # Ensure term is a string
+                            term_str = str(term) if term else ""
+                            term_lower = term_str.lower()
+                            if term_lower in searchable_text or term_lower in description_text or term_lower in resolution_text:
+                                match_count += 1
+                        
+                        if match_count > 0:
+                            similar_cases.append({
+                                'record': record,
+                                'match_score': match_count
+                            })
                 
                 # Sort by match score and limit to top 15
                 similar_cases.sort(key=lambda x: x['match_score'], reverse=True)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for SRTextPreprocessor
+
+Compares, on the same texts:
+    per-text     clean_for_semantic_search() in a loop (what callers did before)
+    batch x1     preprocess_batch(workers=1)            (in-process)
+    batch xN     preprocess_batch(workers=N)            (process pool)
+
+Texts come from the 'Description*' column of the past_data exports when
+available (--source), otherwise from the golden-file inputs repeated to --size.
+
+Usage:
+    python analyzers/benchmark_preprocessor.py
+    python analyzers/benchmark_preprocessor.py --source past_data --size 200000 --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analyzers.sr_text_preprocessor import SRTextPreprocessor
+
+GOLDEN_FILE = Path(__file__).parent / "golden" / "sr_text_preprocessor_golden.json"
+
+
+def load_descriptions(source: str, size: int) -> list:
+    """Real SR descriptions from Excel/CSV exports, sampled/repeated to size"""
+    texts = []
+    folder = Path(source)
+    if folder.exists():
+        try:
+            import pandas as pd
+            for file_path in sorted(list(folder.glob('*.xls*')) + list(folder.glob('*.csv'))):
+                if file_path.suffix.lower() == '.csv':
+                    df = pd.read_csv(file_path, usecols=lambda c: c.startswith('Description'), dtype=str)
+                else:
+                    df = pd.read_excel(file_path, usecols=lambda c: str(c).startswith('Description'))
+                for column in df.columns:
+                    texts.extend(str(t) for t in df[column].dropna())
+                if len(texts) >= size:
+                    break
+        except ImportError:
+            print("⚠️ pandas not installed - using golden-file inputs")
+    if texts:
+        print(f"✓ {len(texts)} SR descriptions loaded from {source}")
+    else:
+        with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+            texts = [c['input'] for c in json.load(f)['cases'] if isinstance(c['input'], str)]
+        print(f"✓ {len(texts)} golden-file inputs (no SR exports in {source})")
+
+    rng = random.Random(42)
+    if len(texts) >= size:
+        return rng.sample(texts, size)
+    return [rng.choice(texts) for _ in range(size)]
+
+
+def timed(label: str, fn, texts: list, rows: list):
+    start = time.perf_counter()
+    output = fn(texts)
+    elapsed = time.perf_counter() - start
+    rows.append((label, elapsed, len(texts) / elapsed))
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SRTextPreprocessor throughput benchmark")
+    parser.add_argument('--source', default='past_data', help='Folder with SR Excel/CSV exports')
+    parser.add_argument('--size', type=int, default=50000, help='Number of texts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Process pool size')
+    args = parser.parse_args()
+
+    texts = load_descriptions(args.source, args.size)
+    rows = []
+
+    clean = SRTextPreprocessor.clean_for_semantic_search
+    reference = timed("per-text", lambda t: [clean(x) for x in t], texts, rows)
+    serial = timed("batch x1", lambda t: SRTextPreprocessor.preprocess_batch(t, workers=1), texts, rows)
+    pooled = timed(f"batch x{args.workers}",
+                   lambda t: SRTextPreprocessor.preprocess_batch(t, workers=args.workers), texts, rows)
+
+    print(f"\n{'='*60}")
+    print(f"SRTextPreprocessor throughput ({len(texts)} texts)")
+    print(f"{'='*60}")
+    print(f"{'Mode':<12} | {'Seconds':>8} | {'Texts/s':>10} | {'Speedup':>7}")
+    print("-" * 48)
+    for label, elapsed, rate in rows:
+        print(f"{label:<12} | {elapsed:>8.2f} | {rate:>10.0f} | {rows[0][1] / elapsed:>6.1f}x")
+
+    identical = reference == serial == pooled
+    print(f"\nOutputs identical across modes: {'YES' if identical else 'NO'}")
+    return identical
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
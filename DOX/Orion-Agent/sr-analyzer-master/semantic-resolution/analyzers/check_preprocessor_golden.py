@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Golden-file check for SRTextPreprocessor
+
+golden/sr_text_preprocessor_golden.json holds inputs and the exact outputs of
+clean_for_semantic_search as recorded from the original (per-call re.sub)
+implementation. Every output - in-process and through the preprocess_batch
+process pool - must match byte for byte.
+
+Usage:
+    python analyzers/check_preprocessor_golden.py
+    python analyzers/check_preprocessor_golden.py --workers 4
+    python analyzers/check_preprocessor_golden.py --regenerate   # only after an intended rule change (bump VERSION)
+
+Exit code 0 = all outputs identical, 1 = mismatch.
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analyzers.sr_text_preprocessor import SRTextPreprocessor
+
+GOLDEN_FILE = Path(__file__).parent / "golden" / "sr_text_preprocessor_golden.json"
+
+
+def check(workers: int) -> bool:
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    cases = golden['cases']
+    failures = []
+
+    # In-process, one call per text
+    for i, case in enumerate(cases):
+        actual = SRTextPreprocessor.clean_for_semantic_search(case['input'], case['keep_activity_label'])
+        if actual != case['output']:
+            failures.append(('single', i, case, actual))
+
+    # Batch through the process pool (replicated so the pool path is taken)
+    for keep_label in (True, False):
+        subset = [c for c in cases if c['keep_activity_label'] is keep_label]
+        repeat = -(-2000 // max(len(subset), 1))
+        inputs = [c['input'] for c in subset] * repeat
+        outputs = SRTextPreprocessor.preprocess_batch(inputs, keep_activity_label=keep_label,
+                                                      workers=workers)
+        expected = [c['output'] for c in subset] * repeat
+        for i, (actual, exp) in enumerate(zip(outputs, expected)):
+            if actual != exp:
+                failures.append(('batch', i, subset[i % len(subset)], actual))
+        if len(outputs) != len(expected):
+            failures.append(('batch', -1, {'input': 'length', 'output': len(expected)}, len(outputs)))
+
+    if golden.get('version') != SRTextPreprocessor.VERSION:
+        print(f"⚠️ Golden file is for VERSION {golden.get('version')}, preprocessor is {SRTextPreprocessor.VERSION}")
+
+    if failures:
+        print(f"❌ {len(failures)} mismatches against {GOLDEN_FILE.name}")
+        for mode, i, case, actual in failures[:10]:
+            print(f"  [{mode} #{i}] input:    {case['input']!r}")
+            print(f"  {' ' * (len(mode) + len(str(i)) + 4)}expected: {case['output']!r}")
+            print(f"  {' ' * (len(mode) + len(str(i)) + 4)}actual:   {actual!r}")
+        return False
+
+    print(f"✅ {len(cases)} golden cases identical (in-process and process pool, workers={workers})")
+    return True
+
+
+def regenerate():
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    for case in golden['cases']:
+        case['output'] = SRTextPreprocessor.clean_for_semantic_search(case['input'], case['keep_activity_label'])
+    golden['version'] = SRTextPreprocessor.VERSION
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, indent=1, ensure_ascii=False)
+    print(f"✓ Regenerated {len(golden['cases'])} outputs (VERSION {SRTextPreprocessor.VERSION})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check SRTextPreprocessor against golden outputs")
+    parser.add_argument('--workers', type=int, default=2, help='Process pool size for the batch check')
+    parser.add_argument('--regenerate', action='store_true', help='Rewrite expected outputs from current code')
+    args = parser.parse_args()
+
+    if args.regenerate:
+        regenerate()
+        return True
+    return check(args.workers)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
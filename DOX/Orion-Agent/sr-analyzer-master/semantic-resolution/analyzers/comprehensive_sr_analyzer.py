@@ -77,6 +77,10 @@ class ComprehensiveSRAnalyzer:
                 except Exception as exc:
                     logger.warning("Failed to reload historical index: %s", exc)
         
+        # Term -> record postings for comprehensive_historical_analysis (persisted next to the pickle)
+        if self.engine.index_loaded and self.engine.historical_indexer:
+            self.engine.load_historical_term_index()
+        
         # Load Java classes if available
         if java_classes.exists():
             self.engine.java_classes_path = java_classes
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Historical Term Index
+Inverted term -> record posting index over historical_sr_index.pkl records.
+
+comprehensive_historical_analysis() counts, per SR, how many of its first 4 key
+terms occur (as lowercase substrings) in each record's searchable_text,
+description or resolution. Scanning 1M+ records per SR made that the slowest
+step of an admin upload; with this index each term resolves to a sorted array
+of record positions and counting is a few vectorised array operations.
+
+Exactness: key terms are \\w+ words, and a \\w+ word can only occur inside a
+maximal \\w+ run of the text. So "records whose text contains the term" is the
+union of the postings of all vocabulary tokens that contain it. The ranking
+(match count desc, then record order) is the same as the original stable sort.
+
+Layout (CSR, compact to pickle):
+    vocab_blob   all distinct tokens (len >= 3), sorted, '\\n'-separated
+    starts       offset of each token in vocab_blob (+ sentinel)
+    offsets      postings slice per token (+ sentinel)
+    postings     int32 record positions, ascending within each token
+
+Persisted next to the source pickle as <name>.terms.pkl and rebuilt when the
+source file (size/mtime) or its record count changes.
+
+Usage:
+    python analyzers/historical_term_index.py data/vectorstore/historical_sr_index.pkl
+    python analyzers/historical_term_index.py data/vectorstore/historical_sr_index.pkl --verify 200
+"""
+
+import os
+import re
+import sys
+import time
+import array
+import pickle
+import bisect
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MIN_TOKEN_LENGTH = 3  # extract_key_terms only returns terms longer than 2 chars
+MATCH_FIELDS = ('searchable_text', 'description', 'resolution')
+
+_TOKEN = re.compile(r'\w+')
+_WORD_ONLY = re.compile(r'\w+\Z')
+
+
+def record_match_text(record: Dict) -> str:
+    """Lowercased text a term is matched against (fields joined by a non-word char)"""
+    return ' '.join(str(record.get(field, '')).lower() for field in MATCH_FIELDS)
+
+
+def sidecar_path(source_path) -> Path:
+    source_path = Path(source_path)
+    return source_path.with_name(f"{source_path.stem}.terms.pkl")
+
+
+def source_fingerprint(source_path, record_count: int) -> Optional[Dict]:
+    try:
+        stat = Path(source_path).stat()
+    except (OSError, TypeError):
+        return None
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'records': record_count}
+
+
+class HistoricalTermIndex:
+    """
+    Posting-list index answering "which records contain this term".
+
+    Attributes:
+        record_count: Number of records indexed (positions are 0..record_count-1)
+        fingerprint: Source pickle fingerprint the index was built for (or None)
+    """
+
+    def __init__(self, vocab_blob: str, starts: np.ndarray, offsets: np.ndarray,
+                 postings: np.ndarray, record_count: int, fingerprint: Optional[Dict] = None):
+        self.vocab_blob = vocab_blob
+        self.starts = starts
+        self.offsets = offsets
+        self.postings = postings
+        self.record_count = record_count
+        self.fingerprint = fingerprint
+        self._starts_list = starts.tolist()
+        self._term_cache: Dict[str, np.ndarray] = {}
+
+    # ========================================================================
+    # BUILD / PERSIST
+    # ========================================================================
+
+    @classmethod
+    def build(cls, records: Iterable[Dict], fingerprint: Optional[Dict] = None) -> 'HistoricalTermIndex':
+        """Build from historical_data records (one pass, pairs kept in compact arrays)"""
+        start_time = time.time()
+        token_ids: Dict[str, int] = {}
+        pair_tokens = array.array('i')
+        pair_records = array.array('i')
+
+        record_count = 0
+        for position, record in enumerate(records):
+            record_count += 1
+            for token in set(_TOKEN.findall(record_match_text(record))):
+                if len(token) < MIN_TOKEN_LENGTH:
+                    continue
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = token_ids[token] = len(token_ids)
+                pair_tokens.append(token_id)
+                pair_records.append(position)
+
+        vocabulary = list(token_ids)  # insertion order == token id
+        order = sorted(range(len(vocabulary)), key=vocabulary.__getitem__)
+        rank = np.empty(len(vocabulary), dtype=np.int32)
+        rank[np.asarray(order, dtype=np.int64)] = np.arange(len(vocabulary), dtype=np.int32)
+
+        tokens_np = rank[np.frombuffer(pair_tokens, dtype=np.int32)] if len(pair_tokens) else np.zeros(0, np.int32)
+        records_np = np.frombuffer(pair_records, dtype=np.int32) if len(pair_records) else np.zeros(0, np.int32)
+        by_token = np.argsort(tokens_np, kind='stable')  # record positions stay ascending per token
+        postings = records_np[by_token].copy()
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tokens_np, minlength=len(vocabulary)), out=offsets[1:])
+
+        sorted_vocab = [vocabulary[i] for i in order]
+        vocab_blob = '\n'.join(sorted_vocab) + '\n'
+        starts = np.zeros(len(sorted_vocab) + 1, dtype=np.int64)
+        np.cumsum([len(token) + 1 for token in sorted_vocab], out=starts[1:])
+
+        logger.info(f"[TERM-INDEX] Built {len(sorted_vocab)} terms / {len(postings)} postings "
+                    f"over {record_count} records in {time.time() - start_time:.1f}s")
+        return cls(vocab_blob, starts, offsets, postings, record_count, fingerprint)
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'format': FORMAT_VERSION,
+                'fingerprint': self.fingerprint,
+                'record_count': self.record_count,
+                'vocab_blob': self.vocab_blob,
+                'starts': self.starts,
+                'offsets': self.offsets,
+                'postings': self.postings
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint: Optional[Dict] = None) -> Optional['HistoricalTermIndex']:
+        """Load a saved index; None if missing, unreadable or built for another source"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"[TERM-INDEX] Could not read {path}: {e}")
+            return None
+        if data.get('format') != FORMAT_VERSION:
+            return None
+        if fingerprint is not None and data.get('fingerprint') != fingerprint:
+            return None
+        return cls(data['vocab_blob'], data['starts'], data['offsets'], data['postings'],
+                   data['record_count'], data.get('fingerprint'))
+
+    @classmethod
+    def load_or_build(cls, records: List[Dict], source_path=None) -> 'HistoricalTermIndex':
+        """Sidecar of source_path if it is current, otherwise build (and persist if possible)"""
+        fingerprint = source_fingerprint(source_path, len(records)) if source_path else None
+        if fingerprint is not None:
+            index = cls.load(sidecar_path(source_path), fingerprint)
+            if index is not None:
+                logger.info(f"[TERM-INDEX] Loaded {sidecar_path(source_path).name}")
+                return index
+
+        index = cls.build(records, fingerprint)
+        if fingerprint is not None:
+            try:
+                index.save(sidecar_path(source_path))
+            except OSError as e:
+                logger.warning(f"[TERM-INDEX] Could not persist index: {e}")
+        return index
+
+    # ========================================================================
+    # QUERY
+    # ========================================================================
+
+    def _token_slices(self, term: str) -> List[int]:
+        """Vocabulary positions of tokens containing term"""
+        hits = []
+        blob = self.vocab_blob
+        starts = self._starts_list
+        pos = blob.find(term)
+        while pos != -1:
+            token_index = bisect.bisect_right(starts, pos) - 1
+            hits.append(token_index)
+            pos = blob.find(term, starts[token_index + 1])
+        return hits
+
+    def records_containing(self, term: str) -> np.ndarray:
+        """
+        Sorted record positions whose match text contains term (lowercased substring).
+
+        Terms made of word characters only are answered from the index; anything
+        else returns None and the caller falls back to a scan.
+        """
+        term = str(term).lower()
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+
+        if not term:
+            result = np.arange(self.record_count, dtype=np.int32)
+        elif not _WORD_ONLY.match(term):
+            return None
+        elif len(term) < MIN_TOKEN_LENGTH:
+            return None
+        else:
+            slices = [self.postings[self.offsets[k]:self.offsets[k + 1]] for k in self._token_slices(term)]
+            if not slices:
+                result = np.zeros(0, dtype=np.int32)
+            elif len(slices) == 1:
+                result = slices[0]
+            else:
+                result = np.unique(np.concatenate(slices))
+
+        if len(self._term_cache) >= 2048:
+            self._term_cache.clear()
+        self._term_cache[term] = result
+        return result
+
+    def top_matches(self, terms: List[str], records: List[Dict], limit: int = 15) -> List[Tuple[int, int]]:
+        """
+        (record position, match count) for the best `limit` records.
+
+        Same result and order as counting each term's substring matches over
+        every record and stable-sorting by count descending.
+        """
+        counts = np.zeros(self.record_count, dtype=np.int16)
+        for term in terms:
+            term_lower = (str(term) if term else "").lower()
+            positions = self.records_containing(term_lower)
+            if positions is None:
+                # Non-word term: per-field scan (a joined text could match across fields)
+                positions = np.fromiter(
+                    (i for i, record in enumerate(records)
+                     if any(term_lower in str(record.get(field, '')).lower() for field in MATCH_FIELDS)),
+                    dtype=np.int32
+                )
+            counts[positions] += 1
+
+        matches = []
+        for score in range(len(terms), 0, -1):
+            for position in np.flatnonzero(counts == score)[:limit - len(matches)]:
+                matches.append((int(position), score))
+            if len(matches) >= limit:
+                break
+        return matches
+
+
+def _scan_top_matches(terms: List[str], records: List[Dict], limit: int = 15) -> List[Tuple[int, int]]:
+    """Reference: the original per-record scan from comprehensive_historical_analysis"""
+    scored = []
+    for position, record in enumerate(records):
+        searchable_text = str(record.get('searchable_text', '')).lower()
+        description_text = str(record.get('description', '')).lower()
+        resolution_text = str(record.get('resolution', '')).lower()
+        match_count = 0
+        for term in terms:
+            term_lower = (str(term) if term else "").lower()
+            if term_lower in searchable_text or term_lower in description_text or term_lower in resolution_text:
+                match_count += 1
+        if match_count > 0:
+            scored.append((position, match_count))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:limit]
+
+
+def main():
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description="Build / verify the historical term index")
+    parser.add_argument('index_file', help='historical_sr_index.pkl (or a Phase 1 variant)')
+    parser.add_argument('--verify', type=int, default=0, help='Compare N sample queries against a full scan')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore an existing sidecar')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from analyzers.batch_sr_analyser import AIEnhancedServiceRequestAnalyzer
+
+    with open(args.index_file, 'rb') as f:
+        records = pickle.load(f)['historical_data']
+    print(f"✓ {len(records)} records loaded")
+
+    if args.rebuild and sidecar_path(args.index_file).exists():
+        sidecar_path(args.index_file).unlink()
+    start = time.time()
+    index = HistoricalTermIndex.load_or_build(records, args.index_file)
+    print(f"✓ Index ready in {time.time() - start:.1f}s ({sidecar_path(args.index_file)})")
+
+    if args.verify:
+        extract = AIEnhancedServiceRequestAnalyzer.extract_key_terms
+        rng = random.Random(7)
+        samples = rng.sample(records, min(args.verify, len(records)))
+        scan_time = index_time = 0.0
+        mismatches = 0
+        for record in samples:
+            terms = extract(None, str(record.get('description', '')))[:4]
+            if not terms:
+                continue
+            t0 = time.perf_counter()
+            expected = _scan_top_matches(terms, records)
+            t1 = time.perf_counter()
+            actual = index.top_matches(terms, records)
+            t2 = time.perf_counter()
+            scan_time += t1 - t0
+            index_time += t2 - t1
+            mismatches += expected != actual
+        print(f"\nQueries: {len(samples)} | mismatches: {mismatches}")
+        print(f"Full scan: {scan_time / len(samples) * 1000:.1f} ms/query | "
+              f"index: {index_time / len(samples) * 1000:.2f} ms/query")
+        return mismatches == 0
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -5,13 +5,108 @@ Cleans unstructured SR text for semantic search by removing customer/project met
 while preserving technical content like activity names and error descriptions
 """
 
+import os
 import re
-from typing import Optional
+import atexit
+import logging
+import threading
+import concurrent.futures
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Batches at least this large go to a process pool in preprocess_batch()
+PARALLEL_MIN_BATCH = int(os.environ.get('SR_PREPROCESS_PARALLEL_MIN', '2000'))
+
+# ============================================================================
+# PRECOMPILED PATTERNS (same order and flags as clean_for_semantic_search steps)
+# ============================================================================
+
+_ACTIVITY_NAME = re.compile(r'Activity:\s*([A-Z0-9]{2,8})\b', re.IGNORECASE)
+
+_CUSTOMER = re.compile(r'(?i)(customer|client|user)(\s+name|\s+id)?:?\s*[^\n,;]+')
+_REPORTED_BY = re.compile(r'(?i)(reported\s+by|submitted\s+by|contact):?\s+[A-Z][a-z]+\s+[A-Z][a-z]+')
+_PROJECT = re.compile(r'(?i)project(\s+name|\s+id)?:?\s*[^\n,;]+')
+_PLAN = re.compile(r'(?i)plan(\s+name|\s+id)?:?\s*[^\n,;]+')
+_SITE = re.compile(r'(?i)site(\s+name|\s+id)?:?\s*[^\n,;]+')
+
+_ENTITY_ID = re.compile(r'(?i)(proposal|plan|customer|site)\s*id:?\s*[A-Za-z0-9\-_]+')
+_ACTIVITY_ID = re.compile(r'(?i)activity\s*id:?\s*[A-Za-z0-9\-_]+')
+_LONG_ID = re.compile(r'\bid:?\s*[A-Za-z0-9\-_]{8,}')
+
+_DIGIT = re.compile(r'\d')
+_ISO_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}(:\d{2})?')
+_US_DATE = re.compile(r'\d{2}/\d{2}/\d{4}')
+_EU_DATE = re.compile(r'\d{2}-\d{2}-\d{4}')
+_TIME_FIELD = re.compile(r'(?i)(timestamp|date|time|created|modified):?\s*[^\n,;]+')
+
+_EMAIL = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE = re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b')
+_PHONE_INTL = re.compile(r'\b\+?\d{1,3}[-.\s]?\(?\d{2,3}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}\b')
+
+_LEADING_LABEL = re.compile(r'^(summary|description|notes|issue|problem|activity):\s*', re.IGNORECASE)
+_INLINE_LABEL = re.compile(r'\n(summary|description|notes|issue|problem):\s*', re.IGNORECASE)
+_ACTIVITY_LABEL = re.compile(r'(?i)activity:\s*')
+
+_WHITESPACE = re.compile(r'\s+')
+_MULTI_DOT = re.compile(r'\.{2,}')
+_SPACE_BEFORE_PUNCT = re.compile(r'\s+([.,!?;])')
+_REPEATED_PUNCT = re.compile(r'([.,!?;])\1+')
+
+_EMPTY_SQUARE = re.compile(r'\[\s*\]')
+_EMPTY_PAREN = re.compile(r'\(\s*\)')
+_MULTI_SEPARATOR = re.compile(r'[,;]\s*[,;]+')
+_TRAILING_SEPARATOR = re.compile(r'\s*[,;]\s*$')
+
+_FALLBACK_FIELDS = re.compile(r'(?i)(customer|project|plan):\s*[^\n,;]+')
+
+
+def _clean_chunk(args) -> List[str]:
+    """Process-pool worker: clean one slice of a batch"""
+    texts, keep_activity_label = args
+    clean = SRTextPreprocessor.clean_for_semantic_search
+    return [clean(text, keep_activity_label) for text in texts]
+
+
+# ============================================================================
+# SHARED PROCESS POOL (created on first parallel batch, reused by later ones)
+# ============================================================================
+
+_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Process pool of `workers` processes, kept for the life of the process"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared preprocessing pool (a later parallel batch starts a new one)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
 
 
 class SRTextPreprocessor:
     """Preprocess SR text for semantic search - optimized for unstructured data"""
     
+    # Bump when cleaning rules change - invalidates cached embeddings of preprocessed text
+    VERSION = 1
+    
     @staticmethod
     def clean_for_semantic_search(text: str, keep_activity_label: bool = True) -> str:
         """
@@ -34,6 +129,9 @@ class SRTextPreprocessor:
         - Error messages
         - Status information
         
+        Output must stay identical to analyzers/golden/sr_text_preprocessor_golden.json
+        (python analyzers/check_preprocessor_golden.py); bump VERSION when rules change.
+        
         Args:
             text: Raw SR description/summary text
             keep_activity_label: Whether to keep "Activity:" label (default: True)
@@ -49,97 +147,125 @@ class SRTextPreprocessor:
         original_text = text
         
         # Step 1: Extract and preserve activity name (important technical context)
-        activity_match = re.search(r'Activity:\s*([A-Z0-9]{2,8})\b', text, re.IGNORECASE)
+        activity_match = _ACTIVITY_NAME.search(text)
         activity_name = activity_match.group(1) if activity_match else ""
         
         # Step 2: Remove customer information
-        text = re.sub(r'(?i)(customer|client|user)(\s+name|\s+id)?:?\s*[^\n,;]+', '', text)
-        text = re.sub(r'(?i)(reported\s+by|submitted\s+by|contact):?\s+[A-Z][a-z]+\s+[A-Z][a-z]+', '', text)
+        text = _CUSTOMER.sub('', text)
+        text = _REPORTED_BY.sub('', text)
         
         # Step 3: Remove project information
-        text = re.sub(r'(?i)project(\s+name|\s+id)?:?\s*[^\n,;]+', '', text)
+        text = _PROJECT.sub('', text)
         
         # Step 4: Remove plan information  
-        text = re.sub(r'(?i)plan(\s+name|\s+id)?:?\s*[^\n,;]+', '', text)
+        text = _PLAN.sub('', text)
         
         # Step 5: Remove site information
-        text = re.sub(r'(?i)site(\s+name|\s+id)?:?\s*[^\n,;]+', '', text)
+        text = _SITE.sub('', text)
         
         # Step 6: Remove various IDs (but keep short codes like CW8, CWMA)
         # Remove long alphanumeric IDs
-        text = re.sub(r'(?i)(proposal|plan|customer|site)\s*id:?\s*[A-Za-z0-9\-_]+', '', text)
-        text = re.sub(r'(?i)activity\s*id:?\s*[A-Za-z0-9\-_]+', '', text)  # Remove activity ID only
-        text = re.sub(r'\bid:?\s*[A-Za-z0-9\-_]{8,}', '', text)  # Remove generic long IDs (8+ chars)
+        text = _ENTITY_ID.sub('', text)
+        text = _ACTIVITY_ID.sub('', text)  # Remove activity ID only
+        text = _LONG_ID.sub('', text)  # Remove generic long IDs (8+ chars)
+        
+        # Steps 7-9 only ever remove digits, so one check up front is exact
+        has_digits = _DIGIT.search(text) is not None
         
         # Step 7: Remove timestamps and dates
-        text = re.sub(r'\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}(:\d{2})?', '', text)  # ISO format
-        text = re.sub(r'\d{2}/\d{2}/\d{4}', '', text)  # MM/DD/YYYY
-        text = re.sub(r'\d{2}-\d{2}-\d{4}', '', text)  # DD-MM-YYYY
-        text = re.sub(r'(?i)(timestamp|date|time|created|modified):?\s*[^\n,;]+', '', text)
+        if has_digits:
+            text = _ISO_DATETIME.sub('', text)  # ISO format
+            text = _US_DATE.sub('', text)  # MM/DD/YYYY
+            text = _EU_DATE.sub('', text)  # DD-MM-YYYY
+        text = _TIME_FIELD.sub('', text)
         
         # Step 8: Remove email addresses
-        text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
+        if '@' in text:
+            text = _EMAIL.sub('[EMAIL]', text)
         
         # Step 9: Remove phone numbers
-        text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-        text = re.sub(r'\b\+?\d{1,3}[-.\s]?\(?\d{2,3}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}\b', '[PHONE]', text)
+        if has_digits:
+            text = _PHONE.sub('[PHONE]', text)
+            text = _PHONE_INTL.sub('[PHONE]', text)
         
         # Step 10: Clean metadata field labels
         # Remove labels at start of text
-        text = re.sub(r'^(summary|description|notes|issue|problem|activity):\s*', '', text, flags=re.IGNORECASE)
+        text = _LEADING_LABEL.sub('', text)
         # Remove labels within text
-        text = re.sub(r'\n(summary|description|notes|issue|problem):\s*', ' ', text, flags=re.IGNORECASE)
+        text = _INLINE_LABEL.sub(' ', text)
         
         # Step 11: Keep Activity label with value (important context)
         if keep_activity_label and activity_name:
             # Clean any existing activity references first
-            text = re.sub(r'(?i)activity:\s*', '', text)
+            text = _ACTIVITY_LABEL.sub('', text)
             # Add clean activity reference at start if not already there
             if activity_name.upper() not in text.upper():
                 text = f"Activity {activity_name} {text}"
         
-        # Step 12: Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single space
-        text = text.replace('\n', ' ').replace('\t', ' ')  # Convert newlines/tabs to spaces
+        # Step 12: Normalize whitespace (also converts newlines/tabs to spaces)
+        text = _WHITESPACE.sub(' ', text)
         
         # Step 13: Clean punctuation
-        text = re.sub(r'\.{2,}', '.', text)  # Multiple dots to single dot
-        text = re.sub(r'\s+([.,!?;])', r'\1', text)  # Remove space before punctuation
-        text = re.sub(r'([.,!?;])\1+', r'\1', text)  # Remove duplicate punctuation
+        text = _MULTI_DOT.sub('.', text)  # Multiple dots to single dot
+        text = _SPACE_BEFORE_PUNCT.sub(r'\1', text)  # Remove space before punctuation
+        text = _REPEATED_PUNCT.sub(r'\1', text)  # Remove duplicate punctuation
         
         # Step 14: Remove empty brackets and extra separators
-        text = re.sub(r'\[\s*\]', '', text)
-        text = re.sub(r'\(\s*\)', '', text)
-        text = re.sub(r'[,;]\s*[,;]+', ',', text)  # Multiple commas/semicolons
-        text = re.sub(r'\s*[,;]\s*$', '', text)  # Trailing comma/semicolon
+        text = _EMPTY_SQUARE.sub('', text)
+        text = _EMPTY_PAREN.sub('', text)
+        text = _MULTI_SEPARATOR.sub(',', text)  # Multiple commas/semicolons
+        text = _TRAILING_SEPARATOR.sub('', text)  # Trailing comma/semicolon
         
         # Step 15: Final cleanup
         text = text.strip()
-        text = re.sub(r'\s+', ' ', text)  # One more whitespace normalization
+        text = _WHITESPACE.sub(' ', text)  # One more whitespace normalization
         
         # Step 16: Quality check - if we removed too much, use simpler approach
         if len(text) < 10 and original_length > 30:
             # Too aggressive - use lighter preprocessing
             text = original_text
             # Just remove obvious customer/project info
-            text = re.sub(r'(?i)(customer|project|plan):\s*[^\n,;]+', '', text)
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = _FALLBACK_FIELDS.sub('', text)
+            text = _WHITESPACE.sub(' ', text).strip()
         
         return text
     
     @staticmethod
-    def preprocess_batch(texts: list) -> list:
+    def preprocess_batch(texts: list, keep_activity_label: bool = True,
+                         workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
         """
         Preprocess a batch of texts
         
+        Batches of PARALLEL_MIN_BATCH or more are split across a process pool
+        (order preserved); smaller ones run in-process. Output is identical either way.
+        The pool is created once and reused by later batches (ingestion calls this
+        per chunk); shutdown_pool() releases it.
+        
         Args:
             texts: List of raw text strings
+            keep_activity_label: Passed through to clean_for_semantic_search
+            workers: Pool size (default: CPU count; 1 forces in-process)
+            chunksize: Texts per worker task (default: spread ~4 tasks per worker)
         
         Returns:
             List of preprocessed text strings
         """
-        preprocessor = SRTextPreprocessor()
-        return [preprocessor.clean_for_semantic_search(text) for text in texts]
+        texts = list(texts)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(texts) < PARALLEL_MIN_BATCH:
+            return _clean_chunk((texts, keep_activity_label))
+        
+        chunksize = chunksize or max(1, -(-len(texts) // (workers * 4)))
+        chunks = [(texts[i:i + chunksize], keep_activity_label) for i in range(0, len(texts), chunksize)]
+        try:
+            results = []
+            for cleaned in _get_pool(workers).map(_clean_chunk, chunks):
+                results.extend(cleaned)
+            return results
+        except (OSError, RuntimeError, concurrent.futures.process.BrokenProcessPool) as e:
+            logger.warning(f"Process pool unavailable, preprocessing in-process: {e}")
+            shutdown_pool()  # Don't hand a broken pool to the next batch
+            return _clean_chunk((texts, keep_activity_label))
 
 
 # Standalone function for easy import
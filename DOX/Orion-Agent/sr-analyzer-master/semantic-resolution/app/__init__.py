@@ -82,6 +82,16 @@ def create_app(config=None):
     from app.routes import register_blueprints
     register_blueprints(app)
     
+    # Warm up shared model/ChromaDB in the background so the first search is fast
+    # (disable with SR_WARMUP=0, e.g. for admin scripts that import the app)
+    if os.environ.get('SR_WARMUP', '1') != '0':
+        try:
+            from RAG.utils.shared_resources import warm_up
+            warm_up(chromadb_path=os.path.join(app.config['VECTORSTORE_DIR'], 'chromadb_store'),
+                    background=True)
+        except Exception as e:
+            logger.warning(f"Shared resource warm-up not started: {e}")
+    
     logger.info("Flask application created successfully")
     return app
 
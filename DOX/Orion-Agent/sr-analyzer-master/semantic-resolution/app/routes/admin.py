@@ -35,91 +35,48 @@ def admin_page():
 @admin_bp.route('/admin/stats')
 @login_required
 def admin_stats():
-    """Get admin statistics"""
+    """
+    Get admin statistics.
+    
+    Served from the in-memory dashboard counters (RAG/utils/dashboard_stats.py),
+    which writers update incrementally - no collection scan, file reads or
+    directory listing per request.
+    """
     try:
-        import json
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
+        from RAG.utils.dashboard_stats import get_dashboard_stats
         
-        # Get historical SR count - use ChromaDB
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
-        historical_count = 0
-        user_corrections = 0
+        dashboard_stats = get_dashboard_stats()
         
-        # Check ChromaDB first
-        if hist_manager.use_chromadb and hist_manager.chromadb_collection:
-            try:
-                historical_count = hist_manager.chromadb_collection.count()
-                # Count user corrections from ChromaDB
-                all_metadata = hist_manager.chromadb_collection.get(include=['metadatas'])
-                metadata_list = all_metadata.get('metadatas', [])
-                user_corrections = sum(
-                    1 for m in metadata_list 
-                    if m and m.get('user_corrected_workaround', '').strip()
-                )
-            except Exception as e:
-                logger.warning(f"ChromaDB count error: {e}")
-        
-        # Fallback to pickle
-        if historical_count == 0:
-            if hist_manager.db_data:
-                metadata_list = hist_manager.db_data.get('metadata', [])
-                historical_count = len(metadata_list)
-                # Count user corrections
-                user_corrections = sum(
-                    1 for m in metadata_list 
-                    if m.get('user_corrected_workaround', '').strip()
-                )
-        
-        # Get upload stats
-        output_dir = os.path.join(BASE_DIR, 'output', 'reports')
-        upload_count = 0
-        latest_upload = 'None'
+        # First run without a snapshot: seed from ChromaDB/side index once
+        def _count_records():
+            hist_manager = get_history_manager()
+            if hist_manager.use_chromadb and hist_manager.chromadb_collection:
+                return hist_manager.chromadb_collection.count()
+            return len(hist_manager.db_data.get('metadata', [])) if hist_manager.db_data else 0
+        
+        dashboard_stats.ensure_seeded(
+            count_records=_count_records,
+            count_corrections=lambda: get_history_manager().count_user_corrections()
+        )
         
-        if os.path.exists(output_dir):
-            files = [f for f in os.listdir(output_dir) if f.startswith('Admin_Upload_') and f.endswith('.xlsx')]
-            upload_count = len(files)
-            if files:
-                files.sort(reverse=True)
-                latest_upload = files[0]
+        stats = dashboard_stats.get_snapshot()
+        historical_count = stats['historical_srs']
+        user_corrections = stats['user_corrections']
+        upload_count = stats['uploads']
+        latest_upload = stats['latest_upload'] or 'None'
+        llm_usage = stats['llm_usage']
         
-        # Get LLM usage stats
+        last_run = (llm_usage or {}).get('last_run', {})
+        cumulative = (llm_usage or {}).get('cumulative', {})
         llm_stats = {
-            'last_run_cost': 0,
-            'last_run_tokens': 0,
-            'last_run_calls': 0,
-            'cumulative_cost': 0,
-            'cumulative_tokens': 0
+            'last_run_cost': last_run.get('cost', 0),
+            'last_run_tokens': last_run.get('input_tokens', 0) + last_run.get('output_tokens', 0),
+            'last_run_calls': last_run.get('total_calls', 0),
+            'cumulative_cost': cumulative.get('total_cost', 0),
+            'cumulative_tokens': cumulative.get('total_tokens', 0)
         }
         
-        llm_stats_file = os.path.join(DATABASE_DIR, 'llm_usage_stats.json')
-        if os.path.exists(llm_stats_file):
-            try:
-                with open(llm_stats_file, 'r') as f:
-                    llm_data = json.load(f)
-                
-                last_run = llm_data.get('last_run', {})
-                cumulative = llm_data.get('cumulative', {})
-                
-                llm_stats = {
-                    'last_run_cost': last_run.get('cost', 0),
-                    'last_run_tokens': last_run.get('input_tokens', 0) + last_run.get('output_tokens', 0),
-                    'last_run_calls': last_run.get('total_calls', 0),
-                    'cumulative_cost': cumulative.get('total_cost', 0),
-                    'cumulative_tokens': cumulative.get('total_tokens', 0)
-                }
-            except Exception as e:
-                logger.warning(f"Error reading LLM stats: {e}")
-        
-        # Read LLM usage JSON file directly for proper structure
-        llm_usage = None
-        llm_stats_file = os.path.join(DATABASE_DIR, 'llm_usage_stats.json')
-        if os.path.exists(llm_stats_file):
-            try:
-                with open(llm_stats_file, 'r') as f:
-                    llm_usage = json.load(f)
-            except Exception as e:
-                logger.warning(f"Error reading LLM usage file: {e}")
-        
         return jsonify({
             'success': True,
             # Frontend expects these names:
@@ -615,10 +572,10 @@ def delete_sr():
         if not sr_id:
             return jsonify({'success': False, 'error': 'SR ID required'}), 400
         
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         import numpy as np
         
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         if not hist_manager.use_chromadb:
             return jsonify({'success': False, 'error': 'Could not connect to ChromaDB'}), 500
         
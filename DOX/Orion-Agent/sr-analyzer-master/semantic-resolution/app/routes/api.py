@@ -119,6 +119,18 @@ def get_vote_statistics():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/health/resources', methods=['GET'])
+def get_resources_health():
+    """Shared model/ChromaDB status: what is loaded, load times, warm-up state and process memory"""
+    try:
+        from RAG.utils.shared_resources import get_resource_health
+        return jsonify({'success': True, 'resources': get_resource_health()})
+
+    except Exception as e:
+        logger.error(f"Resource health error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @api_bp.route('/regenerate_ai_workaround', methods=['POST'])
 @user_login_required
 def regenerate_ai_workaround():
@@ -164,7 +176,7 @@ def regenerate_ai_workaround():
                 'existing_semantic_workaround': semantic_workaround,  # Pass existing workaround
                 'Resolution Category': resolution_category,
                 'Application': application
-            })
+            }, use_cache=False)  # Regenerate must not get the cached response back
             
             if result:
                 ai_workaround = result.get('AI Workaround', '')
@@ -218,10 +230,12 @@ def update_ai_workaround_in_db():
         if not sr_id or not workaround:
             return jsonify({'success': False, 'error': 'SR ID and workaround required'}), 400
         
-        import chromadb
+        from RAG.utils.shared_resources import get_chromadb_client
         
-        # Connect directly to ChromaDB
-        client = chromadb.PersistentClient(path=CHROMADB_PATH)
+        # Shared client - a second PersistentClient on the same path is not allowed
+        client = get_chromadb_client(CHROMADB_PATH)
+        if client is None:
+            return jsonify({'success': False, 'error': 'ChromaDB not available'}), 503
         
         # Try to find and update in the history collection
         updated = False
@@ -250,6 +264,9 @@ def update_ai_workaround_in_db():
                             ids=[doc_id],
                             metadatas=[metadata]
                         )
+                        if coll_name == 'clean_history_data':
+                            from app.utils.state import get_history_manager
+                            get_history_manager().index_record(doc_id, metadata)
                         updated = True
                         logger.info(f"✅ Updated AI workaround for {sr_id} in collection {coll_name}")
                         break
@@ -276,6 +293,9 @@ def update_ai_workaround_in_db():
                             metadata['ai_generated_workaround'] = workaround[:10000]  # Increased limit
                             metadata['ai_workaround_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                             collection.update(ids=[doc_id], metadatas=[metadata])
+                            if coll_name == 'clean_history_data':
+                                from app.utils.state import get_history_manager
+                                get_history_manager().index_record(doc_id, metadata)
                             updated = True
                             logger.info(f"✅ Updated AI workaround for {sr_id} in {coll_name}")
                             break
@@ -316,9 +336,9 @@ def get_all_user_feedback(sr_id: str):
         if not sr_id:
             return jsonify({'success': False, 'error': 'SR ID required'}), 400
         
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         
         # Get all user feedback for this SR
         all_feedback = hist_manager.get_all_user_feedback_for_sr(sr_id)
@@ -341,9 +361,9 @@ def get_user_feedback_stats():
     Get statistics about user feedback in the system.
     """
     try:
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         stats = hist_manager.get_statistics()
         
         return jsonify({
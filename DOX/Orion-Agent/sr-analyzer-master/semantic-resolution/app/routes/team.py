@@ -8,6 +8,7 @@ from flask import Blueprint, render_template, request, jsonify
 import os
 import logging
 import sqlite3
+import time
 from datetime import datetime
 
 from app.utils.decorators import login_required
@@ -506,8 +507,8 @@ def update_sr_assignment():
         if not sr_id or not new_assignee:
             return jsonify({'success': False, 'error': 'SR ID and assignee required'}), 400
         
-        import chromadb
         import pandas as pd
+        from RAG.utils.shared_resources import get_chromadb_client
         from pathlib import Path
         
         sr_id_upper = sr_id.upper().strip()
@@ -516,7 +517,9 @@ def update_sr_assignment():
         
         # 1. Update ChromaDB
         try:
-            client = chromadb.PersistentClient(path=str(CHROMADB_PATH))
+            client = get_chromadb_client(CHROMADB_PATH)
+            if client is None:
+                raise RuntimeError("ChromaDB not available")
             
             for collection_name in ['clean_history_data', 'sr_history', 'history_data']:
                 try:
@@ -534,6 +537,9 @@ def update_sr_assignment():
                         old_metadata['assigned_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                         
                         collection.update(ids=[doc_id], metadatas=[old_metadata])
+                        if collection_name == 'clean_history_data':
+                            from app.utils.state import get_history_manager
+                            get_history_manager().index_record(doc_id, old_metadata)
                         updated_chromadb = True
                         logger.info(f"Updated {sr_id} in ChromaDB collection {collection_name}")
                         break
@@ -603,11 +609,14 @@ def update_sr_assignment():
 @login_required
 def batch_reassign_unassigned():
     """
-    Re-assign ALL SRs uploaded today using LLM CALL 5 (skill-based assignment).
+    Re-assign ALL SRs uploaded today with the skill-based assignment rules of LLM CALL 5.
     This will reassign ALL today's SRs, not just unassigned ones.
+    
+    The whole day is solved in one pass by BatchAssignmentEngine; the LLM is only
+    called for ties between equally suitable specialists.
     """
     try:
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         from team.people_skills_database import PeopleSkillsDatabase
         import sys
         from pathlib import Path
@@ -621,36 +630,23 @@ def batch_reassign_unassigned():
         today = datetime.now().strftime('%Y-%m-%d')
         
         # Connect to ChromaDB
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         if not hist_manager.use_chromadb:
             return jsonify({'success': False, 'error': 'Could not connect to ChromaDB'}), 500
         
-        # Get all SRs from ChromaDB with IDs for later update
+        # Get ALL today's SRs (not just unassigned - reassign everything).
+        # Metadata only, located through the side index - no full collection scan.
         try:
-            all_records = hist_manager.chromadb_collection.get(include=['metadatas', 'documents', 'embeddings'])
-            metadata_list = all_records.get('metadatas', [])
-            ids_list = all_records.get('ids', [])
-            docs_list = all_records.get('documents', [])
-            embeddings_list = all_records.get('embeddings', [])
+            record_ids, metadata_list = hist_manager.get_records_added_on(today)
         except Exception as e:
             logger.error(f"ChromaDB query error: {e}")
             return jsonify({'success': False, 'error': 'ChromaDB query failed'}), 500
         
-        # Filter for ALL today's SRs (not just unassigned - reassign everything)
-        # Store record_id, document, embedding along with metadata for updates
+        # Keep the record ID with the metadata for the batched update
         todays_srs = []
-        for i, sr in enumerate(metadata_list):
-            if sr is None:
-                continue
-            sr_date = sr.get('added_date', '') or sr.get('opened_date', '') or sr.get('Reported Date', '')
-            
-            # Check if it's today - include ALL SRs regardless of current assignment
-            if sr_date and sr_date.startswith(today):
-                # Store the ChromaDB record ID, document, and embedding for later update
-                sr['_chromadb_id'] = ids_list[i] if i < len(ids_list) else None
-                sr['_chromadb_doc'] = docs_list[i] if docs_list and i < len(docs_list) else ''
-                sr['_chromadb_embedding'] = embeddings_list[i] if embeddings_list and i < len(embeddings_list) else None
-                todays_srs.append(sr)
+        for record_id, sr in zip(record_ids, metadata_list):
+            sr['_chromadb_id'] = record_id
+            todays_srs.append(sr)
         
         if not todays_srs:
             return jsonify({
@@ -662,119 +658,96 @@ def batch_reassign_unassigned():
         
         # SORT BY: 1) Aging SRs first, 2) Priority (P1 first)
         # Aging SR conditions: Category is EOM-related, or Priority P2/P3, or Age > 3 days
-        def get_sr_sort_key(sr):
-            # Check if aging
-            is_aging = sr.get('is_aging', False)
-            if not is_aging:
-                # Calculate aging if not already set
-                priority = str(sr.get('priority', 'P3')).upper()
-                age_days = sr.get('age_days', 0) or 0
-                category = str(sr.get('categorization_tier3', '') or sr.get('category', '')).lower()
-                aging_categories = ['ops eom', 'potential ops eom', 'sales eom', 'potential sales eom']
-                is_aging_category = any(cat in category for cat in aging_categories)
-                is_aging_priority = priority in ['P2', 'P3']
-                is_over_age = age_days > 3 if isinstance(age_days, (int, float)) else False
-                is_aging = is_aging_category or is_aging_priority or is_over_age
-            
-            # Priority order
-            priority_order = {'P1': 1, 'P2': 2, 'P3': 3, 'P4': 4, '': 5}
-            priority_rank = priority_order.get(str(sr.get('priority', 'P3')).upper(), 5)
-            
-            # Sort key: (not aging=1/aging=0, priority rank) - aging first, then by priority
-            return (0 if is_aging else 1, priority_rank)
-        
-        todays_srs.sort(key=get_sr_sort_key)
+        from assignment.batch_assignment_engine import BatchAssignmentEngine, sr_sort_key
+        todays_srs.sort(key=sr_sort_key)
         
         # Count aging vs non-aging for logging
-        aging_count = sum(1 for sr in todays_srs if get_sr_sort_key(sr)[0] == 0)
+        aging_count = sum(1 for sr in todays_srs if sr_sort_key(sr)[0] == 0)
         logger.info(f"[BATCH] Sorted {len(todays_srs)} SRs: {aging_count} AGING first, then by priority (P1→P4)")
         
-        # Initialize LLM for skill-based assignment
+        # Skill-based assignment for the whole day in one pass (rules of LLM CALL 5).
+        # Every SR of today is being reassigned, so loads start from zero.
         try:
-            from RAG.pipeline.multi_model_rag_pipeline_chatgpt import MultiModelSRPipeline
-            pipeline = MultiModelSRPipeline()
-            logger.info(f"[BATCH] Initialized RAG pipeline for {len(todays_srs)} today's SRs (reassigning all)")
+            engine = BatchAssignmentEngine(os.path.join(DATABASE_DIR, 'people_skills.db'))
         except Exception as e:
-            logger.error(f"Failed to initialize RAG pipeline: {e}")
-            # Fallback to simple round-robin if LLM unavailable
+            logger.error(f"Failed to load team roster: {e}")
             return _fallback_batch_assignment(todays_srs, hist_manager)
         
-        # Process each SR (reassign all today's SRs)
+        # LLM only for ties the rules can't break (pipeline created on first use)
+        pipeline_holder = {}
+        
+        def resolve_tie(sr, candidates):
+            if 'pipeline' not in pipeline_holder:
+                try:
+                    from RAG.pipeline.multi_model_rag_pipeline_chatgpt import MultiModelSRPipeline
+                    pipeline_holder['pipeline'] = MultiModelSRPipeline()
+                except Exception as e:
+                    logger.warning(f"[BATCH] LLM unavailable for tie-breaks, keeping rule-based picks: {e}")
+                    pipeline_holder['pipeline'] = None
+            pipeline = pipeline_holder['pipeline']
+            if pipeline is None:
+                return None
+            sr_data = {
+                'SR ID': sr.get('call_id', 'Unknown'),
+                'Priority': sr.get('priority', 'P3'),
+                'Description': sr.get('description', ''),
+                'Notes': sr.get('notes', ''),
+                'Application': sr.get('application', 'Unknown')
+            }
+            return pipeline._llm_resolve_assignment_tie(
+                sr_data, candidates,
+                sr.get('is_java_error', 'No') == 'Yes',
+                sr.get('issue_type', 'Unknown')
+            )
+        
+        start_time = time.time()
+        decisions = engine.assign_batch(todays_srs, resolver=resolve_tie)
+        logger.info(f"[BATCH] Assignment solved for {len(todays_srs)} SRs in "
+                    f"{(time.time() - start_time) * 1000:.0f} ms ({engine.llm_calls} LLM tie-breaks)")
+        
+        # Collect assignments (reassign all today's SRs), then write them in one batch
         assigned_count = 0
         distribution = {}
         errors = []
+        update_ids = []
+        update_metadatas = []
         
-        for idx, sr in enumerate(todays_srs, 1):
+        for idx, (sr, decision) in enumerate(zip(todays_srs, decisions), 1):
             try:
-                sr_id = sr.get('call_id', 'Unknown')
-                priority = sr.get('priority', 'P3')
-                application = sr.get('application', 'Unknown')
-                is_aging = sr.get('is_aging', False)
-                age_days = sr.get('age_days', 0)
-                
-                # Log SR details before assignment
-                aging_tag = "🔴 AGING" if is_aging else "🟢 Normal"
-                logger.info(f"[BATCH] [{idx}/{len(todays_srs)}] Processing {sr_id}: {aging_tag} | Priority={priority} | App={application} | Age={age_days}d")
-                
-                # Build SR data for LLM
-                sr_data = {
-                    'SR ID': sr_id,
-                    'Priority': priority,
-                    'Description': sr.get('description', ''),
-                    'Notes': sr.get('notes', ''),
-                    'Application': application
-                }
-                
-                # Determine if Java error (from stored data or default to False)
-                is_java_error = sr.get('is_java_error', 'No') == 'Yes'
-                issue_type = sr.get('issue_type', 'Unknown')
+                sr_id = decision['sr_id']
+                assigned_to = decision['assigned_to']
                 
-                # Call LLM CALL 5: Skill-based assignment
-                assigned_to = pipeline._llm_skill_assignment(sr_data, is_java_error, issue_type)
+                aging_tag = "🔴 AGING" if sr_sort_key(sr)[0] == 0 else "🟢 Normal"
+                logger.info(f"[BATCH] [{idx}/{len(todays_srs)}] {sr_id}: {aging_tag} | "
+                            f"Priority={sr.get('priority', 'P3')} | App={sr.get('application', 'Unknown')} | "
+                            f"→ {assigned_to or 'UNASSIGNED'} [{decision['method']}] {decision['reason']}")
                 
-                if assigned_to and assigned_to != 'UNASSIGNED':
-                    # Update SR dict for Excel update later
+                if assigned_to:
+                    # Update SR dict for ChromaDB + Excel update below
                     sr['current_assignee'] = assigned_to
                     sr['assigned_to'] = assigned_to
                     sr['assigned_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     
-                    # Update SR in ChromaDB - use stored IDs from initial query
-                    record_id = sr.get('_chromadb_id')
-                    old_doc = sr.get('_chromadb_doc', '')
-                    old_embedding = sr.get('_chromadb_embedding')
-                    
-                    if record_id:
-                        # Actually persist to ChromaDB using stored ID
-                        try:
-                            # Update metadata (remove our internal fields first)
-                            updated_metadata = {k: v for k, v in sr.items() if not k.startswith('_chromadb_')}
-                            
-                            # Delete and re-add (ChromaDB update pattern)
-                            hist_manager.chromadb_collection.delete(ids=[record_id])
-                            hist_manager.chromadb_collection.add(
-                                ids=[record_id],
-                                embeddings=[old_embedding] if old_embedding else None,
-                                documents=[old_doc],
-                                metadatas=[updated_metadata]
-                            )
-                            logger.info(f"[BATCH] ChromaDB updated for {sr_id}")
-                        except Exception as chroma_err:
-                            logger.warning(f"[BATCH] ChromaDB update failed for {sr_id}: {chroma_err}")
-                    else:
-                        logger.warning(f"[BATCH] No ChromaDB record ID found for {sr_id} - Excel will be updated")
+                    update_ids.append(sr['_chromadb_id'])
+                    update_metadatas.append({k: v for k, v in sr.items() if not k.startswith('_chromadb_')})
                     
                     assigned_count += 1
                     distribution[assigned_to] = distribution.get(assigned_to, 0) + 1
-                    logger.info(f"[BATCH] Assigned {sr_id} to {assigned_to}")
                 else:
-                    errors.append(f"{sr_id}: No suitable assignee found")
+                    errors.append(f"{sr_id}: {decision['reason']}")
                     
             except Exception as e:
                 logger.error(f"Error assigning SR {sr.get('call_id', 'Unknown')}: {e}")
                 errors.append(f"{sr.get('call_id', 'Unknown')}: {str(e)}")
         
-        # Save all updates to ChromaDB
+        # Save all updates to ChromaDB (metadata only - documents/embeddings untouched)
         if assigned_count > 0:
+            try:
+                hist_manager.update_metadata_batch(update_ids, update_metadatas)
+                logger.info(f"[BATCH] ChromaDB updated for {len(update_ids)} SRs")
+            except Exception as chroma_err:
+                logger.error(f"[BATCH] ChromaDB batch update failed: {chroma_err}")
+                errors.append(f"ChromaDB update failed: {chroma_err}")
             hist_manager.save_database()
             
             # Also update the Excel file so UI shows updated assignments
@@ -838,6 +811,7 @@ def batch_reassign_unassigned():
             'assigned_count': assigned_count,
             'total_today': len(todays_srs),
             'distribution': distribution,
+            'llm_calls': engine.llm_calls,
             'errors': errors if errors else None
         })
         
@@ -868,6 +842,8 @@ def _fallback_batch_assignment(unassigned_srs, hist_manager):
         # Simple round-robin
         distribution = {}
         assigned_count = 0
+        update_ids = []
+        update_metadatas = []
         
         for i, sr in enumerate(unassigned_srs):
             assignee = available[i % len(available)]['name']
@@ -877,33 +853,21 @@ def _fallback_batch_assignment(unassigned_srs, hist_manager):
             sr['assigned_to'] = assignee
             sr['assigned_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            # Actually persist to ChromaDB using stored IDs from initial query
-            record_id = sr.get('_chromadb_id')
-            old_doc = sr.get('_chromadb_doc', '')
-            old_embedding = sr.get('_chromadb_embedding')
-            
-            if record_id and hist_manager.chromadb_collection:
-                try:
-                    # Update metadata (remove our internal fields first)
-                    updated_metadata = {k: v for k, v in sr.items() if not k.startswith('_chromadb_')}
-                    
-                    # Delete and re-add (ChromaDB update pattern)
-                    hist_manager.chromadb_collection.delete(ids=[record_id])
-                    hist_manager.chromadb_collection.add(
-                        ids=[record_id],
-                        embeddings=[old_embedding] if old_embedding else None,
-                        documents=[old_doc],
-                        metadatas=[updated_metadata]
-                    )
-                    logger.info(f"[FALLBACK] ChromaDB updated for {sr_id}")
-                except Exception as chroma_err:
-                    logger.warning(f"[FALLBACK] ChromaDB update failed for {sr_id}: {chroma_err}")
+            if sr.get('_chromadb_id'):
+                update_ids.append(sr['_chromadb_id'])
+                update_metadatas.append({k: v for k, v in sr.items() if not k.startswith('_chromadb_')})
             else:
                 logger.warning(f"[FALLBACK] No ChromaDB record ID found for {sr_id} - Excel will be updated")
             
             distribution[assignee] = distribution.get(assignee, 0) + 1
             assigned_count += 1
         
+        # Persist all assignments in one batched metadata update
+        try:
+            hist_manager.update_metadata_batch(update_ids, update_metadatas)
+            logger.info(f"[FALLBACK] ChromaDB updated for {len(update_ids)} SRs")
+        except Exception as chroma_err:
+            logger.warning(f"[FALLBACK] ChromaDB batch update failed: {chroma_err}")
         hist_manager.save_database()
         
         # Also update Excel file so UI shows updated assignments
@@ -548,7 +548,7 @@ def get_my_srs():
 def get_upload_info():
     """Get info about admin uploads - uses ChromaDB and output files"""
     try:
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         from team.people_skills_database import PeopleSkillsDatabase
         import pandas as pd
         
@@ -576,7 +576,7 @@ def get_upload_info():
         latest_date = None
         
         try:
-            hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+            hist_manager = get_history_manager()
             if hist_manager.use_chromadb and hist_manager.chromadb_collection:
                 chromadb_count = hist_manager.chromadb_collection.count()
         except Exception as e:
@@ -713,9 +713,9 @@ def _is_valid_workaround(workaround: str) -> bool:
 def find_similar_srs(description: str, current_sr_id: str, top_k: int = 5) -> list:
     """Find similar SRs using semantic search (summary param removed - was redundant)"""
     try:
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         
         # Build query from description only (summary removed - was redundant)
         query_text = description.strip()
@@ -735,7 +735,7 @@ def find_similar_srs(description: str, current_sr_id: str, top_k: int = 5) -> li
                     logger.warning("Model not loaded in hist_manager, skipping similar SR search")
                     return []
                 
-                query_embedding = model.encode(query_text).tolist()
+                query_embedding = hist_manager.encode_text(query_text)
                 
                 # Query ChromaDB
                 results = hist_manager.chromadb_collection.query(
@@ -805,9 +805,9 @@ def find_similar_srs(description: str, current_sr_id: str, top_k: int = 5) -> li
 def search_vectorstore_by_sr_id(sr_id: str) -> Optional[Dict]:
     """Search vector store for exact SR ID match using HistoryDatabaseManager"""
     try:
-        from RAG.utils.history_db_manager import HistoryDatabaseManager
+        from app.utils.state import get_history_manager
         
-        hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+        hist_manager = get_history_manager()
         
         sr_id_upper = sr_id.upper().strip()
         
@@ -830,22 +830,13 @@ def search_vectorstore_by_sr_id(sr_id: str) -> Optional[Dict]:
                     logger.info(f"📊 Assigned: {metadata.get('assigned_to', 'N/A')}")
                     return metadata
                 
-                # Also try case-insensitive search with all records
-                all_results = hist_manager.chromadb_collection.get(
-                    limit=50000,
-                    include=['metadatas']
-                )
-                
-                if all_results and all_results.get('metadatas'):
-                    for metadata in all_results['metadatas']:
-                        call_id = str(metadata.get('call_id', '')).upper().strip()
-                        if call_id == sr_id_upper:
-                            logger.info(f"✅ Found SR {sr_id} in ChromaDB (full scan)")
-                            # Debug: Log all fields in the metadata
-                            logger.info(f"📊 Metadata keys: {list(metadata.keys())}")
-                            logger.info(f"📊 Description: {metadata.get('description', 'N/A')[:100]}")
-                            logger.info(f"📊 Priority: {metadata.get('Customer Priority', metadata.get('priority', 'N/A'))}")
-                            return metadata
+                # Case-insensitive lookup through the call_id side index
+                metadata = hist_manager.find_record_by_sr_id(sr_id_upper)
+                if metadata:
+                    logger.info(f"✅ Found SR {sr_id} in ChromaDB (side index)")
+                    logger.info(f"📊 Description: {str(metadata.get('description', 'N/A'))[:100]}")
+                    logger.info(f"📊 Priority: {metadata.get('Customer Priority', metadata.get('priority', 'N/A'))}")
+                    return metadata
                 
             except Exception as e:
                 logger.warning(f"ChromaDB search error: {e}, trying pickle fallback")
@@ -1002,8 +993,8 @@ def search_sr():
             # Get all user feedback entries for this SR (supports multiple corrections per SR)
             all_user_feedback = []
             try:
-                from RAG.utils.history_db_manager import HistoryDatabaseManager
-                feedback_hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+                from app.utils.state import get_history_manager
+                feedback_hist_manager = get_history_manager()
                 if feedback_hist_manager and hasattr(feedback_hist_manager, 'get_all_user_feedback_for_sr'):
                     all_user_feedback = feedback_hist_manager.get_all_user_feedback_for_sr(sr_id)
                     if all_user_feedback:
@@ -1190,10 +1181,10 @@ def mark_sr_done():
         
         # 1. Update ChromaDB
         try:
-            from RAG.utils.history_db_manager import HistoryDatabaseManager
+            from app.utils.state import get_history_manager
             import chromadb
             
-            hist_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+            hist_manager = get_history_manager()
             
             if hist_manager.use_chromadb and hist_manager.chromadb_collection:
                 results = hist_manager.chromadb_collection.get(
@@ -1221,6 +1212,7 @@ def mark_sr_done():
                         documents=[old_doc],
                         metadatas=[updated_metadata]
                     )
+                    hist_manager.index_record(record_id, updated_metadata)
                     updated_chromadb = True
                     logger.info(f"Marked SR {sr_id} as Done in ChromaDB by {logged_in_user}")
         except Exception as e:
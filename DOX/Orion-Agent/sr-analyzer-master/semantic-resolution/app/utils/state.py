@@ -6,6 +6,7 @@ Manages shared state across blueprints
 
 import os
 import sys
+import threading
 from pathlib import Path
 
 # Project paths
@@ -40,6 +41,9 @@ _feedback_manager = None
 _analyzer = None
 _age_calculator = None
 _feedback_storage = None
+_feedback_storage_lock = threading.Lock()
+_history_manager = None
+_history_manager_lock = threading.Lock()
 
 
 def get_feedback_manager():
@@ -80,15 +84,38 @@ def get_age_calculator():
 
 
 def get_feedback_storage():
-    """Get or initialize feedback storage"""
+    """Get or initialize feedback storage (one per process - it owns the vote writer thread)"""
     global _feedback_storage
     if _feedback_storage is None:
-        try:
-            from RAG.utils.feedback_storage import WorkaroundFeedbackStorage
-            _feedback_storage = WorkaroundFeedbackStorage()
-            print("[OK] Workaround feedback storage initialized")
-        except Exception as e:
-            print(f"[WARN] Could not initialize feedback storage: {e}")
+        with _feedback_storage_lock:
+            if _feedback_storage is None:
+                try:
+                    from RAG.utils.feedback_storage import WorkaroundFeedbackStorage
+                    _feedback_storage = WorkaroundFeedbackStorage()
+                    print("[OK] Workaround feedback storage initialized")
+                except Exception as e:
+                    print(f"[WARN] Could not initialize feedback storage: {e}")
     return _feedback_storage
 
 
+def get_history_manager():
+    """
+    Get the process-wide HistoryDatabaseManager.
+    
+    The ChromaDB client, clean_history_data collection and embedding model are
+    shared (see RAG/utils/shared_resources.py), so routes reuse one manager
+    instead of constructing a new one per request.
+    
+    A manager that came up without ChromaDB (store missing or locked at the
+    time) is not kept: the next call builds a new one, so the app recovers
+    once the store is available.
+    """
+    global _history_manager
+    manager = _history_manager
+    if manager is None or not manager.use_chromadb:
+        with _history_manager_lock:
+            if _history_manager is None or not _history_manager.use_chromadb:
+                from RAG.utils.history_db_manager import HistoryDatabaseManager
+                _history_manager = HistoryDatabaseManager(chromadb_path=CHROMADB_PATH)
+            manager = _history_manager
+    return manager
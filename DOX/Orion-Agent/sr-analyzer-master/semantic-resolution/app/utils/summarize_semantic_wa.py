@@ -15,6 +15,8 @@ import sys
 import json
 import logging
 import re
+import hashlib
+import threading
 from typing import List, Dict, Optional
 
 # Setup paths
@@ -25,6 +27,8 @@ PROJECT_ROOT = os.path.dirname(APP_DIR)
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from app.utils.summary_cache import SummaryCache
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -224,6 +228,13 @@ class SummarizationLLM:
             # Write back
             with open(usage_file, 'w') as f:
                 json.dump(existing_data, f, indent=2)
+            
+            from RAG.utils.dashboard_stats import get_dashboard_stats
+            get_dashboard_stats().record_summarization_call(
+                call_result.get('input_tokens', 0),
+                call_result.get('output_tokens', 0),
+                call_result.get('cost', 0)
+            )
                 
         except Exception as e:
             logger.warning(f"[SummarizationLLM] Failed to update usage stats: {e}")
@@ -338,8 +349,12 @@ class SemanticWASummarizer:
     
     def __init__(self):
         self.llm = SummarizationLLM()
-        self._cache = {}  # Simple in-memory cache
+        self._cache = SummaryCache() if os.environ.get('SUMMARY_CACHE_ENABLED', '1') != '0' else None
         self.abbreviation_context = self._load_abbreviations()
+        # Prompt template, model and abbreviations change the output - part of every cache key
+        self._prompt_version = hashlib.sha256(
+            f"{self.llm.model}\n{PROMPT_SUMMARIZE_SEMANTIC_WA}\n{self.abbreviation_context}".encode('utf-8')
+        ).hexdigest()[:16]
         logger.info("[SemanticWASummarizer] Initialized")
     
     def _load_abbreviations(self) -> str:
@@ -388,6 +403,26 @@ class SemanticWASummarizer:
             logger.debug(f"[SemanticWASummarizer] Could not load abbreviations: {e}")
             return ""
     
+    @staticmethod
+    def _get_workaround(sr: Dict) -> str:
+        """Workaround text from the various possible field names"""
+        return (
+            sr.get('workaround') or 
+            sr.get('ai_workaround') or 
+            sr.get('ai_generated_workaround') or
+            sr.get('semantic_workaround') or
+            ''
+        )
+    
+    def _cache_key(self, description: str, priority: str, similar_srs: List[Dict]) -> str:
+        """Content hash of the inputs: description, priority, ordered top-5 IDs + workaround text"""
+        workarounds = [
+            (sr.get('call_id', '') or sr.get('sr_id', '') or sr.get('cas_id', ''), str(self._get_workaround(sr)))
+            for sr in similar_srs[:5]
+        ]
+        return SummaryCache.make_key(description[:1500] if description else "", priority,
+                                     workarounds, self._prompt_version)
+    
     def _build_workarounds_context(self, similar_srs: List[Dict]) -> str:
         """Build context string from similar SRs"""
         context = ""
@@ -397,13 +432,7 @@ class SemanticWASummarizer:
             similarity = sr.get('similarity', 0)
             
             # Get workaround from various possible field names
-            workaround = (
-                sr.get('workaround') or 
-                sr.get('ai_workaround') or 
-                sr.get('ai_generated_workaround') or
-                sr.get('semantic_workaround') or
-                ''
-            )
+            workaround = self._get_workaround(sr)
             
             # Get resolution category
             resolution = (
@@ -483,11 +512,14 @@ class SemanticWASummarizer:
                 'cas_ids': []
             }
         
-        # Check cache (simple key based on SR ID)
-        cache_key = f"{sr_id}_{len(similar_srs)}"
-        if cache_key in self._cache:
-            logger.info(f"[SemanticWASummarizer] Cache hit for {sr_id}")
-            return self._cache[cache_key]
+        # Check cache (keyed on content, not SR ID - only the top 5 similar SRs reach the prompt)
+        cache_key = self._cache_key(description, priority, similar_srs)
+        if self._cache is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                cached['similar_count'] = len(similar_srs)
+                logger.info(f"[SemanticWASummarizer] Cache hit for {sr_id}")
+                return cached
         
         # Extract all CAS IDs first (for header display)
         cas_ids = []
@@ -517,7 +549,8 @@ Manual investigation is recommended based on the SR descriptions."""
                 'no_recorded_workarounds': True  # Flag to indicate no WA recorded
             }
             # Cache this result too
-            self._cache[cache_key] = result
+            if self._cache is not None:
+                self._cache.put(cache_key, result)
             logger.info(f"[SemanticWASummarizer] ⚠️ No workarounds recorded for similar SRs of {sr_id}")
             return result
         
@@ -546,7 +579,8 @@ Manual investigation is recommended based on the SR descriptions."""
                 'cas_ids': cas_ids
             }
             # Cache the result
-            self._cache[cache_key] = result
+            if self._cache is not None:
+                self._cache.put(cache_key, result)
             logger.info(f"[SemanticWASummarizer] ✅ Successfully summarized for {sr_id}")
             return result
         else:
@@ -558,9 +592,20 @@ Manual investigation is recommended based on the SR descriptions."""
             }
     
     def clear_cache(self):
-        """Clear the summarization cache"""
-        self._cache = {}
+        """Clear the summarization cache (memory and shared disk tier)"""
+        if self._cache is not None:
+            self._cache.clear()
         logger.info("[SemanticWASummarizer] Cache cleared")
+    
+    def get_cache_stats(self) -> dict:
+        """Summary cache hit/miss counters and sizes"""
+        if self._cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self._cache.get_stats()}
+    
+    def get_usage_stats(self) -> dict:
+        """LLM usage statistics plus summary cache statistics"""
+        return {**self.llm.get_usage_stats(), 'cache': self.get_cache_stats()}
 
 
 # ============================================================================
@@ -568,12 +613,15 @@ Manual investigation is recommended based on the SR descriptions."""
 # ============================================================================
 
 _summarizer_instance = None
+_summarizer_lock = threading.Lock()
 
 def get_summarizer() -> SemanticWASummarizer:
     """Get or create the singleton summarizer instance"""
     global _summarizer_instance
     if _summarizer_instance is None:
-        _summarizer_instance = SemanticWASummarizer()
+        with _summarizer_lock:
+            if _summarizer_instance is None:
+                _summarizer_instance = SemanticWASummarizer()
     return _summarizer_instance
 
 
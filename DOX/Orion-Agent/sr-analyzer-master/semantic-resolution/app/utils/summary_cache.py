@@ -0,0 +1,219 @@
+"""
+Summary Cache
+Bounded, content-addressed cache for SemanticWASummarizer results.
+
+The key is a SHA-256 of everything that shapes the summary: the SR description,
+priority, the ordered similar-SR IDs with their workaround text, the prompt
+template and the model. The same SR viewed again with a changed workaround (or
+a different SR with identical inputs) therefore gets the right answer, and
+nothing depends on the SR ID or on the list length alone.
+
+Tiers:
+    - Memory: OrderedDict LRU with TTL, per process
+    - Disk:   optional SQLite file shared by all gunicorn workers (WAL mode)
+
+Settings (environment):
+    SUMMARY_CACHE_ENABLED      1/0 (default 1)
+    SUMMARY_CACHE_PERSIST      1/0 (default 1) - use the SQLite tier
+    SUMMARY_CACHE_TTL_HOURS    default 24
+    SUMMARY_CACHE_MEMORY_SIZE  default 512 entries per process
+    SUMMARY_CACHE_MAX_ENTRIES  default 20000 rows on disk
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "database" / "summary_cache.db"
+
+
+class SummaryCache:
+    """
+    Two-tier (memory LRU + optional SQLite) cache of summarization results.
+
+    Values are the JSON-serialisable result dicts returned by
+    SemanticWASummarizer.summarize(). Safe to share between threads.
+
+    Attributes:
+        hits / misses: Lookup counters for this process
+        memory_hits / disk_hits: Which tier answered
+    """
+
+    def __init__(self, db_path: Path = None, ttl_hours: float = None, memory_size: int = None,
+                 max_entries: int = None, persist: bool = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = float(ttl_hours if ttl_hours is not None
+                                 else os.environ.get('SUMMARY_CACHE_TTL_HOURS', '24')) * 3600
+        self.memory_size = int(memory_size if memory_size is not None
+                               else os.environ.get('SUMMARY_CACHE_MEMORY_SIZE', '512'))
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', '20000'))
+        persist = os.environ.get('SUMMARY_CACHE_PERSIST', '1') != '0' if persist is None else persist
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, result)
+        self._puts_since_evict = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        self._conn = None
+        if persist:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+                self._init_db()
+            except sqlite3.Error as e:
+                logger.warning(f"[SUMMARY-CACHE] Disk tier disabled: {e}")
+                self._conn = None
+
+    def _init_db(self):
+        """Create cache table (WAL mode so workers don't block each other)"""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_cache_accessed ON summary_cache(last_accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(description: str, priority: str, workarounds: list, prompt_version: str = "") -> str:
+        """
+        Stable cache key for one summarization request.
+
+        Args:
+            description: SR description as sent to the LLM
+            priority: SR priority
+            workarounds: Ordered [(similar SR id, workaround text), ...]
+            prompt_version: Anything else that changes the output (model, template hash)
+        """
+        raw = json.dumps([prompt_version, description or "", priority or "",
+                          [[str(sr_id), text or ""] for sr_id, text in workarounds]],
+                         ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, created_at: float, result: Dict):
+        """Insert into the memory LRU, evicting the oldest entries (lock held)"""
+        self._memory[key] = (created_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a copy of the cached result, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                    del self._memory[key]
+                else:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return dict(entry[1])
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT result, created_at FROM summary_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and not (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                        self._conn.execute(
+                            "UPDATE summary_cache SET last_accessed = ? WHERE cache_key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        result = json.loads(row[0])
+                        self._remember(key, row[1], result)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return dict(result)
+                except (sqlite3.Error, ValueError) as e:
+                    logger.warning(f"[SUMMARY-CACHE] Read error: {e}")
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict):
+        """Store a result in memory and, if enabled, on disk"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, dict(result))
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summary_cache (cache_key, result, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), now, now)
+                )
+                self._conn.commit()
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= 100:
+                    self._evict()
+            except sqlite3.Error as e:
+                logger.warning(f"[SUMMARY-CACHE] Write error: {e}")
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows above max_entries (lock held)"""
+        self._puts_since_evict = 0
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM summary_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute("""
+                DELETE FROM summary_cache WHERE cache_key IN (
+                    SELECT cache_key FROM summary_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        self._conn.commit()
+
+    def clear(self):
+        """Remove all cached results (both tiers)"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM summary_cache")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"[SUMMARY-CACHE] Clear error: {e}")
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache sizes"""
+        with self._lock:
+            entries = None
+            if self._conn is not None:
+                try:
+                    entries = self._conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+                except sqlite3.Error:
+                    entries = -1
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'memory_entries': len(self._memory),
+                'memory_size': self.memory_size,
+                'disk_entries': entries,
+                'max_entries': self.max_entries,
+                'ttl_hours': self.ttl_seconds / 3600
+            }
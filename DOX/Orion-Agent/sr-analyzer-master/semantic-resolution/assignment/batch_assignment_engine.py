@@ -0,0 +1,294 @@
+"""
+Batch Assignment Engine - deterministic skill-based assignment for a whole day of SRs
+
+Replaces one LLM CALL 5 per SR in batch re-assignment. The roster
+(people_skills.db) is read once and the day's SRs are assigned in a single
+greedy pass with capacities, applying the same rules PROMPT_SKILL_BASED_ASSIGNMENT
+gives the LLM:
+
+    1. Application match is mandatory (no match -> UNASSIGNED)
+    2. Fair distribution - lowest current load first
+    3. Availability 0% -> skip; capacity = max_load x availability%
+    4. P1 needs skill >= 4.5, P2 >= 4.0; P3 prefers 3.0-4.0, P4 prefers 2.0-3.0
+    5. Specialization keywords found in the SR text
+    6. Tie-break deterministically by name
+
+Aging SRs are assigned first, then P1 -> P4, so they get first pick of the
+experts and of remaining capacity. P1s ignore the capacity limit.
+
+The LLM is only consulted (through a resolver callback) when several
+candidates are tied on load and skill fit and each matches the SR on a
+specialization - the one judgement the rules can't make.
+
+Usage:
+    from assignment.batch_assignment_engine import BatchAssignmentEngine, sr_sort_key
+
+    engine = BatchAssignmentEngine("data/database/people_skills.db")
+    decisions = engine.assign_batch(sorted(srs, key=sr_sort_key))
+"""
+
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / 'data' / 'database' / 'people_skills.db'
+
+PRIORITY_RANK = {'P1': 1, 'P2': 2, 'P3': 3, 'P4': 4}
+
+# Rule 4: hard minimum for P1/P2, preferred band for P3/P4
+MIN_SKILL = {'P1': 4.5, 'P2': 4.0}
+PREFERRED_SKILL = {'P3': (3.0, 4.0), 'P4': (2.0, 3.0)}
+
+AGING_CATEGORIES = ['ops eom', 'potential ops eom', 'sales eom', 'potential sales eom']
+
+UNKNOWN_APPLICATIONS = {'', 'UNKNOWN', 'NAN', 'NONE'}
+
+
+def is_aging_sr(sr: Dict) -> bool:
+    """Aging SR: flagged is_aging, EOM category, priority P2/P3, or older than 3 days"""
+    if sr.get('is_aging', False):
+        return True
+    priority = str(sr.get('priority', 'P3')).upper()
+    age_days = sr.get('age_days', 0) or 0
+    category = str(sr.get('categorization_tier3', '') or sr.get('category', '')).lower()
+    is_aging_category = any(cat in category for cat in AGING_CATEGORIES)
+    is_over_age = age_days > 3 if isinstance(age_days, (int, float)) else False
+    return is_aging_category or priority in ['P2', 'P3'] or is_over_age
+
+
+def sr_sort_key(sr: Dict) -> tuple:
+    """Assignment order: aging SRs first, then priority P1 -> P4"""
+    priority_rank = PRIORITY_RANK.get(str(sr.get('priority', 'P3')).upper(), 5)
+    return (0 if is_aging_sr(sr) else 1, priority_rank)
+
+
+def _parse_specializations(raw) -> List[str]:
+    """Specializations are stored as a JSON array, older rows as plain text"""
+    if not raw:
+        return []
+    try:
+        values = json.loads(raw)
+        if isinstance(values, str):
+            values = [values]
+    except (json.JSONDecodeError, TypeError):
+        values = str(raw).replace('/', ',').split(',')
+    return [str(v).strip().lower() for v in values if str(v).strip()]
+
+
+class BatchAssignmentEngine:
+    """
+    Greedy-with-capacities SR assignment over the people_skills.db roster.
+
+    Loads start from initial_loads and are updated as SRs are assigned, so
+    every decision sees the load produced by the ones before it.
+    """
+
+    def __init__(self, db_path: str = None, initial_loads: Optional[Dict[str, int]] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.members = self.load_roster()
+        self.loads = {name: 0 for name in self.members}
+        for name, count in (initial_loads or {}).items():
+            name = str(name).replace('_', ' ').strip()
+            if name in self.loads:
+                self.loads[name] += int(count)
+        self.llm_calls = 0
+
+    def load_roster(self) -> Dict[str, Dict]:
+        """
+        Read active members, their per-application skills and current availability.
+
+        Returns:
+            {name: {'availability': int, 'skills': {APPLICATION: {...}}}}
+        """
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"People skills database not found: {self.db_path}")
+
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            rows = conn.execute("""
+                SELECT
+                    tm.name,
+                    s.application,
+                    s.skill_level,
+                    s.max_load,
+                    s.specializations,
+                    COALESCE(ah.availability_percent, 100) as availability
+                FROM team_members tm
+                LEFT JOIN skills s ON tm.id = s.member_id
+                LEFT JOIN (
+                    SELECT member_id, availability_percent
+                    FROM availability_history
+                    WHERE (end_date IS NULL OR end_date >= datetime('now'))
+                    GROUP BY member_id
+                    HAVING id = MAX(id)
+                ) ah ON tm.id = ah.member_id
+                WHERE tm.status = 'active'
+                ORDER BY tm.name, s.application
+            """).fetchall()
+        finally:
+            conn.close()
+
+        members = {}
+        for name, application, skill_level, max_load, specializations, availability in rows:
+            member = members.setdefault(name, {
+                'availability': availability if availability is not None else 100,
+                'skills': {}
+            })
+            if application:
+                member['skills'][str(application).strip().upper()] = {
+                    'application': application,
+                    'skill_level': float(skill_level or 3.0),
+                    'max_load': int(max_load or 10),
+                    'specializations': _parse_specializations(specializations)
+                }
+        logger.info(f"[ASSIGN] Roster loaded: {len(members)} active members")
+        return members
+
+    # ========================================================================
+    # CANDIDATE SELECTION
+    # ========================================================================
+
+    def _candidates(self, application: str) -> List[Dict]:
+        """Rules 1 + 3: available members with the SR's application (none if it is unknown)"""
+        app_key = str(application or '').strip().upper()
+        if app_key in UNKNOWN_APPLICATIONS:
+            return []
+        candidates = []
+        for name, member in self.members.items():
+            availability = member['availability']
+            if availability <= 0:
+                continue
+            skill = member['skills'].get(app_key)
+            if skill is None:
+                continue
+            candidates.append({
+                'name': name,
+                'skill_level': skill['skill_level'],
+                'capacity': max(1, int(skill['max_load'] * availability / 100)),
+                'availability': availability,
+                'specializations': skill['specializations'],
+                'load': self.loads[name]
+            })
+        return candidates
+
+    @staticmethod
+    def _skill_fit(priority: str, skill_level: float) -> float:
+        """Rule 4 penalty: higher skill first for P1/P2, distance from preferred band for P3/P4"""
+        if priority in MIN_SKILL:
+            return -skill_level
+        low, high = PREFERRED_SKILL.get(priority, (3.0, 4.0))
+        if skill_level < low:
+            return low - skill_level
+        if skill_level > high:
+            return skill_level - high
+        return 0.0
+
+    def choose(self, sr: Dict) -> Dict:
+        """
+        Pick an assignee for one SR without committing it.
+
+        Returns:
+            {'assigned_to': name or None, 'reason': str, 'tied': [candidates]}
+            'tied' is non-empty only when the pick is ambiguous.
+        """
+        priority = str(sr.get('priority', 'P3')).upper()
+        application = sr.get('application', 'Unknown')
+        text = f"{sr.get('description', '')} {sr.get('notes', '')}".lower()
+
+        candidates = self._candidates(application)
+        if not candidates:
+            if str(application or '').strip().upper() in UNKNOWN_APPLICATIONS:
+                reason = "Application unknown - cannot match a team member"
+            else:
+                reason = f"No available team member has application '{application}'"
+            return {'assigned_to': None, 'tied': [], 'reason': reason}
+
+        notes = []
+        if priority != 'P1':
+            within = [c for c in candidates if c['load'] < c['capacity']]
+            if within:
+                candidates = within
+            else:
+                notes.append('all matching members at capacity')
+
+        minimum = MIN_SKILL.get(priority)
+        if minimum is not None:
+            qualified = [c for c in candidates if c['skill_level'] >= minimum]
+            if qualified:
+                candidates = qualified
+            else:
+                best = max(c['skill_level'] for c in candidates)
+                candidates = [c for c in candidates if c['skill_level'] == best]
+                notes.append(f"no one at skill>={minimum}, best available {best}")
+
+        for c in candidates:
+            c['fit'] = self._skill_fit(priority, c['skill_level'])
+            c['spec'] = sum(1 for s in c['specializations'] if s in text)
+
+        candidates.sort(key=lambda c: (c['load'], c['fit'], -c['spec'], c['name']))
+        top = candidates[0]
+        tied = [c for c in candidates
+                if (c['load'], c['fit'], c['spec']) == (top['load'], top['fit'], top['spec'])]
+
+        reason = (f"Application={application} match, skill_level={top['skill_level']}, "
+                  f"current_load={top['load']}/{top['capacity']}, {priority}")
+        if top['spec']:
+            reason += f", {top['spec']} specialization match(es)"
+        if notes:
+            reason += f" ({'; '.join(notes)})"
+
+        return {'assigned_to': top['name'], 'reason': reason,
+                'tied': tied if top['spec'] and len(tied) > 1 else []}
+
+    # ========================================================================
+    # BATCH
+    # ========================================================================
+
+    def assign_batch(self, srs: List[Dict],
+                     resolver: Callable[[Dict, List[Dict]], Optional[str]] = None,
+                     max_llm_calls: int = 25) -> List[Dict]:
+        """
+        Assign SRs in the given order (sort with sr_sort_key first).
+
+        Args:
+            srs: ChromaDB-style SR metadata (call_id, priority, application, description, ...)
+            resolver: Called as resolver(sr, tied) for genuinely ambiguous SRs, where tied
+                are the candidate dicts (name, skill_level, load, capacity, specializations);
+                returns one of their names or None to keep the rule-based pick
+            max_llm_calls: Upper bound on resolver calls per batch
+
+        Returns:
+            One decision per SR: {'sr_id', 'assigned_to' (None = unassigned), 'reason', 'method'}
+        """
+        decisions = []
+        for sr in srs:
+            choice = self.choose(sr)
+            assigned_to = choice['assigned_to']
+            method = 'rules' if assigned_to else 'unassigned'
+
+            if choice['tied'] and resolver is not None and self.llm_calls < max_llm_calls:
+                self.llm_calls += 1
+                try:
+                    picked = resolver(sr, choice['tied'])
+                except Exception as e:
+                    logger.warning(f"[ASSIGN] Resolver failed for {sr.get('call_id')}: {e}")
+                    picked = None
+                tied_names = [c['name'] for c in choice['tied']]
+                if picked in tied_names:
+                    assigned_to = picked
+                    method = 'llm'
+                    choice['reason'] = f"LLM pick among tied {tied_names}"
+
+            if assigned_to:
+                self.loads[assigned_to] += 1
+            decisions.append({
+                'sr_id': sr.get('call_id', 'Unknown'),
+                'assigned_to': assigned_to,
+                'reason': choice['reason'],
+                'method': method
+            })
+        return decisions
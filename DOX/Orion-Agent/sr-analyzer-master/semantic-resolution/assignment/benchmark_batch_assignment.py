@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark and rule check for BatchAssignmentEngine
+
+Builds a synthetic people_skills.db (or uses --db), assigns a day of synthetic
+SRs in one pass and verifies every decision against the LLM CALL 5 rules:
+
+    - assignee has the SR's application skill (unless the application is unknown)
+    - assignee availability > 0
+    - no one above capacity while a matching member still had room (P2-P4)
+    - P1 -> skill >= 4.5, P2 -> skill >= 4.0 whenever such a member passes the
+      rules above (the prompt applies rule 4 among candidates matching rules 1-3)
+
+Usage:
+    python assignment/benchmark_batch_assignment.py
+    python assignment/benchmark_batch_assignment.py --srs 300 --members 25
+    python assignment/benchmark_batch_assignment.py --db data/database/people_skills.db
+"""
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from assignment.batch_assignment_engine import BatchAssignmentEngine, sr_sort_key, MIN_SKILL, UNKNOWN_APPLICATIONS
+
+APPLICATIONS = ['SQO_MM', 'SOM_MM', 'BILLING', 'ORDER_MGMT']
+SPECIALIZATIONS = ['merge failure', 'billing errors', 'address validation', 'port in',
+                   'modem swap', 'tax rate', 'credit adjustment', 'order stuck']
+
+
+def build_synthetic_db(path: Path, num_members: int, rng: random.Random):
+    """Minimal people_skills.db schema (team_members, skills, availability_history)"""
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE team_members (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL,
+                                   status TEXT DEFAULT 'active');
+        CREATE TABLE skills (id INTEGER PRIMARY KEY AUTOINCREMENT, member_id INTEGER NOT NULL,
+                             application TEXT NOT NULL, skill_level REAL NOT NULL, specializations TEXT,
+                             max_load INTEGER NOT NULL DEFAULT 10, UNIQUE(member_id, application));
+        CREATE TABLE availability_history (id INTEGER PRIMARY KEY AUTOINCREMENT, member_id INTEGER NOT NULL,
+                                           availability_percent INTEGER NOT NULL, end_date DATETIME);
+    """)
+    for i in range(num_members):
+        member_id = conn.execute("INSERT INTO team_members (name) VALUES (?)", (f"Member {i:02d}",)).lastrowid
+        for app in rng.sample(APPLICATIONS, rng.randint(1, 2)):
+            conn.execute(
+                "INSERT INTO skills (member_id, application, skill_level, specializations, max_load) VALUES (?, ?, ?, ?, ?)",
+                (member_id, app, rng.choice([2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0]),
+                 json.dumps(rng.sample(SPECIALIZATIONS, 2)), rng.randint(8, 15))
+            )
+        if rng.random() < 0.2:
+            conn.execute("INSERT INTO availability_history (member_id, availability_percent) VALUES (?, ?)",
+                         (member_id, rng.choice([0, 50])))
+    conn.commit()
+    conn.close()
+
+
+def synthetic_srs(count: int, rng: random.Random) -> list:
+    return [{
+        'call_id': f"CAS{rng.randint(0, 9999999):07d}",
+        'priority': rng.choices(['P1', 'P2', 'P3', 'P4'], weights=[1, 3, 5, 2])[0],
+        'application': rng.choice(APPLICATIONS + ['Unknown', 'PAYROLL']),
+        'description': f"Customer reports {rng.choice(SPECIALIZATIONS)} after {rng.choice(SPECIALIZATIONS)}",
+        'age_days': rng.randint(0, 6)
+    } for _ in range(count)]
+
+
+def check_rules(engine: BatchAssignmentEngine, srs: list, decisions: list) -> list:
+    """Replay the decisions and report any that break a CALL 5 rule"""
+    violations = []
+    loads = {name: 0 for name in engine.members}
+    for sr, decision in zip(srs, decisions):
+        name = decision['assigned_to']
+        app = str(sr['application']).upper()
+        matching = {n: m for n, m in engine.members.items()
+                    if m['availability'] > 0 and app not in UNKNOWN_APPLICATIONS and app in m['skills']}
+        if name is None:
+            if matching:
+                violations.append(f"{sr['call_id']}: unassigned although {len(matching)} members match")
+            continue
+        member = engine.members[name]
+        if name not in matching:
+            violations.append(f"{sr['call_id']}: {name} has no {app} skill or is unavailable")
+        else:
+            pool = list(matching)
+            if sr['priority'] != 'P1':
+                capacity = lambda n: max(1, int(matching[n]['skills'][app]['max_load'] * matching[n]['availability'] / 100))
+                room = [n for n in matching if loads[n] < capacity(n)]
+                if room and loads[name] >= capacity(name):
+                    violations.append(f"{sr['call_id']}: {name} over capacity while {room[0]} had room")
+                pool = room or pool
+            minimum = MIN_SKILL.get(sr['priority'])
+            skill = member['skills'][app]['skill_level']
+            experts = [n for n in pool if matching[n]['skills'][app]['skill_level'] >= (minimum or 0)]
+            if minimum and experts and skill < minimum:
+                violations.append(f"{sr['call_id']}: {sr['priority']} to {name} (skill {skill})")
+        loads[name] += 1
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BatchAssignmentEngine timing and rule check")
+    parser.add_argument('--srs', type=int, default=300, help='SRs to assign')
+    parser.add_argument('--members', type=int, default=25, help='Members in the synthetic roster')
+    parser.add_argument('--db', default=None, help='Use an existing people_skills.db instead')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(args.db) if args.db else Path(tmp) / "people_skills.db"
+        if not args.db:
+            build_synthetic_db(db_path, args.members, rng)
+
+        srs = sorted(synthetic_srs(args.srs, rng), key=sr_sort_key)
+
+        start = time.perf_counter()
+        engine = BatchAssignmentEngine(db_path)
+        roster_ms = (time.perf_counter() - start) * 1000
+        ambiguous = []
+        start = time.perf_counter()
+        decisions = engine.assign_batch(srs, resolver=lambda sr, tied: ambiguous.append(sr) or None,
+                                        max_llm_calls=len(srs))
+        assign_ms = (time.perf_counter() - start) * 1000
+
+    assigned = [d for d in decisions if d['assigned_to']]
+    loads = sorted(engine.loads.items(), key=lambda x: -x[1])
+    print(f"\n{'='*60}")
+    print(f"Batch assignment: {len(srs)} SRs, {len(engine.members)} members")
+    print(f"{'='*60}")
+    print(f"Roster load:  {roster_ms:8.1f} ms")
+    print(f"Assignment:   {assign_ms:8.1f} ms  ({assign_ms / max(len(srs), 1):.3f} ms/SR)")
+    print(f"Assigned:     {len(assigned)} / {len(srs)}")
+    print(f"Ambiguous (would go to LLM): {len(ambiguous)}")
+    print(f"Load range:   {loads[-1][1]} - {loads[0][1]} SRs per member")
+
+    violations = check_rules(engine, srs, decisions)
+    if violations:
+        print(f"\n❌ {len(violations)} rule violations")
+        for v in violations[:10]:
+            print(f"  {v}")
+        return False
+    print("\n✅ All decisions follow the CALL 5 rules")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
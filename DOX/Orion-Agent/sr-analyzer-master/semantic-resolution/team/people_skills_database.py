@@ -10,8 +10,20 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
+import copy
+import os
+import threading
 from collections import defaultdict, Counter
 
+try:
+    from team.roster_cache import get_roster_cache, parse_specializations, sqlite_lower
+except ImportError:
+    from roster_cache import get_roster_cache, parse_specializations, sqlite_lower
+
+# Databases whose schema was already created/upgraded in this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
 class PeopleSkillsDatabase:
     """
     Database system for managing team skills with ML learning capabilities
@@ -20,11 +32,29 @@ class PeopleSkillsDatabase:
     def __init__(self, db_path: str = "people_skills.db"):
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
-        self._init_database()
+        # Shared per database: read snapshot + connection pool (see team/roster_cache.py)
+        self._roster = get_roster_cache(db_path)
+        
+        # Instances are created per request - create/upgrade the schema once per process
+        key = os.path.abspath(db_path)
+        if key not in _initialized_paths or not os.path.exists(key):
+            with _init_lock:
+                if key not in _initialized_paths or not os.path.exists(key):
+                    self._init_database()
+                    self._roster.invalidate('schema init')
+                    _initialized_paths.add(key)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Pooled WAL-mode connection; close() returns it and invalidates the roster if it wrote"""
+        return self._roster.pool.connect()
+    
+    def invalidate_roster_cache(self):
+        """Drop the cached roster (for writes made outside this class in the same process)"""
+        self._roster.invalidate('manual')
         
     def _init_database(self):
         """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Team members table
@@ -132,7 +162,7 @@ class PeopleSkillsDatabase:
     def _upgrade_schema_if_needed(self):
         """Upgrade database schema to add unique constraints and email column if needed"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if skills table has the unique constraint
@@ -206,7 +236,7 @@ class PeopleSkillsDatabase:
     def _cleanup_duplicate_skills(self):
         """Clean up duplicate (member_id, application) records, keeping the latest"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Find duplicates
@@ -252,7 +282,7 @@ class PeopleSkillsDatabase:
     def make_member_id_unique_only(self):
         """Alternative method: Make member_id unique (one skill record per member total)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             print("[WARNING] WARNING: This will keep only ONE skill record per member!")
@@ -297,6 +327,7 @@ class PeopleSkillsDatabase:
             conn.close()
             
             print(f"[OK] Member ID made unique. Kept {records_kept} records (one per member)")
+            self._roster.invalidate('schema change')  # DDL is not counted as a row change
             return True
             
         except Exception as e:
@@ -309,7 +340,7 @@ class PeopleSkillsDatabase:
     def _get_current_skills_schema(self) -> List[str]:
         """Get current column names from skills table"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute("PRAGMA table_info(skills)")
@@ -378,7 +409,7 @@ class PeopleSkillsDatabase:
         print(f"[DELETE] Removing {len(columns_to_remove)} column(s) from skills table...")
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get current schema
@@ -450,6 +481,7 @@ class PeopleSkillsDatabase:
             conn.close()
             
             print("[OK] Column removal completed successfully")
+            self._roster.invalidate('schema change')  # DDL is not counted as a row change
             return True
             
         except Exception as e:
@@ -467,7 +499,7 @@ class PeopleSkillsDatabase:
         print(f"[TOOL] Adding {len(new_columns)} new column(s) to skills table...")
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             for excel_col, db_col in new_columns:
@@ -503,6 +535,7 @@ class PeopleSkillsDatabase:
             conn.close()
             
             print("[OK] Schema update completed successfully")
+            self._roster.invalidate('schema change')  # DDL is not counted as a row change
             return True
             
         except Exception as e:
@@ -588,7 +621,7 @@ class PeopleSkillsDatabase:
                     print("[ERROR] Schema update failed, aborting data load")
                     return False
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # STEP 1: Handle deletions - find records in DB but not in Excel
@@ -766,72 +799,49 @@ class PeopleSkillsDatabase:
         """
         Get current team configuration with dynamic column support
         Automatically includes all columns from skills table
+        (served from the in-memory roster snapshot)
         """
-        conn = sqlite3.connect(self.db_path)
+        snapshot = self._roster.snapshot()
         
-        # Get all columns from skills table dynamically
-        skill_columns = self._get_current_skills_schema()
-        
-        # Build dynamic query excluding certain columns
+        # Dynamic skill columns, excluding certain columns
         excluded_columns = ['id', 'member_id']
-        skill_cols_to_select = [f"s.{col}" for col in skill_columns if col not in excluded_columns]
-        skill_cols_str = ', '.join(skill_cols_to_select)
-        
-        query = f'''
-        SELECT tm.name, tm.status, {skill_cols_str}
-        FROM team_members tm
-        JOIN skills s ON tm.id = s.member_id
-        WHERE tm.status = 'active'
-        ORDER BY tm.name, s.application
-        '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        base_columns = ['application', 'skill_level', 'specializations', 'max_load', 'confidence_score', 'last_updated']
+        extra_columns = [col for col in snapshot.skill_columns
+                         if col not in excluded_columns and col not in base_columns]
         
-        # Convert to structured format
+        # Convert to structured format (active members with skills, ordered by name, application)
         config = {}
-        for _, row in df.iterrows():
-            member_name = row['name']
-            if member_name not in config:
-                config[member_name] = {
-                    'status': row['status'],
-                    'applications': {}
+        for member in sorted(snapshot.active_members(), key=lambda m: m['name']):
+            for row in snapshot.skills_by_member.get(member['id'], []):
+                member_name = member['name']
+                if member_name not in config:
+                    config[member_name] = {
+                        'status': member['status'],
+                        'applications': {}
+                    }
+                
+                # Build skill data dynamically including all columns
+                skill_data = {
+                    'skill_level': row['skill_level'],
+                    'specializations': parse_specializations(row['specializations']),
+                    'max_load': row['max_load'],
+                    'confidence_score': row.get('confidence_score'),
+                    'last_updated': row.get('last_updated')
                 }
-            
-            app = row['application']
-            # Safely parse specializations - handle both JSON and plain text
-            if row['specializations']:
-                try:
-                    specializations = json.loads(row['specializations'])
-                except json.JSONDecodeError:
-                    # Handle plain text format
-                    specializations = [s.strip() for s in str(row['specializations']).replace(',', ' ').split() if s.strip()]
-            else:
-                specializations = []
-            
-            # Build skill data dynamically including all columns
-            skill_data = {
-                'skill_level': row['skill_level'],
-                'specializations': specializations,
-                'max_load': row['max_load'],
-                'confidence_score': row['confidence_score'],
-                'last_updated': row['last_updated']
-            }
-            
-            # Add any additional dynamic columns
-            for col in skill_columns:
-                if col not in excluded_columns and col not in ['application', 'skill_level', 'specializations', 'max_load', 'confidence_score', 'last_updated']:
-                    if col in row.index and pd.notna(row[col]):
+                
+                # Add any additional dynamic columns
+                for col in extra_columns:
+                    if row.get(col) is not None:
                         skill_data[col] = row[col]
-            
-            config[member_name]['applications'][app] = skill_data
+                
+                config[member_name]['applications'][row['application']] = skill_data
         
-        return config
+        return copy.deepcopy(config)
     
     def record_assignment(self, member_name: str, assignment_data: Dict[str, Any]) -> bool:
         """Record assignment for ML learning"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get member ID
@@ -874,7 +884,7 @@ class PeopleSkillsDatabase:
                                     changed_by: str = "CHATBOT") -> bool:
         """Update member configuration via chatbot commands"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get member ID
@@ -1193,7 +1203,7 @@ class PeopleSkillsDatabase:
     
     def get_skill_evolution_report(self, member_name: str = None, days: int = 30) -> Dict[str, Any]:
         """Get skill evolution report for analysis"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         
         where_clause = ""
         params = [datetime.now() - timedelta(days=days)]
@@ -1282,21 +1292,15 @@ class PeopleSkillsDatabase:
             List of member IDs sorted by skill level (highest first)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            snapshot = self._roster.snapshot()
             
-            query = """
-            SELECT s.member_id, tm.name, s.skill_level 
-            FROM skills s
-            JOIN team_members tm ON s.member_id = tm.id
-            WHERE s.application = ? AND s.skill_level >= 4.0 AND tm.status = 'active'
-            ORDER BY s.skill_level DESC, s.confidence_score DESC
-            LIMIT ?
-            """
-            
-            cursor = conn.cursor()
-            cursor.execute(query, (application, top_n))
-            results = cursor.fetchall()
-            conn.close()
+            experts = [
+                (member_id, snapshot.by_id[member_id]['name'], skill['skill_level'], skill.get('confidence_score') or 0)
+                for member_id, skill in snapshot.skills_by_application.get(application, [])
+                if skill['skill_level'] >= 4.0 and snapshot.is_active(snapshot.by_id.get(member_id))
+            ]
+            experts.sort(key=lambda e: (-e[2], -e[3]))
+            results = experts[:top_n]
             
             if results:
                 expert_ids = [row[0] for row in results]
@@ -1322,22 +1326,7 @@ class PeopleSkillsDatabase:
             List of team member names
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            query = """
-            SELECT name 
-            FROM team_members 
-            WHERE status = 'active'
-            ORDER BY name
-            """
-            
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            conn.close()
-            
-            return [row[0] for row in results]
-            
+            return sorted(m['name'] for m in self._roster.snapshot().active_members())
         except Exception as e:
             self.logger.error(f"Error getting member names: {str(e)}")
             return []
@@ -1355,7 +1344,7 @@ class PeopleSkillsDatabase:
             True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if member already exists
@@ -1406,7 +1395,7 @@ class PeopleSkillsDatabase:
             True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if member already exists
@@ -1461,7 +1450,7 @@ class PeopleSkillsDatabase:
             True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get member ID first
@@ -1499,49 +1488,23 @@ class PeopleSkillsDatabase:
             List of dicts with member info including availability and email
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get all active team members including email
-            cursor.execute('''
-                SELECT DISTINCT tm.name, tm.status, tm.email
-                FROM team_members tm
-                WHERE tm.status = 'active'
-            ''')
+            snapshot = self._roster.snapshot()
             
             members = []
-            for row in cursor.fetchall():
-                name = row[0]
+            for member in snapshot.active_members():
+                name = member['name']
                 
-                # Get current availability (from latest availability record or default to 100%)
-                try:
-                    cursor.execute('''
-                        SELECT availability_percent 
-                        FROM availability_history 
-                        WHERE member_id = (SELECT id FROM team_members WHERE name = ?)
-                        ORDER BY updated_at DESC
-                        LIMIT 1
-                    ''', (name,))
-                    
-                    avail_result = cursor.fetchone()
-                    availability = avail_result[0] if avail_result else 100
-                except sqlite3.OperationalError:
-                    # Table doesn't exist yet - default to 100% availability
-                    availability = 100
+                # Current availability (latest availability record or default to 100%)
+                latest = snapshot.latest_availability(member['id'])
+                availability = latest['availability_percent'] if latest else 100
                 
-                # Get ALL applications this person has expertise in (including max_load)
-                cursor.execute('''
-                    SELECT skill_level, application, max_load
-                    FROM skills
-                    WHERE member_id = (SELECT id FROM team_members WHERE name = ?)
-                    ORDER BY skill_level DESC
-                ''', (name,))
-                
-                skills_results = cursor.fetchall()
+                # ALL applications this person has expertise in (highest skill first)
+                skills_results = sorted(snapshot.skills_by_member.get(member['id'], []),
+                                        key=lambda s: (-s['skill_level'], s['id']))
                 
                 if skills_results:
                     # Get highest skill level
-                    highest_skill = max([s[0] for s in skills_results])
+                    highest_skill = skills_results[0]['skill_level']
                     if highest_skill >= 4.5:
                         skill_level = 'Expert'
                     elif highest_skill >= 3.5:
@@ -1552,11 +1515,11 @@ class PeopleSkillsDatabase:
                         skill_level = 'Fresher'
                     
                     # Get all applications (comma-separated for primary, but also keep list)
-                    applications = [s[1] for s in skills_results]
-                    primary_app = applications[0] if applications else 'SOM_MM'
+                    applications = [s['application'] for s in skills_results]
+                    primary_app = applications[0]
                     
                     # Get max_load from all skills (use highest)
-                    max_load = max([s[2] if s[2] else 10 for s in skills_results])
+                    max_load = max([s['max_load'] if s['max_load'] else 10 for s in skills_results])
                 else:
                     skill_level = 'Intermediate'
                     applications = ['SOM_MM']
@@ -1565,8 +1528,8 @@ class PeopleSkillsDatabase:
                 
                 members.append({
                     'name': name,
-                    'status': row[1],
-                    'email': row[2] if len(row) > 2 else 'test@amdocs.com',  # Include email
+                    'status': member['status'],
+                    'email': member.get('email', 'test@amdocs.com'),  # Include email
                     'current_availability': availability,
                     'skill_level': skill_level,
                     'max_load': max_load,  # Include max_load from skills table
@@ -1574,7 +1537,6 @@ class PeopleSkillsDatabase:
                     'applications': applications  # List of ALL apps this person can handle
                 })
             
-            conn.close()
             return members
             
         except Exception as e:
@@ -1592,21 +1554,8 @@ class PeopleSkillsDatabase:
             Member ID or None if not found
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            query = """
-            SELECT id 
-            FROM team_members 
-            WHERE LOWER(name) = LOWER(?) AND status = 'active'
-            """
-            
-            cursor = conn.cursor()
-            cursor.execute(query, (member_name,))
-            result = cursor.fetchone()
-            conn.close()
-            
-            return result[0] if result else None
-            
+            member = self._roster.snapshot().by_lower_name.get(sqlite_lower(member_name))
+            return member['id'] if member else None
         except Exception as e:
             self.logger.error(f"Error getting member ID: {str(e)}")
             return None
@@ -1622,25 +1571,14 @@ class PeopleSkillsDatabase:
             Dict with member info or None if not found
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name, employee_id, email, status
-                FROM team_members
-                WHERE LOWER(email) = LOWER(?) AND status = 'active'
-            ''', (email,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
+            member = self._roster.snapshot().by_email.get(sqlite_lower(email))
+            if member:
                 return {
-                    'id': result[0],
-                    'name': result[1],
-                    'employee_id': result[2],
-                    'email': result[3],
-                    'status': result[4]
+                    'id': member['id'],
+                    'name': member['name'],
+                    'employee_id': member.get('employee_id'),
+                    'email': member['email'],
+                    'status': member['status']
                 }
             return None
             
@@ -1665,7 +1603,7 @@ class PeopleSkillsDatabase:
                 self.logger.error(f"Invalid email format: {new_email}. Must end with @amdocs.com")
                 return False
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if member exists
@@ -1714,16 +1652,9 @@ class PeopleSkillsDatabase:
             Email address or None if not found
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT email FROM team_members WHERE name = ? AND status = ?', 
-                          (member_name, 'active'))
-            result = cursor.fetchone()
-            conn.close()
-            
-            return result[0] if result else None
-            
+            snapshot = self._roster.snapshot()
+            member = snapshot.by_name.get(member_name)
+            return member.get('email') if snapshot.is_active(member) else None
         except Exception as e:
             self.logger.error(f"Error getting member email: {str(e)}")
             return None
@@ -1746,7 +1677,7 @@ class PeopleSkillsDatabase:
             True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get member ID
@@ -1783,32 +1714,19 @@ class PeopleSkillsDatabase:
             Dict with availability info or default 100% if not set
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             member_id = self.get_member_id_by_name(member_name)
             if not member_id:
                 return {'availability_percent': 100, 'availability_type': 'full_day', 'reason': ''}
             
-            # Get latest availability record that is still active
-            cursor.execute('''
-                SELECT availability_percent, availability_type, reason, start_date, end_date
-                FROM availability_history
-                WHERE member_id = ? AND (end_date IS NULL OR end_date >= datetime('now'))
-                ORDER BY updated_at DESC
-                LIMIT 1
-            ''', (member_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
+            # Latest availability record that is still active
+            result = self._roster.snapshot().current_availability(member_id)
             if result:
                 return {
-                    'availability_percent': result[0],
-                    'availability_type': result[1],
-                    'reason': result[2] or '',
-                    'start_date': result[3],
-                    'end_date': result[4]
+                    'availability_percent': result['availability_percent'],
+                    'availability_type': result['availability_type'],
+                    'reason': result['reason'] or '',
+                    'start_date': result['start_date'],
+                    'end_date': result['end_date']
                 }
             else:
                 return {'availability_percent': 100, 'availability_type': 'full_day', 'reason': ''}
@@ -1825,46 +1743,25 @@ class PeopleSkillsDatabase:
             List of dicts with member name and availability info
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get all active members with their latest availability
-            cursor.execute('''
-                SELECT tm.name, tm.id
-                FROM team_members tm
-                WHERE tm.status = 'active'
-                ORDER BY tm.name
-            ''')
+            snapshot = self._roster.snapshot()
             
             members = []
-            for row in cursor.fetchall():
-                name = row[0]
-                member_id = row[1]
-                
-                # Get latest availability
-                cursor.execute('''
-                    SELECT availability_percent, availability_type, reason, start_date, end_date
-                    FROM availability_history
-                    WHERE member_id = ? AND (end_date IS NULL OR end_date >= datetime('now'))
-                    ORDER BY updated_at DESC
-                    LIMIT 1
-                ''', (member_id,))
-                
-                avail_result = cursor.fetchone()
+            for member in sorted(snapshot.active_members(), key=lambda m: m['name']):
+                avail_result = snapshot.current_availability(member['id'])
                 
                 if avail_result:
                     members.append({
-                        'name': name,
-                        'availability_percent': avail_result[0],
-                        'availability_type': avail_result[1],
-                        'reason': avail_result[2] or '',
-                        'start_date': avail_result[3],
-                        'end_date': avail_result[4]
+                        'name': member['name'],
+                        'availability_percent': avail_result['availability_percent'],
+                        'availability_type': avail_result['availability_type'],
+                        'reason': avail_result['reason'] or '',
+                        'start_date': avail_result['start_date'],
+                        'end_date': avail_result['end_date']
                     })
                 else:
                     # Default to 100% if not set
                     members.append({
-                        'name': name,
+                        'name': member['name'],
                         'availability_percent': 100,
                         'availability_type': 'full_day',
                         'reason': '',
@@ -1872,7 +1769,6 @@ class PeopleSkillsDatabase:
                         'end_date': None
                     })
             
-            conn.close()
             return members
             
         except Exception as e:
@@ -0,0 +1,325 @@
+"""
+Roster Cache - in-memory snapshot of people_skills.db plus a SQLite connection pool
+
+PeopleSkillsDatabase is instantiated per request and its read methods used to
+open a connection, run a query (often pandas + iterrows) and close again on
+every portal request and every LLM 5 prompt build. The team is small and
+changes rarely, so reads are served from one immutable snapshot per database:
+
+    RosterSnapshot     members indexed by id / name / lower-case name / email,
+                       skills by application, availability records per member
+    RosterCache        builds the snapshot lazily, versions it, invalidates it
+                       and notifies subscribers
+    ConnectionPool     reusable WAL-mode connections; a connection that wrote
+                       anything invalidates the roster when it is returned
+
+Writes from other processes (admin scripts, a second worker) are picked up
+through SQLite's PRAGMA data_version, checked at most once per second.
+
+Usage:
+    from team.roster_cache import get_roster_cache
+
+    cache = get_roster_cache("data/database/people_skills.db")
+    snapshot = cache.snapshot()
+    member = snapshot.by_email.get("jane@amdocs.com")
+    cache.subscribe(lambda version: print(f"roster changed -> v{version}"))
+"""
+
+import os
+import json
+import time
+import queue
+import string
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often a snapshot read checks PRAGMA data_version for other writers
+VERSION_CHECK_INTERVAL = 1.0
+
+# Idle connections kept per database
+POOL_SIZE = 4
+
+# SQLite LOWER() only folds ASCII - match it exactly
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+_caches: Dict[str, 'RosterCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def sqlite_lower(value: Any) -> str:
+    return str(value or '').translate(_ASCII_LOWER)
+
+
+def parse_specializations(raw) -> List[str]:
+    """JSON array, or plain text split on commas/whitespace (same as get_team_configuration)"""
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return [s.strip() for s in str(raw).replace(',', ' ').split() if s.strip()]
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() hands it back to its pool"""
+
+    def close(self):
+        pool = getattr(self, '_pool', None)
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Small LIFO pool of WAL-mode connections to one database.
+
+    Callers keep the usual connect / commit / close pattern. On release an
+    open transaction is rolled back (as a real close would) and, if the
+    connection changed any rows, on_write is called.
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE, on_write: Callable[[], None] = None):
+        self.db_path = db_path
+        self.size = size
+        self.on_write = on_write
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue()
+        self._wal_checked = False
+
+    def connect(self) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                   factory=PooledConnection)
+            if not self._wal_checked:
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    self._wal_checked = True
+                except sqlite3.Error as e:
+                    logger.warning(f"[ROSTER] Could not enable WAL on {self.db_path}: {e}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn._pool = self
+        conn._changes_at_checkout = conn.total_changes
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if getattr(conn, '_pool', None) is not self:
+            return  # Already released
+        conn._pool = None
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            wrote = conn.total_changes != conn._changes_at_checkout
+        except sqlite3.Error:
+            conn.close_for_real()
+            return
+        if wrote and self.on_write is not None:
+            self.on_write()
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close_for_real()
+
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+class RosterSnapshot:
+    """
+    Immutable view of team_members, skills and current availability records.
+
+    Attributes:
+        version: RosterCache version this snapshot was built for
+        members: member dicts (id, name, employee_id, email, status) in id order
+        by_id / by_name: O(1) lookups over all members
+        by_lower_name / by_email: O(1) lookups over active members (keys lower-cased like SQLite LOWER)
+        skills_by_member: {member_id: [skill rows]}
+        skills_by_application: {application: [(member_id, skill row)]}
+        skill_columns: skills table columns, in table order
+    """
+
+    def __init__(self, conn: sqlite3.Connection, version: int):
+        self.version = version
+        self.built_at = time.time()
+        conn.row_factory = sqlite3.Row
+
+        self.members = [dict(row) for row in conn.execute("SELECT * FROM team_members ORDER BY id")]
+        self.by_id = {m['id']: m for m in self.members}
+        self.by_name = {m['name']: m for m in self.members}
+        self.by_lower_name: Dict[str, Dict] = {}
+        self.by_email: Dict[str, Dict] = {}
+        for member in self.members:
+            if member.get('status') != 'active':
+                continue
+            self.by_lower_name.setdefault(sqlite_lower(member['name']), member)
+            if member.get('email'):
+                self.by_email.setdefault(sqlite_lower(member['email']), member)
+
+        cursor = conn.execute("SELECT * FROM skills ORDER BY member_id, application")
+        self.skill_columns = [d[0] for d in cursor.description]
+        self.skills_by_member: Dict[int, List[Dict]] = {}
+        self.skills_by_application: Dict[str, List[tuple]] = {}
+        for row in cursor:
+            skill = dict(row)
+            self.skills_by_member.setdefault(skill['member_id'], []).append(skill)
+            self.skills_by_application.setdefault(skill['application'], []).append((skill['member_id'], skill))
+
+        # Newest first; older records behind an open-ended one can never be current
+        self.availability_table = True
+        self.availability: Dict[int, List[Dict]] = {}
+        try:
+            rows = conn.execute("""
+                SELECT member_id, availability_percent, availability_type, reason, start_date, end_date
+                FROM availability_history
+                ORDER BY updated_at DESC, id DESC
+            """)
+            closed = set()
+            for row in rows:
+                member_id = row['member_id']
+                if member_id in closed:
+                    continue
+                record = dict(row)
+                self.availability.setdefault(member_id, []).append(record)
+                if record['end_date'] is None:
+                    closed.add(member_id)
+        except sqlite3.OperationalError:
+            self.availability_table = False
+
+    def is_active(self, member: Optional[Dict]) -> bool:
+        return member is not None and member.get('status') == 'active'
+
+    def active_members(self) -> List[Dict]:
+        return [m for m in self.members if m.get('status') == 'active']
+
+    def latest_availability(self, member_id: int) -> Optional[Dict]:
+        """Most recent availability record regardless of end_date"""
+        records = self.availability.get(member_id)
+        return records[0] if records else None
+
+    def current_availability(self, member_id: int) -> Optional[Dict]:
+        """Most recent record with no end_date or end_date >= now (SQLite datetime('now'), UTC)"""
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        for record in self.availability.get(member_id, []):
+            end_date = record['end_date']
+            if end_date is None or str(end_date) >= now:
+                return record
+        return None
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class RosterCache:
+    """
+    Versioned roster snapshot for one people_skills.db.
+
+    The snapshot is rebuilt lazily on the first read after an invalidation.
+    Subscribers are called with the new version on every invalidation.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, on_write=lambda: self.invalidate('local write'))
+        self.version = 0
+        self.hits = 0
+        self.rebuilds = 0
+        self._snapshot: Optional[RosterSnapshot] = None
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[int], None]] = []
+        self._watch_conn = None
+        self._data_version = None
+        self._last_check = 0.0
+
+    def _external_change(self) -> bool:
+        """True if another connection committed since the last check (throttled)"""
+        now = time.monotonic()
+        if now - self._last_check < VERSION_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        try:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            data_version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"[ROSTER] data_version check failed: {e}")
+            return True
+        changed = self._data_version is not None and data_version != self._data_version
+        self._data_version = data_version
+        return changed
+
+    def snapshot(self) -> RosterSnapshot:
+        with self._lock:
+            if self._external_change():
+                self.invalidate('external write')
+            if self._snapshot is not None:
+                self.hits += 1
+                return self._snapshot
+
+            conn = self.pool.connect()
+            try:
+                snapshot = RosterSnapshot(conn, self.version)
+            finally:
+                conn.close()
+            self._snapshot = snapshot
+            self.rebuilds += 1
+            logger.debug(f"[ROSTER] Snapshot v{self.version}: {len(snapshot.members)} members")
+            return snapshot
+
+    def invalidate(self, reason: str = ''):
+        with self._lock:
+            self._snapshot = None
+            self.version += 1
+            version = self.version
+            subscribers = list(self._subscribers)
+        logger.debug(f"[ROSTER] Invalidated -> v{version} ({reason})")
+        for callback in subscribers:
+            try:
+                callback(version)
+            except Exception as e:
+                logger.warning(f"[ROSTER] Subscriber failed: {e}")
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """Call callback(version) whenever the roster changes"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'version': self.version,
+                'hits': self.hits,
+                'rebuilds': self.rebuilds,
+                'members': len(self._snapshot.members) if self._snapshot else None,
+                'idle_connections': self.pool._idle.qsize()
+            }
+
+
+def get_roster_cache(db_path: str) -> RosterCache:
+    """Process-wide RosterCache for a database path"""
+    key = os.path.abspath(db_path)
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = RosterCache(key)
+                _caches[key] = cache
+    return cache
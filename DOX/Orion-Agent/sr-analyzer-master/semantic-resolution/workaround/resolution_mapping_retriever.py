@@ -41,13 +41,24 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     logger.warning("sentence-transformers not available")
 
-# FAISS removed - using ChromaDB as primary storage with numpy-based fallback
+# ANN index for the pickle fallback (HNSW / IVF-PQ / exact, see RAG/utils/ann_index.py)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    from RAG.utils.ann_index import exact_search, build_index, load_index, normalize_rows, MIN_ROWS
+    ANN_INDEX_AVAILABLE = True
+except ImportError:
+    ANN_INDEX_AVAILABLE = False
+    logger.warning("RAG.utils.ann_index not available, using full-matrix fallback search")
 
 
 class ResolutionMappingRetriever:
     """
     Loads and queries the resolution mapping vectorstore for RAG applications.
     Now uses ChromaDB as primary storage with pickle fallback.
+    
+    The pickle fallback normalizes the embeddings once at load and, if
+    resolution_mapping.ann/ exists next to the pickle (build_ann_index()),
+    searches through it instead of scoring every row.
     """
     
     def __init__(self, vectorstore_dir: str = "data/vectorstore"):
@@ -138,6 +149,13 @@ class ResolutionMappingRetriever:
                 raise ImportError("sentence-transformers required for retrieval")
             
             self.index = None
+            if ANN_INDEX_AVAILABLE:
+                self.embeddings = normalize_rows(self.embeddings)
+                if len(self.embeddings) >= MIN_ROWS:
+                    self.index = load_index(self._ann_path())
+                    if self.index is not None and self.index.count != len(self.embeddings):
+                        logger.warning("resolution_mapping.ann is stale, using exact search")
+                        self.index = None
                 
         except Exception as e:
             logger.error(f"Error loading vectorstore: {e}")
@@ -190,22 +208,23 @@ class ResolutionMappingRetriever:
         # Create query embedding
         query_embedding = self.model.encode([query], convert_to_numpy=True)
         
-        # Use numpy for search
-        embeddings_normalized = self.embeddings / np.linalg.norm(
-            self.embeddings, axis=1, keepdims=True
-        )
-        query_normalized = query_embedding / np.linalg.norm(query_embedding)
-        
-        # Compute similarities
-        similarities = np.dot(embeddings_normalized, query_normalized.T).flatten()
-        
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        if self.index is not None:
+            ids, scores = self.index.search(query_embedding, top_k, vectors=self.embeddings)
+        elif ANN_INDEX_AVAILABLE:
+            ids, scores = exact_search(self.embeddings, query_embedding, top_k)
+        else:
+            embeddings_normalized = self.embeddings / np.linalg.norm(
+                self.embeddings, axis=1, keepdims=True
+            )
+            query_normalized = query_embedding / np.linalg.norm(query_embedding)
+            similarities = np.dot(embeddings_normalized, query_normalized.T).flatten()
+            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            ids, scores = [top_indices], [similarities[top_indices]]
         
         results = []
-        for idx in top_indices:
-            similarity = float(similarities[idx])
-            if similarity >= similarity_threshold:
+        for idx, similarity in zip(ids[0], scores[0]):
+            similarity = float(similarity)
+            if idx >= 0 and similarity >= similarity_threshold:
                 results.append({
                     'index': int(idx),
                     'similarity': similarity,
@@ -214,6 +233,26 @@ class ResolutionMappingRetriever:
         
         return results
     
+    def _ann_path(self) -> Path:
+        return self.vectorstore_dir / "resolution_mapping.ann"
+    
+    def build_ann_index(self, backend: str = None, **params):
+        """
+        Build and save the ANN index used by the pickle fallback
+        
+        Args:
+            backend: hnsw | ivfpq | auto (see RAG/utils/ann_index.py)
+            **params: Backend parameters (m, ef_search, nlist, nprobe ...)
+        """
+        if self.embeddings is None:
+            raise RuntimeError("Pickle vectorstore not loaded (ANN index only serves the fallback)")
+        self.index = build_index(self.embeddings, backend, **params)
+        if self.index.backend == 'exact':
+            self.index = None
+            return None
+        self.index.save(self._ann_path())
+        return self.index
+    
     def search_with_context(self, query: str, top_k: int = 3) -> str:
         """
         Search and return results formatted as context for RAG